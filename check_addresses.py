@@ -2,7 +2,7 @@
 查询两个地址的余额和交易记录
 """
 
-import requests
+from patches import http_transport
 import json
 from datetime import datetime
 
@@ -39,7 +39,7 @@ def get_balance(address):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_transport.get(url, params=params, timeout=10)
         data = response.json()
 
         if data.get("status") == "1":
@@ -58,7 +58,7 @@ def get_balance(address):
     # Native USDC
     params["contractaddress"] = USDC_NATIVE
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_transport.get(url, params=params, timeout=10)
         data = response.json()
 
         if data.get("status") == "1":
@@ -83,7 +83,7 @@ def get_balance(address):
         "apikey": POLYGONSCAN_API_KEY
     }
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_transport.get(url, params=params, timeout=10)
         data = response.json()
 
         if data.get("status") == "1":
@@ -119,7 +119,7 @@ def get_recent_transactions(address):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_transport.get(url, params=params, timeout=10)
         data = response.json()
 
         if data.get("status") == "1" and data.get("result"):
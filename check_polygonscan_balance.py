@@ -1,7 +1,7 @@
 """
 使用 PolygonScan API 直接查询 Proxy 地址余额
 """
-import requests
+from patches import http_transport
 
 # Proxy 地址
 PROXY_ADDRESS = "0x18DdcbD977e5b7Ff751A3BAd6F274b67A311CD2d"
@@ -25,7 +25,7 @@ def get_balance(address, token_contract):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_transport.get(url, params=params, timeout=10)
         data = response.json()
 
         if data.get("status") == "1":
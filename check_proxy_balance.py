@@ -61,7 +61,7 @@ def main():
         print("\n=== 尝试直接查询 Proxy 地址余额 ===")
         try:
             # Polymarket Gamma API
-            import requests
+            from patches import http_transport
 
             headers = {
                 'x-polymarket-access-key': api_creds.api_key,
@@ -71,7 +71,7 @@ def main():
 
             # 查询账户余额
             url = "https://gamma-api.polymarket.com/wallets/balances"
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_transport.get(url, headers=headers, timeout=10)
 
             print(f"\nGamma API 响应:")
             print(f"Status: {response.status_code}")
@@ -0,0 +1,46 @@
+"""
+限流配置 - 端点类别、默认速率与环境变量解析
+
+客户端限流器（patches/rate_limiter.py）与 RiskEngine 配置（config/risk_config.py）
+共用这里的数值。本模块只做配置解析，导入时不安装任何补丁。
+
+配置（环境变量，格式 "每秒速率/突发容量"）：
+  - RATE_LIMIT_ORDER_POST / RATE_LIMIT_CANCEL / RATE_LIMIT_BALANCE
+  - RATE_LIMIT_MARKET_DATA / RATE_LIMIT_GLOBAL
+"""
+
+import os
+
+
+ORDER_POST = "order_post"
+CANCEL = "cancel"
+BALANCE = "balance"
+MARKET_DATA = "market_data"
+GLOBAL = "global"
+
+# (每秒速率, 突发容量)
+DEFAULT_LIMITS = {
+    ORDER_POST: (10.0, 20.0),
+    CANCEL: (20.0, 40.0),
+    BALANCE: (2.0, 5.0),
+    MARKET_DATA: (10.0, 20.0),
+    GLOBAL: (25.0, 50.0),
+}
+
+
+def load_limits_from_env(defaults=None):
+    """从环境变量读取限流配置（RATE_LIMIT_<CLASS>="rate/burst"）"""
+    limits = dict(defaults or DEFAULT_LIMITS)
+    for name in limits:
+        value = os.getenv(f"RATE_LIMIT_{name.upper()}")
+        if not value:
+            continue
+        rate, _, burst = value.partition('/')
+        limits[name] = (float(rate), float(burst or rate))
+    return limits
+
+
+def order_submit_rate_limit() -> str:
+    """RiskEngine 的 max_order_submit_rate（与 order_post 桶速率一致）"""
+    rate, burst = load_limits_from_env()[ORDER_POST]
+    return f"{int(burst)}/00:00:{max(int(round(burst / rate)), 1):02d}"
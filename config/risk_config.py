@@ -7,43 +7,59 @@
 3. 配置合理的限制参数
 """
 
-from nautilus_trader.config import RiskEngineConfig
+import os
+
+from nautilus_trader.config import LiveRiskEngineConfig
 from nautilus_trader.model.identifiers import InstrumentId
 from decimal import Decimal
 
+from config.rate_limits import order_submit_rate_limit
+
 
-def get_polymarket_risk_config(instrument_id: InstrumentId):
+def get_polymarket_risk_config(
+    instrument_ids,
+    max_notional_per_order: Decimal = Decimal("100.00"),
+    debug: bool = None,
+):
     """
     获取 Polymarket 风险配置
 
     充分利用 RiskEngine 的能力：
     - 订单限流（防止过度交易）
-    - 最大名义价值（资金管理）
+    - 最大名义价值（资金管理，按 instrument 分别设置）
     - 价格和数量验证（防止无效订单）
 
     Args:
-        instrument_id: InstrumentId 对象
+        instrument_ids: InstrumentId（或字符串），也可以是多个 instrument 的列表
+        max_notional_per_order: 每个 instrument 的单订单最大名义价值（USDC）
+        debug: RiskEngine 调试日志（默认关闭，RISK_ENGINE_DEBUG=1 开启；每次检查都会记录日志）
 
     Returns:
-        RiskEngineConfig
+        LiveRiskEngineConfig（TradingNode 在 live 环境只接受 Live 版本）
     """
-    return RiskEngineConfig(
+    if isinstance(instrument_ids, (str, InstrumentId)):
+        instrument_ids = [instrument_ids]
+    if debug is None:
+        debug = os.getenv('RISK_ENGINE_DEBUG', '0') == '1'
+
+    return LiveRiskEngineConfig(
         # ========== 订单限流 ==========
-        # Polymarket 低流动性，限制订单速率
-        max_order_submit_rate=10,   # 每秒最多10个订单
-        max_order_modify_rate=20,   # 每秒最多20个修改
+        # 与客户端限流器的下单令牌桶一致（config/rate_limits.py，RATE_LIMIT_ORDER_POST 可配置）
+        max_order_submit_rate=order_submit_rate_limit(),
+        max_order_modify_rate="20/00:00:01",   # 每秒最多20个修改
 
         # ========== 最大名义价值 ==========
-        # 单订单最大金额（资金管理）
+        # 单订单最大金额（资金管理），配置要求字符串形式的 instrument_id 和数值
         max_notional_per_order={
-            instrument_id: Decimal("100.00")  # 单订单最多100 USDC
+            str(instrument_id): str(max_notional_per_order)
+            for instrument_id in instrument_ids
         },
 
         # ========== 风险检查开关 ==========
-        bypass_check=False,  # 启用所有风险检查
+        bypass=False,  # 启用所有风险检查
 
         # ========== 调试模式 ==========
-        debug=True,  # 记录详细的检查日志
+        debug=debug,  # 生产环境关闭（每次检查都记录日志）
     )
 
 
@@ -63,11 +79,15 @@ class StrategyRiskConfig:
         min_free_balance: Decimal = Decimal("10.00"),  # 最小保留余额
         max_position_size: Decimal = Decimal("100"),   # 单笔最大仓位
         max_daily_pnl_loss: Decimal = Decimal("-50.00"),  # 日最大亏损
+        max_gross_exposure: Decimal = None,  # 当日总敞口上限（所有轮次/实例，None 不限制）
+        max_daily_orders: int = None,        # 当日订单数上限（None 不限制）
     ):
         self.max_positions = max_positions
         self.min_free_balance = min_free_balance
         self.max_position_size = max_position_size
         self.max_daily_pnl_loss = max_daily_pnl_loss
+        self.max_gross_exposure = max_gross_exposure
+        self.max_daily_orders = max_daily_orders
 
     def __repr__(self):
         return (
@@ -75,47 +95,164 @@ class StrategyRiskConfig:
             f"  max_positions={self.max_positions},\n"
             f"  min_free_balance={self.min_free_balance},\n"
             f"  max_position_size={self.max_position_size},\n"
-            f"  max_daily_pnl_loss={self.max_daily_pnl_loss}\n"
+            f"  max_daily_pnl_loss={self.max_daily_pnl_loss},\n"
+            f"  max_gross_exposure={self.max_gross_exposure},\n"
+            f"  max_daily_orders={self.max_daily_orders}\n"
             f")"
         )
 
 
 # ========== 预设配置 ==========
 
-def get_conservative_config(instrument_id: InstrumentId):
+def get_small_config(instrument_ids):
+    """小资金配置（10-50 USDC 账户，见 SMALL_CAPITAL_CONFIG.md；默认预设）"""
+    return {
+        'max_notional_per_order': Decimal("10.00"),  # 单订单最多10 USDC
+        'risk_engine': get_polymarket_risk_config(instrument_ids, Decimal("10.00")),
+        'strategy': StrategyRiskConfig(
+            max_positions=1,
+            min_free_balance=Decimal("5.00"),    # 保留5 USDC
+            max_position_size=Decimal("20"),     # 库存最多20个（约 10 USDC）
+            max_daily_pnl_loss=Decimal("-3.00"),   # 日最大亏损3 USDC
+            max_gross_exposure=Decimal("50.00"),   # 总敞口50 USDC
+        ),
+    }
+
+
+def get_conservative_config(instrument_ids):
     """保守配置（低风险）"""
     return {
-        'risk_engine': get_polymarket_risk_config(instrument_id),
+        'max_notional_per_order': Decimal("10.00"),  # 单订单最多10 USDC
+        'risk_engine': get_polymarket_risk_config(instrument_ids, Decimal("10.00")),
         'strategy': StrategyRiskConfig(
             max_positions=1,
             min_free_balance=Decimal("50.00"),  # 保留50 USDC
             max_position_size=Decimal("20"),     # 单笔最多20个
             max_daily_pnl_loss=Decimal("-20.00"),  # 日最大亏损20 USDC
+            max_gross_exposure=Decimal("50.00"),   # 总敞口50 USDC
         ),
     }
 
 
-def get_moderate_config(instrument_id: InstrumentId):
+def get_moderate_config(instrument_ids):
     """适中配置（中等风险）"""
     return {
-        'risk_engine': get_polymarket_risk_config(instrument_id),
+        'max_notional_per_order': Decimal("25.00"),  # 单订单最多25 USDC
+        'risk_engine': get_polymarket_risk_config(instrument_ids, Decimal("25.00")),
         'strategy': StrategyRiskConfig(
             max_positions=2,
             min_free_balance=Decimal("20.00"),  # 保留20 USDC
             max_position_size=Decimal("50"),     # 单笔最多50个
             max_daily_pnl_loss=Decimal("-50.00"),  # 日最大亏损50 USDC
+            max_gross_exposure=Decimal("150.00"),  # 总敞口150 USDC
         ),
     }
 
 
-def get_aggressive_config(instrument_id: InstrumentId):
+def get_aggressive_config(instrument_ids):
     """激进配置（高风险）"""
     return {
-        'risk_engine': get_polymarket_risk_config(instrument_id),
+        'max_notional_per_order': Decimal("100.00"),  # 单订单最多100 USDC
+        'risk_engine': get_polymarket_risk_config(instrument_ids, Decimal("100.00")),
         'strategy': StrategyRiskConfig(
             max_positions=3,
             min_free_balance=Decimal("10.00"),  # 保留10 USDC
             max_position_size=Decimal("100"),    # 单笔最多100个
             max_daily_pnl_loss=Decimal("-100.00"),  # 日最大亏损100 USDC
+            max_gross_exposure=Decimal("400.00"),   # 总敞口400 USDC
         ),
     }
+
+
+PRESETS = {
+    'small': get_small_config,
+    'conservative': get_conservative_config,
+    'moderate': get_moderate_config,
+    'aggressive': get_aggressive_config,
+}
+
+DEFAULT_PRESET = 'small'
+
+
+def get_risk_preset(name: str, instrument_ids):
+    """按名称获取预设（RISK_PRESET 环境变量的取值）"""
+    try:
+        return PRESETS[name.strip().lower()](instrument_ids)
+    except KeyError:
+        raise ValueError(f"未知的风险预设: {name}（可选: {', '.join(PRESETS)}）")
+
+
+# ========== 运行时调整 ==========
+
+class RiskPresetController:
+    """
+    运行时切换预设 / 新增 instrument，无需重建 TradingNode
+
+    风险引擎配置只在创建 TradingNode 时读取一次；之后通过 RiskEngine.set_max_notional_per_order
+    直接修改引擎内的每订单名义价值上限。策略级别的限制（库存上限 / 日亏损 / 总敞口）
+    通过 on_strategy_limits(StrategyRiskConfig) 回调交给策略（PredictionMarketMMStrategy.apply_risk_limits）
+
+    用法：
+        controller = RiskPresetController(
+            node.kernel.risk_engine, "small", [instrument_id], on_strategy_limits=strategy.apply_risk_limits,
+        )
+        controller.add_instruments([next_instrument_id])   # 发现新市场
+        controller.set_preset("moderate")                  # 切换预设
+        controller.reload_from_file("/app/data/risk_preset")  # SIGHUP 时重新读取
+    """
+
+    def __init__(self, risk_engine, preset_name: str = DEFAULT_PRESET, instrument_ids=(), on_strategy_limits=None):
+        self.risk_engine = risk_engine
+        self.preset_name = preset_name
+        self.on_strategy_limits = on_strategy_limits
+        self.instrument_ids = []
+        self._notional = get_risk_preset(preset_name, [])['max_notional_per_order']
+        self.add_instruments(instrument_ids)
+
+    def _apply(self, instrument_ids):
+        for instrument_id in instrument_ids:
+            if isinstance(instrument_id, str):
+                instrument_id = InstrumentId.from_str(instrument_id)
+            self.risk_engine.set_max_notional_per_order(instrument_id, self._notional)
+
+    def add_instruments(self, instrument_ids):
+        """为新发现的 instrument 设置当前预设的上限"""
+        new_ids = [i for i in instrument_ids if str(i) not in {str(j) for j in self.instrument_ids}]
+        self._apply(new_ids)
+        self.instrument_ids.extend(new_ids)
+
+    def set_preset(self, name: str):
+        """切换预设：所有已知 instrument 立即使用新上限，策略限制经回调同时更新"""
+        preset = get_risk_preset(name, [])
+        self.preset_name = name
+        self._notional = preset['max_notional_per_order']
+        self._apply(self.instrument_ids)
+
+        strategy_risk = preset['strategy']
+        if self.on_strategy_limits is not None:
+            self.on_strategy_limits(strategy_risk)
+            print(
+                f"[RISK] 风险预设已切换: {name}（单订单上限 {self._notional} USDC，"
+                f"库存上限 {strategy_risk.max_position_size} 个，日亏损上限 {strategy_risk.max_daily_pnl_loss} USDC，"
+                f"总敞口上限 {strategy_risk.max_gross_exposure} USDC）"
+            )
+        else:
+            print(f"[RISK] 风险预设已切换: {name}（仅单订单上限 {self._notional} USDC，未登记策略回调）")
+
+    def reload_from_file(self, path: str) -> bool:
+        """从文件读取预设名称（内容如 "moderate"），有变化时切换"""
+        try:
+            with open(path, 'r') as f:
+                name = f.read().strip()
+        except OSError as e:
+            print(f"[RISK] 读取风险预设文件失败: {e}")
+            return False
+
+        if not name or name == self.preset_name:
+            return False
+        try:
+            self.set_preset(name)
+        except ValueError as e:
+            print(f"[RISK] {e}")
+            return False
+        return True
@@ -3,7 +3,7 @@
 
 不做任何关键词过滤，直接打印前 10 个市场的所有信息
 """
-import requests
+from patches import http_transport
 from datetime import datetime, timezone
 import dateutil.parser
 
@@ -29,7 +29,7 @@ def raw_scan():
     print(f"=" * 80)
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_transport.get(url, params=params, timeout=10)
         response.raise_for_status()
         events = response.json()
 
@@ -55,14 +55,14 @@ print("\n[3/7] 检查 run_15m_market.py 的补丁导入...")
 with open("run_15m_market.py", "r", encoding="utf-8") as f:
     main_content = f.read()
 
-if "import patches" in main_content:
-    print("  [OK] run_15m_market.py 正确导入了 patches")
+if "patches.apply_patches()" in main_content:
+    print("  [OK] run_15m_market.py 正确应用了 patches")
 elif "from patches import py_clob_client_patch" in main_content:
     print("  [FAIL] 使用了错误的导入方式: from patches import py_clob_client_patch")
-    print("  应该使用: import patches")
+    print("  应该使用: import patches; patches.apply_patches()")
     sys.exit(1)
 else:
-    print("  [FAIL] run_15m_market.py 没有导入 patches")
+    print("  [FAIL] run_15m_market.py 没有应用 patches")
     sys.exit(1)
 
 # ========== 4. 检查 force_regenerate 参数 ==========
@@ -107,8 +107,9 @@ try:
     project_root = Path(__file__).parent
     sys.path.insert(0, str(project_root))
 
-    # 导入补丁（这会自动执行修补）
-    import patches  # noqa: F401
+    # 导入补丁并执行修补
+    import patches
+    patches.apply_patches()
 
     print("  [OK] 补丁模块导入成功")
 
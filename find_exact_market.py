@@ -3,7 +3,7 @@
 
 用途：发现 API 中真实的 "Bitcoin > XXXXX" 行权价格市场
 """
-import requests
+from patches import http_transport
 from datetime import datetime, timezone
 import dateutil.parser
 import json
@@ -25,7 +25,7 @@ def find_specific_et_market():
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_transport.get(url, params=params, timeout=10)
         response.raise_for_status()
         events = response.json()
 
@@ -4,7 +4,7 @@
 Slug 格式：btc-updown-15m-{unix_timestamp}
 其中 timestamp 是市场结束时间的 Unix 时间戳
 """
-import requests
+from patches import http_transport
 from datetime import datetime, timezone, timedelta
 import math
 import json
@@ -39,7 +39,7 @@ def get_market_by_slug(slug):
     url = "https://gamma-api.polymarket.com/markets/slug/" + slug
 
     try:
-        response = requests.get(url, timeout=10)
+        response = http_transport.get(url, timeout=10)
         response.raise_for_status()
 
         market = response.json()
@@ -1,21 +1,38 @@
 """
 py_clob_client 补丁模块
 
-在项目启动时自动应用修复补丁
+导入本包不会安装任何补丁（http_transport 等工具模块可单独导入）。
+入口脚本在任何 Polymarket 相关导入之前调用 apply_patches() 应用修复补丁。
 """
 
-# 导入补丁模块，这会自动执行 patch_py_clob_client() 函数
-from patches import py_clob_client_patch  # noqa: F401
 
-# 导入 httpx 代理支持补丁（必须在其他补丁之前导入）
-from patches import httpx_proxy_patch  # noqa: F401
+def apply_patches():
+    """按顺序安装全部补丁（补丁模块在首次导入时自行安装，重复调用无副作用）"""
+    # 导入补丁模块，这会自动执行 patch_py_clob_client() 函数
+    from patches import py_clob_client_patch  # noqa: F401
 
-# 导入 Cloudflare Anti-Bot 补丁（浏览器伪装头）
-from patches import cloudflare_headers_patch  # noqa: F401
+    # 导入 httpx 代理支持补丁（必须在其他补丁之前导入）
+    from patches import httpx_proxy_patch  # noqa: F401
 
-# 导入 NautilusTrader 余额补丁
-# 选择一个：
-# - nautilus_balance_patch: 使用 POLYMARKET_BALANCE_OVERRIDE 环境变量（需要手动设置）
-# - nautilus_skip_balance_check: 自动跳过余额检查，让 Polymarket API 验证（推荐）
-from patches import nautilus_skip_balance_check  # noqa: F401
-# from patches import nautilus_balance_patch  # noqa: F401
+    # 导入 Cloudflare Anti-Bot 补丁（浏览器伪装头）
+    from patches import cloudflare_headers_patch  # noqa: F401
+
+    # 导入 NautilusTrader 余额补丁
+    # 选择一个：
+    # - balance_oracle: 链上 Funder 余额 + TTL 缓存 + 成交调整（推荐）
+    # - nautilus_balance_patch: 使用 POLYMARKET_BALANCE_OVERRIDE 环境变量（需要手动设置）
+    # - nautilus_skip_balance_check: 固定虚拟余额 1000 USDC.e，跳过余额检查
+    from patches import balance_oracle  # noqa: F401
+    # from patches import nautilus_skip_balance_check  # noqa: F401
+    # from patches import nautilus_balance_patch  # noqa: F401
+
+    # 导入批量下单补丁（SubmitOrderList → POST /orders）
+    from patches import batch_orders_patch  # noqa: F401
+
+    # 导入预签名订单缓存补丁（降低重新报价的签名延迟）
+    from patches import order_signing_cache  # noqa: F401
+
+    # 客户端限流补丁（必须在批量下单补丁之后，包装其 _submit_order_list）
+    # rate_limiter 也被 http_transport 用作行情限流器，导入时不自行安装，这里显式安装
+    from patches import rate_limiter
+    rate_limiter.patch_nautilus_rate_limits()
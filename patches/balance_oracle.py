@@ -0,0 +1,254 @@
+"""
+链上余额预言机 - 替代固定虚拟余额补丁
+
+问题：
+  - nautilus_skip_balance_check 固定报告 1000 USDC.e，RiskEngine 的余额检查形同虚设
+  - nautilus_balance_patch 需要手动设置 POLYMARKET_BALANCE_OVERRIDE
+  - balance-allowance API 只返回 Signer 余额（0），真实余额只能从链上查 Funder（Proxy）地址
+  - 适配器每次成交后都会重新查询余额，频繁调用容易触发限流
+
+解决方案：
+  - BalanceOracle：缓存 Funder 的 USDC.e 链上余额（TTL 内不重复查询）
+    - 两次刷新之间用自己的成交调整余额（买入扣减，卖出增加，扣除手续费）
+    - 挂单锁定：未成交 BUY 限价单的名义金额（从 Nautilus Cache 计算）
+  - 余额源可插拔：
+    - JsonRpcBalanceSource：通过共享连接池的 JSON-RPC eth_call 查询 balanceOf（无需 web3）
+    - StaticBalanceSource：本地替身（测试 / 模拟运行）
+
+环境变量：
+  - POLYMARKET_PROXY_ADDRESS：Funder 地址（未配置时不应用补丁）
+  - POLYGON_RPC_URL：JSON-RPC 地址（默认 https://polygon-rpc.com）
+  - POLYMARKET_BALANCE_TTL：缓存秒数（默认 60）
+  - POLYMARKET_BALANCE_OVERRIDE：设置后使用固定余额（本地替身）
+"""
+
+import os
+import threading
+import time
+from decimal import Decimal
+
+
+USDC_E_CONTRACT = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+USDC_E_DECIMALS = 6
+DEFAULT_RPC_URL = "https://polygon-rpc.com"
+DEFAULT_TTL_SECS = 60.0
+
+# ERC20 balanceOf(address) 函数选择器
+BALANCE_OF_SELECTOR = "0x70a08231"
+
+
+# ========== 余额源 ==========
+
+class JsonRpcBalanceSource:
+    """通过 JSON-RPC eth_call 查询 ERC20 余额（使用共享 HTTP 连接池）"""
+
+    def __init__(self, rpc_url: str = DEFAULT_RPC_URL, contract: str = USDC_E_CONTRACT,
+                 decimals: int = USDC_E_DECIMALS):
+        self.rpc_url = rpc_url
+        self.contract = contract
+        self.decimals = decimals
+
+    @staticmethod
+    def encode_balance_of(address: str) -> str:
+        return BALANCE_OF_SELECTOR + address.lower().replace("0x", "").rjust(64, "0")
+
+    def fetch(self, address: str) -> Decimal:
+        from patches import http_transport
+
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "eth_call",
+            "params": [{"to": self.contract, "data": self.encode_balance_of(address)}, "latest"],
+        }
+        response = http_transport.post(self.rpc_url, json=payload, timeout=10)
+        response.raise_for_status()
+        result = response.json()
+        if "error" in result:
+            raise RuntimeError(f"RPC 错误: {result['error']}")
+
+        return Decimal(int(result["result"], 16)) / (Decimal(10) ** self.decimals)
+
+
+class StaticBalanceSource:
+    """固定余额（测试 / 模拟运行的本地替身）"""
+
+    def __init__(self, balance):
+        self.balance = Decimal(str(balance))
+
+    def fetch(self, address: str) -> Decimal:
+        return self.balance
+
+
+# ========== 预言机 ==========
+
+class BalanceOracle:
+    """
+    带 TTL 缓存和成交调整的余额
+
+    Args:
+        source: 余额源（提供 fetch(address) -> Decimal）
+        address: Funder 地址
+        ttl_secs: 缓存有效期
+        clock: 单调时钟（测试可替换）
+    """
+
+    def __init__(self, source, address: str, ttl_secs: float = DEFAULT_TTL_SECS, clock=time.monotonic):
+        self.source = source
+        self.address = address
+        self.ttl_secs = float(ttl_secs)
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._onchain = None            # 最近一次链上余额
+        self._fetched_at = None
+        self._fill_adjustment = Decimal("0")
+
+        self.fetch_count = 0
+
+    @property
+    def is_stale(self) -> bool:
+        return self._fetched_at is None or self._clock() - self._fetched_at >= self.ttl_secs
+
+    def refresh(self, force: bool = False) -> Decimal:
+        """TTL 过期（或强制）时查询链上余额，返回当前总余额"""
+        if force or self.is_stale:
+            try:
+                balance = self.source.fetch(self.address)
+            except Exception as e:
+                print(f"[BALANCE] 链上余额查询失败，继续使用缓存: {e}")
+                if self._onchain is None:
+                    raise
+            else:
+                with self._lock:
+                    self._onchain = balance
+                    self._fetched_at = self._clock()
+                    self._fill_adjustment = Decimal("0")  # 链上余额已包含之前的成交
+                    self.fetch_count += 1
+
+        return self.total
+
+    def on_fill(self, is_buy: bool, price: Decimal, quantity: Decimal, fee: Decimal = Decimal("0")):
+        """自己的成交：在下次刷新前调整缓存余额"""
+        notional = Decimal(str(price)) * Decimal(str(quantity))
+        with self._lock:
+            self._fill_adjustment += (-notional if is_buy else notional) - Decimal(str(fee))
+
+    @property
+    def total(self) -> Decimal:
+        with self._lock:
+            if self._onchain is None:
+                return Decimal("0")
+            return max(self._onchain + self._fill_adjustment, Decimal("0"))
+
+    def snapshot(self, locked: Decimal = Decimal("0")):
+        """(total, locked, free)；locked 不超过 total"""
+        total = self.total
+        locked = min(max(Decimal(str(locked)), Decimal("0")), total)
+        return total, locked, total - locked
+
+
+def create_balance_source():
+    """根据环境变量创建余额源"""
+    override = os.getenv("POLYMARKET_BALANCE_OVERRIDE")
+    if override:
+        return StaticBalanceSource(override)
+    return JsonRpcBalanceSource(rpc_url=os.getenv("POLYGON_RPC_URL", DEFAULT_RPC_URL))
+
+
+def open_buy_notional(cache, venue) -> Decimal:
+    """未成交 BUY 限价单锁定的 USDC 名义金额"""
+    from nautilus_trader.model.enums import OrderSide
+
+    locked = Decimal("0")
+    for order in cache.orders_open(venue=venue):
+        if order.side == OrderSide.BUY and order.has_price and order.price is not None:
+            locked += order.price.as_decimal() * order.leaves_qty.as_decimal()
+    return locked
+
+
+# ========== NautilusTrader 接入 ==========
+
+_PATCHED = False
+
+
+def patch_nautilus_balance_oracle():
+    """修补 PolymarketExecutionClient：余额来自链上预言机"""
+    global _PATCHED
+
+    if _PATCHED:
+        return  # 已经修补过了
+
+    try:
+        import asyncio
+
+        from nautilus_trader.adapters.polymarket.common.constants import POLYMARKET_VENUE
+        from nautilus_trader.adapters.polymarket.execution import PolymarketExecutionClient
+        from nautilus_trader.model.currencies import USDC_POS
+        from nautilus_trader.model.enums import OrderSide
+        from nautilus_trader.model.objects import AccountBalance, Money
+
+        funder = os.getenv('POLYMARKET_PROXY_ADDRESS')
+        if not funder:
+            print("[INFO] 未检测到 Proxy 地址配置，不应用链上余额补丁")
+            return
+
+        oracle = BalanceOracle(
+            create_balance_source(),
+            address=funder,
+            ttl_secs=float(os.getenv("POLYMARKET_BALANCE_TTL", DEFAULT_TTL_SECS)),
+        )
+
+        async def _update_account_state_patched(self) -> None:
+            """使用链上余额（TTL 缓存 + 成交调整），缓存有效时不发起网络请求"""
+            if oracle.is_stale:
+                self._log.info("Checking account balance (on-chain funder balance)")
+                await asyncio.to_thread(oracle.refresh)
+
+            total, locked, free = oracle.snapshot(open_buy_notional(self._cache, POLYMARKET_VENUE))
+
+            self.generate_account_state(
+                balances=[
+                    AccountBalance(
+                        total=Money(total, USDC_POS),
+                        locked=Money(locked, USDC_POS),
+                        free=Money(free, USDC_POS),
+                    ),
+                ],
+                margins=[],  # N/A
+                reported=True,
+                ts_event=self._clock.timestamp_ns(),
+            )
+
+        original_generate_order_filled = PolymarketExecutionClient.generate_order_filled
+
+        def generate_order_filled_patched(self, *args, **kwargs):
+            original_generate_order_filled(self, *args, **kwargs)
+            commission = kwargs.get('commission')
+            fee = commission.as_decimal() if commission is not None and commission.currency == USDC_POS else 0
+            oracle.on_fill(
+                is_buy=kwargs['order_side'] == OrderSide.BUY,
+                price=kwargs['last_px'].as_decimal(),
+                quantity=kwargs['last_qty'].as_decimal(),
+                fee=fee,
+            )
+
+        PolymarketExecutionClient._update_account_state = _update_account_state_patched
+        PolymarketExecutionClient.generate_order_filled = generate_order_filled_patched
+        PolymarketExecutionClient.balance_oracle = oracle
+
+        print(f"[PATCH] 链上余额补丁已安装（Funder {funder[:10]}...，TTL {oracle.ttl_secs:.0f}s）")
+
+        _PATCHED = True
+
+    except ImportError as e:
+        # NautilusTrader 还未导入，延迟修补
+        print(f"[INFO] NautilusTrader 未加载，将在导入后应用链上余额补丁: {e}")
+    except Exception as e:
+        print(f"[ERROR] 链上余额补丁失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+# 尝试立即修补（如果 NautilusTrader 已加载）
+patch_nautilus_balance_oracle()
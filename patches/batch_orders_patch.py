@@ -0,0 +1,199 @@
+"""
+批量下单补丁 - 为 NautilusTrader Polymarket 适配器实现 SubmitOrderList
+
+问题：
+  - 每个报价单独 submit_order：每条腿一次签名 + 一次 POST /order
+  - Polymarket 适配器没有实现 _submit_order_list（直接 NotImplementedError）
+  - 每次重新报价的 REST 往返次数翻倍，更容易触发 Cloudflare 速率限制
+
+解决方案：
+  - 实现 PolymarketExecutionClient._submit_order_list：
+    1. 并发签名列表中的全部限价单（线程池，不阻塞事件循环）；
+       签名失败的订单单独 OrderDenied（不影响其他订单，也不会停留在 INITIALIZED 状态）
+    2. 通过 CLOB 批量端点 POST /orders 一次提交（每批最多 BATCH_LIMIT 个）
+    3. 按返回顺序逐个确认 / 拒绝
+  - 非限价单（或 py_clob_client 版本不支持 post_orders）回退到逐个提交
+  - 批量撤单已由适配器的 _batch_cancel_orders（DELETE /orders）支持
+"""
+
+# Polymarket 批量端点单次最多 15 个订单
+BATCH_LIMIT = 15
+
+_PATCHED = False
+
+
+def patch_nautilus_batch_orders():
+    """修补 NautilusTrader 以支持批量下单"""
+    global _PATCHED
+
+    if _PATCHED:
+        return  # 已经修补过了
+
+    try:
+        import asyncio
+
+        from nautilus_trader.adapters.polymarket.common.constants import VALID_POLYMARKET_TIME_IN_FORCE
+        from nautilus_trader.adapters.polymarket.common.symbol import get_polymarket_token_id
+        from nautilus_trader.adapters.polymarket.execution import PolymarketExecutionClient
+        from nautilus_trader.adapters.polymarket.http.conversion import convert_tif_to_polymarket_order_type
+        from nautilus_trader.core.datetime import nanos_to_secs
+        from nautilus_trader.core.uuid import UUID4
+        from nautilus_trader.execution.messages import SubmitOrder
+        from nautilus_trader.model.enums import OrderType
+        from nautilus_trader.model.enums import order_side_to_str
+        from nautilus_trader.model.identifiers import VenueOrderId
+        from py_clob_client.clob_types import OrderArgs, PartialCreateOrderOptions, PostOrdersArgs
+
+        async def _submit_order_list(self, command) -> None:
+            """批量提交订单列表（并发签名 + 单次批量 POST）"""
+            batchable = []
+            for order in command.order_list.orders:
+                if (
+                    order.order_type == OrderType.LIMIT
+                    and not order.is_closed
+                    and not order.is_post_only
+                    and not order.is_reduce_only
+                    and not order.is_quote_quantity
+                    and order.time_in_force in VALID_POLYMARKET_TIME_IN_FORCE
+                ):
+                    batchable.append(order)
+                    continue
+
+                # 其他订单走原有的单笔校验和提交逻辑（拒绝原因与单笔提交一致）
+                await self._submit_order(
+                    SubmitOrder(
+                        trader_id=command.trader_id,
+                        strategy_id=command.strategy_id,
+                        order=order,
+                        command_id=UUID4(),
+                        ts_init=self._clock.timestamp_ns(),
+                        position_id=command.position_id,
+                    ),
+                )
+
+            if not batchable:
+                return
+
+            await self._maintain_active_market(command.instrument_id)
+
+            instrument = self._cache.instrument(command.instrument_id)
+            options = PartialCreateOrderOptions(neg_risk=self._get_neg_risk_for_instrument(instrument))
+
+            # 1. 并发签名（逐个收集异常：一个订单签名失败不能让整个列表都没有状态事件）
+            signing_start = self._clock.timestamp()
+            results = await asyncio.gather(*[
+                asyncio.to_thread(
+                    self._http_client.create_order,
+                    OrderArgs(
+                        price=float(order.price),
+                        token_id=get_polymarket_token_id(order.instrument_id),
+                        size=float(order.quantity),
+                        side=order_side_to_str(order.side),
+                        expiration=int(nanos_to_secs(order.expire_time_ns)),
+                    ),
+                    options=options,
+                )
+                for order in batchable
+            ], return_exceptions=True)
+            interval = self._clock.timestamp() - signing_start
+            self._log.info(f"Signed {len(batchable)} Polymarket orders in {interval:.3f}s")
+
+            signed, signed_orders = [], []
+            for order, result in zip(batchable, results):
+                if isinstance(result, BaseException):
+                    self._log.error(f"Cannot sign order {order.client_order_id}: {result!r}")
+                    self.generate_order_denied(
+                        strategy_id=order.strategy_id,
+                        instrument_id=order.instrument_id,
+                        client_order_id=order.client_order_id,
+                        reason=f"SIGNING_FAILED: {result!r}",
+                        ts_event=self._clock.timestamp_ns(),
+                    )
+                    continue
+                signed.append(order)
+                signed_orders.append(result)
+            batchable = signed
+            if not batchable:
+                return
+
+            for order in batchable:
+                self.generate_order_submitted(
+                    strategy_id=order.strategy_id,
+                    instrument_id=order.instrument_id,
+                    client_order_id=order.client_order_id,
+                    ts_event=self._clock.timestamp_ns(),
+                )
+
+            # 旧版本 py_clob_client 没有批量端点：逐个提交
+            if not hasattr(self._http_client, 'post_orders'):
+                for order, signed_order in zip(batchable, signed_orders):
+                    await self._post_signed_order(order, signed_order)
+                return
+
+            # 2. 分批 POST /orders
+            for start in range(0, len(batchable), BATCH_LIMIT):
+                chunk = list(zip(batchable[start:start + BATCH_LIMIT], signed_orders[start:start + BATCH_LIMIT]))
+                await _post_signed_order_batch(self, chunk)
+
+        async def _post_signed_order_batch(self, chunk) -> None:
+            """单次批量 POST，并按顺序处理每个订单的结果"""
+            retry_manager = await self._retry_manager_pool.acquire()
+            try:
+                response = await retry_manager.run(
+                    "submit_order_list",
+                    [order.client_order_id for order, _ in chunk],
+                    asyncio.to_thread,
+                    self._http_client.post_orders,
+                    [
+                        PostOrdersArgs(
+                            order=signed_order,
+                            orderType=convert_tif_to_polymarket_order_type(order.time_in_force),
+                        )
+                        for order, signed_order in chunk
+                    ],
+                )
+                results = response if isinstance(response, list) else []
+
+                for i, (order, _) in enumerate(chunk):
+                    result = results[i] if i < len(results) else None
+                    if not result or not result.get("success"):
+                        reason = (result or {}).get("errorMsg") or retry_manager.message
+                        self.generate_order_rejected(
+                            strategy_id=order.strategy_id,
+                            instrument_id=order.instrument_id,
+                            client_order_id=order.client_order_id,
+                            reason=str(reason),
+                            ts_event=self._clock.timestamp_ns(),
+                        )
+                        continue
+
+                    venue_order_id = VenueOrderId(result["orderID"])
+                    self._cache.add_venue_order_id(order.client_order_id, venue_order_id)
+
+                    # 与 _post_signed_order 相同：通知等待中的订单/成交确认
+                    event = self._ack_events_order.get(venue_order_id)
+                    if event:
+                        event.set()
+                    trade_event = self._ack_events_trade.get(venue_order_id)
+                    if trade_event:
+                        trade_event.set()
+            finally:
+                await self._retry_manager_pool.release(retry_manager)
+
+        PolymarketExecutionClient._submit_order_list = _submit_order_list
+
+        print("[PATCH] Polymarket 批量下单补丁已安装（POST /orders）")
+
+        _PATCHED = True
+
+    except ImportError as e:
+        # NautilusTrader 还未导入，延迟修补
+        print(f"[INFO] NautilusTrader 未加载，将在导入后应用批量下单补丁: {e}")
+    except Exception as e:
+        print(f"[ERROR] 批量下单补丁失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+# 尝试立即修补（如果 NautilusTrader 已加载）
+patch_nautilus_batch_orders()
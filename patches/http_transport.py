@@ -0,0 +1,187 @@
+"""
+共享 HTTP 传输层 - 连接池 + keep-alive + HTTP/2
+
+问题：
+  - run_15m_market.py 和辅助脚本用裸 requests.get 查询 Gamma，每次都重新建立 TCP/TLS
+  - 经过代理时每次握手都要额外几百毫秒
+  - 代理和浏览器伪装头分别在 httpx_proxy_patch / cloudflare_headers_patch 中各配一遍
+  - py_clob_client 在导入时就创建了模块级 httpx.Client，补丁生效前已经建好，
+    既没有代理也没有伪装头
+
+解决方案：
+  - 唯一的配置入口：代理（HTTP_PROXY / HTTPS_PROXY）、浏览器伪装头、连接数限制
+  - 每个主机一个长连接 httpx.Client（按主机限制连接数，HTTP/2 可用时启用）
+  - get() / post()：脚本和运行器直接使用，接口与 requests.get 一致
+  - install_clob_transport()：把 py_clob_client 的模块级客户端替换为共享客户端
+
+环境变量：
+  - HTTP_MAX_CONNECTIONS_PER_HOST：每个主机的最大连接数（默认 10）
+  - HTTP_KEEPALIVE_EXPIRY：空闲连接保持秒数（默认 60）
+"""
+
+import os
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+
+
+# 浏览器伪装头（模拟 Chrome 120 on Windows），绕过 Cloudflare 对脚本 UA 的拦截
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/json",
+    "Referer": "https://polymarket.com/",
+    "Origin": "https://polymarket.com",
+    "sec-ch-ua": '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
+}
+
+
+def brotli_available() -> bool:
+    """httpx 只有在 brotli / brotlicffi 可导入时才能解码 br 响应（httpx[brotli]）"""
+    for module in ('brotli', 'brotlicffi'):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+# 只声明能解码的压缩格式：否则 Cloudflare 返回 br 时 .json() 拿到的是原始压缩字节
+BROWSER_HEADERS["Accept-Encoding"] = "gzip, deflate, br" if brotli_available() else "gzip, deflate"
+
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+DEFAULT_TIMEOUT = 10.0
+
+_clients = {}
+_lock = threading.Lock()
+
+
+# ========== 配置 ==========
+
+def get_proxy():
+    """代理地址（HTTPS 优先，与原补丁一致从环境变量读取）"""
+    return (
+        os.getenv('HTTPS_PROXY') or os.getenv('https_proxy')
+        or os.getenv('HTTP_PROXY') or os.getenv('http_proxy')
+    )
+
+
+def http2_available() -> bool:
+    """HTTP/2 需要 h2 包（httpx[http2]）"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_limits() -> httpx.Limits:
+    """每个主机的连接池限制"""
+    max_connections = int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', DEFAULT_MAX_CONNECTIONS_PER_HOST))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=float(os.getenv('HTTP_KEEPALIVE_EXPIRY', DEFAULT_KEEPALIVE_EXPIRY)),
+    )
+
+
+def client_kwargs() -> dict:
+    """创建 httpx.Client 的统一参数（代理、头、连接池、HTTP/2）"""
+    kwargs = {
+        'headers': BROWSER_HEADERS,
+        'limits': get_limits(),
+        'http2': http2_available(),
+        'timeout': DEFAULT_TIMEOUT,
+        'follow_redirects': True,
+    }
+    proxy = get_proxy()
+    if proxy:
+        kwargs['proxy'] = proxy
+    return kwargs
+
+
+# ========== 共享客户端 ==========
+
+def get_client(url_or_host: str) -> httpx.Client:
+    """获取某主机的共享长连接客户端（线程安全，首次调用时创建）"""
+    host = urlsplit(url_or_host).netloc or url_or_host
+
+    client = _clients.get(host)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(host)
+        if client is None:
+            client = httpx.Client(**client_kwargs())
+            _clients[host] = client
+        return client
+
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    """通过共享客户端发送请求（参数与 httpx.Client.request 一致，受行情 REST 限流）"""
+    from patches.rate_limiter import MARKET_DATA, get_governor
+
+    get_governor().acquire_sync(MARKET_DATA)
+    return get_client(url).request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> httpx.Response:
+    """替代 requests.get：复用连接"""
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> httpx.Response:
+    """替代 requests.post：复用连接"""
+    return request("POST", url, **kwargs)
+
+
+def close_all():
+    """关闭全部共享客户端（进程退出前调用）"""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+# ========== py_clob_client 接入 ==========
+
+def install_clob_transport():
+    """
+    将 py_clob_client 的模块级 httpx 客户端替换为共享客户端，
+    并在每个请求的头上叠加浏览器伪装头
+    """
+    from py_clob_client.http_helpers import helpers as helpers_module
+
+    if getattr(helpers_module, '_shared_transport_installed', False):
+        return
+
+    # py_clob_client 所有请求都发往同一个 CLOB 主机，使用一个共享客户端即可
+    shared_client = httpx.Client(**client_kwargs())
+    old_client = helpers_module._http_client
+    helpers_module._http_client = shared_client
+    old_client.close()
+
+    original_overload_headers = helpers_module.overloadHeaders
+
+    def overload_headers_patched(method, headers):
+        headers = original_overload_headers(method, headers)
+        headers["User-Agent"] = BROWSER_HEADERS["User-Agent"]
+        for name in ("Referer", "Origin", "Accept-Language"):
+            headers[name] = BROWSER_HEADERS[name]
+        return headers
+
+    helpers_module.overloadHeaders = overload_headers_patched
+    helpers_module._shared_transport_installed = True
+
+    proxy = get_proxy()
+    print(
+        f"[TRANSPORT] py_clob_client 使用共享连接池 "
+        f"(HTTP/2={'开' if http2_available() else '关'}, 代理={proxy or '无'})"
+    )
@@ -8,10 +8,9 @@ httpx 代理支持补丁
 
 解决方案：
 - 猴子补丁 httpx.Client，自动从环境变量读取代理
+- 代理配置统一由 patches/http_transport.py 提供
 """
 
-import os
-
 
 def patch_httpx_proxy():
     """为 httpx.Client 添加代理支持"""
@@ -19,6 +18,8 @@ def patch_httpx_proxy():
     try:
         import httpx
 
+        from patches.http_transport import get_proxy
+
         # 保存原始的 __init__ 方法
         original_init = httpx.Client.__init__
 
@@ -26,17 +27,12 @@ def patch_httpx_proxy():
             """修补后的 __init__：自动添加代理配置"""
 
             # 如果没有显式设置代理，从环境变量读取
-            if 'proxy' not in kwargs and 'proxies' not in kwargs:
-                http_proxy = os.getenv('HTTP_PROXY') or os.getenv('http_proxy')
-                https_proxy = os.getenv('HTTPS_PROXY') or os.getenv('https_proxy')
-
-                if http_proxy:
-                    # httpx 使用 proxy 参数（单字符串）或 proxies 参数（字典）
-                    kwargs['proxies'] = {
-                        'http://': http_proxy,
-                        'https://': https_proxy or http_proxy,
-                    }
-                    print(f"[PATCH] httpx.Client 已配置代理: {http_proxy}")
+            if 'proxy' not in kwargs and 'proxies' not in kwargs and 'mounts' not in kwargs:
+                proxy = get_proxy()
+
+                if proxy:
+                    # httpx >= 0.26 使用 proxy 参数（0.28 已移除 proxies）
+                    kwargs['proxy'] = proxy
 
             # 调用原始的 __init__
             original_init(self, *args, **kwargs)
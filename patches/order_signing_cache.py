@@ -0,0 +1,229 @@
+"""
+预签名订单缓存 - 降低重新报价时的 EIP-712 签名延迟
+
+问题：
+  - 每个限价单都在提交时才构建并用 eth_account 做 EIP-712 签名（CPU 密集）
+  - 做市策略反复在中间价附近的少数几个价位（相隔 0.01）重新报价
+  - 签名位于下单热路径上，直接增加报价延迟
+
+解决方案：
+  - PresignedOrderCache 包装 ClobClient.create_order：
+    1. 命中：直接返回预签名订单（每个签名订单只使用一次，salt 唯一）
+    2. 未命中：在调用线程签名（适配器已在 to_thread 中调用，不阻塞事件循环）
+    3. 每次请求后，在后台线程池预签名同一价位及相邻 ±N 档的订单
+  - LRU 淘汰，限制缓存大小
+  - 失效：
+    - 成交后清空（库存变化，报价阶梯随之移动）
+    - 到期时间不足的 GTD 订单不预签名
+    - 不按 nonce 失效：适配器下单时 OrderArgs.nonce 恒为 0（链上 nonce 只在调用
+      incrementNonce 取消全部订单时变化，本项目不调用）；nonce 仍是缓存键的一部分，
+      不同 nonce 的请求不会命中旧订单
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PresignedOrderCache:
+    """
+    预签名订单 LRU 缓存
+
+    Args:
+        client: ClobClient（或任何提供 create_order(order_args, options=None) 的对象）
+        max_entries: 最多缓存的价位数（LRU 淘汰）
+        neighbor_levels: 每次请求后预签名的相邻档数（每侧）
+        price_step: 相邻档价格间隔
+        min_expiry_secs: GTD 订单剩余有效期低于该值时不预签名
+        max_workers: 后台签名线程数
+    """
+
+    DEFAULT_MAX_ENTRIES = 64
+    DEFAULT_NEIGHBOR_LEVELS = 2
+    DEFAULT_PRICE_STEP = 0.01
+    DEFAULT_MIN_EXPIRY_SECS = 60
+
+    def __init__(
+        self,
+        client,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        neighbor_levels: int = DEFAULT_NEIGHBOR_LEVELS,
+        price_step: float = DEFAULT_PRICE_STEP,
+        min_expiry_secs: int = DEFAULT_MIN_EXPIRY_SECS,
+        max_workers: int = 2,
+    ):
+        self._client = client
+        self._sign = client.create_order  # 原始签名方法（包装前保存）
+        self.max_entries = int(max_entries)
+        self.neighbor_levels = int(neighbor_levels)
+        self.price_step = float(price_step)
+        self.min_expiry_secs = int(min_expiry_secs)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order-presign")
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key → 签名订单
+        self._pending = set()           # 正在后台签名的 key
+        self._generation = 0            # 每次失效 +1，丢弃失效前开始的后台签名
+
+        self.hits = 0
+        self.misses = 0
+
+    # ========== 签名入口 ==========
+
+    def create_order(self, order_args, options=None):
+        """与 ClobClient.create_order 签名一致：优先返回预签名订单"""
+        key = self._make_key(order_args, options)
+
+        with self._lock:
+            signed_order = self._entries.pop(key, None)
+            if signed_order is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if signed_order is None:
+            signed_order = self._sign(order_args, options=options)
+
+        # 为下一次重新报价准备：同一价位 + 相邻档位
+        self.prefetch_around(key, options)
+
+        return signed_order
+
+    def prefetch_around(self, key, options=None):
+        """后台预签名 key 所在价位及相邻 ±neighbor_levels 档"""
+        if not self._can_presign(key):
+            return
+
+        price = key[2]
+        for offset in range(-self.neighbor_levels, self.neighbor_levels + 1):
+            level_price = round(price + offset * self.price_step, 6)
+            if 0 < level_price < 1:
+                self._schedule(key[:2] + (level_price,) + key[3:], options)
+
+    # ========== 失效 ==========
+
+    def invalidate(self):
+        """清空全部预签名订单（成交后调用）"""
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._generation += 1
+
+    def shutdown(self):
+        self.invalidate()
+        self._executor.shutdown(wait=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ========== 内部方法 ==========
+
+    @staticmethod
+    def _make_key(order_args, options):
+        return (
+            str(order_args.token_id),
+            str(order_args.side),
+            round(float(order_args.price), 6),
+            round(float(order_args.size), 6),
+            int(order_args.expiration),
+            int(order_args.nonce),
+            str(order_args.taker),
+            int(order_args.fee_rate_bps),
+        )
+
+    @staticmethod
+    def _order_args_from_key(key):
+        from py_clob_client.clob_types import OrderArgs
+
+        token_id, side, price, size, expiration, nonce, taker, fee_rate_bps = key
+        return OrderArgs(
+            token_id=token_id,
+            price=price,
+            size=size,
+            side=side,
+            fee_rate_bps=fee_rate_bps,
+            nonce=nonce,
+            expiration=expiration,
+            taker=taker,
+        )
+
+    def _can_presign(self, key):
+        expiration = key[4]
+        return expiration == 0 or expiration - time.time() > self.min_expiry_secs
+
+    def _schedule(self, key, options):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            if key in self._pending:
+                return
+            self._pending.add(key)
+            generation = self._generation
+
+        self._executor.submit(self._presign, key, options, generation)
+
+    def _presign(self, key, options, generation):
+        try:
+            signed_order = self._sign(self._order_args_from_key(key), options=options)
+        except Exception as e:
+            print(f"[PRESIGN] 预签名失败 {key[1]} {key[2]}: {e}")
+            signed_order = None
+
+        with self._lock:
+            self._pending.discard(key)
+            if signed_order is None or generation != self._generation:
+                return  # 签名期间已失效
+
+            self._entries[key] = signed_order
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_PATCHED = False
+
+
+def patch_nautilus_order_signing():
+    """修补 PolymarketExecutionClient：签名走预签名缓存，成交后失效"""
+    global _PATCHED
+
+    if _PATCHED:
+        return  # 已经修补过了
+
+    try:
+        from nautilus_trader.adapters.polymarket.common.enums import PolymarketTradeStatus
+        from nautilus_trader.adapters.polymarket.execution import PolymarketExecutionClient
+
+        original_init = PolymarketExecutionClient.__init__
+        original_handle_trade = PolymarketExecutionClient._handle_ws_trade_msg
+
+        def patched_init(self, *args, **kwargs):
+            original_init(self, *args, **kwargs)
+            self._presigned_orders = PresignedOrderCache(self._http_client)
+            # 实例属性覆盖：单笔下单和批量下单补丁都调用 self._http_client.create_order
+            self._http_client.create_order = self._presigned_orders.create_order
+
+        def patched_handle_trade(self, msg, wait_for_ack):
+            original_handle_trade(self, msg, wait_for_ack)
+            if msg.status == PolymarketTradeStatus.MATCHED:
+                self._presigned_orders.invalidate()
+
+        PolymarketExecutionClient.__init__ = patched_init
+        PolymarketExecutionClient._handle_ws_trade_msg = patched_handle_trade
+
+        print("[PATCH] 预签名订单缓存补丁已安装")
+
+        _PATCHED = True
+
+    except ImportError as e:
+        # NautilusTrader 还未导入，延迟修补
+        print(f"[INFO] NautilusTrader 未加载，将在导入后应用预签名补丁: {e}")
+    except Exception as e:
+        print(f"[ERROR] 预签名补丁失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+# 尝试立即修补（如果 NautilusTrader 已加载）
+patch_nautilus_order_signing()
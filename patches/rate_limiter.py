@@ -0,0 +1,379 @@
+"""
+客户端限流器 - 按端点类别的令牌桶，避免 Cloudflare 403/429 封禁
+
+问题：
+  - 触发 Cloudflare 限流后被 403/429 封禁数分钟，交易完全停止
+  - RiskEngine 只有一个写死的 max_order_submit_rate=10，不区分下单/撤单/查询
+  - 排队中的报价可能已经过时，仍然占用额度
+
+解决方案：
+  - RateLimitGovernor：每个端点类别一个令牌桶 + CLOB 主机全局令牌桶
+    - order_post：下单（POST /order, /orders）
+    - cancel：撤单（DELETE /order, /orders, /cancel-all）
+    - balance：余额查询
+    - market_data：行情 REST（Gamma 等）
+  - 排队按优先级放行：撤单 > 下单 > 余额 > 行情
+  - 相同 coalesce_key 的新请求替换排队中的旧请求（旧请求返回 False = 已过时）
+  - 排队超过 max_wait 的请求同样视为过时
+  - 收到 403/429 时 penalize()：全局桶透支，平滑降速而不是持续撞墙
+
+配置（环境变量，格式 "每秒速率/突发容量"，解析见 config/rate_limits.py）：
+  - RATE_LIMIT_ORDER_POST / RATE_LIMIT_CANCEL / RATE_LIMIT_BALANCE
+  - RATE_LIMIT_MARKET_DATA / RATE_LIMIT_GLOBAL
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+from config.rate_limits import (
+    BALANCE,
+    CANCEL,
+    DEFAULT_LIMITS,
+    GLOBAL,
+    MARKET_DATA,
+    ORDER_POST,
+    load_limits_from_env,
+    order_submit_rate_limit,
+)
+
+
+# 数值越小优先级越高
+PRIORITY = {
+    CANCEL: 0,
+    ORDER_POST: 1,
+    BALANCE: 2,
+    MARKET_DATA: 3,
+}
+
+# 403/429 后全局暂停的秒数（连续触发时翻倍）
+DEFAULT_PENALTY_SECS = 5.0
+MAX_PENALTY_SECS = 120.0
+
+
+# ========== 令牌桶 ==========
+
+class TokenBucket:
+    """
+    令牌桶（线程安全）
+
+    tokens 可以为负（penalize 透支），此时需等待补满到 1 才能放行
+    """
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"invalid token bucket: rate={rate}, capacity={capacity}")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def has_token(self) -> bool:
+        return self.tokens >= 1.0
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    def wait_time(self) -> float:
+        """距离下一个令牌可用的秒数"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (1.0 - self._tokens) / self.rate)
+
+    def drain(self, secs: float):
+        """透支令牌，使接下来 secs 秒内不放行"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0) - secs * self.rate
+
+    def acquire_sync(self, timeout: float = None) -> bool:
+        """阻塞获取（供线程调用）"""
+        deadline = None if timeout is None else self._clock() + timeout
+        while not self.try_acquire():
+            wait = self.wait_time()
+            if deadline is not None and self._clock() + wait > deadline:
+                return False
+            time.sleep(wait)
+        return True
+
+
+# ========== 限流调度器 ==========
+
+class _Waiter:
+    __slots__ = ('endpoint', 'coalesce_key', 'enqueued_at', 'max_wait', 'future')
+
+    def __init__(self, endpoint, coalesce_key, enqueued_at, max_wait, future):
+        self.endpoint = endpoint
+        self.coalesce_key = coalesce_key
+        self.enqueued_at = enqueued_at
+        self.max_wait = max_wait
+        self.future = future
+
+
+class RateLimitGovernor:
+    """
+    按端点类别限流，带优先级队列和过时请求合并
+
+    Args:
+        limits: {endpoint: (rate, burst)}，需包含 GLOBAL
+        clock: 单调时钟（测试可替换）
+    """
+
+    def __init__(self, limits=None, clock=time.monotonic):
+        limits = limits or load_limits_from_env()
+        self._clock = clock
+        self.buckets = {
+            name: TokenBucket(rate, burst, clock=clock) for name, (rate, burst) in limits.items()
+        }
+
+        self._queue = []                # (priority, seq, waiter)
+        self._seq = itertools.count()
+        self._by_key = {}               # coalesce_key → waiter
+        self._pump_task = None
+
+        self._penalty_secs = DEFAULT_PENALTY_SECS
+        self._last_penalty = None
+
+        self.granted = 0
+        self.stale = 0
+
+    # ========== 获取额度 ==========
+
+    async def acquire(self, endpoint: str, coalesce_key=None, max_wait: float = None) -> bool:
+        """
+        等待额度（协程）
+
+        Args:
+            endpoint: 端点类别
+            coalesce_key: 相同 key 的新请求会替换排队中的旧请求
+            max_wait: 最长排队秒数
+
+        Returns:
+            True = 放行；False = 已过时（被新请求替换或排队超时），调用方应放弃该请求
+        """
+        if not self._queue and self._try_grant(endpoint):
+            return True
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(endpoint, coalesce_key, self._clock(), max_wait, future)
+
+        if coalesce_key is not None:
+            previous = self._by_key.get(coalesce_key)
+            if previous is not None:
+                self._resolve(previous, False)
+            self._by_key[coalesce_key] = waiter
+
+        heapq.heappush(self._queue, (PRIORITY.get(endpoint, len(PRIORITY)), next(self._seq), waiter))
+
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.ensure_future(self._pump())
+
+        return await future
+
+    def acquire_sync(self, endpoint: str, timeout: float = None) -> bool:
+        """阻塞获取（线程调用，如行情 REST；不参与优先级队列）"""
+        return self.buckets[endpoint].acquire_sync(timeout)
+
+    # ========== 限流反馈 ==========
+
+    def penalize(self, status_code: int = None):
+        """收到 403/429：全局桶透支，连续触发时暂停时间翻倍"""
+        now = self._clock()
+        if self._last_penalty is not None and now - self._last_penalty < self._penalty_secs * 2:
+            self._penalty_secs = min(self._penalty_secs * 2, MAX_PENALTY_SECS)
+        else:
+            self._penalty_secs = DEFAULT_PENALTY_SECS
+        self._last_penalty = now
+
+        self.buckets[GLOBAL].drain(self._penalty_secs)
+        print(f"[RATE_LIMIT] 收到 {status_code}，全局暂停 {self._penalty_secs:.0f} 秒")
+
+    @property
+    def queue_length(self) -> int:
+        return sum(1 for _, _, waiter in self._queue if not waiter.future.done())
+
+    # ========== 内部方法 ==========
+
+    def _buckets_for(self, endpoint):
+        buckets = [self.buckets[endpoint]]
+        if endpoint != MARKET_DATA and GLOBAL in self.buckets:
+            buckets.append(self.buckets[GLOBAL])
+        return buckets
+
+    def _try_grant(self, endpoint) -> bool:
+        buckets = self._buckets_for(endpoint)
+        if not all(bucket.has_token() for bucket in buckets):
+            return False
+        for bucket in buckets:
+            bucket.try_acquire()
+        self.granted += 1
+        return True
+
+    def _resolve(self, waiter, granted: bool):
+        if waiter.future.done():
+            return
+        if not granted:
+            self.stale += 1
+        waiter.future.set_result(granted)
+        if waiter.coalesce_key is not None and self._by_key.get(waiter.coalesce_key) is waiter:
+            del self._by_key[waiter.coalesce_key]
+
+    def _dispatch(self) -> float:
+        """
+        按优先级放行一轮，返回下一次检查前的等待秒数（队列空时返回 None）
+
+        - 某类别桶空：跳过，其他类别继续
+        - 全局桶空：停止（保证高优先级请求先拿到全局额度）
+        """
+        now = self._clock()
+        pending = []
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            waiter = entry[2]
+            if waiter.future.done():
+                continue
+
+            if waiter.max_wait is not None and now - waiter.enqueued_at > waiter.max_wait:
+                self._resolve(waiter, False)
+                continue
+
+            global_bucket = self.buckets.get(GLOBAL)
+            if waiter.endpoint != MARKET_DATA and global_bucket and not global_bucket.has_token():
+                pending.append(entry)
+                break
+
+            if self._try_grant(waiter.endpoint):
+                self._resolve(waiter, True)
+            else:
+                pending.append(entry)
+
+        for entry in pending:
+            heapq.heappush(self._queue, entry)
+
+        live = [entry[2] for entry in self._queue if not entry[2].future.done()]
+        if not live:
+            self._queue.clear()
+            return None
+
+        waits = [max(b.wait_time() for b in self._buckets_for(w.endpoint)) for w in live]
+        return max(min(waits), 0.001)
+
+    async def _pump(self):
+        while True:
+            wait = self._dispatch()
+            if wait is None:
+                return
+            await asyncio.sleep(wait)
+
+
+_governor = None
+
+
+def get_governor() -> RateLimitGovernor:
+    """进程内共享的限流器"""
+    global _governor
+    if _governor is None:
+        _governor = RateLimitGovernor()
+    return _governor
+
+
+# ========== NautilusTrader 接入 ==========
+# 导入时不自动安装（http_transport 只使用限流器），由 patches.apply_patches() 或入口脚本调用
+
+_PATCHED = False
+
+
+def patch_nautilus_rate_limits():
+    """修补 PolymarketExecutionClient：下单/撤单/余额查询先经过限流器"""
+    global _PATCHED
+
+    if _PATCHED:
+        return  # 已经修补过了
+
+    try:
+        from nautilus_trader.adapters.polymarket.execution import PolymarketExecutionClient
+        from py_clob_client.exceptions import PolyApiException
+        from py_clob_client.http_helpers import helpers as helpers_module
+
+        def deny_stale(self, orders):
+            for order in orders:
+                self.generate_order_denied(
+                    strategy_id=order.strategy_id,
+                    instrument_id=order.instrument_id,
+                    client_order_id=order.client_order_id,
+                    reason="RATE_LIMITED_STALE",
+                    ts_event=self._clock.timestamp_ns(),
+                )
+
+        def wrap_submit(original, get_orders, coalesce):
+            async def wrapper(self, command):
+                # 报价列表：同一 instrument 排队中的旧报价被新报价替换（单笔订单如对冲不合并）
+                coalesce_key = (command.instrument_id, "quotes") if coalesce else None
+                granted = await get_governor().acquire(ORDER_POST, coalesce_key=coalesce_key)
+                if not granted:
+                    self._log.warning(f"[RATE_LIMIT] 报价已过时，放弃提交: {command.instrument_id}")
+                    deny_stale(self, get_orders(command))
+                    return
+                await original(self, command)
+            return wrapper
+
+        def wrap_simple(original, endpoint):
+            async def wrapper(self, *args, **kwargs):
+                await get_governor().acquire(endpoint)
+                await original(self, *args, **kwargs)
+            return wrapper
+
+        cls = PolymarketExecutionClient
+        cls._submit_order = wrap_submit(cls._submit_order, lambda c: [c.order], coalesce=False)
+        cls._submit_order_list = wrap_submit(cls._submit_order_list, lambda c: c.order_list.orders, coalesce=True)
+        cls._cancel_order = wrap_simple(cls._cancel_order, CANCEL)
+        cls._batch_cancel_orders = wrap_simple(cls._batch_cancel_orders, CANCEL)
+        cls._cancel_all_orders = wrap_simple(cls._cancel_all_orders, CANCEL)
+        cls._update_account_state = wrap_simple(cls._update_account_state, BALANCE)
+
+        # 403/429 反馈：所有 CLOB 请求都经过 helpers.request
+        original_request = helpers_module.request
+
+        def request_patched(endpoint, method, headers=None, data=None):
+            try:
+                return original_request(endpoint, method, headers, data)
+            except PolyApiException as e:
+                if e.status_code in (403, 429):
+                    get_governor().penalize(e.status_code)
+                raise
+
+        helpers_module.request = request_patched
+
+        print("[PATCH] 客户端限流补丁已安装（撤单优先，过时报价合并）")
+
+        _PATCHED = True
+
+    except ImportError as e:
+        # NautilusTrader 还未导入，延迟修补
+        print(f"[INFO] NautilusTrader 未加载，将在导入后应用限流补丁: {e}")
+    except Exception as e:
+        print(f"[ERROR] 限流补丁失败: {e}")
+        import traceback
+        traceback.print_exc()
+
@@ -21,7 +21,6 @@ print("=" * 60)
 import os
 import sys
 import json
-import requests
 from pathlib import Path
 from decimal import Decimal
 
@@ -31,10 +30,14 @@ sys.path.insert(0, str(project_root))
 # ========== 关键修复：应用 py_clob_client 补丁 ==========
 # 必须在任何 Polymarket 相关导入之前执行
 try:
-    import patches  # noqa: F401
+    import patches
+    patches.apply_patches()
 except ImportError as e:
     print(f"[WARN] 补丁模块未找到，余额查询可能无法正常工作: {e}")
 
+# 共享 HTTP 连接池：Gamma 查询复用 TCP/TLS 连接（经代理时尤其明显）
+from patches import http_transport  # noqa: E402
+
 def load_env():
     """加载私钥并推导钱包地址"""
     # ========== 关键修复：首先加载 .env 文件中的所有环境变量 ==========
@@ -179,12 +182,62 @@ def ensure_api_credentials(private_key: str, force_regenerate: bool = False):
         return False
 
 
+def reconcile_on_start(private_key: str, markets, lookback_mins: int):
+    """
+    启动对账：TradingNode 启动前撤销本进程市场中上个进程遗留的挂单
+
+    Args:
+        markets: [(condition_id, token_id), ...]
+        lookback_mins: 近期成交回看窗口（与 NautilusTrader 启动对账一致）
+    """
+    if os.getenv('RECONCILE_ON_START', '1') != '1':
+        print("[INFO] 启动对账已关闭（RECONCILE_ON_START=0）")
+        return None
+
+    try:
+        from py_clob_client.client import ClobClient
+        from py_clob_client.clob_types import ApiCreds
+        from patches import rate_limiter
+        from strategies.startup_reconciliation import QUERY, StartupReconciler
+
+        client = ClobClient(
+            "https://clob.polymarket.com",
+            key=str(private_key),
+            chain_id=137,
+            creds=ApiCreds(
+                api_key=os.environ['POLYMARKET_API_KEY'],
+                api_secret=os.environ['POLYMARKET_API_SECRET'],
+                api_passphrase=os.environ['POLYMARKET_PASSPHRASE'],
+            ),
+            signature_type=2,  # Magic Wallet
+            funder=os.getenv('POLYMARKET_FUNDER'),
+        )
+        governor = rate_limiter.get_governor()
+        reconciler = StartupReconciler(
+            client,
+            trade_lookback_secs=lookback_mins * 60,
+            throttle=lambda kind: governor.acquire_sync(
+                rate_limiter.MARKET_DATA if kind == QUERY else rate_limiter.CANCEL, timeout=10
+            ),
+        )
+        report = reconciler.run(markets)
+    except Exception as e:
+        # 对账失败不阻止启动：策略 on_start 仍会撤销 Cache 中认领的遗留订单
+        print(f"[WARN] 启动对账失败: {e}")
+        return None
+
+    print(f"[OK] 启动对账: {report.summary()}")
+    for error in report.errors:
+        print(f"[WARN] 启动对账: {error}")
+    return report
+
+
 def get_market_info(slug: str):
     """从 Gamma API 获取市场信息"""
     url = f"https://gamma-api.polymarket.com/markets/slug/{slug}"
 
     try:
-        response = requests.get(url, timeout=5)
+        response = http_transport.get(url, timeout=5)
         response.raise_for_status()
 
         market = response.json()
@@ -257,7 +310,7 @@ def get_latest_15m_btc_market():
         # 使用 /markets/slug/{slug} 端点
         url = f"https://gamma-api.polymarket.com/markets/slug/{slug}"
 
-        response = requests.get(url, timeout=10)
+        response = http_transport.get(url, timeout=10)
 
         if response.status_code == 404:
             print(f"[WARN] Market not found (404)")
@@ -273,7 +326,7 @@ def get_latest_15m_btc_market():
             print(f"[INFO] Next Time: {datetime.fromtimestamp(next_ts, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC")
 
             url = f"https://gamma-api.polymarket.com/markets/slug/{next_slug}"
-            response = requests.get(url, timeout=10)
+            response = http_transport.get(url, timeout=10)
 
             if response.status_code == 404:
                 print(f"[ERROR] Next market also not found")
@@ -326,7 +379,7 @@ def get_latest_15m_btc_market():
 
                 # 递归调用下一个市场
                 url = f"https://gamma-api.polymarket.com/markets/slug/{next_slug}"
-                response = requests.get(url, timeout=10)
+                response = http_transport.get(url, timeout=10)
 
                 if response.status_code == 404:
                     print(f"[ERROR] 下一个市场也不存在，停止尝试")
@@ -366,7 +419,13 @@ def get_latest_15m_btc_market():
 
         print(f"=" * 80)
 
-        return condition_id, token_ids[0], question, slug
+        # 本轮到期时间（用于参考价定价的剩余时间 T）
+        end_ts = None
+        if market.get('endDate'):
+            import dateutil.parser
+            end_ts = int(dateutil.parser.isoparse(market.get('endDate')).timestamp())
+
+        return condition_id, token_ids[0], question, slug, end_ts
 
     except Exception as e:
         print(f"[ERROR] Failed to fetch market: {e}")
@@ -439,7 +498,7 @@ def main():
                 time.sleep(60)
                 return 1
 
-    condition_id, token_id, question, slug = market_info
+    condition_id, token_id, question, slug, end_ts = market_info
     print(f"    Question: {question[:80]}...")
     print(f"[DEBUG] condition_id: {condition_id}")
     print(f"[DEBUG] token_id: {token_id}")
@@ -457,15 +516,22 @@ def main():
             PolymarketLiveExecClientFactory,
         )
         from nautilus_trader.adapters.polymarket.common.symbol import get_polymarket_instrument_id
-        from nautilus_trader.config import InstrumentProviderConfig, LoggingConfig, TradingNodeConfig, StrategyConfig
+        from nautilus_trader.config import InstrumentProviderConfig, LiveExecEngineConfig, LoggingConfig, TradingNodeConfig, StrategyConfig
         from nautilus_trader.live.node import TradingNode
         from nautilus_trader.model.identifiers import TraderId
         from strategies.prediction_market_mm_strategy import PredictionMarketMMStrategy
+        from config.risk_config import DEFAULT_PRESET, RiskPresetController, get_risk_preset
 
         # ========== 关键：在 NautilusTrader 导入后应用补丁 ==========
         try:
-            from patches import nautilus_skip_balance_check
-            nautilus_skip_balance_check.patch_nautilus_order_validation()
+            from patches import balance_oracle
+            balance_oracle.patch_nautilus_balance_oracle()
+            from patches import batch_orders_patch
+            batch_orders_patch.patch_nautilus_batch_orders()
+            from patches import order_signing_cache
+            order_signing_cache.patch_nautilus_order_signing()
+            from patches import rate_limiter
+            rate_limiter.patch_nautilus_rate_limits()
             print("[OK] NautilusTrader 补丁已应用")
         except Exception as e:
             print(f"[WARN] 补丁应用失败: {e}")
@@ -476,6 +542,10 @@ def main():
         print(f"[DEBUG] Instrument ID 类型: {type(instrument_id)}")
         print(f"[DEBUG] Instrument ID (字符串): {str(instrument_id)}")
 
+        # ========== 启动对账（第一次报价前）==========
+        reconcile_lookback_mins = int(os.getenv('RECONCILE_LOOKBACK_MINS', '60'))
+        reconcile_on_start(private_key, [(condition_id, token_id)], reconcile_lookback_mins)
+
         # 创建基于论文优化的预测市场做市策略配置
         class PredictionMarketConfig(StrategyConfig, frozen=True):
             instrument_id: str
@@ -483,6 +553,15 @@ def main():
             # ========== 论文参数（Avellaneda-Stoikov 模型）==========
             risk_aversion: Decimal = Decimal("0.5")     # γ 风险厌恶系数
             time_decay_factor: Decimal = Decimal("2.0") # 时间衰减因子
+            arrival_kappa: Decimal = Decimal("100")     # κ 订单到达强度衰减系数
+            use_quote_table: bool = True                # 使用 A-S 预计算报价表
+            use_microprice: bool = True                 # 以微观价格作为公允价值
+
+            # ========== 外部现货参考价 ==========
+            use_reference_price: bool = True            # 以 BTC 现货推导的公允概率为报价中心
+            reference_source: str = "binance"           # 或 "replay:/path/prices.csv"
+            round_start_ts: int = 0                     # 本轮开始时间（从 slug 解析）
+            market_slug: str = ""                       # 市场 slug（登记到会话目录）
 
             # ========== 价差设置（基于论文优化）==========
             base_spread: Decimal = Decimal("0.02")  # 2% 基础价差
@@ -496,7 +575,7 @@ def main():
 
             # ========== 库存设置（严格管理）==========
             target_inventory: int = 0        # 市场中性
-            max_inventory: int = 20          # 最大 20 个（10 USDC）
+            max_inventory: int = 20          # 最大 20 个（10 USDC；运行时由风险预设填入）
             inventory_skew_factor: Decimal = Decimal("0.001")  # 更敏感（论文建议）
             max_skew: Decimal = Decimal("0.05")
             hedge_threshold: int = 10        # 持有 10 个就对冲
@@ -512,15 +591,68 @@ def main():
 
             # ========== 资金管理 ==========
             max_position_ratio: Decimal = Decimal("0.4")   # 最多用 40% 资金
-            max_daily_loss: Decimal = Decimal("-3.0")      # 日亏损 -3 USDC
+            max_daily_loss: Decimal = Decimal("-3.0")      # 日亏损 -3 USDC（运行时由风险预设填入）
+            max_gross_exposure: Decimal | None = None      # 当日总敞口上限（由风险预设填入）
 
             # ========== 行为控制 ==========
-            update_interval_ms: int = 30000   # 30 秒更新（避免 Cloudflare 封禁 IP）
+            update_interval_ms: int = 30000   # 盘口无变化时 30 秒心跳（避免 Cloudflare 封禁 IP）
+            requote_threshold: Decimal = Decimal("0.01")  # 顶档变动 1 个价格单位立即重新报价
+            requote_min_interval_ms: int = 5000           # 两次评估至少间隔 5 秒
+            requote_max_interval_ms: int = 120000         # 无变化时心跳退避到 2 分钟
             end_buffer_minutes: int = 5       # 最后5分钟停止做市（关键！）
             use_inventory_skew: bool = True
             use_dynamic_spread: bool = True
 
-        config = PredictionMarketConfig(instrument_id=str(instrument_id))
+            # ========== 旁路数据 ==========
+            book_bus_name: str | None = None  # 订单簿快照总线（共享内存名称），记录器 / 监控在独立进程读取
+
+            # ========== 崩溃恢复 ==========
+            use_state_journal: bool = True    # 状态日志：容器重启后恢复本轮价格历史 / 成交强度，撤销遗留报价
+
+            # ========== 数据记录 ==========
+            recorder_rotate_secs: int = 3600  # 记录文件按整点轮转，已关闭分段后台压缩
+            recorder_rotate_mb: int = 256     # 单个活动段超过此大小也轮转
+            recorder_codec: str = "gzip"      # 或 "zstd"（需安装 zstandard，否则回退 gzip）
+            recorder_hot_days: int = 3        # 超过此天数的会话合并为每类一个压缩文件
+            recorder_retention_days: int = 30 # 超过此天数的会话删除（0 = 不删除）
+            recorder_max_disk_mb: int = 0     # 数据目录总大小上限（0 = 不限），超出时删除最旧的会话
+            capture_market_data: bool = False # 原始增量 / 报价 / 成交写入 capture_*.bin（回测用，见 market_capture.py）
+
+        # 本轮开始时间 = 到期时间 - 15分钟（无 endDate 时从 slug 解析）
+        if end_ts:
+            round_start_ts = end_ts - 15 * 60
+        else:
+            round_start_ts = int(slug.rsplit('-', 1)[-1])
+
+        # ========== 风险预设（RISK_PRESET=small/conservative/moderate/aggressive，默认 small）==========
+        # RiskEngine 按 instrument 限制单订单名义价值；调试日志默认关闭（RISK_ENGINE_DEBUG=1 开启）
+        risk_preset_name = os.getenv('RISK_PRESET', DEFAULT_PRESET)
+        risk_preset = get_risk_preset(risk_preset_name, [instrument_id])
+        strategy_risk = risk_preset['strategy']
+        print(
+            f"[OK] 风险预设: {risk_preset_name}"
+            f"（单订单上限 {risk_preset['max_notional_per_order']} USDC，"
+            f"库存上限 {strategy_risk.max_position_size} 个，"
+            f"日亏损上限 {strategy_risk.max_daily_pnl_loss} USDC，"
+            f"总敞口上限 {strategy_risk.max_gross_exposure} USDC）"
+        )
+
+        config = PredictionMarketConfig(
+            instrument_id=str(instrument_id),
+            round_start_ts=round_start_ts,
+            market_slug=slug,
+            # 策略级别的限制全部取自风险预设（类定义中的默认值只在未使用预设时生效）
+            max_inventory=int(strategy_risk.max_position_size),
+            max_daily_loss=strategy_risk.max_daily_pnl_loss,
+            max_gross_exposure=strategy_risk.max_gross_exposure,
+            book_bus_name=os.getenv('BOOK_BUS_NAME') or None,  # 默认关闭；设置名称后发布（同名总线正被其他进程使用时不接管）
+            recorder_codec=os.getenv('RECORDER_CODEC', 'gzip'),
+            recorder_retention_days=int(os.getenv('RECORDER_RETENTION_DAYS', '30')),
+            recorder_max_disk_mb=int(os.getenv('RECORDER_MAX_DISK_MB', '0')),
+            capture_market_data=os.getenv('CAPTURE_MARKET_DATA', '0') == '1',
+            # 认领对账得到的本市场未结订单（上个进程遗留的报价），启动时由策略批量撤销
+            external_order_claims=[str(instrument_id)],
+        )
 
         # 创建 TradingNode
         print("\n[INFO] 创建 TradingNode...")
@@ -549,6 +681,21 @@ def main():
                     passphrase=os.environ['POLYMARKET_PASSPHRASE'],
                 ),
             },
+            risk_engine=risk_preset['risk_engine'],
+            # ========== 内存治理：定期清理已关闭的订单/仓位 ==========
+            # 每秒重新报价会产生大量已撤销订单，不清理时 Cache 无限增长
+            # 启动对账只针对本市场、只回看最近成交（默认会拉取账户全部历史成交）
+            exec_engine=LiveExecEngineConfig(
+                reconciliation=True,
+                reconciliation_lookback_mins=reconcile_lookback_mins,
+                reconciliation_instrument_ids=[instrument_id],
+                purge_closed_orders_interval_mins=15,
+                purge_closed_orders_buffer_mins=60,
+                purge_closed_positions_interval_mins=15,
+                purge_closed_positions_buffer_mins=60,
+                purge_account_events_interval_mins=15,
+                purge_account_events_lookback_mins=60,
+            ),
             logging=LoggingConfig(log_level="WARNING"),  # 减少日志噪音
         )
 
@@ -562,6 +709,21 @@ def main():
         node.add_exec_client_factory(POLYMARKET, PolymarketLiveExecClientFactory)
         node.build()
 
+        # 运行时切换预设：写入预设名到 RISK_PRESET_FILE 后发送 SIGHUP（无需重建 TradingNode）
+        # 单订单上限写入 RiskEngine，库存上限 / 日亏损 / 总敞口（含风险预算）经回调交给策略
+        risk_controller = RiskPresetController(
+            node.kernel.risk_engine, risk_preset_name, [instrument_id],
+            on_strategy_limits=strategy.apply_risk_limits,
+        )
+        risk_preset_file = os.getenv('RISK_PRESET_FILE', '/app/data/risk_preset')
+        try:
+            import signal
+            node.get_event_loop().add_signal_handler(
+                signal.SIGHUP, risk_controller.reload_from_file, risk_preset_file
+            )
+        except (AttributeError, NotImplementedError, RuntimeError) as e:
+            print(f"[WARN] 无法注册 SIGHUP 风险预设重载: {e}")
+
         print("[OK] TradingNode 创建成功")
         print("[OK] 策略已添加")
 
@@ -0,0 +1,185 @@
+"""
+Polymarket 多市场做市 - 行情只接入一次，报价计算分散到多个工作进程
+
+架构：
+- 本进程：唯一的 TradingNode（行情 + 执行 + RiskEngine），FanoutGatewayStrategy 负责
+  把顶档更新写入共享内存、执行工作进程返回的报价请求
+- 报价工作进程：每个进程负责一部分市场（见 strategies/quote_workers.py）
+
+环境变量：
+- MARKET_SLUGS: 逗号分隔的市场 slug，如 btc-updown-15m-1767225600,eth-updown-15m-1767225600
+- QUOTE_WORKERS: 报价工作进程数（默认 CPU 核数 - 1）
+- ORDER_SIZE: 每单数量（默认 5）
+- RISK_PRESET: 风险预设（同 run_15m_market.py）
+- BOOK_BUS_NAME: 订单簿快照总线名称（默认关闭；设置后发布，如 polymarket_book_multi）
+- RECONCILE_ON_START: 启动前撤销这些市场中遗留的挂单（默认 1）
+- RECONCILE_LOOKBACK_MINS: 启动对账的成交回看窗口，分钟（默认 60）
+
+运行: MARKET_SLUGS=... python run_multi_market.py
+"""
+
+import os
+import sys
+
+from run_15m_market import ensure_api_credentials, get_market_info, load_env, reconcile_on_start
+
+
+def load_markets(slugs):
+    """查询每个 slug 的 condition / token，本轮开始时间从 slug 解析"""
+    markets = []
+    for slug in slugs:
+        info = get_market_info(slug)
+        if info is None:
+            print(f"[WARN] 跳过市场（查询失败）: {slug}")
+            continue
+        condition_id, token_id, question = info
+        markets.append({
+            'slug': slug,
+            'condition_id': condition_id,
+            'token_id': token_id,
+            'question': question,
+            'round_start_ts': int(slug.rsplit('-', 1)[-1]),
+        })
+    return markets
+
+
+def main():
+    """主函数 - 多市场做市"""
+    print("=" * 80)
+    print("Polymarket 多市场做市（多进程报价）")
+    print("=" * 80)
+
+    slugs = [s.strip() for s in os.getenv('MARKET_SLUGS', '').split(',') if s.strip()]
+    if not slugs:
+        print("[ERROR] 未配置 MARKET_SLUGS")
+        return 1
+
+    private_key = load_env()
+    if not private_key:
+        print("[ERROR] 未找到私钥（POLYMARKET_PK）")
+        return 1
+    if not ensure_api_credentials(private_key, force_regenerate=True):
+        print("[ERROR] API 凭证获取失败，程序退出")
+        return 1
+
+    markets = load_markets(slugs)
+    if not markets:
+        print("[ERROR] 没有可用的市场")
+        return 1
+
+    from nautilus_trader.adapters.polymarket import (
+        POLYMARKET,
+        PolymarketDataClientConfig,
+        PolymarketExecClientConfig,
+        PolymarketLiveDataClientFactory,
+        PolymarketLiveExecClientFactory,
+    )
+    from nautilus_trader.adapters.polymarket.common.symbol import get_polymarket_instrument_id
+    from nautilus_trader.config import InstrumentProviderConfig, LiveExecEngineConfig, LoggingConfig, TradingNodeConfig
+    from nautilus_trader.live.node import TradingNode
+    from nautilus_trader.model.identifiers import InstrumentId, TraderId
+    from config.risk_config import DEFAULT_PRESET, get_risk_preset
+    from strategies.fanout_gateway import FanoutGatewayConfig, FanoutGatewayStrategy
+
+    try:
+        from patches import balance_oracle, batch_orders_patch, order_signing_cache, rate_limiter
+        balance_oracle.patch_nautilus_balance_oracle()
+        batch_orders_patch.patch_nautilus_batch_orders()
+        order_signing_cache.patch_nautilus_order_signing()
+        rate_limiter.patch_nautilus_rate_limits()
+        print("[OK] NautilusTrader 补丁已应用")
+    except Exception as e:
+        print(f"[WARN] 补丁应用失败: {e}")
+
+    instrument_ids = [
+        str(get_polymarket_instrument_id(m['condition_id'], m['token_id'])) for m in markets
+    ]
+
+    # 启动对账：所有市场的未结订单一次拉取，成交按市场并发拉取，遗留订单分批撤销
+    reconcile_lookback_mins = int(os.getenv('RECONCILE_LOOKBACK_MINS', '60'))
+    reconcile_on_start(
+        private_key, [(m['condition_id'], m['token_id']) for m in markets], reconcile_lookback_mins
+    )
+
+    order_size = int(os.getenv('ORDER_SIZE', '5'))
+    n_workers = int(os.getenv('QUOTE_WORKERS', '0')) or None
+
+    risk_preset_name = os.getenv('RISK_PRESET', DEFAULT_PRESET)
+    risk_preset = get_risk_preset(risk_preset_name, instrument_ids)
+    max_inventory = int(risk_preset['strategy'].max_position_size)
+    print(
+        f"[OK] 风险预设: {risk_preset_name}（单订单上限 {risk_preset['max_notional_per_order']} USDC，"
+        f"库存上限 {max_inventory} 个，日亏损上限 {risk_preset['strategy'].max_daily_pnl_loss} USDC）"
+    )
+
+    gateway_config = FanoutGatewayConfig(
+        instrument_ids=instrument_ids,
+        markets=[
+            {'round_start_ts': m['round_start_ts'], 'order_size': order_size, 'max_inventory': max_inventory}
+            for m in markets
+        ],
+        n_workers=n_workers,
+        book_bus_name=os.getenv('BOOK_BUS_NAME') or None,
+        max_daily_loss=risk_preset['strategy'].max_daily_pnl_loss,
+    )
+
+    client_kwargs = dict(
+        private_key=private_key,
+        signature_type=2,  # Magic Wallet
+        funder=os.getenv('POLYMARKET_FUNDER'),
+    )
+    node_config = TradingNodeConfig(
+        trader_id=TraderId("POLYMARKET-MULTI-001"),
+        data_clients={
+            POLYMARKET: PolymarketDataClientConfig(
+                **client_kwargs,
+                instrument_provider=InstrumentProviderConfig(load_ids=frozenset(instrument_ids)),
+            ),
+        },
+        exec_clients={
+            POLYMARKET: PolymarketExecClientConfig(
+                **client_kwargs,
+                api_key=os.environ['POLYMARKET_API_KEY'],
+                api_secret=os.environ['POLYMARKET_API_SECRET'],
+                passphrase=os.environ['POLYMARKET_PASSPHRASE'],
+            ),
+        },
+        risk_engine=risk_preset['risk_engine'],
+        exec_engine=LiveExecEngineConfig(
+            reconciliation=True,
+            reconciliation_lookback_mins=reconcile_lookback_mins,
+            reconciliation_instrument_ids=[InstrumentId.from_str(i) for i in instrument_ids],
+            purge_closed_orders_interval_mins=15,
+            purge_closed_orders_buffer_mins=60,
+            purge_closed_positions_interval_mins=15,
+            purge_closed_positions_buffer_mins=60,
+            purge_account_events_interval_mins=15,
+            purge_account_events_lookback_mins=60,
+        ),
+        logging=LoggingConfig(log_level="WARNING"),
+    )
+
+    node = TradingNode(config=node_config)
+    gateway = FanoutGatewayStrategy(gateway_config)
+    node.trader.add_strategy(gateway)
+    node.add_data_client_factory(POLYMARKET, PolymarketLiveDataClientFactory)
+    node.add_exec_client_factory(POLYMARKET, PolymarketLiveExecClientFactory)
+    node.build()
+
+    for m, instrument_id in zip(markets, instrument_ids):
+        print(f"  [{m['slug']}] {instrument_id}")
+    print(f"[OK] {len(markets)} 个市场，报价工作进程 {gateway.pool.n_workers} 个")
+    print("[WARN] 这是真实交易模式！按 Ctrl+C 停止")
+
+    try:
+        node.run()
+    except KeyboardInterrupt:
+        print("\n[INFO] 正在停止...")
+    finally:
+        gateway.pool.stop()
+        node.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,13 +12,17 @@ Polymarket 做市策略 - 简化版
 import os
 import sys
 import json
-import requests
 from pathlib import Path
 from decimal import Decimal
 
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
+import patches  # noqa: E402
+from patches import http_transport  # noqa: E402  共享连接池（keep-alive）
+
+patches.apply_patches()
+
 
 def load_env():
     """加载私钥"""
@@ -76,7 +80,7 @@ def get_market_info(slug: str):
     url = f"https://gamma-api.polymarket.com/markets/slug/{slug}"
 
     try:
-        response = requests.get(url, timeout=5)
+        response = http_transport.get(url, timeout=5)
         response.raise_for_status()
 
         market = response.json()
@@ -69,6 +69,7 @@ try:
     import sys
     sys.path.insert(0, os.getcwd())
     import patches
+    patches.apply_patches()
     print("    SUCCESS - patches module imported")
 except Exception as e:
     print(f"    FAILED - {e}")
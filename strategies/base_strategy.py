@@ -10,6 +10,7 @@
 """
 
 from decimal import Decimal
+import math
 import threading
 
 from nautilus_trader.trading.strategy import Strategy
@@ -19,6 +20,13 @@ from nautilus_trader.model.identifiers import OrderListId
 from nautilus_trader.model.enums import OrderSide, TimeInForce, BookType
 from nautilus_trader.model.objects import Quantity, Price, Money
 
+from .book_bus import BookSnapshotBus
+from .book_features import OrderBookFeatures
+from .event_actor import EventActor, route_handlers
+from .markout import MarkoutTracker, format_report
+from .memory_monitor import MemoryMonitor
+from .tick_store import TickStore
+
 
 class BaseStrategy(Strategy):
     """
@@ -26,8 +34,58 @@ class BaseStrategy(Strategy):
 
     封装常用功能，确保正确使用 NautilusTrader API
     充分利用 Portfolio、BettingAccount、RiskEngine 等框架能力
+
+    事件派发：
+    - ACTOR_HANDLERS 中的方法（含子类覆盖的版本）都经由 self.actor 串行处理，
+      无论调用来自事件循环、定时器线程还是参考价源线程
+    - 订单簿 / 定时器可合并：积压时只处理最新的一次
     """
 
+    # {方法名: 合并键}，合并键为 None 表示按顺序逐个处理
+    ACTOR_HANDLERS = {
+        'on_order_book': 'order_book',
+        'on_timer': 'timer',
+        'on_order_book_deltas': None,
+        'on_trade_tick': None,
+        'on_order_filled': None,
+        'on_order_rejected': None,
+        'on_order_canceled': None,
+    }
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        route_handlers(cls, cls.ACTOR_HANDLERS)
+
+    def __init__(self, config=None):
+        super().__init__(config)
+
+        # 单写者事件派发（use_event_actor=False 时直接调用，便于排查问题）
+        self.actor = None
+        if getattr(config, 'use_event_actor', True):
+            self.actor = EventActor(on_error=lambda message: self.log.warning(message))
+
+        # 增量盘口特征（由 on_order_book_deltas 维护，策略直接读取）
+        self.book_features = OrderBookFeatures()
+
+        # 订单簿快照总线（book_bus_name 为空时关闭；旁路进程见 book_bus.py）
+        self.book_bus_name = getattr(config, 'book_bus_name', None)
+        self.book_bus_depth = getattr(config, 'book_bus_depth', BookSnapshotBus.DEFAULT_DEPTH)
+        self.book_bus = None
+        self._book_bus_slot = None
+
+        # 盘口时间序列（预分配数组，多个信号共享）
+        self.tick_store = TickStore(
+            capacity=getattr(config, 'tick_store_capacity', TickStore.DEFAULT_CAPACITY),
+        )
+
+        # 成交 markout（成交后 +1s/+5s/+30s/+60s 的中间价变动，衡量逆向选择）
+        self.markouts = MarkoutTracker()
+
+        # 内存监控（定时器中按间隔报告 RSS 和各组件规模）
+        self.memory_monitor = MemoryMonitor(
+            interval_secs=getattr(config, 'memory_report_interval_secs', MemoryMonitor.DEFAULT_INTERVAL_SECS),
+        )
+
     # ========== 生命周期管理 ==========
 
     def on_start(self):
@@ -70,12 +128,19 @@ class BaseStrategy(Strategy):
                 f"  最小数量: {self.instrument.min_quantity}\n"
                 f"  最大数量: {self.instrument.max_quantity}\n"
             )
+
+            # 按 instrument 的最小价格变动重建价格阶梯
+            self.book_features.reset(tick_size=self.instrument.price_increment.as_double())
+            self.start_book_bus()
         except Exception as e:
             self.log.error(f"[ERROR] Failed to get instrument: {e}")
             import traceback
             self.log.error(f"[ERROR] Traceback: {traceback.format_exc()[:500]}")
             return
 
+        # 注册内存探针（报告由定时器按间隔触发）
+        self.register_memory_probes()
+
         # ========== Step 3: 订阅数据 ==========
         self.log.info("[DEBUG] Step 3: Subscribing to data...")
         try:
@@ -128,17 +193,36 @@ class BaseStrategy(Strategy):
         self.log.info(f"策略停止: {self.id}")
         self.log.info("=" * 80)
 
-        # 停止定时器
-        self._stop_timer_flag = True
+        self.stop_event_dispatch()
         if self._timer_thread:
             self._timer_thread.join(timeout=2.0)  # 等待最多2秒
 
         # 打印最终状态
         self.print_account_summary()
         self.print_position_summary()
+        self.print_markout_report()
 
         # 取消所有订单
         self.cancel_all_orders(self.instrument_id)
+        self.close_book_bus()
+
+    def stop_event_dispatch(self):
+        """
+        停止定时器和事件派发（可重复调用）
+
+        返回后不会再有报价 / 定时器逻辑在其他线程中执行；子类的 on_stop 如果在
+        super().on_stop() 之前读写策略状态，应先调用本方法
+        """
+        self._stop_timer_flag = True
+        if self.actor is None or self.actor.closed:
+            return
+
+        dropped = self.actor.close()
+        stats = self.actor.stats()
+        self.log.info(
+            f"[ACTOR] 已处理 {stats['processed']}，合并 {stats['coalesced']}，"
+            f"失败 {stats['errors']}，最大积压 {stats['max_depth']}，停止时丢弃 {dropped}"
+        )
 
     # ========== 数据订阅 ==========
 
@@ -158,6 +242,77 @@ class BaseStrategy(Strategy):
 
         self.log.info("[OK] 数据订阅完成")
 
+    def on_order_book_deltas(self, deltas):
+        """订单簿增量：更新盘口特征（每批增量只刷新一次），推进 markout"""
+        self.book_features.apply_deltas(deltas)
+
+        if self.book_features.is_valid:
+            self.markouts.on_mid(self.clock.timestamp_ns(), self.book_features.mid)
+
+        if self.book_bus is not None:
+            self.book_bus.publish(
+                self._book_bus_slot,
+                self.clock.timestamp_ns(),
+                *self.book_features.top_levels(self.book_bus.depth),
+            )
+
+    # ========== 订单簿快照总线 ==========
+
+    def start_book_bus(self):
+        """创建快照总线并登记本策略的 instrument（失败只告警，不影响交易）"""
+        if not self.book_bus_name or self.book_bus is not None:
+            return
+        try:
+            self.book_bus = BookSnapshotBus.create(self.book_bus_name, depth=self.book_bus_depth)
+            self._book_bus_slot = self.book_bus.register(str(self.instrument_id))
+            self.log.info(f"[BOOK_BUS] 发布前 {self.book_bus.depth} 档快照到共享内存 {self.book_bus.name}")
+        except Exception as e:
+            self.log.warning(f"[BOOK_BUS] 快照总线创建失败（已关闭）: {e}")
+            self.close_book_bus()
+
+    def close_book_bus(self):
+        if self.book_bus is None:
+            return
+        self.log.info(f"[BOOK_BUS] 已发布 {self.book_bus.stats()}")
+        self.book_bus.close()
+        self.book_bus = None
+
+    def record_tick(self, mid):
+        """记录一行盘口时间序列：中间价 + 当前盘口特征"""
+        features = self.book_features
+        self.tick_store.append(
+            self.clock.timestamp_ns(),
+            float(mid),
+            best_bid=features.best_bid if features.best_bid is not None else math.nan,
+            best_ask=features.best_ask if features.best_ask is not None else math.nan,
+            bid_depth=features.bid_depth,
+            ask_depth=features.ask_depth,
+        )
+
+    def on_timer(self):
+        """定时器每秒调用一次（子类可覆盖，用于低频后台任务）"""
+        pass
+
+    def time_to_expiry_secs(self) -> float:
+        """距离到期的秒数（用于 markout 分组；无到期概念的策略返回 NaN）"""
+        return math.nan
+
+    # ========== 内存监控 ==========
+
+    def register_memory_probes(self):
+        """注册内存探针（子类可扩展，记得调用 super()）"""
+        self.memory_monitor.register("cache_orders", self.cache.orders_total_count)
+        self.memory_monitor.register("cache_orders_closed", self.cache.orders_closed_count)
+        self.memory_monitor.register("cache_positions", self.cache.positions_total_count)
+        self.memory_monitor.register(
+            "book_features_bytes",
+            lambda: self.book_features._bids.nbytes + self.book_features._asks.nbytes,
+        )
+        self.memory_monitor.register("tick_store_bytes", lambda: self.tick_store.nbytes)
+        self.memory_monitor.register("markout_fills", lambda: len(self.markouts.fills))
+        if self.actor is not None:
+            self.memory_monitor.register("actor_max_depth", lambda: self.actor.max_depth)
+
     # ========== Portfolio 相关方法 ==========
 
     def get_current_position(self):
@@ -397,6 +552,35 @@ class BaseStrategy(Strategy):
         self.submit_order_list(order_list)
         self.log.info(f"[OK] OCO 订单已提交: {order_list.order_list_id}")
 
+    # ========== 批量报价相关方法 ==========
+
+    def replace_quotes(self, orders):
+        """
+        撤单-重挂：一次批量撤销本策略在该 instrument 上的挂单，再一次批量提交新报价
+
+        - 撤单：BatchCancelOrders → DELETE /orders（一次请求）
+        - 下单：SubmitOrderList → POST /orders（见 patches/batch_orders_patch.py）
+
+        Args:
+            orders: 新报价订单列表（同一 instrument）
+        """
+        open_orders = self.cache.orders_open(
+            instrument_id=self.instrument_id,
+            strategy_id=self.id,
+        )
+        if open_orders:
+            self.cancel_orders(open_orders)
+
+        order_list = OrderList(
+            order_list_id=OrderListId(f"QUOTES_{self.clock.timestamp_ns()}"),
+            orders=list(orders),
+        )
+
+        self.submit_order_list(order_list)
+        self.log.debug(
+            f"[BATCH] 撤销 {len(open_orders)} 个挂单，提交 {len(order_list.orders)} 个报价"
+        )
+
     # ========== 事件处理 ==========
 
     def on_order_filled(self, event):
@@ -415,6 +599,15 @@ class BaseStrategy(Strategy):
             f"{'='*60}"
         )
 
+        self.markouts.on_fill(
+            ts_ns=self.clock.timestamp_ns(),
+            is_buy=event.order_side == OrderSide.BUY,
+            price=event.last_px.as_double(),
+            quantity=event.last_qty.as_double(),
+            spread=self.book_features.spread,
+            tte_secs=self.time_to_expiry_secs(),
+        )
+
         # 打印仓位更新（Portfolio 自动维护）
         self.print_position_summary()
 
@@ -494,6 +687,20 @@ class BaseStrategy(Strategy):
             f"{'='*60}"
         )
 
+    def print_markout_report(self):
+        """打印成交 markout 报表（按方向 / 价差区间 / 剩余时间分组）"""
+        if not self.markouts.fills:
+            return
+
+        self.log.info(
+            f"\n"
+            f"{'='*60}\n"
+            f"[MARKOUT] 成交标记（均值 / 不利比例）\n"
+            f"{'='*60}\n"
+            f"{format_report(self.markouts.summary())}\n"
+            f"{'='*60}"
+        )
+
     def print_order_book_snapshot(self, depth=5):
         """打印订单簿快照"""
         book = self.get_order_book()
@@ -563,7 +770,7 @@ class BaseStrategy(Strategy):
                 self.log.info("[TIMER] Timer stopped (flag=True)")
                 return  # 停止循环
 
-            # 执行策略逻辑
+            # 执行策略逻辑（经由事件派发，与事件循环中的处理串行）
             try:
                 order_book = self.cache.order_book(self.instrument_id)
                 if order_book and hasattr(self, 'on_order_book'):
@@ -576,6 +783,16 @@ class BaseStrategy(Strategy):
                     self.log.warning(f"[TIMER] Error in timer callback: {e}")
                     self._timer_error_count += 1
 
+            try:
+                self.memory_monitor.maybe_report(self.log)
+            except Exception as e:
+                self.log.warning(f"[MEMORY] 内存报告失败: {e}")
+
+            try:
+                self.on_timer()
+            except Exception as e:
+                self.log.warning(f"[TIMER] on_timer 失败: {e}")
+
             # 重新设置定时器（1秒后）
             if not self._stop_timer_flag:
                 try:
@@ -597,3 +814,7 @@ class BaseStrategy(Strategy):
             import traceback
             self.log.error(f"[TIMER] Traceback: {traceback.format_exc()[:500]}")
             raise
+
+
+# BaseStrategy 自身定义的事件方法也要经由派发（子类由 __init_subclass__ 处理）
+route_handlers(BaseStrategy, BaseStrategy.ACTOR_HANDLERS)
@@ -0,0 +1,442 @@
+"""
+共享内存订单簿快照总线 - 交易进程发布前 N 档快照，旁路进程零拷贝读取
+
+用途：
+- 记录器、监控指标导出、研究 notebook 需要同一份盘口数据，
+  不再各自订阅行情，也不在策略线程上做额外工作
+- 发布方（交易进程）每批增量后写入一次前 N 档；读取方在自己的进程里按需读取，
+  发布方不等待、不感知读取方
+
+内存布局（一块 multiprocessing.shared_memory）：
+- 64 字节头部 int64：[魔数, 版本, 最大品种数, 档位数 N, 每品种环长度, 已登记品种数, 发布方已关闭, 发布方 pid]
+- 品种名表：最大品种数 × NAME_BYTES 字节（instrument_id 字符串）
+- 每品种写序号 int64：已发布快照总数
+- 快照环：(最大品种数, 环长度) 条定长记录（seq、ts_ns、买卖各 N 档价格 / 数量）
+
+seqlock：
+- 第 n 条快照写入环位置 n % 环长度；写入前 seq = 2n+1（奇数 = 写入中），写完 seq = 2n+2
+- 读取方先读 seq、再复制记录、再读 seq，两次都等于 2n+2 才算有效快照，否则重试
+- 只有一个写者，读取方从不写共享内存，因此任意多个读取方互不影响、也不影响发布方
+- 依赖 CPython 按顺序执行字段写入、x86 存储顺序（同 shm_ring.py）
+
+读取方只复制要用的那条快照（几百字节）；view() 直接返回共享内存上的数组视图，
+调用方自行用 seq 校验
+
+运行（旁路进程）：
+    python -m strategies.book_bus watch                   # 每秒打印各品种最新顶档
+    python -m strategies.book_bus record -o book.csv      # 逐条记录所有快照
+"""
+
+import argparse
+import csv
+import math
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .shm_ring import untrack_shared_memory
+
+
+HEADER_BYTES = 64
+NAME_BYTES = 192            # Polymarket instrument_id 约 150 字符
+MAGIC = 0x4B4F4F42          # b'BOOK'
+VERSION = 1
+_MAGIC, _VERSION, _MAX_INSTRUMENTS, _DEPTH, _RING_LEN, _N_INSTRUMENTS, _CLOSED, _PID = range(8)
+
+
+def snapshot_dtype(depth: int) -> np.dtype:
+    """N 档快照记录（缺失档位价格为 NaN、数量为 0）"""
+    return np.dtype([
+        ('seq', np.int64),
+        ('ts_ns', np.int64),
+        ('bid_px', np.float64, (depth,)),
+        ('bid_sz', np.float64, (depth,)),
+        ('ask_px', np.float64, (depth,)),
+        ('ask_sz', np.float64, (depth,)),
+    ])
+
+
+class BookSnapshotBus:
+    """
+    订单簿快照总线（单写者 / 多读者）
+
+    用法：
+        bus = BookSnapshotBus.create(depth=5)                     # 交易进程
+        slot = bus.register(str(instrument_id))
+        bus.publish(slot, ts_ns, *features.top_levels(bus.depth))
+
+        bus = BookSnapshotBus.attach()                            # 旁路进程
+        snapshot = bus.latest(bus.index_of(instrument_id))
+        records, cursor, lost = bus.read_since(slot, cursor)
+    """
+
+    DEFAULT_NAME = "polymarket_book"
+    DEFAULT_DEPTH = 5
+    DEFAULT_RING_LEN = 1024             # 每品种最近 1024 条快照（记录器按 0.2 秒轮询足够）
+    DEFAULT_MAX_INSTRUMENTS = 16
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._header = np.ndarray((8,), dtype=np.int64, buffer=shm.buf, offset=0)
+        if int(self._header[_MAGIC]) != MAGIC or int(self._header[_VERSION]) != VERSION:
+            del self._header
+            raise ValueError(f"不是订单簿快照总线（或版本不兼容）: {shm.name}")
+
+        max_instruments, depth, ring_len = (
+            int(self._header[i]) for i in (_MAX_INSTRUMENTS, _DEPTH, _RING_LEN)
+        )
+        self.depth = depth
+        self.ring_len = ring_len
+        self.dtype = snapshot_dtype(depth)
+
+        offset = HEADER_BYTES
+        self._names = np.ndarray((max_instruments,), dtype=f'S{NAME_BYTES}', buffer=shm.buf, offset=offset)
+        offset += max_instruments * NAME_BYTES
+        self._cursors = np.ndarray((max_instruments,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += max_instruments * 8
+        self._slots = np.ndarray((max_instruments, ring_len), dtype=self.dtype, buffer=shm.buf, offset=offset)
+
+        # 字段视图（写入时逐字段赋值，不构造临时记录）
+        self._seq = self._slots['seq']
+        self._ts = self._slots['ts_ns']
+        self._bid_px = self._slots['bid_px']
+        self._bid_sz = self._slots['bid_sz']
+        self._ask_px = self._slots['ask_px']
+        self._ask_sz = self._slots['ask_sz']
+
+    @staticmethod
+    def segment_size(max_instruments: int, depth: int, ring_len: int) -> int:
+        return (
+            HEADER_BYTES
+            + max_instruments * (NAME_BYTES + 8)
+            + max_instruments * ring_len * snapshot_dtype(depth).itemsize
+        )
+
+    @classmethod
+    def create(
+        cls,
+        name: str = DEFAULT_NAME,
+        depth: int = DEFAULT_DEPTH,
+        ring_len: int = DEFAULT_RING_LEN,
+        max_instruments: int = DEFAULT_MAX_INSTRUMENTS,
+        replace: bool = True,
+    ) -> 'BookSnapshotBus':
+        """
+        创建总线
+
+        Args:
+            replace: 同名共享内存已存在且是残留（发布方已关闭、或发布进程已不存在）时删除后重建；
+                仍有发布方在用时抛出 FileExistsError（不接管另一个进程正在发布的总线）
+        """
+        if depth <= 0 or ring_len <= 0 or max_instruments <= 0:
+            raise ValueError(f"参数必须为正数: depth={depth}, ring_len={ring_len}, max_instruments={max_instruments}")
+
+        size = cls.segment_size(max_instruments, depth, ring_len)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            if not replace:
+                raise
+            existing = shared_memory.SharedMemory(name=name)
+            untrack_shared_memory(existing)
+            publisher_pid = _live_publisher(existing)
+            existing.close()
+            if publisher_pid is not None:
+                raise FileExistsError(f"共享内存 {name} 正由进程 {publisher_pid} 发布，请换一个 BOOK_BUS_NAME")
+            try:
+                shared_memory.SharedMemory(name=name).unlink()
+            except FileNotFoundError:
+                pass
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((8,), dtype=np.int64, buffer=shm.buf, offset=0)
+        header[:] = (MAGIC, VERSION, max_instruments, depth, ring_len, 0, 0, os.getpid())
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_NAME, untrack: bool = True) -> 'BookSnapshotBus':
+        """
+        附加到已有总线（读取方）
+
+        Args:
+            untrack: 独立启动的旁路进程保持 True；与发布方同一进程 / multiprocessing 子进程传 False，
+                见 shm_ring.untrack_shared_memory()
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            untrack_shared_memory(shm)
+        try:
+            return cls(shm, owner=False)
+        except ValueError:
+            shm.close()
+            raise
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def max_instruments(self) -> int:
+        return len(self._names)
+
+    @property
+    def publisher_closed(self) -> bool:
+        """发布方已停止（读取方应重新 attach 等待下一轮的总线）"""
+        return bool(self._header[_CLOSED])
+
+    # ========== 品种登记 ==========
+
+    def register(self, instrument_id: str) -> int:
+        """登记品种并返回其编号（发布方调用；重复登记返回原编号）"""
+        existing = self.index_of(instrument_id)
+        if existing is not None:
+            return existing
+
+        count = int(self._header[_N_INSTRUMENTS])
+        if count >= self.max_instruments:
+            raise ValueError(f"品种数超过上限 {self.max_instruments}")
+
+        encoded = str(instrument_id).encode()
+        if len(encoded) > NAME_BYTES:
+            raise ValueError(f"instrument_id 过长（>{NAME_BYTES} 字节）: {instrument_id}")
+
+        self._names[count] = encoded
+        self._header[_N_INSTRUMENTS] = count + 1  # 名称写完再公布
+        return count
+
+    def instruments(self) -> list[str]:
+        return [name.decode() for name in self._names[:int(self._header[_N_INSTRUMENTS])]]
+
+    def index_of(self, instrument_id: str):
+        """品种编号，未登记返回 None"""
+        try:
+            return self.instruments().index(str(instrument_id))
+        except ValueError:
+            return None
+
+    # ========== 发布方 ==========
+
+    def publish(self, slot: int, ts_ns: int, bid_px, bid_sz, ask_px, ask_sz) -> int:
+        """
+        发布一条快照（各数组长度 <= depth，买盘价格降序、卖盘价格升序）
+
+        Returns:
+            该快照的序号 n（从 0 开始）
+        """
+        n = int(self._cursors[slot])
+        pos = n % self.ring_len
+
+        self._seq[slot, pos] = 2 * n + 1
+        self._ts[slot, pos] = ts_ns
+        self._write_side(self._bid_px[slot, pos], self._bid_sz[slot, pos], bid_px, bid_sz)
+        self._write_side(self._ask_px[slot, pos], self._ask_sz[slot, pos], ask_px, ask_sz)
+        self._seq[slot, pos] = 2 * n + 2
+
+        self._cursors[slot] = n + 1
+        return n
+
+    @staticmethod
+    def _write_side(px_out, sz_out, px, sz):
+        k = min(len(px), len(px_out))
+        px_out[:k] = px[:k]
+        sz_out[:k] = sz[:k]
+        px_out[k:] = math.nan
+        sz_out[k:] = 0.0
+
+    # ========== 读取方 ==========
+
+    def published(self, slot: int) -> int:
+        """该品种已发布的快照总数"""
+        return int(self._cursors[slot])
+
+    def read(self, slot: int, n: int, max_retries: int = 100):
+        """
+        读取第 n 条快照（副本）
+
+        Returns:
+            记录（np.void）；尚未发布或已被覆盖返回 None
+        """
+        pos = n % self.ring_len
+        expected = 2 * n + 2
+        for _ in range(max_retries):
+            seq = int(self._seq[slot, pos])
+            if seq == expected - 1:
+                continue            # 写入中
+            if seq != expected:
+                return None         # 尚未发布（更小）或已被覆盖（更大）
+            record = self._slots[slot, pos:pos + 1].copy()[0]
+            if int(self._seq[slot, pos]) == expected:
+                return record
+        return None
+
+    def latest(self, slot: int, max_retries: int = 100):
+        """最新一条快照（副本），尚无快照返回 None"""
+        for _ in range(max_retries):
+            n = int(self._cursors[slot]) - 1
+            if n < 0:
+                return None
+            record = self.read(slot, n)
+            if record is not None:
+                return record
+            # 读取期间发布方绕环一圈覆盖了该位置，按新的写序号重试
+        return None
+
+    def read_since(self, slot: int, cursor: int):
+        """
+        读取序号 >= cursor 的所有快照（按序号升序，批量复制）
+
+        Returns:
+            (records, next_cursor, lost)：lost 为读取方落后超过一圈而被覆盖的快照数
+        """
+        end = int(self._cursors[slot])
+        start = max(int(cursor), end - self.ring_len)
+        if start >= end:
+            return self._slots[slot, :0].copy(), max(int(cursor), end), max(0, start - int(cursor))
+
+        numbers = np.arange(start, end, dtype=np.int64)
+        positions = numbers % self.ring_len
+        records = self._slots[slot, positions]   # 花式索引即副本
+        expected = 2 * numbers + 2
+        valid = (records['seq'] == expected) & (self._seq[slot, positions] == expected)
+        # 只有环最旧的一端会在复制期间被覆盖
+        return records[valid], end, (start - int(cursor)) + int((~valid).sum())
+
+    def view(self, slot: int) -> np.ndarray:
+        """该品种快照环的共享内存视图（零拷贝；记录可能正在写入，需按 seq 校验）"""
+        return self._slots[slot]
+
+    def stats(self) -> dict:
+        return {name: self.published(slot) for slot, name in enumerate(self.instruments())}
+
+    # ========== 释放 ==========
+
+    def close(self):
+        """解除映射；发布方同时标记关闭并删除共享内存（读取方已有的映射仍可读完）"""
+        if self._shm is None:
+            return
+        if self._owner:
+            self._header[_CLOSED] = 1
+        del self._header, self._names, self._cursors, self._slots
+        del self._seq, self._ts, self._bid_px, self._bid_sz, self._ask_px, self._ask_sz
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+
+def _live_publisher(shm: shared_memory.SharedMemory):
+    """同名共享内存的发布方仍在运行时返回其 pid，残留（已关闭 / 进程不存在 / 非总线）返回 None"""
+    if shm.size < HEADER_BYTES:
+        return None
+    header = np.ndarray((8,), dtype=np.int64, buffer=shm.buf, offset=0)
+    try:
+        if int(header[_MAGIC]) != MAGIC or int(header[_CLOSED]):
+            return None
+        pid = int(header[_PID])
+    finally:
+        del header
+    if pid <= 0:
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass  # 进程存在但属于其他用户
+    return pid
+
+
+# ========== 旁路进程工具 ==========
+
+def _attach_when_available(name: str, poll_secs: float):
+    """等待发布方创建总线（两轮之间总线会短暂不存在）"""
+    while True:
+        try:
+            return BookSnapshotBus.attach(name)
+        except (FileNotFoundError, ValueError):
+            time.sleep(poll_secs)
+
+
+def watch(name: str, interval_secs: float = 1.0):
+    """每隔 interval_secs 打印各品种最新顶档"""
+    bus = _attach_when_available(name, interval_secs)
+    while True:
+        if bus.publisher_closed:
+            bus.close()
+            print("[BOOK_BUS] 发布方已停止，等待下一轮...")
+            bus = _attach_when_available(name, interval_secs)
+
+        for slot, instrument_id in enumerate(bus.instruments()):
+            snapshot = bus.latest(slot)
+            if snapshot is None:
+                continue
+            print(
+                f"[BOOK_BUS] {instrument_id[-24:]} #{bus.published(slot) - 1} "
+                f"bid {snapshot['bid_px'][0]:.3f} x {snapshot['bid_sz'][0]:.0f} | "
+                f"ask {snapshot['ask_px'][0]:.3f} x {snapshot['ask_sz'][0]:.0f}"
+            )
+        time.sleep(interval_secs)
+
+
+def record(name: str, output: str, interval_secs: float = 0.2):
+    """把所有快照逐条追加到 CSV（落后超过一圈时记录丢失数量）"""
+    bus = _attach_when_available(name, interval_secs)
+    cursors = {}
+    depth = bus.depth
+    with open(output, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if f.tell() == 0:
+            writer.writerow(
+                ['ts_ns', 'instrument_id', 'seq']
+                + [f'{side}_{field}_{i + 1}' for side in ('bid', 'ask') for field in ('px', 'sz') for i in range(depth)]
+            )
+
+        while True:
+            if bus.publisher_closed:
+                bus.close()
+                cursors.clear()
+                bus = _attach_when_available(name, interval_secs)
+                if bus.depth != depth:
+                    raise ValueError(f"档位数变化（{depth} -> {bus.depth}），请换一个输出文件")
+
+            for slot, instrument_id in enumerate(bus.instruments()):
+                records, cursors[slot], lost = bus.read_since(slot, cursors.get(slot, 0))
+                if lost:
+                    print(f"[BOOK_BUS] {instrument_id[-24:]} 落后，丢失 {lost} 条快照")
+                for r in records:
+                    writer.writerow(
+                        [int(r['ts_ns']), instrument_id, int(r['seq']) // 2 - 1]
+                        + [f"{v:g}" for v in np.concatenate((r['bid_px'], r['bid_sz'], r['ask_px'], r['ask_sz']))]
+                    )
+            f.flush()
+            time.sleep(interval_secs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="订单簿快照总线读取工具")
+    parser.add_argument("command", choices=("watch", "record"))
+    parser.add_argument("--name", default=BookSnapshotBus.DEFAULT_NAME, help="共享内存名称（BOOK_BUS_NAME）")
+    parser.add_argument("-o", "--output", default="book_snapshots.csv", help="record 输出 CSV")
+    parser.add_argument("--interval", type=float, default=None, help="轮询间隔（秒）")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "watch":
+            watch(args.name, args.interval or 1.0)
+        else:
+            record(args.name, args.output, args.interval or 0.2)
+    except KeyboardInterrupt:
+        return 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+订单簿特征流水线 - 随增量更新维护盘口特征
+
+问题：
+- 策略每个 tick 都遍历 bids()[:5] / asks()[:5] 计算深度
+- 只使用 midpoint() 作为公允价值，忽略了盘口不平衡
+
+解决方案：
+- 订阅 OrderBookDeltas，在价格阶梯数组上 O(1) 应用每条增量
+- 每批增量结束后只刷新一次特征（前 N 档深度、不平衡、微观价格、价差）
+- 策略直接读取预计算好的特征
+
+Polymarket 价格在 [0, 1] 之间、按 tick（0.01/0.001）离散，
+因此用定长数组（下标 = 价格 / tick）表示价格阶梯，无需排序结构
+"""
+
+import numpy as np
+
+from nautilus_trader.model.enums import OrderSide
+
+
+class OrderBookFeatures:
+    """
+    增量盘口特征
+
+    特征（每批增量后刷新）：
+    - best_bid / best_ask / best_bid_size / best_ask_size
+    - bid_depth / ask_depth：前 N 个非空档位的数量之和
+    - mid / spread
+    - imbalance：(bid_depth - ask_depth) / (bid_depth + ask_depth)
+    - microprice：按对手盘顶档数量加权的中间价
+    - depth_weighted_mid：按前 N 档深度加权的中间价
+    """
+
+    def __init__(self, tick_size: float = 0.01, depth: int = 5, max_price: float = 1.0):
+        self.depth = int(depth)
+        self.max_price = float(max_price)
+        self.reset(tick_size)
+
+    def reset(self, tick_size: float = None):
+        """清空盘口（可同时切换 tick 大小）"""
+        if tick_size is not None:
+            self.tick_size = float(tick_size)
+
+        n_levels = int(round(self.max_price / self.tick_size)) + 1
+        self._bids = np.zeros(n_levels, dtype=np.float64)
+        self._asks = np.zeros(n_levels, dtype=np.float64)
+        self._best_bid_idx = -1          # -1 表示无买单
+        self._best_ask_idx = n_levels    # n_levels 表示无卖单
+
+        self.update_count = 0
+        self._clear_features()
+
+    def _clear_features(self):
+        self.best_bid = None
+        self.best_ask = None
+        self.best_bid_size = 0.0
+        self.best_ask_size = 0.0
+        self.bid_depth = 0.0
+        self.ask_depth = 0.0
+        self.mid = None
+        self.spread = None
+        self.imbalance = 0.0
+        self.microprice = None
+        self.depth_weighted_mid = None
+
+    @property
+    def is_valid(self) -> bool:
+        """双边都有报价且未交叉"""
+        return self.mid is not None
+
+    # ========== 增量应用 ==========
+
+    def apply_deltas(self, deltas):
+        """
+        应用一批增量（OrderBookDeltas 或 OrderBookDelta 列表），结束后刷新特征
+        """
+        for delta in getattr(deltas, 'deltas', deltas):
+            self.apply_delta(delta)
+
+        self.refresh()
+
+    def apply_delta(self, delta):
+        """应用单条增量（不刷新特征）"""
+        if delta.is_clear:
+            self._bids[:] = 0.0
+            self._asks[:] = 0.0
+            self._best_bid_idx = -1
+            self._best_ask_idx = len(self._asks)
+            return
+
+        order = delta.order
+        size = 0.0 if delta.is_delete else float(order.size)
+        self.set_level(order.side == OrderSide.BUY, order.price.as_double(), size)
+
+    def set_level(self, is_bid: bool, price: float, size: float):
+        """设置某一价位的数量（L2：size=0 表示删除该档）"""
+        idx = int(round(price / self.tick_size))
+        if idx < 0 or idx >= len(self._bids):
+            return
+
+        self.update_count += 1
+
+        if is_bid:
+            self._bids[idx] = size
+            if size > 0:
+                if idx > self._best_bid_idx:
+                    self._best_bid_idx = idx
+            elif idx == self._best_bid_idx:
+                nonzero = np.flatnonzero(self._bids[:idx])
+                self._best_bid_idx = int(nonzero[-1]) if len(nonzero) else -1
+        else:
+            self._asks[idx] = size
+            if size > 0:
+                if idx < self._best_ask_idx:
+                    self._best_ask_idx = idx
+            elif idx == self._best_ask_idx:
+                nonzero = np.flatnonzero(self._asks[idx + 1:])
+                self._best_ask_idx = int(nonzero[0]) + idx + 1 if len(nonzero) else len(self._asks)
+
+    # ========== 特征刷新 ==========
+
+    def refresh(self):
+        """根据当前价格阶梯刷新全部特征（每批增量一次）"""
+        self._clear_features()
+
+        bid_idx = self._best_bid_idx
+        ask_idx = self._best_ask_idx
+        has_bid = bid_idx >= 0
+        has_ask = ask_idx < len(self._asks)
+
+        if has_bid:
+            self.best_bid = bid_idx * self.tick_size
+            self.best_bid_size = float(self._bids[bid_idx])
+            levels = np.flatnonzero(self._bids[:bid_idx + 1])[-self.depth:]
+            self.bid_depth = float(self._bids[levels].sum())
+
+        if has_ask:
+            self.best_ask = ask_idx * self.tick_size
+            self.best_ask_size = float(self._asks[ask_idx])
+            levels = np.flatnonzero(self._asks[ask_idx:])[:self.depth] + ask_idx
+            self.ask_depth = float(self._asks[levels].sum())
+
+        total_depth = self.bid_depth + self.ask_depth
+        if total_depth > 0:
+            self.imbalance = (self.bid_depth - self.ask_depth) / total_depth
+
+        if not (has_bid and has_ask) or bid_idx >= ask_idx:
+            return
+
+        self.mid = (self.best_bid + self.best_ask) / 2
+        self.spread = self.best_ask - self.best_bid
+
+        top_size = self.best_bid_size + self.best_ask_size
+        self.microprice = (
+            self.best_bid * self.best_ask_size + self.best_ask * self.best_bid_size
+        ) / top_size
+
+        self.depth_weighted_mid = (
+            self.best_bid * self.ask_depth + self.best_ask * self.bid_depth
+        ) / total_depth
+
+    # ========== 盘口档位 ==========
+
+    def top_levels(self, n: int):
+        """
+        前 n 个非空档位（买盘价格降序、卖盘价格升序）
+
+        Returns:
+            (bid_px, bid_sz, ask_px, ask_sz)，各数组长度 <= n
+        """
+        bid_levels = np.flatnonzero(self._bids[:self._best_bid_idx + 1])[::-1][:n]
+        ask_levels = np.flatnonzero(self._asks[self._best_ask_idx:])[:n] + self._best_ask_idx
+        return (
+            bid_levels * self.tick_size,
+            self._bids[bid_levels],
+            ask_levels * self.tick_size,
+            self._asks[ask_levels],
+        )
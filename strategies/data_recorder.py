@@ -7,23 +7,44 @@
 3. 库存变化
 4. 价格历史
 5. 策略参数
+6. 结算结果（用于 markout 分析，见 markout.py）
 
-输出格式：CSV 文件（便于分析）
+输出格式：CSV 文件（便于分析）；每个会话登记到数据目录的会话目录（见 session_catalog.py）
+文件管理：按整点 / 大小轮转分段，已关闭分段后台压缩，保留策略见 recorder_storage.py
 """
 
 import csv
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from decimal import Decimal
 from datetime import datetime
 from typing import Any, Dict
 import json
+import sqlite3
+import time
+
+from .recorder_storage import apply_retention, compress_file, resolve_codec, segment_path
+from .session_catalog import CSV_KINDS, SessionCatalog
 
 
 class TradeDataRecorder:
     """交易数据记录器"""
 
-    def __init__(self, output_dir: str = "/app/data"):
+    def __init__(
+        self,
+        output_dir: str = "/app/data",
+        use_catalog: bool = True,
+        rotate_secs: int = 0,
+        rotate_bytes: int = 0,
+        codec: str = 'gzip',
+    ):
+        """
+        Args:
+            rotate_secs: 按整点对齐的轮转周期（3600 = 每小时，0 = 不按时间轮转）
+            rotate_bytes: 单个活动段的大小上限（0 = 不按大小轮转）
+            codec: 已关闭分段的压缩格式（gzip / zstd）
+        """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -36,6 +57,7 @@ class TradeDataRecorder:
         self.inventory_file = self.output_dir / f"inventory_{self.session_id}.csv"
         self.trades_file = self.output_dir / f"trades_{self.session_id}.csv"
         self.config_file = self.output_dir / f"config_{self.session_id}.json"
+        self.settlement_file = self.output_dir / f"settlement_{self.session_id}.json"
 
         # 初始化 CSV 文件
         self._init_csv_files()
@@ -43,6 +65,24 @@ class TradeDataRecorder:
         # 配置数据
         self.config_data = {}
 
+        # 会话目录：写入时只在内存中累计行数 / 时间范围，save_config / 结算 / close 时写入
+        self.catalog = None
+        if use_catalog:
+            try:
+                self.catalog = SessionCatalog(self.output_dir)
+            except sqlite3.Error as e:
+                print(f"[CATALOG] 会话目录不可用: {e}")
+        self._file_stats = {kind: [0, None, None] for kind in CSV_KINDS}  # [行数, 最早, 最晚]
+
+        # 分段轮转：活动段只做追加写入，轮转时改名并交给后台线程压缩
+        self.rotate_secs = int(rotate_secs)
+        self.rotate_bytes = int(rotate_bytes)
+        self.codec = resolve_codec(codec)
+        self._segment = 0
+        self._segment_rows = {kind: 0 for kind in CSV_KINDS}
+        self._segment_bucket = self._time_bucket(time.time())
+        self._background = None
+
     def _init_csv_files(self):
         """初始化 CSV 文件和表头"""
 
@@ -61,7 +101,10 @@ class TradeDataRecorder:
                     'volatility',
                     'inventory_skew_pct',
                     'calculated_bid',
-                    'calculated_ask'
+                    'calculated_ask',
+                    'ts_ns',
+                    'best_bid',
+                    'best_ask'
                 ])
 
         # 订单数据
@@ -106,9 +149,30 @@ class TradeDataRecorder:
                     'price',
                     'quantity',
                     'commission',
-                    'pnl'
+                    'pnl',
+                    'ts_ns'
                 ])
 
+    def _paths(self) -> dict:
+        return {
+            'orderbook': self.orderbook_file,
+            'orders': self.orders_file,
+            'inventory': self.inventory_file,
+            'trades': self.trades_file,
+        }
+
+    def _append(self, kind: str, values: list):
+        """追加一行到活动段（首列 timestamp 在此填入），必要时轮转"""
+        with open(self._paths()[kind], 'a', newline='') as f:
+            csv.writer(f).writerow([self._track(kind), *values])
+            size = f.tell()
+        self._segment_rows[kind] += 1
+
+        if (self.rotate_bytes and size >= self.rotate_bytes) or (
+            self.rotate_secs and self._time_bucket(time.time()) != self._segment_bucket
+        ):
+            self.rotate()
+
     def record_orderbook(
         self,
         mid_price: Decimal,
@@ -118,23 +182,26 @@ class TradeDataRecorder:
         time_remaining_min: float,
         volatility: Decimal,
         skew: Decimal,
+        best_bid: float = None,
+        best_ask: float = None,
+        ts_ns: int = None,
     ):
-        """记录订单簿快照"""
-        with open(self.orderbook_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                int(datetime.utcnow().timestamp()),
-                datetime.utcnow().isoformat(),
-                str(mid_price),
-                str(bid_price),
-                str(ask_price),
-                str(spread * 100),
-                f"{time_remaining_min:.2f}",
-                str(volatility * 100),
-                str(skew * 100),
-                str(bid_price),
-                str(ask_price)
-            ])
+        """记录订单簿快照（best_bid / best_ask 为市场买一/卖一，markout 分析使用）"""
+        self._append('orderbook', [
+            datetime.utcnow().isoformat(),
+            str(mid_price),
+            str(bid_price),
+            str(ask_price),
+            str(spread * 100),
+            f"{time_remaining_min:.2f}",
+            str(volatility * 100),
+            str(skew * 100),
+            str(bid_price),
+            str(ask_price),
+            ts_ns if ts_ns is not None else time.time_ns(),
+            '' if best_bid is None else best_bid,
+            '' if best_ask is None else best_ask
+        ])
 
     def record_order(
         self,
@@ -146,18 +213,15 @@ class TradeDataRecorder:
         status: str = "SUBMITTED"
     ):
         """记录订单"""
-        with open(self.orders_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                int(datetime.utcnow().timestamp()),
-                datetime.utcnow().isoformat(),
-                order_id,
-                side,
-                str(price),
-                quantity,
-                order_type,
-                status
-            ])
+        self._append('orders', [
+            datetime.utcnow().isoformat(),
+            order_id,
+            side,
+            str(price),
+            quantity,
+            order_type,
+            status
+        ])
 
     def record_inventory(
         self,
@@ -169,18 +233,15 @@ class TradeDataRecorder:
         unrealized_pnl: Decimal,
     ):
         """记录库存变化"""
-        with open(self.inventory_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                int(datetime.utcnow().timestamp()),
-                datetime.utcnow().isoformat(),
-                inventory_qty,
-                str(inventory_value),
-                str(free_balance),
-                str(total_balance),
-                str(realized_pnl),
-                str(unrealized_pnl)
-            ])
+        self._append('inventory', [
+            datetime.utcnow().isoformat(),
+            inventory_qty,
+            str(inventory_value),
+            str(free_balance),
+            str(total_balance),
+            str(realized_pnl),
+            str(unrealized_pnl)
+        ])
 
     def record_trade(
         self,
@@ -190,20 +251,46 @@ class TradeDataRecorder:
         quantity: int,
         commission: Decimal,
         pnl: Decimal,
+        ts_ns: int = None,
     ):
         """记录成交"""
-        with open(self.trades_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                int(datetime.utcnow().timestamp()),
-                datetime.utcnow().isoformat(),
-                order_id,
-                side,
-                str(price),
-                quantity,
-                str(commission),
-                str(pnl)
-            ])
+        self._append('trades', [
+            datetime.utcnow().isoformat(),
+            order_id,
+            side,
+            str(price),
+            quantity,
+            str(commission),
+            str(pnl),
+            ts_ns if ts_ns is not None else time.time_ns()
+        ])
+
+    def record_fill(self, event, ts_ns: int = None):
+        """
+        记录一次 OrderFilled 事件（简化盈亏：只扣除手续费）
+
+        commission 为 Money（如 "0.00000000 USDC"），需用 as_decimal() 取数值
+        """
+        commission = event.commission.as_decimal() if event.commission is not None else Decimal("0")
+        self.record_trade(
+            order_id=str(event.client_order_id),
+            side=event.order_side.name,
+            price=event.last_px.as_decimal(),
+            quantity=event.last_qty.as_decimal(),
+            commission=commission,
+            pnl=-commission,
+            ts_ns=ts_ns if ts_ns is not None else event.ts_event,
+        )
+
+    def record_settlement(self, outcome: float, source: str):
+        """记录本轮结算结果（本 token 的最终价值：1 或 0）"""
+        with open(self.settlement_file, 'w') as f:
+            json.dump({
+                'outcome': float(outcome),
+                'source': source,
+                'datetime': datetime.utcnow().isoformat(),
+            }, f, indent=2)
+        self.sync_catalog(outcome=float(outcome))
 
     def save_config(self, config: Dict[str, Any]):
         """保存策略配置"""
@@ -211,23 +298,102 @@ class TradeDataRecorder:
         with open(self.config_file, 'w') as f:
             json.dump(config, f, indent=2, default=str)
 
+        if self.catalog is not None:
+            try:
+                self.catalog.register_session(self.session_id, config, start_ts=time.time())
+            except sqlite3.Error as e:
+                print(f"[CATALOG] 登记会话失败: {e}")
+        self.sync_catalog()
+
+    # ========== 分段轮转 / 压缩 / 保留 ==========
+
+    def _time_bucket(self, now: float) -> int:
+        return int(now // self.rotate_secs) if self.rotate_secs else 0
+
+    def rotate(self):
+        """关闭当前分段：有数据的活动段改名为 partNNNN 并提交后台压缩，然后新建活动段"""
+        self._segment += 1
+        for kind, path in self._paths().items():
+            if not self._segment_rows[kind] or not path.exists():
+                continue
+            part = segment_path(path.parent, kind, self.session_id, self._segment)
+            os.replace(path, part)
+            self._segment_rows[kind] = 0
+            self._submit(self._compress, part)
+        self._init_csv_files()
+        self._segment_bucket = self._time_bucket(time.time())
+
+    def _submit(self, fn, *args):
+        if self._background is None:
+            self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recorder-storage")
+        return self._background.submit(fn, *args)
+
+    def _compress(self, path: Path):
+        try:
+            compress_file(path, self.codec)
+        except OSError as e:
+            print(f"[STORAGE] 压缩分段失败 {path.name}: {e}")
+
+    def apply_retention_async(self, hot_days: float, retention_days: float = None, max_bytes: int = None):
+        """在后台线程中对数据目录执行保留策略（当前会话除外），返回 Future"""
+        def run():
+            try:
+                result = apply_retention(
+                    self.output_dir,
+                    hot_days=hot_days,
+                    retention_days=retention_days,
+                    max_bytes=max_bytes,
+                    codec=self.codec,
+                    exclude={self.session_id},
+                    catalog=self.catalog,
+                )
+            except (OSError, sqlite3.Error) as e:
+                print(f"[STORAGE] 保留策略执行失败: {e}")
+                return None
+            print(f"[STORAGE] 保留策略: 合并压缩 {result['compacted']} 个会话, "
+                  f"删除 {result['deleted']} 个会话, 数据目录 {result['bytes'] / 1024 / 1024:.1f} MB")
+            return result
+
+        return self._submit(run)
+
+    # ========== 会话目录 ==========
+
+    def _track(self, kind: str) -> int:
+        """累计一行的统计，返回该行的 timestamp"""
+        ts = int(datetime.utcnow().timestamp())
+        stats = self._file_stats[kind]
+        stats[0] += 1
+        if stats[1] is None:
+            stats[1] = ts
+        stats[2] = ts
+        return ts
+
+    def sync_catalog(self, outcome: float = None, closed: bool = False):
+        """把各文件的行数 / 时间范围写入会话目录（失败不影响记录）"""
+        if self.catalog is None or not self.config_data:
+            return
+        paths = self._paths()
+        files = {kind: (paths[kind], *stats) for kind, stats in self._file_stats.items()}
+        try:
+            self.catalog.update_files(self.session_id, files, outcome=outcome, closed=closed)
+        except sqlite3.Error as e:
+            print(f"[CATALOG] 更新会话统计失败: {e}")
+
+    def close(self):
+        """会话结束：等待后台压缩 / 保留策略完成，写入最终统计并标记关闭"""
+        if self._background is not None:
+            self._background.shutdown(wait=True)
+            self._background = None
+        self.sync_catalog(closed=True)
+        if self.catalog is not None:
+            self.catalog.close()
+            self.catalog = None
+
     def get_summary(self) -> str:
-        """获取数据摘要"""
-        orderbook_count = 0
-        orders_count = 0
-        trades_count = 0
-
-        if self.orderbook_file.exists():
-            with open(self.orderbook_file, 'r') as f:
-                orderbook_count = sum(1 for _ in f) - 1  # 减去表头
-
-        if self.orders_file.exists():
-            with open(self.orders_file, 'r') as f:
-                orders_count = sum(1 for _ in f) - 1
-
-        if self.trades_file.exists():
-            with open(self.trades_file, 'r') as f:
-                trades_count = sum(1 for _ in f) - 1
+        """获取数据摘要（行数为本会话写入的全部分段合计）"""
+        orderbook_count = self._file_stats['orderbook'][0]
+        orders_count = self._file_stats['orders'][0]
+        trades_count = self._file_stats['trades'][0]
 
         return f"""
 数据记录摘要（会话 {self.session_id}）:
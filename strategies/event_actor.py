@@ -0,0 +1,236 @@
+"""
+单写者事件派发 - 订单簿、定时器、成交事件按顺序串行处理
+
+问题：
+- on_order_book 同时可能从三处被调用：Nautilus 事件循环、threading.Timer 回调、
+  参考价源线程（_on_reference_fair_value），都没有加锁
+- on_order_filled 会调用 _hedge_inventory 下单，与定时器线程中的报价逻辑并发修改同一状态
+- 行情突发时，每个排队的订单簿事件都会完整跑一遍报价逻辑，大部分是重复工作
+
+解决方案：
+- EventActor：一个有序邮箱（mailbox），所有策略输入都投递到这里
+  - 同一时刻只有一个线程在处理（谁先拿到处理权谁负责清空队列，其他线程投递后立即返回）
+  - 可合并事件（订单簿、定时器）：队列中已有同类事件时，旧的作废，只处理最新的一次
+  - 不可合并事件（成交、订单簿增量）：按投递顺序逐个处理
+  - 处理过程中的嵌套调用（super() 链、下单触发的同步事件）直接内联执行，与原有行为一致
+  - close() 之后不再处理任何事件（停止后不应再报价）
+  - 处理函数异常不影响后续事件：带 traceback 上报，同一处理函数按时间限频（期间次数汇总到下一条）
+- route_handlers：把类上的 on_* 方法包装为投递到 self.actor（BaseStrategy 及其子类自动应用）
+"""
+
+import functools
+import threading
+import time
+import traceback
+from collections import deque
+
+
+class _Entry:
+    """邮箱中的一个事件"""
+
+    __slots__ = ('handler', 'args', 'key', 'alive')
+
+    def __init__(self, handler, args, key):
+        self.handler = handler
+        self.args = args
+        self.key = key
+        self.alive = True
+
+
+class EventActor:
+    """
+    单写者事件派发器
+
+    用法：
+        actor = EventActor(on_error=log.warning)
+        actor.submit(handler, deltas)                    # 按顺序处理
+        actor.submit(handler, book, key='order_book')    # 合并：只处理最新的一次
+    """
+
+    DEFAULT_ERROR_LOG_INTERVAL_SECS = 10.0   # 同一处理函数的异常最多每 10 秒上报一次
+
+    def __init__(self, on_error=None, error_log_interval_secs: float = DEFAULT_ERROR_LOG_INTERVAL_SECS,
+                 clock=time.monotonic):
+        self._on_error = on_error
+        self._error_log_interval = float(error_log_interval_secs)
+        self._clock = clock
+        self._error_log = {}   # 处理函数名 → [上次上报时间, 期间未上报次数]
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._queue = deque()
+        self._pending = {}     # key → 队列中尚未处理的可合并事件
+        self._owner = None     # 正在处理队列的线程
+        self._closed = False
+
+        # 统计
+        self.processed = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+
+    # ========== 投递 ==========
+
+    @property
+    def in_actor(self) -> bool:
+        """当前线程是否正在处理队列（嵌套调用直接内联执行）"""
+        return self._owner == threading.get_ident()
+
+    def submit(self, handler, *args, key=None) -> bool:
+        """
+        投递一个事件
+
+        Args:
+            handler: 处理函数
+            key: 合并键（None 表示不合并；相同键只保留最新一次）
+
+        Returns:
+            bool: 是否被接受（关闭后投递的事件被丢弃）
+        """
+        if self.in_actor:
+            self._run(handler, args)
+            return True
+        return self.defer(handler, *args, key=key)
+
+    def defer(self, handler, *args, key=None) -> bool:
+        """
+        投递一个事件，总是排队（处理函数内部调用时，在当前事件处理完之后执行）
+
+        用于“请求一次评估”：同一批积压事件中多次请求只执行最新的一次
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            entry = _Entry(handler, args, key)
+            if key is not None:
+                stale = self._pending.get(key)
+                if stale is not None:
+                    stale.alive = False
+                    self.coalesced += 1
+                self._pending[key] = entry
+            self._queue.append(entry)
+            if len(self._queue) > self.max_depth:
+                self.max_depth = len(self._queue)
+
+        if not self.in_actor:
+            self._drain()
+        return True
+
+    # ========== 处理 ==========
+
+    def _pop(self):
+        with self._lock:
+            while self._queue and not self._closed:
+                entry = self._queue.popleft()
+                if not entry.alive:
+                    continue
+                if entry.key is not None:
+                    del self._pending[entry.key]
+                return entry
+            return None
+
+    def _run(self, handler, args):
+        try:
+            handler(*args)
+        except Exception as e:
+            self.errors += 1
+            if self._on_error is not None:
+                self._report_error(handler, e)
+
+    def _report_error(self, handler, error: Exception):
+        name = getattr(getattr(handler, 'func', handler), '__name__', str(handler))
+        now = self._clock()
+        state = self._error_log.get(name)
+        if state is not None and now - state[0] < self._error_log_interval:
+            state[1] += 1
+            return
+
+        suppressed = state[1] if state is not None else 0
+        self._error_log[name] = [now, 0]
+        note = f"（此前 {self._error_log_interval:.0f} 秒内另有 {suppressed} 次未上报）" if suppressed else ""
+        self._on_error(f"[ACTOR] {name} 处理失败: {error}{note}\n{traceback.format_exc()}")
+
+    def _drain(self, blocking: bool = False, timeout: float = -1):
+        """清空队列；已有线程在处理时直接返回（该线程会处理新投递的事件）"""
+        while True:
+            if not self._drain_lock.acquire(blocking, timeout):
+                return
+            try:
+                self._owner = threading.get_ident()
+                while True:
+                    entry = self._pop()
+                    if entry is None:
+                        break
+                    self._run(entry.handler, entry.args)
+                    self.processed += 1
+            finally:
+                self._owner = None
+                self._drain_lock.release()
+
+            # 释放处理权与其他线程投递之间可能有空隙：队列非空则再抢一次
+            with self._lock:
+                if not self._queue or self._closed:
+                    return
+            blocking, timeout = False, -1
+
+    def close(self, timeout: float = 2.0) -> int:
+        """
+        停止派发：丢弃队列中未处理的事件，并等待正在执行的处理函数结束（最多 timeout 秒）
+
+        Returns:
+            int: 丢弃的事件数
+        """
+        with self._lock:
+            self._closed = True
+            dropped = sum(1 for entry in self._queue if entry.alive)
+            self._queue.clear()
+            self._pending.clear()
+        if not self.in_actor and self._drain_lock.acquire(True, timeout):
+            self._drain_lock.release()
+        return dropped
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> dict:
+        return {
+            'processed': self.processed,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'max_depth': self.max_depth,
+        }
+
+
+# ========== 方法路由 ==========
+
+def routed(method, key=None):
+    """把方法包装为投递到 self.actor（没有 actor 时直接调用）"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        actor = getattr(self, 'actor', None)
+        if actor is None:
+            return method(self, *args)
+        actor.submit(functools.partial(method, self), *args, key=key)
+
+    wrapper.__routed__ = True
+    return wrapper
+
+
+def route_handlers(cls, handlers: dict):
+    """
+    包装类上定义的事件方法
+
+    Args:
+        handlers: {方法名: 合并键}，合并键为 None 表示按顺序逐个处理
+    """
+    for name, key in handlers.items():
+        method = cls.__dict__.get(name)
+        if method is None or getattr(method, '__routed__', False):
+            continue
+        setattr(cls, name, routed(method, key))
+    return cls
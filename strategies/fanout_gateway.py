@@ -0,0 +1,256 @@
+"""
+行情分发 / 执行网关 - 多进程报价部署中唯一的 NautilusTrader 策略
+
+职责：
+- 订阅所有市场的订单簿增量，增量维护每个市场的顶档（OrderBookFeatures），
+  把顶档更新写入对应报价工作进程的共享内存环形缓冲区
+- 成交回报转发给负责该市场的工作进程（库存倾斜）；成交走专用缓冲区，满时排队重试而不丢弃
+- 定时读取工作进程的报价请求，同一市场在一批请求中只执行最新一次：批量撤单 + 批量提交
+- 所有订单仍经过本进程的 RiskEngine（按 instrument 的单订单上限等）
+- 当日亏损上限（max_daily_loss）：SettlementLedger 按成交现金流 + 持仓 × 中间价计算所有市场的当日盈亏，
+  低于上限时撤销全部挂单并停止执行报价请求（库存硬上限由工作进程中的 MarketQuoter 检查）
+- 可选：所有市场的前 N 档快照写入订单簿快照总线（book_bus.py），供记录器等旁路进程读取
+
+报价计算见 quote_workers.py，部署入口见 run_multi_market.py
+"""
+
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from nautilus_trader.config import StrategyConfig
+from nautilus_trader.model.enums import BookType, OrderSide, TimeInForce
+from nautilus_trader.model.identifiers import InstrumentId, OrderListId
+from nautilus_trader.model.orders import OrderList
+from nautilus_trader.trading.strategy import Strategy
+
+from .book_bus import BookSnapshotBus
+from .book_features import OrderBookFeatures
+from .quote_workers import ROUND_DURATION_SECS, QuoteWorkerPool
+from .settlement_ledger import SettlementLedger
+from .shm_ring import ACTION_CANCEL, ACTION_QUOTE
+
+
+class FanoutGatewayConfig(StrategyConfig, frozen=True):
+    instrument_ids: list[str]
+    markets: list[dict]                 # 与 instrument_ids 一一对应的 MarketQuoter 参数
+    n_workers: int | None = None        # 默认 CPU 核数 - 1
+    drain_interval_ms: int = 5
+    stats_interval_secs: int = 60
+    book_bus_name: str | None = None    # 订单簿快照总线（None 关闭）
+    book_bus_depth: int = BookSnapshotBus.DEFAULT_DEPTH
+    max_daily_loss: Decimal | None = None  # 当日亏损上限（负数，None 不检查；由风险预设填入）
+
+
+class FanoutGatewayStrategy(Strategy):
+    """
+    行情分发 + 执行网关
+
+    slot（市场编号）= instrument_ids 中的下标，工作进程按 slot % 进程数 分配市场
+    """
+
+    DRAIN_TIMER = "quote_gateway_drain"
+    STATS_TIMER = "quote_gateway_stats"
+
+    def __init__(self, config: FanoutGatewayConfig):
+        super().__init__(config)
+
+        if len(config.instrument_ids) != len(config.markets):
+            raise ValueError("instrument_ids 与 markets 数量不一致")
+
+        self.instrument_ids = [InstrumentId.from_str(str(i)) for i in config.instrument_ids]
+        self.drain_interval_ms = config.drain_interval_ms
+        self.stats_interval_secs = config.stats_interval_secs
+
+        self._slots = {instrument_id: slot for slot, instrument_id in enumerate(self.instrument_ids)}
+        self._features = {instrument_id: OrderBookFeatures() for instrument_id in self.instrument_ids}
+        self.pool = QuoteWorkerPool(config.markets, n_workers=config.n_workers)
+        self.book_bus = None
+
+        # 当日盈亏（所有市场）：低于 max_daily_loss 时停止报价
+        self.max_daily_loss = config.max_daily_loss
+        self.ledger = SettlementLedger()
+        for instrument_id, market in zip(self.instrument_ids, config.markets):
+            round_start_ts = market.get('round_start_ts')
+            self.ledger.open(
+                str(instrument_id),
+                expiry_ts=round_start_ts + ROUND_DURATION_SECS if round_start_ts else None,
+            )
+        self.halted = False
+
+        # 统计
+        self.requests_executed = 0
+        self.requests_coalesced = 0
+
+    # ========== 生命周期 ==========
+
+    def on_start(self):
+        for instrument_id in self.instrument_ids:
+            instrument = self.cache.instrument(instrument_id)
+            if instrument is None:
+                self.log.error(f"[GATEWAY] Instrument not found: {instrument_id}")
+                continue
+            self._features[instrument_id].reset(tick_size=instrument.price_increment.as_double())
+            self.subscribe_order_book_deltas(instrument_id, BookType.L2_MBP)
+
+        if self.config.book_bus_name:
+            self.book_bus = BookSnapshotBus.create(
+                self.config.book_bus_name,
+                depth=self.config.book_bus_depth,
+                max_instruments=max(len(self.instrument_ids), BookSnapshotBus.DEFAULT_MAX_INSTRUMENTS),
+            )
+            for instrument_id in self.instrument_ids:
+                self.book_bus.register(str(instrument_id))  # 编号与 slot 一致
+
+        self.pool.start()
+        self.log.info(
+            f"[GATEWAY] {len(self.instrument_ids)} 个市场，{self.pool.n_workers} 个报价工作进程"
+        )
+
+        self.clock.set_timer(
+            self.DRAIN_TIMER,
+            interval=timedelta(milliseconds=self.drain_interval_ms),
+            callback=self._on_drain_timer,
+        )
+        self.clock.set_timer(
+            self.STATS_TIMER,
+            interval=timedelta(seconds=self.stats_interval_secs),
+            callback=self._on_stats_timer,
+        )
+
+    def on_stop(self):
+        for name in (self.DRAIN_TIMER, self.STATS_TIMER):
+            if name in self.clock.timer_names:
+                self.clock.cancel_timer(name)
+
+        self.pool.stop()
+        for instrument_id in self.instrument_ids:
+            self.cancel_all_orders(instrument_id)
+        if self.book_bus is not None:
+            self.book_bus.close()
+            self.book_bus = None
+        self.log.info(
+            f"[GATEWAY] 已执行 {self.requests_executed} 个报价请求，合并 {self.requests_coalesced} 个"
+        )
+
+    # ========== 行情 → 工作进程 ==========
+
+    def on_order_book_deltas(self, deltas):
+        instrument_id = deltas.instrument_id
+        features = self._features.get(instrument_id)
+        if features is None:
+            return
+
+        features.apply_deltas(deltas)
+        self.ledger.mark(str(instrument_id), features.mid)
+        slot = self._slots[instrument_id]
+        ts_ns = self.clock.timestamp_ns()
+        self.pool.publish_book(
+            slot,
+            ts_ns,
+            features.best_bid,
+            features.best_ask,
+            features.best_bid_size,
+            features.best_ask_size,
+        )
+        if self.book_bus is not None:
+            self.book_bus.publish(slot, ts_ns, *features.top_levels(self.book_bus.depth))
+
+    def on_order_filled(self, event):
+        slot = self._slots.get(event.instrument_id)
+        if slot is None:
+            return
+
+        quantity = event.last_qty.as_double()
+        self.ledger.on_fill(
+            str(event.instrument_id),
+            event.order_side == OrderSide.BUY,
+            event.last_px.as_double(),
+            quantity,
+            fee=event.commission.as_double() if event.commission is not None else 0.0,
+        )
+        if event.order_side == OrderSide.SELL:
+            quantity = -quantity
+        if not self.pool.publish_fill(slot, self.clock.timestamp_ns(), event.last_px.as_double(), quantity):
+            self.log.warning(
+                f"[GATEWAY] 成交缓冲区已满，成交排队重试（待发送 {self.pool.pending_fills}）: "
+                f"{event.instrument_id} {quantity:+g}"
+            )
+
+    # ========== 工作进程 → 执行 ==========
+
+    def _on_drain_timer(self, event):
+        requests = self.pool.drain_orders()
+        if self._check_daily_loss() or not requests:
+            return
+
+        latest = {}
+        for request in requests:
+            latest[int(request['slot'])] = request
+        self.requests_coalesced += len(requests) - len(latest)
+
+        for slot, request in latest.items():
+            self.execute_request(self.instrument_ids[slot], request)
+
+    def _check_daily_loss(self) -> bool:
+        """当日盈亏低于上限时撤销全部挂单并停止报价，返回是否已停止"""
+        if self.halted:
+            return True
+        if self.max_daily_loss is None:
+            return False
+
+        pnl = self.ledger.daily_pnl
+        if pnl >= float(self.max_daily_loss):
+            return False
+
+        self.halted = True
+        for instrument_id in self.instrument_ids:
+            self.cancel_all_orders(instrument_id)
+        self.log.error(
+            f"[GATEWAY] 已达日最大亏损: {pnl:.2f} < {float(self.max_daily_loss):.2f} USDC，"
+            f"撤销全部挂单并停止报价"
+        )
+        return True
+
+    def execute_request(self, instrument_id: InstrumentId, request):
+        """执行一个报价请求：撤销该市场的挂单，ACTION_QUOTE 时再批量提交新的买卖单（NaN 的一侧不挂）"""
+        open_orders = self.cache.orders_open(instrument_id=instrument_id, strategy_id=self.id)
+        if open_orders:
+            self.cancel_orders(open_orders)
+        self.requests_executed += 1
+
+        action = int(request['action'])
+        if action == ACTION_CANCEL:
+            return
+        if action != ACTION_QUOTE:
+            self.log.warning(f"[GATEWAY] 未知请求类型: {action}")
+            return
+
+        instrument = self.cache.instrument(instrument_id)
+        if instrument is None:
+            return
+
+        quantity = instrument.make_qty(float(request['quantity']))
+        orders = [
+            self.order_factory.limit(
+                instrument_id=instrument_id,
+                order_side=side,
+                quantity=quantity,
+                price=instrument.make_price(float(price)),
+                time_in_force=TimeInForce.GTC,
+            )
+            for side, price in ((OrderSide.BUY, request['bid']), (OrderSide.SELL, request['ask']))
+            if not math.isnan(price)
+        ]
+        if not orders:
+            return
+        self.submit_order_list(OrderList(
+            order_list_id=OrderListId(f"QUOTES_{self._slots[instrument_id]}_{self.clock.timestamp_ns()}"),
+            orders=orders,
+        ))
+
+    def _on_stats_timer(self, event):
+        self.log.info(
+            f"[GATEWAY] {self.pool.stats()}，已执行 {self.requests_executed} 个报价请求，"
+            f"当日盈亏 {self.ledger.daily_pnl:+.4f} USDC{'（已停止报价）' if self.halted else ''}"
+        )
@@ -0,0 +1,164 @@
+"""
+订单到达强度估计器 - 在线拟合 λ(δ) = A·exp(-κδ)
+
+用途：
+- 为 A-S 报价引擎提供实时 κ（成交概率随报价距离的衰减速度）
+- 价差随真实成交概率自适应，而不仅仅依赖价格波动率
+
+实现：
+- 按"成交价距中间价的 tick 数"分桶计数
+- 指数衰减（半衰期可配置），旧成交权重逐渐降低
+- 每笔成交 O(1)：不逐桶衰减，而是给新成交乘以递增权重 exp(t/τ)，
+  所有桶共享同一衰减因子，拟合斜率不受影响；权重过大时整体重标定
+- κ 惰性拟合：只在读取时、且有新成交时重新做加权对数线性回归
+"""
+
+import math
+
+
+class ArrivalIntensityEstimator:
+    """
+    订单到达强度估计器
+
+    ln λ(δ) = ln A - κ·δ，按桶做加权最小二乘（权重 = 衰减后计数）
+    """
+
+    # 权重超过该值时重标定，避免浮点溢出
+    RESCALE_THRESHOLD = 1e100
+
+    def __init__(
+        self,
+        tick_size: float = 0.01,
+        n_buckets: int = 10,
+        half_life_secs: float = 300.0,
+        min_trades: int = 30,
+        default_kappa: float = 100.0,
+        min_kappa: float = 10.0,
+        max_kappa: float = 1000.0,
+    ):
+        self.tick_size = float(tick_size)
+        self.n_buckets = int(n_buckets)
+        self.min_trades = int(min_trades)
+        self.default_kappa = float(default_kappa)
+        self.min_kappa = float(min_kappa)
+        self.max_kappa = float(max_kappa)
+
+        self._tau_ns = half_life_secs / math.log(2) * 1e9
+        self.reset()
+
+    def reset(self):
+        """清空所有计数（换市场时调用）"""
+        self._counts = [0.0] * self.n_buckets
+        self._origin_ns = None
+        self._first_ts_ns = None
+        self._last_ts_ns = None
+        self._trade_count = 0
+
+        self._dirty = False
+        self._kappa = self.default_kappa
+        self._log_a = None
+
+    # ========== 在线更新 ==========
+
+    def on_trade(self, price: float, mid: float, ts_ns: int):
+        """
+        记录一笔成交（O(1)）
+
+        Args:
+            price: 成交价
+            mid: 成交时的中间价
+            ts_ns: 成交时间戳（纳秒）
+        """
+        if self._origin_ns is None:
+            self._origin_ns = ts_ns
+            self._first_ts_ns = ts_ns
+
+        bucket = int(round(abs(float(price) - float(mid)) / self.tick_size))
+        if bucket >= self.n_buckets:
+            bucket = self.n_buckets - 1
+
+        weight = math.exp((ts_ns - self._origin_ns) / self._tau_ns)
+        if weight > self.RESCALE_THRESHOLD:
+            self._rescale(ts_ns)
+            weight = 1.0
+
+        self._counts[bucket] += weight
+        self._last_ts_ns = max(ts_ns, self._last_ts_ns or ts_ns)
+        self._trade_count += 1
+        self._dirty = True
+
+    def _rescale(self, ts_ns: int):
+        """把权重原点移动到 ts_ns（O(n_buckets)，极少触发）"""
+        factor = math.exp(-(ts_ns - self._origin_ns) / self._tau_ns)
+        self._counts = [c * factor for c in self._counts]
+        self._origin_ns = ts_ns
+
+    # ========== 拟合结果 ==========
+
+    @property
+    def trade_count(self) -> int:
+        return self._trade_count
+
+    @property
+    def is_ready(self) -> bool:
+        """成交数足够且至少有两个非空桶时才可信"""
+        return self._trade_count >= self.min_trades and self._fit()
+
+    @property
+    def kappa(self) -> float:
+        """当前 κ（样本不足时返回默认值）"""
+        if self._trade_count < self.min_trades or not self._fit():
+            return self.default_kappa
+        return self._kappa
+
+    @property
+    def intensity_a(self):
+        """
+        当前 A（δ=0 处的每秒成交强度）
+
+        按衰减后的有效观测时长归一化；样本不足时返回 None
+        """
+        if not self.is_ready or self._log_a is None:
+            return None
+
+        elapsed_ns = self._last_ts_ns - self._first_ts_ns
+        exposure_secs = self._tau_ns * (1 - math.exp(-elapsed_ns / self._tau_ns)) / 1e9
+        if exposure_secs <= 0:
+            return None
+
+        # 计数以 _last_ts_ns 为基准衰减
+        scale = math.exp(-(self._last_ts_ns - self._origin_ns) / self._tau_ns)
+        return math.exp(self._log_a) * scale / exposure_secs
+
+    def _fit(self) -> bool:
+        """加权对数线性回归（仅在有新成交时重算）"""
+        if not self._dirty:
+            return self._log_a is not None
+
+        self._dirty = False
+
+        sw = swx = swy = swxx = swxy = 0.0
+        n_points = 0
+        for bucket, count in enumerate(self._counts):
+            if count <= 0:
+                continue
+            x = bucket * self.tick_size
+            y = math.log(count)
+            sw += count
+            swx += count * x
+            swy += count * y
+            swxx += count * x * x
+            swxy += count * x * y
+            n_points += 1
+
+        denominator = sw * swxx - swx * swx
+        if n_points < 2 or denominator <= 0:
+            self._log_a = None
+            return False
+
+        slope = (sw * swxy - swx * swy) / denominator
+        intercept = (swy - slope * swx) / sw
+
+        self._kappa = min(max(-slope, self.min_kappa), self.max_kappa)
+        self._log_a = intercept
+        return True
@@ -0,0 +1,307 @@
+"""
+原始行情采集 - 订单簿增量 / 报价 / 成交逐条写入紧凑的二进制帧文件
+
+问题：
+- 记录器只保存策略自己算出的中间价 / 报价，没有市场原始盘口
+- 公允价值逻辑的任何改动都无法用历史数据回测
+
+解决方案：
+- 策略收到的每一批 OrderBookDeltas、每个 QuoteTick / TradeTick 编码为一帧，
+  同时保存交易所时间（ts_event）与本地接收时间（ts_init）
+- 回调线程只做 struct 打包 + 追加到内存缓冲（微秒级），后台线程批量写盘；
+  缓冲超过上限时丢弃新帧并计数，从不阻塞事件循环
+- 读取：iter_frames 按块读取文件逐帧产出，增量帧直接解码为 NumPy 结构化数组
+
+文件格式（小端）：
+- 文件头 8 字节：b'PMCAP' + 版本(u8) + 保留(2 字节)
+- 帧头 23 字节：类型(u8) 品种编号(u16) 计数(u32) ts_event(i64) ts_init(i64)
+- 帧体：
+  - INSTRUMENT：计数 = 名称字节数，帧体为 instrument_id（UTF-8），品种编号按出现顺序分配
+  - DELTAS：计数 = 增量条数，每条 19 字节：action(u8) side(u8) flags(u8) price(f64) size(f64)
+    （ts_event 为该批最后一条增量的交易所时间）
+  - QUOTE：32 字节：bid_price bid_size ask_price ask_size（f64）
+  - TRADE：计数 = trade_id 字节数，17 字节 aggressor_side(u8) price(f64) size(f64) + trade_id（UTF-8）
+
+运行：
+    python -m strategies.market_capture summary /app/data/capture_xxx.bin
+"""
+
+import argparse
+import struct
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+MAGIC = b'PMCAP'
+VERSION = 1
+FILE_HEADER = struct.Struct('<5sB2x')
+
+INSTRUMENT, DELTAS, QUOTE, TRADE = range(4)
+KIND_NAMES = {INSTRUMENT: 'instrument', DELTAS: 'deltas', QUOTE: 'quote', TRADE: 'trade'}
+
+FRAME_HEADER = struct.Struct('<BHIqq')
+DELTA = struct.Struct('<BBBdd')
+QUOTE_BODY = struct.Struct('<dddd')
+TRADE_BODY = struct.Struct('<Bdd')
+
+DELTA_DTYPE = np.dtype([
+    ('action', 'u1'),
+    ('side', 'u1'),
+    ('flags', 'u1'),
+    ('price', '<f8'),
+    ('size', '<f8'),
+])
+assert DELTA_DTYPE.itemsize == DELTA.size
+
+
+def capture_path(data_dir, session_id: str) -> Path:
+    """与记录器同一会话的采集文件（保留策略按会话一并删除）"""
+    return Path(data_dir) / f"capture_{session_id}.bin"
+
+
+# ========== 写入 ==========
+
+class MarketDataCapture:
+    """
+    非阻塞的行情采集写入器
+
+    用法：
+        capture = MarketDataCapture(capture_path(data_dir, session_id))
+        capture.on_deltas(deltas)        # 策略回调中调用，只打包、入缓冲
+        capture.on_quote(tick)
+        capture.on_trade(tick)
+        capture.close()                  # 写完缓冲中的全部帧
+    """
+
+    DEFAULT_FLUSH_INTERVAL_MS = 100
+    DEFAULT_MAX_BUFFER_BYTES = 64 * 1024 * 1024   # 写盘跟不上时最多积压 64MB，超出丢弃
+
+    def __init__(
+        self,
+        path,
+        flush_interval_ms: float = DEFAULT_FLUSH_INTERVAL_MS,
+        max_buffer_bytes: int = DEFAULT_MAX_BUFFER_BYTES,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_buffer_bytes = int(max_buffer_bytes)
+
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, 'ab')
+        if new_file:
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self._slots = {}   # instrument_id -> 品种编号（每个文件独立编号，追加打开时重新登记）
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        # 统计
+        self.frames = 0
+        self.dropped = 0
+        self.bytes_written = 0
+
+        self._writer = threading.Thread(target=self._run, name="market-capture", daemon=True)
+        self._writer.start()
+
+    # ========== 编码（回调线程）==========
+
+    def on_deltas(self, deltas):
+        """一批订单簿增量（OrderBookDeltas 或 OrderBookDelta 列表）编码为一帧"""
+        items = getattr(deltas, 'deltas', deltas)
+        if not items:
+            return
+        body = bytearray()
+        pack = DELTA.pack
+        for delta in items:
+            order = delta.order
+            body += pack(
+                int(delta.action), int(order.side), delta.flags,
+                order.price.as_double(), order.size.as_double(),
+            )
+        last = items[-1]
+        ts_init = getattr(deltas, 'ts_init', last.ts_init)
+        self._put(DELTAS, last.instrument_id, len(items), last.ts_event, ts_init, body)
+
+    def on_quote(self, tick):
+        body = QUOTE_BODY.pack(
+            tick.bid_price.as_double(), tick.bid_size.as_double(),
+            tick.ask_price.as_double(), tick.ask_size.as_double(),
+        )
+        self._put(QUOTE, tick.instrument_id, 1, tick.ts_event, tick.ts_init, body)
+
+    def on_trade(self, tick):
+        trade_id = str(tick.trade_id).encode()
+        body = TRADE_BODY.pack(int(tick.aggressor_side), tick.price.as_double(), tick.size.as_double()) + trade_id
+        self._put(TRADE, tick.instrument_id, len(trade_id), tick.ts_event, tick.ts_init, body)
+
+    def _put(self, kind: int, instrument_id, count: int, ts_event: int, ts_init: int, body):
+        # 增量经由事件派发线程、报价直接在事件循环线程回调，编号分配与入缓冲都在锁内
+        if self._closed:
+            return
+        key = str(instrument_id)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = len(self._slots)
+                name = key.encode()
+                self._buffer.append(FRAME_HEADER.pack(INSTRUMENT, slot, len(name), 0, 0) + name)
+                self._buffered_bytes += FRAME_HEADER.size + len(name)
+
+            frame = FRAME_HEADER.pack(kind, slot, count, ts_event, ts_init) + body
+            if self._buffered_bytes + len(frame) > self.max_buffer_bytes:
+                self.dropped += 1
+                return
+            self._buffer.append(frame)
+            self._buffered_bytes += len(frame)
+            self.frames += 1
+
+    # ========== 写盘（后台线程）==========
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            closing = self._closed
+            self._write_pending()
+            if closing:
+                return
+
+    def _write_pending(self):
+        with self._lock:
+            frames, self._buffer = self._buffer, []
+            self._buffered_bytes = 0
+        if not frames:
+            return
+        data = b''.join(frames)
+        try:
+            self._file.write(data)
+            self._file.flush()
+            self.bytes_written += len(data)
+        except OSError as e:
+            self.dropped += len(frames)
+            print(f"[CAPTURE] 写入失败，丢弃 {len(frames)} 帧: {e}")
+
+    def close(self):
+        """停止采集：写完缓冲中的全部帧后关闭文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+        self._file.close()
+
+    def stats(self) -> dict:
+        return {'frames': self.frames, 'dropped': self.dropped, 'bytes': self.bytes_written}
+
+
+# ========== 读取 ==========
+
+def iter_frames(path, kinds=None, chunk_bytes: int = 1 << 20):
+    """
+    按块流式读取采集文件，逐帧产出 (kind, instrument_id, ts_event, ts_init, data)
+
+    data：
+    - DELTAS：DELTA_DTYPE 结构化数组（action / side / flags / price / size）
+    - QUOTE：(bid_price, bid_size, ask_price, ask_size)
+    - TRADE：(aggressor_side, price, size, trade_id)
+
+    Args:
+        kinds: 只产出这些类型（如 {DELTAS}），其余帧跳过帧体解码
+    """
+    header_size = FRAME_HEADER.size
+    unpack_header = FRAME_HEADER.unpack_from
+    names = {}
+    with open(path, 'rb') as f:
+        magic, version = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是采集文件或版本不支持: {path}")
+
+        buf = b''
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            buf = buf + chunk if buf else chunk
+            pos, end = 0, len(buf)
+            while pos + header_size <= end:
+                kind, slot, count, ts_event, ts_init = unpack_header(buf, pos)
+                body_size = _body_size(kind, count)
+                start = pos + header_size
+                if start + body_size > end:
+                    break
+                pos = start + body_size
+
+                if kind == INSTRUMENT:
+                    names[slot] = buf[start:pos].decode()
+                    continue
+                if kinds is not None and kind not in kinds:
+                    continue
+                if kind == DELTAS:
+                    data = np.frombuffer(buf, dtype=DELTA_DTYPE, count=count, offset=start)
+                elif kind == QUOTE:
+                    data = QUOTE_BODY.unpack_from(buf, start)
+                else:
+                    data = TRADE_BODY.unpack_from(buf, start) + (buf[start + TRADE_BODY.size:pos].decode(),)
+                yield kind, names.get(slot), ts_event, ts_init, data
+            buf = buf[pos:]
+        # 末尾不完整的帧（进程被杀时写了一半）忽略
+
+
+def _body_size(kind: int, count: int) -> int:
+    if kind == DELTAS:
+        return count * DELTA.size
+    if kind == QUOTE:
+        return QUOTE_BODY.size
+    if kind == TRADE:
+        return TRADE_BODY.size + count
+    if kind == INSTRUMENT:
+        return count
+    raise ValueError(f"未知帧类型: {kind}")
+
+
+def summarize(path) -> dict:
+    """每类帧的数量、增量条数、时间范围、交易所到接收的延迟"""
+    summary = {}
+    for kind, instrument_id, ts_event, ts_init, data in iter_frames(path):
+        entry = summary.setdefault(KIND_NAMES[kind], {
+            'frames': 0, 'entries': 0, 'first_ts': ts_event, 'last_ts': ts_event, 'latency_ms_sum': 0.0,
+            'instruments': set(),
+        })
+        entry['frames'] += 1
+        entry['entries'] += len(data) if kind == DELTAS else 1
+        entry['first_ts'] = min(entry['first_ts'], ts_event)
+        entry['last_ts'] = max(entry['last_ts'], ts_event)
+        entry['latency_ms_sum'] += (ts_init - ts_event) / 1e6
+        entry['instruments'].add(instrument_id)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="原始行情采集文件工具")
+    sub = parser.add_subparsers(dest='command', required=True)
+    summary_parser = sub.add_parser('summary', help="统计各类帧数量与时间范围")
+    summary_parser.add_argument('path')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    summary = summarize(args.path)
+    elapsed = time.perf_counter() - started
+    for name, entry in summary.items():
+        span = (entry['last_ts'] - entry['first_ts']) / 1e9
+        latency = entry['latency_ms_sum'] / entry['frames']
+        print(
+            f"{name:<8} 帧 {entry['frames']:>10}  条目 {entry['entries']:>10}  "
+            f"时长 {span:>9.1f}s  平均接收延迟 {latency:>8.2f}ms  品种 {len(entry['instruments'])}"
+        )
+    print(f"读取耗时 {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -110,7 +110,6 @@ class MarketMakingStrategy(BaseStrategy):
 
         # 内部状态
         self._last_update_time_ns = 0
-        self._price_history = []  # 用于计算波动率
         self._daily_start_pnl = Decimal("0")
         self._daily_start_balance = Decimal("0")
 
@@ -128,12 +127,15 @@ class MarketMakingStrategy(BaseStrategy):
         if not self._check_risk(order_book):
             return
 
-        # 3. 获取中间价
-        mid = order_book.midpoint()
+        # 3. 获取中间价（优先使用增量维护的盘口特征）
+        if self.book_features.is_valid:
+            mid = self.book_features.mid
+        else:
+            mid = order_book.midpoint()
         if not mid:
             return
 
-        mid_price = Decimal(mid)
+        mid_price = Decimal(str(mid))
 
         # 4. 记录价格历史（用于波动率计算）
         self._update_price_history(mid_price)
@@ -199,6 +201,8 @@ class MarketMakingStrategy(BaseStrategy):
 
         使用 GTC 订单：保持挂单状态，赚取价差
         """
+        self.tick_store.update_last(our_bid=float(bid_price), our_ask=float(ask_price))
+
         # 创建买单
         buy_order = self.order_factory.limit(
             instrument_id=self.instrument.id,
@@ -219,10 +223,9 @@ class MarketMakingStrategy(BaseStrategy):
             time_in_force=TimeInForce.GTC,  # GTC：保持挂单直到成交或取消
         )
 
-        # 提交两个独立的订单（不做 OCO）
-        # 做市策略需要同时在两边挂单，保持中性
-        self.submit_order(buy_order)
-        self.submit_order(sell_order)
+        # 两边同时挂单（不做 OCO），保持中性
+        # 撤单-重挂：旧报价一次批量撤销，新的买卖单一次批量提交
+        self.replace_quotes([buy_order, sell_order])
 
     # ========== 计算方法 ==========
 
@@ -267,12 +270,16 @@ class MarketMakingStrategy(BaseStrategy):
 
     def _calculate_order_size(self, order_book) -> int:
         """动态调整订单大小"""
-        # 获取订单簿深度
-        bids = order_book.bids()
-        asks = order_book.asks()
+        # 获取订单簿深度（优先使用预计算的前 5 档深度，避免每个 tick 遍历订单簿）
+        if self.book_features.is_valid:
+            bid_depth = self.book_features.bid_depth
+            ask_depth = self.book_features.ask_depth
+        else:
+            bids = order_book.bids()
+            asks = order_book.asks()
 
-        bid_depth = sum(level.size() for level in bids[:5])
-        ask_depth = sum(level.size() for level in asks[:5])
+            bid_depth = sum(level.size() for level in bids[:5])
+            ask_depth = sum(level.size() for level in asks[:5])
         avg_depth = (bid_depth + ask_depth) / 2
 
         # 根据深度调整
@@ -287,26 +294,19 @@ class MarketMakingStrategy(BaseStrategy):
 
     def _calculate_volatility(self) -> Decimal:
         """计算价格波动率"""
-        if len(self._price_history) < 10:
+        if len(self.tick_store) < 10:
             return Decimal("0")
 
-        # 取最近的 N 个价格
-        recent_prices = self._price_history[-self.volatility_window:]
-
-        # 计算标准差
-        mean_price = sum(recent_prices) / len(recent_prices)
-        variance = sum((p - mean_price) ** 2 for p in recent_prices) / len(recent_prices)
-        volatility = (variance ** 0.5) / mean_price if mean_price > 0 else Decimal("0")
+        # 最近 N 个中间价（零拷贝视图，向量化计算）
+        mean_price = self.tick_store.mean('mid', self.volatility_window)
+        std_dev = self.tick_store.std('mid', self.volatility_window)
+        volatility = Decimal(str(std_dev / mean_price)) if mean_price > 0 else Decimal("0")
 
         return volatility
 
     def _update_price_history(self, price: Decimal):
-        """更新价格历史"""
-        self._price_history.append(price)
-
-        # 保持历史长度
-        if len(self._price_history) > self.volatility_window * 2:
-            self._price_history = self._price_history[-self.volatility_window * 2:]
+        """更新价格历史（写入共享的盘口时间序列）"""
+        self.record_tick(price)
 
     # ========== 风险检查 ==========
 
@@ -0,0 +1,405 @@
+"""
+成交标记（markout）与逆向选择分析
+
+问题：
+- record_trade 只记录 pnl = -commission，无法判断报价是否被"挑走"
+- 成交后中间价朝不利方向移动（逆向选择）是做市亏损的主要来源
+
+解决方案：
+- markout：成交后 +1s / +5s / +30s / +60s 的市场中间价相对成交价的变动
+  （买单：mid - 成交价；卖单：成交价 - mid；正值 = 对我们有利）
+- 结算 markout：相对最终结算结果（1 或 0）的变动
+- 离线：按会话整体向量化（np.searchsorted 在中间价路径上对齐所有成交），
+  多会话拼接后一次分组统计
+- 在线：MarkoutTracker 随中间价更新增量结算到期的 horizon，O(1) 摊销
+- 分组：方向 × 价差区间 × 剩余时间区间
+
+命令行：
+    python -m strategies.markout /app/data
+    python -m strategies.markout /app/data --market btc-updown-15m --since 2026-01-01   # 经会话目录筛选
+"""
+
+import argparse
+import json
+import math
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+from .recorder_storage import iter_csv, list_sessions
+from .session_catalog import SessionCatalog, parse_time
+
+
+NANOS_PER_SECOND = 1_000_000_000
+
+HORIZONS_SECS = (1, 5, 30, 60)
+
+# 市场价差区间（价格单位，上界不含）
+SPREAD_BINS = (0.02, 0.05)
+SPREAD_LABELS = ('tight', 'normal', 'wide')
+
+# 剩余时间区间（分钟，上界不含）
+TTE_BINS_MIN = (3.0, 6.0, 10.0)
+TTE_LABELS = ('0-3m', '3-6m', '6-10m', '10m+')
+
+SIDE_LABELS = {1: 'BUY', -1: 'SELL'}
+
+
+# ========== 向量化计算 ==========
+
+def markouts(fill_ts_ns, fill_px, side_sign, mid_ts_ns, mid_px, horizons_secs=HORIZONS_SECS) -> np.ndarray:
+    """
+    所有成交在各 horizon 的 markout（每股，价格单位）
+
+    Args:
+        fill_ts_ns / fill_px / side_sign: 成交时间、价格、方向（买 +1，卖 -1）
+        mid_ts_ns / mid_px: 中间价路径（时间升序）
+        horizons_secs: 标记时间点
+
+    Returns:
+        (n_fills, n_horizons) 数组；horizon 超出中间价路径末端时为 NaN
+    """
+    fill_ts_ns = np.asarray(fill_ts_ns, dtype=np.int64)
+    fill_px = np.asarray(fill_px, dtype=np.float64)
+    side_sign = np.asarray(side_sign, dtype=np.float64)
+    mid_ts_ns = np.asarray(mid_ts_ns, dtype=np.int64)
+    mid_px = np.asarray(mid_px, dtype=np.float64)
+
+    result = np.full((len(fill_ts_ns), len(horizons_secs)), np.nan)
+    if not len(fill_ts_ns) or not len(mid_ts_ns):
+        return result
+
+    offsets = np.asarray(horizons_secs, dtype=np.int64) * NANOS_PER_SECOND
+    targets = fill_ts_ns[:, None] + offsets[None, :]
+
+    # 目标时刻之前（含）最后一个中间价
+    idx = np.searchsorted(mid_ts_ns, targets, side='right') - 1
+    covered = (idx >= 0) & (targets <= mid_ts_ns[-1])
+    future_mid = mid_px[np.clip(idx, 0, len(mid_px) - 1)]
+
+    result[covered] = (side_sign[:, None] * (future_mid - fill_px[:, None]))[covered]
+    return result
+
+
+def settlement_markouts(fill_px, side_sign, outcome) -> np.ndarray:
+    """相对结算结果的 markout（outcome 为 None 时全部为 NaN）"""
+    fill_px = np.asarray(fill_px, dtype=np.float64)
+    if outcome is None:
+        return np.full(len(fill_px), np.nan)
+    return np.asarray(side_sign, dtype=np.float64) * (float(outcome) - fill_px)
+
+
+def value_at(ts_ns, path_ts_ns, path_values) -> np.ndarray:
+    """每个时刻之前（含）最后一个路径值（之前没有值时为 NaN）"""
+    ts_ns = np.asarray(ts_ns, dtype=np.int64)
+    path_values = np.asarray(path_values, dtype=np.float64)
+    if not len(path_values):
+        return np.full(len(ts_ns), np.nan)
+
+    idx = np.searchsorted(np.asarray(path_ts_ns, dtype=np.int64), ts_ns, side='right') - 1
+    return np.where(idx >= 0, path_values[np.clip(idx, 0, None)], np.nan)
+
+
+def spread_regime(spread) -> np.ndarray:
+    """价差区间编号（NaN 归入 wide）"""
+    spread = np.nan_to_num(np.asarray(spread, dtype=np.float64), nan=np.inf)
+    return np.digitize(spread, SPREAD_BINS)
+
+
+def tte_bucket(tte_secs) -> np.ndarray:
+    """剩余时间区间编号（NaN 归入最后一档）"""
+    tte_min = np.nan_to_num(np.asarray(tte_secs, dtype=np.float64), nan=np.inf) / 60.0
+    return np.digitize(tte_min, TTE_BINS_MIN)
+
+
+# ========== 分组统计 ==========
+
+def _stats(values: np.ndarray, weights: np.ndarray) -> dict:
+    mask = ~np.isnan(values)
+    values = values[mask]
+    if not len(values):
+        return {'count': 0}
+    weights = weights[mask]
+    p10, p50, p90 = np.percentile(values, (10, 50, 90))
+    return {
+        'count': int(len(values)),
+        'mean': float(values.mean()),
+        'qty_weighted_mean': float(np.dot(values, weights) / weights.sum()) if weights.sum() > 0 else float(values.mean()),
+        'p10': float(p10),
+        'median': float(p50),
+        'p90': float(p90),
+        'adverse_rate': float((values < 0).mean()),
+    }
+
+
+def summarize(fills: dict, horizons_secs=HORIZONS_SECS) -> dict:
+    """
+    按 方向 / 价差区间 / 剩余时间区间 汇总 markout 分布
+
+    Args:
+        fills: 列数组字典，需包含 side_sign, quantity, spread, tte_secs,
+               markout（n×H）, settlement（n）
+
+    Returns:
+        {'all': {...}, 'by_side': {...}, 'by_spread': {...}, 'by_tte': {...}}，
+        每个分组为 {'+1s': stats, ..., 'settlement': stats}
+    """
+    side_sign = np.asarray(fills['side_sign'])
+    quantity = np.asarray(fills['quantity'], dtype=np.float64)
+    matrix = np.asarray(fills['markout'], dtype=np.float64).reshape(len(side_sign), len(horizons_secs))
+    settlement = np.asarray(fills['settlement'], dtype=np.float64)
+
+    groupings = {
+        'by_side': (side_sign, {sign: label for sign, label in SIDE_LABELS.items()}),
+        'by_spread': (spread_regime(fills['spread']), dict(enumerate(SPREAD_LABELS))),
+        'by_tte': (tte_bucket(fills['tte_secs']), dict(enumerate(TTE_LABELS))),
+    }
+
+    def group_stats(mask):
+        stats = {
+            f'+{h}s': _stats(matrix[mask, k], quantity[mask]) for k, h in enumerate(horizons_secs)
+        }
+        stats['settlement'] = _stats(settlement[mask], quantity[mask])
+        return stats
+
+    report = {'all': group_stats(np.ones(len(side_sign), dtype=bool))}
+    for name, (codes, labels) in groupings.items():
+        report[name] = {
+            labels[code]: group_stats(codes == code) for code in np.unique(codes) if code in labels
+        }
+    return report
+
+
+def format_report(report: dict) -> str:
+    """文本报表：每个分组一行，列为各 horizon 的均值（bps 价格单位 ×1e4）和逆向选择比例"""
+    lines = []
+    for group, rows in [('all', {'ALL': report['all']})] + [(k, report[k]) for k in ('by_side', 'by_spread', 'by_tte')]:
+        for label, horizons in rows.items():
+            cells = []
+            for horizon, stats in horizons.items():
+                if stats['count']:
+                    cells.append(f"{horizon}={stats['mean'] * 1e4:+.0f}bp/{stats['adverse_rate']:.0%}")
+                else:
+                    cells.append(f"{horizon}=n/a")
+            count = max(stats['count'] for stats in horizons.values())
+            lines.append(f"[MARKOUT] {group:<9} {label:<7} n={count:<5} " + " ".join(cells))
+    return "\n".join(lines)
+
+
+# ========== 在线增量 ==========
+
+class MarkoutTracker:
+    """
+    实时 markout：成交进入各 horizon 的待结算队列，中间价更新时结算到期项
+
+    成交按时间顺序到达，因此每个 horizon 的队列按到期时间有序，只需检查队首
+    """
+
+    def __init__(self, horizons_secs=HORIZONS_SECS, max_fills: int = 10_000):
+        self.horizons_secs = tuple(horizons_secs)
+        self._offsets = [int(h * NANOS_PER_SECOND) for h in self.horizons_secs]
+        self._pending = [deque() for _ in self.horizons_secs]
+        self._last_mid = None
+        self._last_mid_ts = None
+
+        # 成交明细（列表；用于结算 markout 和报表）
+        self.fills = deque(maxlen=max_fills)
+
+    def on_fill(self, ts_ns: int, is_buy: bool, price: float, quantity: float,
+                spread: float = math.nan, tte_secs: float = math.nan):
+        """记录一笔成交"""
+        fill = {
+            'ts_ns': int(ts_ns),
+            'side_sign': 1 if is_buy else -1,
+            'price': float(price),
+            'quantity': float(quantity),
+            'spread': float(spread) if spread is not None else math.nan,
+            'tte_secs': float(tte_secs) if tte_secs is not None else math.nan,
+            'markout': [math.nan] * len(self.horizons_secs),
+            'settlement': math.nan,
+        }
+        self.fills.append(fill)
+        for queue, offset in zip(self._pending, self._offsets):
+            queue.append((fill['ts_ns'] + offset, fill))
+
+    def on_mid(self, ts_ns: int, mid: float):
+        """
+        中间价更新：到期时刻严格早于本次更新的项使用上一个中间价，
+        恰好等于本次时间戳的项使用本次中间价（与离线 searchsorted 对齐一致）
+        """
+        for k, queue in enumerate(self._pending):
+            while queue and queue[0][0] <= ts_ns:
+                target, fill = queue.popleft()
+                value = mid if target == ts_ns or self._last_mid is None else self._last_mid
+                fill['markout'][k] = fill['side_sign'] * (value - fill['price'])
+
+        self._last_mid = float(mid)
+        self._last_mid_ts = int(ts_ns)
+
+    def on_settlement(self, outcome: float):
+        """结算：所有成交相对结算结果的 markout"""
+        for fill in self.fills:
+            fill['settlement'] = fill['side_sign'] * (float(outcome) - fill['price'])
+
+    @property
+    def pending_count(self) -> int:
+        return sum(len(queue) for queue in self._pending)
+
+    def columns(self) -> dict:
+        """成交明细转为列数组（summarize 的输入）"""
+        fills = list(self.fills)
+        return {
+            'side_sign': np.array([f['side_sign'] for f in fills], dtype=np.int64),
+            'quantity': np.array([f['quantity'] for f in fills], dtype=np.float64),
+            'spread': np.array([f['spread'] for f in fills], dtype=np.float64),
+            'tte_secs': np.array([f['tte_secs'] for f in fills], dtype=np.float64),
+            'markout': np.array([f['markout'] for f in fills], dtype=np.float64).reshape(len(fills), len(self.horizons_secs)),
+            'settlement': np.array([f['settlement'] for f in fills], dtype=np.float64),
+        }
+
+    def summary(self) -> dict:
+        return summarize(self.columns(), self.horizons_secs)
+
+
+# ========== 离线会话加载 ==========
+
+def _read_columns(rows, columns) -> dict:
+    """读取 CSV 行（第一行为表头）的指定列为 float 数组（缺失列或空值为 NaN）"""
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return {name: np.empty(0) for name in columns}
+    index = {name: header.index(name) if name in header else None for name in columns}
+    rows = list(rows)
+
+    result = {}
+    for name, i in index.items():
+        if i is None:
+            result[name] = np.full(len(rows), np.nan)
+            continue
+        result[name] = np.array(
+            [float(row[i]) if i < len(row) and row[i] not in ('', 'None') else np.nan for row in rows],
+            dtype=np.float64,
+        )
+    return result
+
+
+def _timestamps_ns(columns: dict) -> np.ndarray:
+    """优先使用纳秒时间戳列，旧文件回退到秒级 timestamp"""
+    ts_ns = columns['ts_ns']
+    fallback = columns['timestamp'] * NANOS_PER_SECOND
+    return np.where(np.isnan(ts_ns), fallback, ts_ns).astype(np.int64)
+
+
+def load_session(data_dir, session_id: str, horizons_secs=HORIZONS_SECS) -> dict:
+    """
+    加载一个会话并计算全部成交的 markout
+
+    中间价路径来自 orderbook_*.csv（优先使用市场买一/卖一的中点，缺失时使用报价中心价），
+    成交来自 trades_*.csv，结算结果来自 settlement_*.json（可选）
+    """
+    data_dir = Path(data_dir)
+    book = _read_columns(
+        iter_csv(data_dir, 'orderbook', session_id),
+        ('timestamp', 'ts_ns', 'mid_price', 'best_bid', 'best_ask', 'time_remaining_min'),
+    )
+    trade_rows = list(iter_csv(data_dir, 'trades', session_id))
+    trades = _read_columns(trade_rows, ('timestamp', 'ts_ns', 'price', 'quantity')) if trade_rows else None
+    sides = []
+    if trades is not None:
+        side_index = trade_rows[0].index('side')
+        sides = [row[side_index] for row in trade_rows[1:]]
+
+    book_ts = _timestamps_ns(book)
+    order = np.argsort(book_ts, kind='stable')
+    book_ts = book_ts[order]
+    market_mid = (book['best_bid'] + book['best_ask']) / 2
+    mid = np.where(np.isnan(market_mid), book['mid_price'], market_mid)[order]
+    spread = (book['best_ask'] - book['best_bid'])[order]
+    tte = (book['time_remaining_min'] * 60)[order]
+
+    outcome = None
+    settlement_path = data_dir / f"settlement_{session_id}.json"
+    if settlement_path.exists():
+        with open(settlement_path, 'r') as f:
+            outcome = json.load(f).get('outcome')
+
+    if trades is None or not len(sides):
+        fill_ts = np.empty(0, dtype=np.int64)
+        fill_px = quantity = np.empty(0)
+        side_sign = np.empty(0, dtype=np.int64)
+    else:
+        fill_ts = _timestamps_ns(trades)
+        fill_px = trades['price']
+        quantity = trades['quantity']
+        side_sign = np.where(np.array([s.upper() == 'BUY' for s in sides]), 1, -1)
+
+    return {
+        'session_id': session_id,
+        'outcome': outcome,
+        'side_sign': side_sign,
+        'quantity': quantity,
+        'price': fill_px,
+        'spread': value_at(fill_ts, book_ts, spread),
+        'tte_secs': value_at(fill_ts, book_ts, tte),
+        'markout': markouts(fill_ts, fill_px, side_sign, book_ts, mid, horizons_secs),
+        'settlement': settlement_markouts(fill_px, side_sign, outcome),
+    }
+
+
+def find_sessions(data_dir) -> list:
+    """数据目录下所有有成交记录的会话 ID（按时间排序）"""
+    return sorted(list_sessions(data_dir, 'trades') & list_sessions(data_dir, 'orderbook'))
+
+
+def load_sessions(data_dir, session_ids=None, horizons_secs=HORIZONS_SECS) -> dict:
+    """加载多个会话并拼接为一组列数组（summarize 的输入）"""
+    session_ids = find_sessions(data_dir) if session_ids is None else session_ids
+    sessions = [load_session(data_dir, sid, horizons_secs) for sid in session_ids]
+
+    combined = {'sessions': len(sessions)}
+    for name in ('side_sign', 'quantity', 'price', 'spread', 'tte_secs', 'settlement'):
+        combined[name] = np.concatenate([s[name] for s in sessions]) if sessions else np.empty(0)
+    combined['markout'] = (
+        np.vstack([s['markout'] for s in sessions]) if sessions else np.empty((0, len(horizons_secs)))
+    )
+    return combined
+
+
+# ========== 命令行 ==========
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="成交 markout / 逆向选择分析")
+    parser.add_argument("data_dir", nargs="?", default="/app/data", help="TradeDataRecorder 输出目录")
+    parser.add_argument("--session", action="append", help="只分析指定会话（可重复）")
+    parser.add_argument("--market", help="只分析该市场 slug 前缀的会话（查询会话目录）")
+    parser.add_argument("--since", type=parse_time, help="会话时间下限（Unix 秒或 ISO，UTC）")
+    parser.add_argument("--until", type=parse_time, help="会话时间上限（Unix 秒或 ISO，UTC）")
+    parser.add_argument("--config-hash", help="只分析该参数哈希的会话")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args(argv)
+
+    session_ids = args.session
+    if session_ids is None and any(v is not None for v in (args.market, args.since, args.until, args.config_hash)):
+        catalog = SessionCatalog(args.data_dir)
+        catalog.index_directory()
+        session_ids = [
+            sid for sid in catalog.session_ids(
+                market_slug=args.market, since=args.since, until=args.until, config_hash=args.config_hash,
+            )
+            if 'orderbook' in catalog.files(sid)
+        ]
+
+    fills = load_sessions(args.data_dir, session_ids)
+    report = summarize(fills)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"会话: {fills['sessions']}  成交: {len(fills['side_sign'])}")
+        print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
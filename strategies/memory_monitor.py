@@ -0,0 +1,88 @@
+"""
+内存监控 - 长时间运行时按组件报告内存占用
+
+问题：
+- 机器人连续运行数周，进程内存持续增长，但不知道是哪个组件在增长
+- Nautilus Cache 保存所有已创建订单（每秒重新报价，订单数无上限）
+
+解决方案：
+- 定期报告进程 RSS 以及各组件的规模（订单数、数组字节数、历史长度等）
+- 记录相对启动时的 RSS 增长，便于发现泄漏
+- 已关闭订单/仓位的清理交给 LiveExecEngineConfig 的 purge_* 配置（框架自带）
+"""
+
+import os
+import sys
+import time
+
+
+def process_rss_bytes() -> int:
+    """当前进程常驻内存（字节）"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 单位为字节，Linux 为 KB（这里只在没有 /proc 时使用，取峰值近似）
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return 0
+
+
+class MemoryMonitor:
+    """
+    组件内存报告
+
+    用法：
+        monitor.register("cache_orders", lambda: len(cache.orders()))
+        monitor.maybe_report(log)   # 定时器中调用，按 interval_secs 节流
+    """
+
+    DEFAULT_INTERVAL_SECS = 300
+
+    def __init__(self, interval_secs: float = DEFAULT_INTERVAL_SECS, clock=time.monotonic):
+        self.interval_secs = float(interval_secs)
+        self._clock = clock
+        self._components = {}
+        self._baseline_rss = process_rss_bytes()
+        self._last_report = None
+
+    def register(self, name: str, probe):
+        """注册组件探针：probe() 返回该组件的规模（数量或字节数）"""
+        self._components[name] = probe
+
+    def snapshot(self) -> dict:
+        """采样一次：{'rss_mb', 'rss_growth_mb', 组件名: 规模}"""
+        rss = process_rss_bytes()
+        stats = {
+            'rss_mb': rss / 1024 / 1024,
+            'rss_growth_mb': (rss - self._baseline_rss) / 1024 / 1024,
+        }
+        for name, probe in self._components.items():
+            try:
+                stats[name] = probe()
+            except Exception as e:
+                stats[name] = f"error: {e}"
+        return stats
+
+    def maybe_report(self, log) -> dict:
+        """距离上次报告超过 interval_secs 时记录一次，返回采样结果（未到时间返回 None）"""
+        now = self._clock()
+        if self._last_report is not None and now - self._last_report < self.interval_secs:
+            return None
+        self._last_report = now
+
+        stats = self.snapshot()
+        components = ", ".join(
+            f"{name}={value}" for name, value in stats.items() if name not in ('rss_mb', 'rss_growth_mb')
+        )
+        log.info(
+            f"[MEMORY] RSS {stats['rss_mb']:.1f} MB "
+            f"(启动后 {stats['rss_growth_mb']:+.1f} MB) | {components}"
+        )
+        return stats
@@ -21,8 +21,18 @@ import math
 from nautilus_trader.model.enums import OrderSide, TimeInForce
 from nautilus_trader.model.objects import Price, Quantity
 
+from config.risk_config import StrategyRiskConfig
+
 from .base_strategy import BaseStrategy
 from .data_recorder import TradeDataRecorder
+from .market_capture import MarketDataCapture, capture_path
+from .quoting_engine import AvellanedaStoikovQuoter
+from .intensity_estimator import ArrivalIntensityEstimator
+from .reference_price import BinaryFairValue, create_reference_source
+from .requote_scheduler import RequoteScheduler
+from .settlement_ledger import GammaResolutionSource, SettlementLedger, replay_recorder_sessions
+from .risk_budget import RiskBudget, default_budget_path
+from .state_journal import StateJournal, journal_path, prune_journals
 
 
 class PredictionMarketMMStrategy(BaseStrategy):
@@ -48,6 +58,19 @@ class PredictionMarketMMStrategy(BaseStrategy):
     # 时间衰减参数（关键！）
     DEFAULT_TIME_DECAY_FACTOR = Decimal("2.0")  # 时间衰减因子
 
+    # 订单到达强度参数（论文中的κ，λ(δ) = A·exp(-κδ)）
+    DEFAULT_ARRIVAL_KAPPA = Decimal("100")  # δ=0.01 时成交概率衰减约 63%
+    DEFAULT_KAPPA_HALF_LIFE_SECS = 300      # κ 估计的成交衰减半衰期（5分钟）
+    DEFAULT_KAPPA_MIN_TRADES = 30           # 至少 30 笔成交才使用在线 κ
+    QUOTE_TABLE_TOLERANCE = 0.10            # σ/κ 相对变化超过 10% 时重建报价表
+
+    # 外部现货参考价参数
+    DEFAULT_REFERENCE_SOURCE = "binance"
+    DEFAULT_REFERENCE_REQUOTE_THRESHOLD = Decimal("0.005")  # 公允概率变化 0.5% 立即重新报价
+    ROUND_DURATION_SECS = 15 * 60
+    REFERENCE_ESTIMATE_MAX_STALENESS_SECS = 5   # 结算估计：最后一笔现货距到期不超过 5 秒
+    REFERENCE_ESTIMATE_MIN_MOVE = 0.0005        # 结算估计：收盘相对开盘价至少偏离 5bp
+
     # 订单参数
     DEFAULT_ORDER_SIZE = 2                 # 每单 2 个（1U）
     DEFAULT_MIN_ORDER_SIZE = 1
@@ -75,8 +98,26 @@ class PredictionMarketMMStrategy(BaseStrategy):
     DEFAULT_MAX_DAILY_LOSS = Decimal("-3.0")
 
     # 行为参数
-    DEFAULT_UPDATE_INTERVAL_MS = 1000      # 1 秒
+    DEFAULT_UPDATE_INTERVAL_MS = 1000      # 1 秒（盘口无变化时的心跳间隔，逐步退避）
+    DEFAULT_REQUOTE_THRESHOLD = Decimal("0.01")   # 顶档变动 1 个价格单位立即重新报价
+    DEFAULT_REQUOTE_MIN_INTERVAL_MS = 100  # 两次评估的最小间隔
+    DEFAULT_REQUOTE_MAX_INTERVAL_MS = 5000 # 心跳退避上限
     DEFAULT_END_BUFFER_MINUTES = 5         # 最后5分钟保护
+    DEFAULT_SETTLEMENT_POLL_SECS = 60      # 查询之前几轮结算结果的间隔
+    DEFAULT_RECORDER_ROTATE_SECS = 3600    # 记录文件按整点轮转
+    DEFAULT_RECORDER_ROTATE_MB = 256       # 单个活动段超过此大小也轮转
+    DEFAULT_RECORDER_HOT_DAYS = 3          # 超过此天数的会话合并压缩
+    DEFAULT_RECORDER_RETENTION_DAYS = 30   # 超过此天数的会话删除
+    DEFAULT_RECORDER_MAX_DISK_MB = 0       # 数据目录总大小上限（0 = 不限）
+    JOURNAL_COLUMNS = ('ts', 'mid', 'best_bid', 'best_ask', 'bid_depth', 'ask_depth')  # 写入日志的盘口列
+
+    # 参考价回调来自参考价源线程，同样经由事件派发（积压时只处理最新的一次）
+    # on_order_accepted 写状态日志，与报价在同一个写者上执行
+    ACTOR_HANDLERS = {
+        **BaseStrategy.ACTOR_HANDLERS,
+        '_on_reference_fair_value': 'reference_fair_value',
+        'on_order_accepted': None,
+    }
 
     def __init__(self, config):
         super().__init__(config)
@@ -91,6 +132,11 @@ class PredictionMarketMMStrategy(BaseStrategy):
         self.risk_aversion = getattr(config, 'risk_aversion', self.DEFAULT_RISK_AVERSION)
         self.time_decay_factor = getattr(config, 'time_decay_factor', self.DEFAULT_TIME_DECAY_FACTOR)
         self.end_buffer_minutes = getattr(config, 'end_buffer_minutes', self.DEFAULT_END_BUFFER_MINUTES)
+        self.arrival_kappa = getattr(config, 'arrival_kappa', self.DEFAULT_ARRIVAL_KAPPA)
+        self.kappa_half_life_secs = getattr(
+            config, 'kappa_half_life_secs', self.DEFAULT_KAPPA_HALF_LIFE_SECS
+        )
+        self.kappa_min_trades = getattr(config, 'kappa_min_trades', self.DEFAULT_KAPPA_MIN_TRADES)
 
         self.order_size = getattr(config, 'order_size', self.DEFAULT_ORDER_SIZE)
         self.min_order_size = getattr(config, 'min_order_size', self.DEFAULT_MIN_ORDER_SIZE)
@@ -114,35 +160,117 @@ class PredictionMarketMMStrategy(BaseStrategy):
 
         self.max_position_ratio = getattr(config, 'max_position_ratio', self.DEFAULT_MAX_POSITION_RATIO)
         self.max_daily_loss = getattr(config, 'max_daily_loss', self.DEFAULT_MAX_DAILY_LOSS)
+        self.max_gross_exposure = getattr(config, 'max_gross_exposure', None)
+        self.max_daily_orders = getattr(config, 'max_daily_orders', None)
 
         self.update_interval_ms = getattr(config, 'update_interval_ms', self.DEFAULT_UPDATE_INTERVAL_MS)
+        self.requote_threshold = getattr(config, 'requote_threshold', self.DEFAULT_REQUOTE_THRESHOLD)
+        self.requote_min_interval_ms = getattr(
+            config, 'requote_min_interval_ms', self.DEFAULT_REQUOTE_MIN_INTERVAL_MS
+        )
+        self.requote_max_interval_ms = getattr(
+            config, 'requote_max_interval_ms', self.DEFAULT_REQUOTE_MAX_INTERVAL_MS
+        )
         self.use_inventory_skew = getattr(config, 'use_inventory_skew', True)
         self.use_dynamic_spread = getattr(config, 'use_dynamic_spread', True)
+        self.use_quote_table = getattr(config, 'use_quote_table', False)
+        self.use_microprice = getattr(config, 'use_microprice', False)
+        self.use_reference_price = getattr(config, 'use_reference_price', False)
+        self.reference_source = getattr(config, 'reference_source', self.DEFAULT_REFERENCE_SOURCE)
+        self.reference_requote_threshold = getattr(
+            config, 'reference_requote_threshold', self.DEFAULT_REFERENCE_REQUOTE_THRESHOLD
+        )
+        self.round_start_ts = getattr(config, 'round_start_ts', None)  # 本轮开始时间（Unix 秒）
+        self.market_slug = getattr(config, 'market_slug', '')          # 会话目录按 slug 查询
+        self.settlement_poll_secs = getattr(config, 'settlement_poll_secs', self.DEFAULT_SETTLEMENT_POLL_SECS)
+        self.use_state_journal = getattr(config, 'use_state_journal', True)
+        self.journal_flush_interval_ms = getattr(
+            config, 'journal_flush_interval_ms', StateJournal.DEFAULT_FLUSH_INTERVAL_MS
+        )
+        self.recorder_rotate_secs = getattr(config, 'recorder_rotate_secs', self.DEFAULT_RECORDER_ROTATE_SECS)
+        self.recorder_rotate_mb = getattr(config, 'recorder_rotate_mb', self.DEFAULT_RECORDER_ROTATE_MB)
+        self.recorder_codec = getattr(config, 'recorder_codec', 'gzip')
+        self.recorder_hot_days = getattr(config, 'recorder_hot_days', self.DEFAULT_RECORDER_HOT_DAYS)
+        self.recorder_retention_days = getattr(
+            config, 'recorder_retention_days', self.DEFAULT_RECORDER_RETENTION_DAYS
+        )
+        self.recorder_max_disk_mb = getattr(config, 'recorder_max_disk_mb', self.DEFAULT_RECORDER_MAX_DISK_MB)
+        self.capture_market_data = getattr(config, 'capture_market_data', False)  # 原始增量 / 报价 / 成交采集
 
         # 内部状态
-        self._last_update_time_ns = 0
-        self._price_history = []
-        self._daily_start_pnl = Decimal("0")
-        self._daily_start_balance = Decimal("0")
         self._market_start_time = None  # 市场开始时间（用于计算T）
 
+        # ========== 自适应重新报价（顶档变动 / 成交立即报价，静止时退避）==========
+        self.requote_scheduler = RequoteScheduler(
+            move_threshold=float(self.requote_threshold),
+            min_interval_ms=self.requote_min_interval_ms,
+            base_interval_ms=self.update_interval_ms,
+            max_interval_ms=self.requote_max_interval_ms,
+        )
+        self._last_quoted_prices = None  # 上次提交的（买价, 卖价），未变化且仍挂着时不重挂
+        self._requotes_skipped = 0
+
+        # ========== A-S 报价引擎 ==========
+        self.quoter = AvellanedaStoikovQuoter(
+            risk_aversion=float(self.risk_aversion),
+            kappa=float(self.arrival_kappa),
+        )
+        self._quote_table = None  # 每个市场预计算一次，σ/κ 漂移时重建
+
+        # ========== 订单到达强度（在线 κ）==========
+        self.intensity_estimator = ArrivalIntensityEstimator(
+            half_life_secs=float(self.kappa_half_life_secs),
+            min_trades=int(self.kappa_min_trades),
+            default_kappa=float(self.arrival_kappa),
+        )
+
+        # ========== 外部现货参考价（on_start 时启动）==========
+        self.reference_pricer = None
+        self._reference_source = None
+        self._restored_strike = None     # 状态日志中的本轮开盘价 (price, source)
+        self._strike_journaled = False
+
         # ========== 数据记录器 ==========
-        self.recorder = TradeDataRecorder()
+        # 长时间运行时按整点 / 大小轮转，已关闭分段后台压缩
+        self.recorder = TradeDataRecorder(
+            rotate_secs=int(self.recorder_rotate_secs),
+            rotate_bytes=int(self.recorder_rotate_mb) * 1024 * 1024,
+            codec=self.recorder_codec,
+        )
         self._recording_enabled = True  # 可开关记录功能
+        self.capture = None             # 原始行情采集（on_start 时打开，与记录器同一会话）
+
+        # ========== 结算账本（跨轮次当日盈亏，到期按 0/1 结算）==========
+        self.ledger = SettlementLedger()
+        self.resolution_source = GammaResolutionSource()
+        self._last_settlement_poll = 0.0
+
+        # ========== 跨轮次风险预算（SQLite，多实例共享；on_start 时打开）==========
+        self.risk_budget = None
+
+        # ========== 状态日志（崩溃后恢复本轮状态；on_start 时回放）==========
+        self.journal = None
 
     # ========== 核心逻辑 ==========
 
     def on_order_book(self, order_book):
         """处理订单簿更新（基于论文优化的做市逻辑）"""
 
-        # 1. 检查更新间隔
+        # 1. 自适应调度：顶档变动 / 成交 / 参考价变动立即评估，否则按（退避的）心跳间隔
         now_ns = self.clock.timestamp_ns()
-        if now_ns - self._last_update_time_ns < self.update_interval_ms * 1_000_000:
+        features = self.book_features
+        reason = self.requote_scheduler.check(now_ns, features.best_bid, features.best_ask)
+        if reason is None:
             return
+        self.requote_scheduler.mark_evaluated(now_ns, features.best_bid, features.best_ask, reason)
 
         # 2. 获取中间价（带冷启动逻辑）
         # 注意：必须在风险检查之前，因为冷启动需要处理空盘口
-        mid = order_book.midpoint()
+        # 优先使用增量维护的盘口特征（双边有效时），否则回退到订单簿
+        mid = features.mid if features.is_valid else order_book.midpoint()
+        if features.is_valid:
+            self.ledger.mark(str(self.instrument_id), features.mid)
+            self._sync_risk_budget()
 
         # ========== 冷启动修复：处理空盘口 ==========
         if mid is None:
@@ -191,8 +319,17 @@ class PredictionMarketMMStrategy(BaseStrategy):
                 # 双方都有但还是 midpoint 返回 None（理论上不会）
                 self.log.warning("[COLD START] midpoint 为 None，尝试直接计算")
                 mid_price = (Decimal(best_bid) + Decimal(best_ask)) / 2
+        elif features.is_valid and self.use_microprice:
+            # 微观价格：按对手盘顶档数量加权，比简单中间价更接近公允价值
+            mid_price = Decimal(str(round(features.microprice, 6)))
         else:
-            mid_price = Decimal(mid)
+            mid_price = Decimal(str(mid))
+
+        # ========== 外部参考价：以现货推导的公允概率为报价中心 ==========
+        if self.reference_pricer is not None:
+            fair = self.reference_pricer.fair_probability(time.time_ns())
+            if fair is not None:
+                mid_price = Decimal(str(round(fair, 4)))
 
         # ========== 极端价格保护（双重保险）==========
         if mid_price >= Decimal("0.94") or mid_price <= Decimal("0.06"):
@@ -222,7 +359,12 @@ class PredictionMarketMMStrategy(BaseStrategy):
         # 检测是否为冷启动状态
         is_cold_start = (mid is None)
 
-        if self.use_dynamic_spread:
+        if self.use_quote_table:
+            # A-S 报价表：保留价格 + 最优价差，逐 tick 查表
+            bid_price, ask_price, spread, skew = self._calculate_table_quotes(
+                mid_price, time_remaining, is_cold_start
+            )
+        elif self.use_dynamic_spread:
             spread = self._calculate_time_decay_spread(time_remaining)
 
             # ========== 冷启动优化：使用更小价差吸引交易 ==========
@@ -233,34 +375,34 @@ class PredictionMarketMMStrategy(BaseStrategy):
         else:
             spread = self.base_spread
 
-        # 7. 计算库存倾斜
-        if self.use_inventory_skew:
-            skew = self._calculate_inventory_skew()
-        else:
-            skew = Decimal("0")
+        if not self.use_quote_table:
+            # 7. 计算库存倾斜
+            if self.use_inventory_skew:
+                skew = self._calculate_inventory_skew()
+            else:
+                skew = Decimal("0")
 
-        # 8. 计算挂单价格
-        half_spread = spread / 2
-        bid_price = mid_price * (Decimal("1") - half_spread - skew)
-        ask_price = mid_price * (Decimal("1") + half_spread + skew)
+            # 8. 计算挂单价格
+            half_spread = spread / 2
+            bid_price = mid_price * (Decimal("1") - half_spread - skew)
+            ask_price = mid_price * (Decimal("1") + half_spread + skew)
 
         # 9. 提交订单
         self._submit_market_quotes(bid_price, ask_price, self.order_size)
 
-        # 10. 更新时间戳
-        self._last_update_time_ns = now_ns
-
-        # 11. 记录日志
+        # 10. 记录日志
         time_remaining_min = time_remaining / 60
 
         self.log.info(
             f"\n{'='*60}\n"
             f"预测市场做市（基于论文优化）:\n"
             f"  状态: {'🔥 冷启动' if is_cold_start else '✅ 正常'}\n"
+            f"  触发: {reason} (心跳间隔 {self.requote_scheduler.interval_ms:.0f}ms)\n"
             f"  中间价: {mid_price:.4f}\n"
             f"  剩余时间: {time_remaining_min:.1f} 分钟\n"
             f"  价差: {spread*100:.2f}% (时间衰减调整)\n"
             f"  倾斜: {skew*100:.2f}% (库存风险)\n"
+            f"  κ: {self.intensity_estimator.kappa:.1f} ({self.intensity_estimator.trade_count} 笔成交)\n"
             f"  买价: {bid_price:.4f}\n"
             f"  卖价: {ask_price:.4f}\n"
             f"  订单大小: {self.order_size}个\n"
@@ -278,26 +420,342 @@ class PredictionMarketMMStrategy(BaseStrategy):
                 time_remaining_min=time_remaining_min,
                 volatility=volatility,
                 skew=skew,
+                best_bid=features.best_bid,
+                best_ask=features.best_ask,
+                ts_ns=now_ns,
+            )
+
+    def _start_reference_price(self):
+        """启动外部现货参考价源（本轮开盘价见 _resolve_strike）"""
+        if not self.round_start_ts:
+            self.log.warning("[REFERENCE] 未配置 round_start_ts，无法确定开盘价，跳过参考价")
+            return
+
+        self.reference_pricer = BinaryFairValue(
+            round_start_ts=self.round_start_ts,
+            round_end_ts=self.round_start_ts + self.ROUND_DURATION_SECS,
+            requote_threshold=float(self.reference_requote_threshold),
+        )
+        self.reference_pricer.set_listener(self._on_reference_fair_value)
+
+        try:
+            self._reference_source = create_reference_source(self.reference_source)
+            self._resolve_strike(self._reference_source)
+            self._reference_source.start(self.reference_pricer.on_price)
+            self.log.info(f"[REFERENCE] 参考价源已启动: {self.reference_source}")
+        except Exception as e:
+            self.log.error(f"[REFERENCE] 参考价源启动失败: {e}")
+            self.reference_pricer = None
+
+    def _resolve_strike(self, source):
+        """
+        确定本轮开盘价 K
+
+        - 状态日志中已有（同一轮内重启）：沿用
+        - 本轮已开始（迟启动）：向参考价源查询本轮开始时刻的价格
+        - 都不可用：回退为启动后的第一笔现货价格（本轮已开始时与真实开盘价有偏差，记录警告）
+        """
+        pricer = self.reference_pricer
+        if self._restored_strike is not None:
+            price, source_name = self._restored_strike
+            pricer.set_strike(price, source_name)
+            self._strike_journaled = True
+            self.log.info(f"[REFERENCE] 开盘价从状态日志恢复: {price}（{source_name}）")
+            return
+
+        late_secs = time.time() - self.round_start_ts
+        if late_secs <= 0:
+            return  # 本轮尚未开始：第一笔现货价格即为开盘价
+
+        price = source.round_open_price(self.round_start_ts)
+        if price is not None:
+            pricer.set_strike(price, 'round_open')
+            self._journal_strike()
+            self.log.info(f"[REFERENCE] 开盘价（本轮开始时刻）: {price}")
+        else:
+            self.log.warning(
+                f"[REFERENCE] 本轮已开始 {late_secs:.0f} 秒且无法获取开盘价，"
+                f"回退为启动后的第一笔现货价格（公允概率可能偏向 0.5）"
             )
 
+    def _journal_strike(self):
+        """开盘价写入状态日志（重启后沿用）"""
+        pricer = self.reference_pricer
+        if self.journal is None or pricer is None or pricer.strike is None or self._strike_journaled:
+            return
+        self.journal.append('strike', critical=True, strike=pricer.strike, source=pricer.strike_source)
+        self._strike_journaled = True
+
+    def _start_settlement_ledger(self):
+        """登记本轮 condition，并从记录器输出重建当日之前几轮的盈亏"""
+        expiry_ts = self.round_start_ts + self.ROUND_DURATION_SECS if self.round_start_ts else None
+        self.ledger.open(str(self.instrument_id), expiry_ts=expiry_ts)
+
+        now = time.time()
+        day_start = now - now % 86400  # UTC 零点
+        try:
+            replayed = replay_recorder_sessions(
+                self.ledger,
+                self.recorder.output_dir,
+                since_ts=day_start,
+                exclude={self.recorder.session_id},
+                catalog=self.recorder.catalog,
+            )
+            self.log.info(
+                f"[LEDGER] 回放当日 {replayed} 轮，当日盈亏 {self.ledger.daily_pnl:+.4f} USDC，"
+                f"待结算 {len(self.ledger.unresolved())} 个"
+            )
+        except Exception as e:
+            self.log.warning(f"[LEDGER] 回放记录失败: {e}")
+
+    def _budget_limits(self):
+        """风险预算使用的当日限制（与策略自身的限制一致）"""
+        return StrategyRiskConfig(
+            max_daily_pnl_loss=self.max_daily_loss,
+            max_gross_exposure=self.max_gross_exposure,
+            max_daily_orders=self.max_daily_orders,
+        )
+
+    def apply_risk_limits(self, limits):
+        """
+        运行时切换风险预设（RiskPresetController 回调，SIGHUP 时在事件循环线程调用）
+
+        Args:
+            limits: StrategyRiskConfig（库存上限 / 日亏损 / 总敞口），同时更新风险预算的限制
+        """
+        self.max_inventory = int(limits.max_position_size)
+        self.max_daily_loss = limits.max_daily_pnl_loss
+        self.max_gross_exposure = limits.max_gross_exposure
+        self._quote_table = None  # 报价表按库存上限预计算，下次报价时重建
+        if self.risk_budget is not None:
+            self.risk_budget.limits = self._budget_limits()
+        self.log.warning(
+            f"[RISK] 策略限制已更新: 库存上限 {self.max_inventory}，日亏损 {self.max_daily_loss} USDC，"
+            f"总敞口 {self.max_gross_exposure} USDC"
+        )
+
+    def _start_risk_budget(self):
+        """打开跨轮次风险预算（同一实例的之前轮次、其他实例的用量都计入当日预算）"""
+        try:
+            self.risk_budget = RiskBudget(
+                default_budget_path(str(self.recorder.output_dir)),
+                instance=str(self.id),
+                limits=self._budget_limits(),
+            )
+            self._sync_risk_budget(force=True)
+            self.log.info(
+                f"[BUDGET] 当日盈亏 {self.risk_budget.daily_pnl:+.4f} USDC，"
+                f"总敞口 {self.risk_budget.gross_exposure:.2f} USDC，订单 {self.risk_budget.order_count}"
+            )
+        except Exception as e:
+            self.log.warning(f"[BUDGET] 风险预算不可用，回退到本进程账本: {e}")
+            self.risk_budget = None
+
+    def _start_state_journal(self):
+        """
+        回放本轮状态日志（容器重启后同一轮内再次启动时）并继续追加
+
+        - 恢复：市场开始时间、价格历史（波动率）、市场成交（κ 估计）
+        - 上个进程遗留的报价（日志中的 venue_order_id，或经 external_order_claims 认领的订单）
+          一次批量撤销，之后第一次盘口更新即按当前状态重新报价
+        - 当日盈亏不在日志中：由风险预算（SQLite）和结算账本回放恢复
+        """
+        self._market_start_time = time.time()
+        if not self.use_state_journal:
+            self._cancel_orphan_quotes(venue_order_ids=set())
+            return
+
+        started = time.perf_counter()
+        journal_dir = self.recorder.output_dir / "journal"
+        path = journal_path(journal_dir, self.instrument_id)
+        try:
+            prune_journals(journal_dir, keep=[path])
+            self.journal, state = StateJournal.recover(path, flush_interval_ms=self.journal_flush_interval_ms)
+        except Exception as e:
+            self.log.warning(f"[JOURNAL] 状态日志不可用，不做恢复: {e}")
+            self.journal = None
+            self._cancel_orphan_quotes(venue_order_ids=set())
+            return
+
+        if not state.is_empty:
+            if state.market_start_time:
+                self._market_start_time = state.market_start_time
+            for tick in state.ticks:
+                tick = dict(tick)
+                self.tick_store.append(tick.pop('ts'), **tick)
+            for trade in state.trades:
+                self.intensity_estimator.on_trade(**trade)
+            if state.strike:
+                self._restored_strike = (state.strike, state.strike_source)
+
+        orphans = self._cancel_orphan_quotes(state.venue_order_ids())
+        self.journal.append(
+            'round',
+            critical=True,
+            instrument_id=str(self.instrument_id),
+            round_start_ts=self.round_start_ts,
+            market_start_time=self._market_start_time,
+        )
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if state.is_empty:
+            self.log.info(f"[JOURNAL] 本轮首次启动，状态日志: {path}")
+        else:
+            self.log.warning(
+                f"[JOURNAL] 已恢复（上次{'正常停止' if state.clean_shutdown else '异常退出'}）："
+                f"价格历史 {len(state.ticks)} 条，市场成交 {len(state.trades)} 笔，"
+                f"撤销遗留报价 {orphans} 个，用时 {elapsed_ms:.1f}ms"
+            )
+
+    def _cancel_orphan_quotes(self, venue_order_ids: set) -> int:
+        """批量撤销上个进程遗留的挂单（启动时 Cache 中的未结订单来自 NautilusTrader 的对账）"""
+        open_orders = self.cache.orders_open(instrument_id=self.instrument_id)
+        orphans = [
+            order for order in open_orders
+            if order.strategy_id == self.id
+            or (order.venue_order_id is not None and order.venue_order_id.value in venue_order_ids)
+        ]
+        if orphans:
+            self.cancel_orders(orphans)
+        if len(open_orders) > len(orphans):
+            self.log.warning(
+                f"[JOURNAL] {len(open_orders) - len(orphans)} 个未结订单不属于本策略（未认领），保留不动"
+            )
+        return len(orphans)
+
+    def _journal_order_closed(self, client_order_id):
+        if self.journal is not None:
+            self.journal.append('closed', order=str(client_order_id))
+
+    def _sync_risk_budget(self, round_key: str = None, force: bool = False):
+        """把账本中某一轮（默认本轮）的盈亏和敞口写入风险预算（写入按间隔节流）"""
+        if self.risk_budget is None:
+            return
+        round_key = round_key or str(self.instrument_id)
+        self.risk_budget.update_round(
+            round_key,
+            pnl=self.ledger.pnl_of(round_key),
+            gross_exposure=self.ledger.exposure(round_key),
+            force=force,
+        )
+
+    def on_timer(self):
+        """定时查询之前几轮的结算结果（本轮到期前不会被查询），刷新风险预算和状态日志"""
+        if self.risk_budget is not None:
+            self.risk_budget.flush()
+        if self.journal is not None:
+            self.journal.maybe_flush()
+
+        now = time.time()
+        if now - self._last_settlement_poll < self.settlement_poll_secs:
+            return
+        self._last_settlement_poll = now
+
+        if not self.ledger.unresolved(now):
+            return
+        for key, pnl in self.ledger.poll(self.resolution_source, on_error=self.log.warning).items():
+            self._sync_risk_budget(key, force=True)
+            self.log.info(f"[LEDGER] {key} 已结算: {pnl:+.4f} USDC，当日盈亏 {self.ledger.daily_pnl:+.4f} USDC")
+
+    def _on_reference_fair_value(self, fair: float):
+        """公允概率变化超过阈值：立即重新报价（不等待 Polymarket 订单簿变化）"""
+        self._journal_strike()  # 回退为第一笔现货价格时，在此（派发线程）写入日志
+        self.requote_scheduler.force('reference')
+
+        order_book = self.cache.order_book(self.instrument_id)
+        if order_book:
+            self.on_order_book(order_book)
+
+    def on_order_book_deltas(self, deltas):
+        """订单簿增量：顶档变动超过阈值时请求一次报价评估"""
+        if self.capture is not None:
+            self.capture.on_deltas(deltas)
+
+        super().on_order_book_deltas(deltas)
+
+        features = self.book_features
+        if self.requote_scheduler.check(self.clock.timestamp_ns(), features.best_bid, features.best_ask):
+            self._request_requote()
+
+    def _request_requote(self):
+        """
+        请求一次报价评估
+
+        经由事件派发排在当前事件之后；同一批积压的增量 / 成交多次请求时只评估一次（最新盘口）
+        """
+        order_book = self.cache.order_book(self.instrument_id)
+        if order_book is None:
+            return
+        if self.actor is None:
+            self.on_order_book(order_book)
+        else:
+            self.actor.defer(self.on_order_book, order_book, key=self.ACTOR_HANDLERS['on_order_book'])
+
+    def register_memory_probes(self):
+        """内存探针：时间序列行数、报价表"""
+        super().register_memory_probes()
+        self.memory_monitor.register("tick_store_rows", lambda: len(self.tick_store))
+        self.memory_monitor.register(
+            "quote_table_bytes",
+            lambda: self._quote_table.bid_offsets.nbytes * 2 if self._quote_table is not None else 0,
+        )
+
+    def on_quote_tick(self, tick):
+        """报价：只用于原始行情采集（盘口由增量维护）"""
+        if self.capture is not None:
+            self.capture.on_quote(tick)
+
+    def on_trade_tick(self, tick):
+        """市场成交时调用：更新订单到达强度估计"""
+        if self.capture is not None:
+            self.capture.on_trade(tick)
+
+        mid = self.get_midpoint()
+        if mid is None:
+            return
+
+        trade = {'price': tick.price.as_double(), 'mid': float(mid), 'ts_ns': tick.ts_event}
+        self.intensity_estimator.on_trade(**trade)
+        if self.journal is not None:
+            self.journal.append('trade', trade=trade)
+
+    def on_order_accepted(self, event):
+        """订单被交易所接受：记录 venue_order_id（重启后据此识别遗留报价）"""
+        if self.journal is not None:
+            self.journal.append(
+                'accepted',
+                order=str(event.client_order_id),
+                venue_order_id=event.venue_order_id.value,
+            )
+
+    def on_order_canceled(self, event):
+        super().on_order_canceled(event)
+        self._journal_order_closed(event.client_order_id)
+
+    def on_order_rejected(self, event):
+        super().on_order_rejected(event)
+        self._journal_order_closed(event.client_order_id)
+
     def on_order_filled(self, event):
         """订单成交时调用"""
         super().on_order_filled(event)
 
+        order = self.cache.order(event.client_order_id)
+        if order is None or order.is_closed:
+            self._journal_order_closed(event.client_order_id)
+
+        self.ledger.on_fill(
+            str(self.instrument_id),
+            is_buy=event.order_side == OrderSide.BUY,
+            price=event.last_px.as_double(),
+            quantity=event.last_qty.as_double(),
+            fee=event.commission.as_double() if event.commission else 0.0,
+        )
+        self._sync_risk_budget(force=True)
+
         # ========== 记录成交数据 ==========
         if self._recording_enabled:
-            # 计算此交易的盈亏（简化版本：手续费=成本）
-            commission = Decimal(str(event.commission)) if event.commission else Decimal("0")
-            pnl = -commission  # 简化：只扣除手续费
-
-            self.recorder.record_trade(
-                order_id=str(event.order_cl_order_id),
-                side=event.order_side.name,
-                price=Decimal(str(event.last_px)),
-                quantity=event.last_qty,
-                commission=commission,
-                pnl=pnl
-            )
+            self.recorder.record_fill(event, ts_ns=self.clock.timestamp_ns())
 
             # 记录库存变化
             account = self.get_account_info()
@@ -320,6 +778,51 @@ class PredictionMarketMMStrategy(BaseStrategy):
             self.log.warning("检测到库存过多，执行对冲")
             self._hedge_inventory()
 
+        # 库存变化：立即按新的倾斜重新报价
+        self.requote_scheduler.on_fill()
+        self._request_requote()
+
+    def time_to_expiry_secs(self) -> float:
+        return float(self._get_time_remaining())
+
+    def _settlement_outcome(self):
+        """
+        本 token 的结算结果 (outcome, source)，outcome 为 1 或 0；无法确定时返回 None
+        （写入账本与 settlement_*.json，回放时当作最终结果）
+
+        - 本轮已结束时看盘口：买一 ≥ 0.98 视为 1，卖一 ≤ 0.02 视为 0（与僵尸市场判定一致）
+        - 本轮未结束（中途停止 / 重启）不判定：盘口仍可能反转，交给 GammaResolutionSource 在结算后确认
+        - 不使用 Binance 参考价：Polymarket 不按 Binance 结算，收盘接近开盘价时可能判反，
+          参考价只用于本进程的 markout 估计（_reference_outcome_estimate）
+        """
+        if self._get_time_remaining() > 0:
+            return None
+
+        features = self.book_features
+        if features.best_bid is not None and features.best_bid >= 0.98:
+            return 1.0, "orderbook"
+        if features.best_ask is not None and features.best_ask <= 0.02:
+            return 0.0, "orderbook"
+        return None
+
+    def _reference_outcome_estimate(self):
+        """
+        按现货参考价估计的结算结果（1 / 0），只用于本进程的结算 markout 报表，不写入账本 / 结算文件
+
+        要求本轮已结束、最后一笔现货在到期前后 REFERENCE_ESTIMATE_MAX_STALENESS_SECS 秒内
+        （行情断线时不使用过期价格），且收盘相对开盘价偏离至少 REFERENCE_ESTIMATE_MIN_MOVE
+        """
+        pricer = self.reference_pricer
+        if pricer is None or not pricer.is_ready or pricer.time_remaining_secs() > 0:
+            return None
+        staleness_ns = abs(pricer.round_end_ns - pricer.spot_ts_ns)
+        if staleness_ns > self.REFERENCE_ESTIMATE_MAX_STALENESS_SECS * 1_000_000_000:
+            return None
+        move = math.log(pricer.spot / pricer.strike)
+        if abs(move) < self.REFERENCE_ESTIMATE_MIN_MOVE:
+            return None
+        return 1.0 if move > 0 else 0.0
+
     # ========== 论文公式实现 ==========
 
     def _get_time_remaining(self) -> int:
@@ -330,9 +833,12 @@ class PredictionMarketMMStrategy(BaseStrategy):
         - 如果能获取到期时间，使用实际时间
         - 否则假设15分钟轮次
         """
-        # TODO: 从市场数据获取实际到期时间
-        # 目前使用简化假设：每15分钟一轮
+        # 配置了本轮开始时间时，使用实际到期时间
+        if self.round_start_ts:
+            remaining = self.round_start_ts + self.ROUND_DURATION_SECS - time.time()
+            return int(max(0, remaining))
 
+        # 否则使用简化假设：从策略启动算起 15 分钟一轮
         if not self._market_start_time:
             self._market_start_time = time.time()
 
@@ -409,6 +915,62 @@ class PredictionMarketMMStrategy(BaseStrategy):
         # 限制最大倾斜
         return max(min(skew, self.max_skew), -self.max_skew)
 
+    def _calculate_table_quotes(self, mid_price: Decimal, time_remaining: int, is_cold_start: bool):
+        """
+        基于 A-S 报价表计算挂单价格
+
+        - σ 使用价格单位（相对波动率 × 中间价）
+        - T 与 _calculate_time_decay_spread 保持一致：归一化剩余时间 × 时间衰减因子
+        - κ 来自成交数据在线估计（ArrivalIntensityEstimator）
+        - 报价表按 (库存, 时间) 预计算，σ/κ 漂移超过阈值才重建
+
+        Returns:
+            tuple: (bid_price, ask_price, spread, skew)，spread/skew 为相对中间价的比例
+        """
+        sigma = float(self._calculate_volatility() * mid_price)
+        kappa = self.intensity_estimator.kappa  # 样本不足时回退到 arrival_kappa
+
+        if self._quote_table is None or self._quote_table.is_stale(
+            sigma, kappa, self.QUOTE_TABLE_TOLERANCE
+        ):
+            self._quote_table = self.quoter.build_table(
+                sigma=sigma,
+                max_inventory=self.max_inventory,
+                horizon=float(self.time_decay_factor),
+                kappa=kappa,
+            )
+
+        # 库存偏差（与 _calculate_inventory_skew 相同口径）
+        inventory_delta = Decimal("0")
+        if self.use_inventory_skew:
+            position = self.get_current_position()
+            if position:
+                inventory_delta = Decimal(position['quantity']) - Decimal(self.target_inventory)
+
+        T = time_remaining / (15 * 60) * float(self.time_decay_factor)
+        bid_offset, ask_offset = self._quote_table.lookup(inventory_delta, T)
+
+        # 拆成保留价格偏移和半价差，再按 min/max_spread 限制
+        reservation = Decimal(str((bid_offset + ask_offset) / 2))
+        half_spread = Decimal(str((ask_offset - bid_offset) / 2))
+
+        if is_cold_start:
+            # 冷启动时：使用 1/3 价差，更快成交
+            half_spread = half_spread / 3
+
+        half_spread = max(
+            min(half_spread, mid_price * self.max_spread / 2),
+            mid_price * self.min_spread / 2,
+        )
+
+        bid_price = mid_price + reservation - half_spread
+        ask_price = mid_price + reservation + half_spread
+
+        spread = half_spread * 2 / mid_price
+        skew = -reservation / mid_price
+
+        return bid_price, ask_price, spread, skew
+
     # ========== 订单提交 ==========
 
     def _submit_market_quotes(
@@ -429,6 +991,20 @@ class PredictionMarketMMStrategy(BaseStrategy):
         bid_price_quantized = bid_price.quantize(price_quantization)
         ask_price_quantized = ask_price.quantize(price_quantization)
 
+        # 量化后报价未变且双边挂单仍在：不撤单重挂（减少订单数）
+        quoted_prices = (bid_price_quantized, ask_price_quantized)
+        if quoted_prices == self._last_quoted_prices and self.cache.orders_open_count(
+            instrument_id=self.instrument_id,
+            strategy_id=self.id,
+        ) >= 2:
+            self._requotes_skipped += 1
+            return
+        self._last_quoted_prices = quoted_prices
+
+        self.tick_store.update_last(our_bid=float(bid_price_quantized), our_ask=float(ask_price_quantized))
+        if self.risk_budget is not None:
+            self.risk_budget.record_orders(str(self.instrument_id), 2)
+
         # 创建买单
         buy_order = self.order_factory.limit(
             instrument_id=self.instrument.id,
@@ -449,9 +1025,18 @@ class PredictionMarketMMStrategy(BaseStrategy):
             time_in_force=TimeInForce.GTC,
         )
 
-        # 提交两个独立订单
-        self.submit_order(buy_order)
-        self.submit_order(sell_order)
+        # 预写日志：报价先落盘再发出（进程在发出后崩溃时，重启能识别这两个订单）
+        if self.journal is not None:
+            self.journal.append(
+                'quote',
+                critical=True,
+                bid=float(bid_price_quantized),
+                ask=float(ask_price_quantized),
+                orders=[str(buy_order.client_order_id), str(sell_order.client_order_id)],
+            )
+
+        # 撤单-重挂：旧报价一次批量撤销，新的买卖单一次批量提交
+        self.replace_quotes([buy_order, sell_order])
 
         # ========== 记录订单提交 ==========
         if self._recording_enabled:
@@ -476,31 +1061,26 @@ class PredictionMarketMMStrategy(BaseStrategy):
 
     def _calculate_volatility(self) -> Decimal:
         """计算价格波动率（带最小波动率底线）"""
-        if len(self._price_history) < 10:
+        if len(self.tick_store) < 10:
             return Decimal("0.05")  # 默认5%
 
-        # 取最近的 N 个价格
-        recent_prices = self._price_history[-self.volatility_window:]
-
-        # 计算标准差
-        mean_price = sum(recent_prices) / len(recent_prices)
-        variance = sum((p - mean_price) ** 2 for p in recent_prices) / len(recent_prices)
-
-        # 修复：Decimal ** float 不支持，先转 float 计算平方根，再转回 Decimal
-        std_dev = Decimal(str(float(variance) ** 0.5))
-        volatility = std_dev / mean_price if mean_price > 0 else Decimal("0")
+        # 最近 N 个中间价（零拷贝视图，向量化计算）
+        mean_price = self.tick_store.mean('mid', self.volatility_window)
+        std_dev = self.tick_store.std('mid', self.volatility_window)
+        volatility = Decimal(str(std_dev / mean_price)) if mean_price > 0 else Decimal("0")
 
         # ========== 关键改进：最小波动率底线 ==========
         # 防止在横盘时价差过小，被变盘埋伏
         return max(volatility, self.min_volatility)
 
     def _update_price_history(self, price: Decimal):
-        """更新价格历史"""
-        self._price_history.append(price)
-
-        # 保持历史长度
-        if len(self._price_history) > self.volatility_window * 2:
-            self._price_history = self._price_history[-self.volatility_window * 2:]
+        """更新价格历史（写入共享的盘口时间序列，同时写入状态日志）"""
+        self.record_tick(price)
+        if self.journal is not None:
+            self.journal.append(
+                'tick',
+                tick={name: self.tick_store.last(name) for name in self.JOURNAL_COLUMNS},
+            )
 
     # ========== 风险检查 ==========
 
@@ -520,7 +1100,7 @@ class PredictionMarketMMStrategy(BaseStrategy):
             self._check_volatility_limit(),
             self._check_inventory_limits(),
             self._check_position_limits(),
-            self._check_daily_loss_limit(),
+            self._check_risk_budget(mid_price),
         ]
 
         return all(checks)
@@ -595,14 +1175,28 @@ class PredictionMarketMMStrategy(BaseStrategy):
 
         return True
 
-    def _check_daily_loss_limit(self) -> bool:
-        """检查日最大亏损"""
-        account = self.get_account_info()
+    def _check_risk_budget(self, mid_price: Decimal) -> bool:
+        """
+        检查当日风险预算（所有轮次、所有实例）：日最大亏损、总敞口、订单数
 
-        if not account:
-            return True
+        只读取内存中的汇总值，不扫描 Portfolio；预算不可用时回退到本进程账本的日亏损检查
+        """
+        if self.risk_budget is None:
+            return self._check_daily_loss_limit()
 
-        total_pnl = account['realized_pnl'].as_decimal() + account['unrealized_pnl'].as_decimal()
+        reason = self.risk_budget.check(
+            additional_exposure=float(mid_price) * self.order_size,
+            additional_orders=2,
+        )
+        if reason is not None:
+            self.log.warning(f"[BUDGET] 风险预算不足，暂停做市: {reason}")
+            return False
+
+        return True
+
+    def _check_daily_loss_limit(self) -> bool:
+        """检查日最大亏损（结算账本：当日所有轮次的结算盈亏 + 本轮按盘口中间价计价）"""
+        total_pnl = Decimal(str(round(self.ledger.daily_pnl, 6)))
 
         if total_pnl < self.max_daily_loss:
             self.log.warning(
@@ -658,16 +1252,32 @@ class PredictionMarketMMStrategy(BaseStrategy):
 
     def on_start(self):
         """策略启动"""
+        # 原始行情采集须在订阅之前打开（第一批增量即为完整快照）
+        if self.capture_market_data:
+            self.capture = MarketDataCapture(capture_path(self.recorder.output_dir, self.recorder.session_id))
+            self.log.info(f"[CAPTURE] 原始行情采集: {self.capture.path}")
+
         super().on_start()
 
-        # 记录初始余额
-        account = self.get_account_info()
-        if account:
-            self._daily_start_balance = account['total_balance'].as_decimal()
-            self._daily_start_pnl = account['realized_pnl'].as_decimal()
+        # 状态日志：恢复本轮的市场开始时间、价格历史、成交强度样本，撤销上个进程遗留的报价
+        self._start_state_journal()
 
-        # 记录市场开始时间
-        self._market_start_time = time.time()
+        # 结算账本：登记本轮，回放当日之前几轮的成交和结算
+        # 风险预算：日亏损 / 敞口 / 订单数跨轮次持久化（取代按进程记录的日初余额）
+        self._start_settlement_ledger()
+        self._start_risk_budget()
+
+        # 数据目录保留策略（后台线程，回放之后执行；当前会话不处理）
+        if self._recording_enabled:
+            self.recorder.apply_retention_async(
+                hot_days=float(self.recorder_hot_days),
+                retention_days=float(self.recorder_retention_days) if self.recorder_retention_days else None,
+                max_bytes=int(self.recorder_max_disk_mb) * 1024 * 1024 if self.recorder_max_disk_mb else None,
+            )
+
+        # 启动外部现货参考价
+        if self.use_reference_price:
+            self._start_reference_price()
 
         # ========== 保存策略配置 ==========
         if self._recording_enabled:
@@ -678,6 +1288,13 @@ class PredictionMarketMMStrategy(BaseStrategy):
                 'max_spread': str(self.max_spread),
                 'risk_aversion': str(self.risk_aversion),
                 'time_decay_factor': str(self.time_decay_factor),
+                'arrival_kappa': str(self.arrival_kappa),
+                'use_quote_table': self.use_quote_table,
+                'use_microprice': self.use_microprice,
+                'use_reference_price': self.use_reference_price,
+                'reference_source': self.reference_source,
+                'round_start_ts': self.round_start_ts,
+                'market_slug': self.market_slug,
                 'order_size': self.order_size,
                 'max_inventory': self.max_inventory,
                 'inventory_skew_factor': str(self.inventory_skew_factor),
@@ -685,6 +1302,11 @@ class PredictionMarketMMStrategy(BaseStrategy):
                 'min_volatility': str(self.min_volatility),
                 'max_volatility': str(self.max_volatility),
                 'end_buffer_minutes': self.end_buffer_minutes,
+                'update_interval_ms': self.update_interval_ms,
+                'requote_threshold': str(self.requote_threshold),
+                'requote_min_interval_ms': self.requote_min_interval_ms,
+                'requote_max_interval_ms': self.requote_max_interval_ms,
+                'use_state_journal': self.use_state_journal,
             }
             self.recorder.save_config(config_dict)
             self.log.info("[DATA] Strategy configuration saved")
@@ -705,6 +1327,40 @@ class PredictionMarketMMStrategy(BaseStrategy):
 
     def on_stop(self):
         """策略停止时调用"""
+        # 先停止事件派发：下面的结算 / 账本操作不能与定时器线程中的报价并发
+        self.stop_event_dispatch()
+
+        if self._reference_source is not None:
+            self._reference_source.stop()
+
+        if self.capture is not None:
+            self.capture.close()
+            stats = self.capture.stats()
+            self.log.info(
+                f"[CAPTURE] 采集 {stats['frames']} 帧（{stats['bytes'] / 1024 / 1024:.1f} MB），丢弃 {stats['dropped']} 帧"
+            )
+
+        # 结算 markout 需在基类打印报表之前完成
+        settlement = self._settlement_outcome()
+        if settlement is not None:
+            self.markouts.on_settlement(settlement[0])
+            self.ledger.settle(str(self.instrument_id), settlement[0])
+        else:
+            # 参考价估计只进入本进程的 markout 报表；本轮留给 Gamma 轮询结算
+            estimate = self._reference_outcome_estimate()
+            if estimate is not None:
+                self.markouts.on_settlement(estimate)
+        if self.risk_budget is not None:
+            self._sync_risk_budget(force=True)
+            self.risk_budget.close()
+        self.log.info(
+            f"[REQUOTE] 评估次数 {self.requote_scheduler.counts}，报价未变跳过重挂 {self._requotes_skipped} 次"
+        )
+        self.log.info(
+            f"[LEDGER] 当日盈亏 {self.ledger.daily_pnl:+.4f} USDC "
+            f"(已结算 {self.ledger.settled_pnl:+.4f}，未结算 {self.ledger.open_pnl:+.4f})"
+        )
+
         super().on_stop()
 
         # ========== 记录最终库存状态 ==========
@@ -723,7 +1379,18 @@ class PredictionMarketMMStrategy(BaseStrategy):
                     unrealized_pnl=account['unrealized_pnl'].as_decimal()
                 )
 
+            # 结算结果（markout 离线分析使用）
+            if settlement is not None:
+                self.recorder.record_settlement(*settlement)
+
             # 打印数据摘要
             summary = self.recorder.get_summary()
             self.log.info(f"\n{summary}")
             self.log.info("[DATA] Final inventory state recorded")
+            self.recorder.close()
+
+        if self.journal is not None:
+            self.journal.close()
+            self.log.info(
+                f"[JOURNAL] 写入 {self.journal.records_written} 条记录，落盘 {self.journal.flushes} 次"
+            )
@@ -0,0 +1,446 @@
+"""
+多进程报价 - 行情只接入一次，报价计算分散到多个工作进程
+
+问题：
+- 同一进程内做多个市场时，所有市场的报价计算都在 GIL 之后串行执行，
+  增加市场只会拉长每个市场的响应时间，无法利用多核
+
+解决方案（部署方式见 run_multi_market.py）：
+- 行情 / 执行网关进程（FanoutGatewayStrategy）：唯一的 TradingNode，订阅所有市场，
+  把归一化的顶档更新和成交回报写入各工作进程的共享内存环形缓冲区
+- 顶档更新与成交回报分用两个环形缓冲区：顶档可以丢（下一条更新带来最新状态），
+  成交不能丢（丢一笔库存永久错位），成交缓冲区满时在网关进程排队、下次发布 / 读取请求时重试
+- 报价工作进程（quote_worker_main）：每个进程负责一部分市场（slot % 进程数），
+  每个市场一个 MarketQuoter；一批事件中同一市场只评估一次（最新顶档）
+- 报价请求经另一个环形缓冲区回到执行网关，由网关统一撤单重挂（RiskEngine 检查仍在网关进程）
+
+MarketQuoter 是 PredictionMarketMMStrategy 报价表路径（use_quote_table=True）的无框架版本：
+A-S 报价表 + 自适应重新报价调度，参数默认值与策略一致；冷启动 / 参考价 / 对冲仍只在单进程模式中提供
+库存硬上限：库存 >= max_inventory 时不挂买单，<= -max_inventory 时不挂卖单（报价请求中该侧为 NaN）；
+当日亏损上限在执行网关检查（fanout_gateway.py）
+"""
+
+import math
+import multiprocessing
+import time
+from collections import deque
+
+from .quoting_engine import AvellanedaStoikovQuoter
+from .requote_scheduler import RequoteScheduler
+from .shm_ring import (
+    ACTION_CANCEL,
+    ACTION_QUOTE,
+    EVENT_BOOK,
+    EVENT_FILL,
+    MARKET_EVENT_DTYPE,
+    ORDER_REQUEST_DTYPE,
+    ShmRing,
+)
+from .tick_store import TickStore
+
+
+ROUND_DURATION_SECS = 15 * 60
+
+
+class MarketQuoter:
+    """
+    单个市场的报价计算（工作进程内使用，不依赖 NautilusTrader）
+
+    用法：
+        quoter = MarketQuoter(round_start_ts=..., order_size=5)
+        quoter.on_book(ts_ns, bid, ask, bid_size, ask_size)
+        request = quoter.evaluate(now_ns)   # None / (ACTION_QUOTE, bid, ask) / (ACTION_CANCEL, nan, nan)
+                                            # 库存达到上限时 bid 或 ask 为 NaN（只挂另一侧）
+    """
+
+    DEFAULT_RISK_AVERSION = 0.5
+    DEFAULT_TIME_DECAY_FACTOR = 2.0
+    DEFAULT_ARRIVAL_KAPPA = 100.0
+    DEFAULT_MIN_SPREAD = 0.01
+    DEFAULT_MAX_SPREAD = 0.15
+    DEFAULT_MIN_PRICE = 0.05
+    DEFAULT_MAX_PRICE = 0.95
+    DEFAULT_MIN_VOLATILITY = 0.03
+    DEFAULT_VOLATILITY_WINDOW = 30
+    DEFAULT_ORDER_SIZE = 2
+    DEFAULT_MAX_INVENTORY = 10
+    DEFAULT_END_BUFFER_MINUTES = 5
+    QUOTE_TABLE_TOLERANCE = 0.10
+    PRICE_TICK = 0.01
+
+    def __init__(
+        self,
+        round_start_ts: int,
+        order_size: float = DEFAULT_ORDER_SIZE,
+        max_inventory: int = DEFAULT_MAX_INVENTORY,
+        risk_aversion: float = DEFAULT_RISK_AVERSION,
+        time_decay_factor: float = DEFAULT_TIME_DECAY_FACTOR,
+        arrival_kappa: float = DEFAULT_ARRIVAL_KAPPA,
+        min_spread: float = DEFAULT_MIN_SPREAD,
+        max_spread: float = DEFAULT_MAX_SPREAD,
+        min_price: float = DEFAULT_MIN_PRICE,
+        max_price: float = DEFAULT_MAX_PRICE,
+        min_volatility: float = DEFAULT_MIN_VOLATILITY,
+        volatility_window: int = DEFAULT_VOLATILITY_WINDOW,
+        end_buffer_minutes: float = DEFAULT_END_BUFFER_MINUTES,
+        requote_threshold: float = RequoteScheduler.DEFAULT_MOVE_THRESHOLD,
+        requote_min_interval_ms: float = RequoteScheduler.DEFAULT_MIN_INTERVAL_MS,
+        update_interval_ms: float = RequoteScheduler.DEFAULT_BASE_INTERVAL_MS,
+        requote_max_interval_ms: float = RequoteScheduler.DEFAULT_MAX_INTERVAL_MS,
+    ):
+        self.round_start_ts = int(round_start_ts)
+        self.order_size = float(order_size)
+        self.max_inventory = int(max_inventory)
+        self.time_decay_factor = float(time_decay_factor)
+        self.min_spread = float(min_spread)
+        self.max_spread = float(max_spread)
+        self.min_price = float(min_price)
+        self.max_price = float(max_price)
+        self.min_volatility = float(min_volatility)
+        self.volatility_window = int(volatility_window)
+        self.end_buffer_secs = float(end_buffer_minutes) * 60
+
+        self.quoter = AvellanedaStoikovQuoter(risk_aversion=float(risk_aversion), kappa=float(arrival_kappa))
+        self.scheduler = RequoteScheduler(
+            move_threshold=float(requote_threshold),
+            min_interval_ms=requote_min_interval_ms,
+            base_interval_ms=update_interval_ms,
+            max_interval_ms=requote_max_interval_ms,
+        )
+        self.ticks = TickStore(capacity=max(self.volatility_window * 4, 64))
+        self._table = None
+
+        self.best_bid = math.nan
+        self.best_ask = math.nan
+        self.bid_size = 0.0
+        self.ask_size = 0.0
+        self.inventory = 0.0
+        self._quoting = False
+        self._last_quote = None
+
+    # ========== 输入 ==========
+
+    def on_book(self, ts_ns: int, best_bid: float, best_ask: float, bid_size: float = 0.0, ask_size: float = 0.0):
+        self.best_bid = float(best_bid)
+        self.best_ask = float(best_ask)
+        self.bid_size = float(bid_size)
+        self.ask_size = float(ask_size)
+
+    def on_fill(self, quantity: float):
+        """成交（买入为正、卖出为负）：更新库存，下一次评估立即重新报价"""
+        self.inventory += float(quantity)
+        self.scheduler.on_fill()
+        self._last_quote = None
+
+    # ========== 报价 ==========
+
+    @staticmethod
+    def _touch(value):
+        return None if math.isnan(value) else value
+
+    def mid_price(self):
+        """微观价格（顶档数量加权），数量缺失时退化为中间价"""
+        bid, ask = self.best_bid, self.best_ask
+        if math.isnan(bid) or math.isnan(ask):
+            return None
+        total = self.bid_size + self.ask_size
+        if total <= 0:
+            return (bid + ask) / 2
+        return (bid * self.ask_size + ask * self.bid_size) / total
+
+    def _volatility(self, mid: float) -> float:
+        if len(self.ticks) < 10:
+            return 0.05
+        mean = self.ticks.mean('mid', self.volatility_window)
+        std = self.ticks.std('mid', self.volatility_window)
+        volatility = std / mean if mean > 0 else 0.0
+        return max(volatility, self.min_volatility)
+
+    def _cancel(self):
+        if not self._quoting:
+            return None
+        self._quoting = False
+        self._last_quote = None
+        return ACTION_CANCEL, math.nan, math.nan
+
+    def evaluate(self, now_ns: int, now_ts: float = None):
+        """
+        评估是否需要（以及如何）重新报价
+
+        Returns:
+            None: 不需要动作
+            (ACTION_QUOTE, bid, ask): 撤单重挂（库存达到上限的一侧为 NaN）
+            (ACTION_CANCEL, nan, nan): 停止做市（到期保护 / 极端价格 / 盘口单边）
+        """
+        bid, ask = self._touch(self.best_bid), self._touch(self.best_ask)
+        reason = self.scheduler.check(now_ns, bid, ask)
+        if reason is None:
+            return None
+        self.scheduler.mark_evaluated(now_ns, bid, ask, reason)
+
+        now_ts = time.time() if now_ts is None else now_ts
+        time_remaining = self.round_start_ts + ROUND_DURATION_SECS - now_ts
+        if time_remaining <= self.end_buffer_secs:
+            return self._cancel()
+
+        mid = self.mid_price()
+        if mid is None or mid >= 0.94 or mid <= 0.06:
+            return self._cancel()
+
+        self.ticks.append(now_ns, mid, best_bid=self.best_bid, best_ask=self.best_ask)
+
+        sigma = self._volatility(mid) * mid
+        kappa = self.quoter.kappa
+        if self._table is None or self._table.is_stale(sigma, kappa, self.QUOTE_TABLE_TOLERANCE):
+            self._table = self.quoter.build_table(
+                sigma=sigma,
+                max_inventory=self.max_inventory,
+                horizon=self.time_decay_factor,
+            )
+
+        T = time_remaining / ROUND_DURATION_SECS * self.time_decay_factor
+        bid_offset, ask_offset = self._table.lookup(self.inventory, T)
+        reservation = (bid_offset + ask_offset) / 2
+        half_spread = (ask_offset - bid_offset) / 2
+        half_spread = max(min(half_spread, mid * self.max_spread / 2), mid * self.min_spread / 2)
+
+        our_bid = min(max(round(mid + reservation - half_spread, 2), self.min_price), self.max_price)
+        our_ask = min(max(round(mid + reservation + half_spread, 2), self.min_price), self.max_price)
+        if our_ask - our_bid < self.PRICE_TICK - 1e-9:
+            return None
+
+        # 库存硬上限（与单进程策略的 current_inventory >= max_inventory 检查一致）：
+        # 报价表只把库存截断到表的边缘，不会停止继续加仓
+        if self.inventory >= self.max_inventory:
+            our_bid = None
+        if self.inventory <= -self.max_inventory:
+            our_ask = None
+        if our_bid is None and our_ask is None:
+            return self._cancel()
+
+        quote = (our_bid, our_ask)
+        if quote == self._last_quote:
+            return None
+        self._last_quote = quote
+        self._quoting = True
+        return (
+            ACTION_QUOTE,
+            math.nan if our_bid is None else our_bid,
+            math.nan if our_ask is None else our_ask,
+        )
+
+
+# ========== 工作进程 ==========
+
+def quote_worker_main(events_ring_name: str, fills_ring_name: str, orders_ring_name: str, markets: dict,
+                      stop_event, idle_sleep_secs: float = 0.0005, heartbeat_secs: float = 0.1):
+    """
+    报价工作进程入口
+
+    Args:
+        fills_ring_name: 成交回报缓冲区（与顶档更新分开，先于顶档处理）
+        markets: {slot: MarketQuoter 参数}
+        stop_event: multiprocessing.Event，置位后退出
+        heartbeat_secs: 没有新事件时，按此间隔评估所有市场（心跳重新报价 / 到期保护）
+    """
+    events = ShmRing.attach(events_ring_name, MARKET_EVENT_DTYPE)
+    fills = ShmRing.attach(fills_ring_name, MARKET_EVENT_DTYPE)
+    orders = ShmRing.attach(orders_ring_name, ORDER_REQUEST_DTYPE)
+    quoters = {int(slot): MarketQuoter(**params) for slot, params in markets.items()}
+    last_heartbeat = 0.0
+
+    try:
+        while not stop_event.is_set():
+            fill_batch = fills.pop_many()
+            batch = events.pop_many()
+
+            # 一批事件中同一市场只评估一次（顶档已更新为最新）
+            touched = set()
+            for record in fill_batch:
+                quoter = quoters.get(int(record['slot']))
+                if quoter is not None:
+                    quoter.on_fill(record['quantity'])
+                    touched.add(int(record['slot']))
+            for record in batch:
+                quoter = quoters.get(int(record['slot']))
+                if quoter is None:
+                    continue
+                if record['kind'] == EVENT_BOOK:
+                    quoter.on_book(
+                        int(record['ts_ns']), record['best_bid'], record['best_ask'],
+                        record['bid_size'], record['ask_size'],
+                    )
+                elif record['kind'] == EVENT_FILL:
+                    quoter.on_fill(record['quantity'])
+                touched.add(int(record['slot']))
+
+            now = time.monotonic()
+            if now - last_heartbeat >= heartbeat_secs:
+                touched = quoters.keys()
+                last_heartbeat = now
+
+            now_ns = time.time_ns()
+            for slot in touched:
+                quoter = quoters[slot]
+                request = quoter.evaluate(now_ns, now_ns / 1e9)
+                if request is not None:
+                    action, bid, ask = request
+                    orders.push((action, slot, now_ns, bid, ask, quoter.order_size))
+
+            if len(batch) == 0 and len(fill_batch) == 0:
+                time.sleep(idle_sleep_secs)
+    finally:
+        events.close()
+        fills.close()
+        orders.close()
+
+
+class QuoteWorkerPool:
+    """
+    报价工作进程池（执行网关进程中使用）
+
+    用法：
+        pool = QuoteWorkerPool([{'round_start_ts': ...}, ...], n_workers=4)
+        pool.start()
+        pool.publish_book(slot, ts_ns, bid, ask, bid_size, ask_size)
+        pool.publish_fill(slot, ts_ns, price, quantity)   # 缓冲区满时排队重试，不丢
+        for request in pool.drain_orders(): ...
+        pool.stop()
+    """
+
+    DEFAULT_RING_CAPACITY = 65536
+    DEFAULT_FILL_RING_CAPACITY = 4096
+
+    def __init__(self, markets: list, n_workers: int = None, ring_capacity: int = DEFAULT_RING_CAPACITY,
+                 fill_ring_capacity: int = DEFAULT_FILL_RING_CAPACITY):
+        self.markets = list(markets)
+        cpu_workers = max((multiprocessing.cpu_count() or 2) - 1, 1)
+        self.n_workers = max(1, min(int(n_workers or cpu_workers), len(self.markets) or 1))
+        self.ring_capacity = int(ring_capacity)
+        self.fill_ring_capacity = int(fill_ring_capacity)
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._stop_event = None
+        self._processes = []
+        self._event_rings = []
+        self._fill_rings = []
+        self._order_rings = []
+        self._pending_fills = []   # 每个工作进程一个 deque：成交缓冲区满时暂存，按顺序重试
+
+    def worker_of(self, slot: int) -> int:
+        return slot % self.n_workers
+
+    # ========== 生命周期 ==========
+
+    def _open_rings(self):
+        for _ in range(self.n_workers):
+            self._event_rings.append(ShmRing.create(MARKET_EVENT_DTYPE, self.ring_capacity))
+            self._fill_rings.append(ShmRing.create(MARKET_EVENT_DTYPE, self.fill_ring_capacity))
+            self._order_rings.append(ShmRing.create(ORDER_REQUEST_DTYPE, self.ring_capacity))
+            self._pending_fills.append(deque())
+
+    def start(self):
+        self._stop_event = self._ctx.Event()
+        self._open_rings()
+        for worker_id in range(self.n_workers):
+            markets = {
+                slot: params for slot, params in enumerate(self.markets)
+                if self.worker_of(slot) == worker_id
+            }
+            process = self._ctx.Process(
+                target=quote_worker_main,
+                args=(
+                    self._event_rings[worker_id].name,
+                    self._fill_rings[worker_id].name,
+                    self._order_rings[worker_id].name,
+                    markets,
+                    self._stop_event,
+                ),
+                name=f"quote-worker-{worker_id}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+    def stop(self, timeout: float = 5.0):
+        if self._stop_event is not None:
+            self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+        for ring in self._event_rings + self._fill_rings + self._order_rings:
+            ring.close()
+        self._processes, self._event_rings, self._fill_rings, self._order_rings = [], [], [], []
+        self._pending_fills = []
+
+    @property
+    def alive(self) -> int:
+        return sum(1 for process in self._processes if process.is_alive())
+
+    # ========== 行情 → 工作进程 ==========
+
+    def publish_book(self, slot: int, ts_ns: int, best_bid, best_ask, bid_size: float = 0.0, ask_size: float = 0.0) -> bool:
+        return self._event_rings[self.worker_of(slot)].push((
+            EVENT_BOOK, slot, ts_ns,
+            math.nan if best_bid is None else best_bid,
+            math.nan if best_ask is None else best_ask,
+            bid_size, ask_size, 0.0, 0.0,
+        ))
+
+    def publish_fill(self, slot: int, ts_ns: int, price: float, quantity: float) -> bool:
+        """
+        成交回报（quantity 买入为正、卖出为负），写入成交专用缓冲区
+
+        Returns:
+            True: 已写入；False: 缓冲区满（或前面还有排队的成交），已排队，
+            在之后的 publish_fill / drain_orders 中按顺序重试，不会丢弃
+        """
+        worker_id = self.worker_of(slot)
+        pending = self._pending_fills[worker_id]
+        record = (EVENT_FILL, slot, ts_ns, math.nan, math.nan, 0.0, 0.0, price, quantity)
+        if pending and not self._flush_fills(worker_id):
+            pending.append(record)
+            return False
+        if not self._fill_rings[worker_id].push(record):
+            pending.append(record)
+            return False
+        return True
+
+    def _flush_fills(self, worker_id: int) -> bool:
+        """按顺序重试排队的成交，全部写入返回 True"""
+        pending = self._pending_fills[worker_id]
+        ring = self._fill_rings[worker_id]
+        while pending:
+            if not ring.push(pending[0]):
+                return False
+            pending.popleft()
+        return True
+
+    @property
+    def pending_fills(self) -> int:
+        return sum(len(pending) for pending in self._pending_fills)
+
+    # ========== 工作进程 → 执行网关 ==========
+
+    def drain_orders(self):
+        """读出所有工作进程的报价请求（ORDER_REQUEST_DTYPE 记录）；顺带重试排队的成交"""
+        for worker_id, pending in enumerate(self._pending_fills):
+            if pending:
+                self._flush_fills(worker_id)
+        requests = []
+        for ring in self._order_rings:
+            batch = ring.pop_many()
+            if len(batch):
+                requests.extend(batch)
+        return requests
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.n_workers,
+            'alive': self.alive,
+            'event_backlog': sum(len(ring) for ring in self._event_rings),
+            'event_dropped': sum(ring.dropped for ring in self._event_rings),
+            'fill_pending': self.pending_fills,
+            'order_dropped': sum(ring.dropped for ring in self._order_rings),
+        }
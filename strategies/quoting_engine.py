@@ -0,0 +1,180 @@
+"""
+Avellaneda-Stoikov 报价引擎 - 闭式解 + 向量化参数评估
+
+论文：High-frequency trading in a limit order book (Avellaneda & Stoikov, 2008)
+
+核心公式：
+1. 保留价格：r = s - q·γ·σ²·(T-t)
+2. 最优价差：δᵃ + δᵇ = γ·σ²·(T-t) + (2/γ)·ln(1 + γ/κ)
+
+其中：
+- s: 中间价（公允价值）
+- q: 当前库存
+- γ: 风险厌恶系数
+- σ: 价格波动率（绝对值，价格单位）
+- T-t: 剩余时间（归一化）
+- κ: 订单到达强度衰减系数（λ(δ) = A·exp(-κδ)）
+
+设计：
+- 所有计算都基于 NumPy 广播，一次调用可评估整组库存/时间状态
+- build_table() 为每个市场预计算报价表，逐 tick 报价变成一次查表
+- 报价以"相对中间价的偏移"存储，与 s 无关，因此中间价变化无需重建
+"""
+
+import math
+
+import numpy as np
+
+
+class QuoteTable:
+    """
+    预计算报价表（库存 × 剩余时间）
+
+    bid_offsets / ask_offsets 形状为 (库存数, 时间桶数)，
+    单位为价格（相对中间价的偏移，bid 为负、ask 为正）
+    """
+
+    def __init__(
+        self,
+        inventories: np.ndarray,
+        times: np.ndarray,
+        bid_offsets: np.ndarray,
+        ask_offsets: np.ndarray,
+        sigma: float,
+        kappa: float,
+    ):
+        self.inventories = inventories
+        self.times = times
+        self.bid_offsets = bid_offsets
+        self.ask_offsets = ask_offsets
+
+        # 构建参数（用于判断是否需要重建）
+        self.sigma = sigma
+        self.kappa = kappa
+
+        self._min_inventory = int(inventories[0])
+        self._max_inventory = int(inventories[-1])
+        self._time_step = float(times[1] - times[0]) if len(times) > 1 else 1.0
+        self._last_time_index = len(times) - 1
+
+    def lookup(self, inventory, time_remaining: float):
+        """
+        查表获取报价偏移（O(1)）
+
+        Args:
+            inventory: 当前库存（超出表范围时截断到边界）
+            time_remaining: 剩余时间（与构建时单位一致）
+
+        Returns:
+            tuple[float, float]: (bid_offset, ask_offset)
+        """
+        q = min(max(int(round(float(inventory))), self._min_inventory), self._max_inventory)
+        i = q - self._min_inventory
+
+        # 时间向上取整到桶：保守地使用更长的剩余时间（更宽的价差）
+        j = int(math.ceil(max(float(time_remaining), 0.0) / self._time_step - 1e-9))
+        j = min(j, self._last_time_index)
+
+        return float(self.bid_offsets[i, j]), float(self.ask_offsets[i, j])
+
+    def is_stale(self, sigma: float, kappa: float, tolerance: float) -> bool:
+        """参数相对变化超过 tolerance 时视为过期"""
+        return (
+            abs(sigma - self.sigma) > tolerance * max(self.sigma, 1e-12)
+            or abs(kappa - self.kappa) > tolerance * max(self.kappa, 1e-12)
+        )
+
+
+class AvellanedaStoikovQuoter:
+    """
+    Avellaneda-Stoikov 报价器
+
+    所有方法都接受标量或 NumPy 数组，按广播规则返回同形状结果
+    """
+
+    def __init__(
+        self,
+        risk_aversion: float,
+        kappa: float,
+        min_half_spread: float = 0.0,
+        max_half_spread: float = math.inf,
+    ):
+        if risk_aversion <= 0:
+            raise ValueError(f"risk_aversion 必须为正数: {risk_aversion}")
+        if kappa <= 0:
+            raise ValueError(f"kappa 必须为正数: {kappa}")
+
+        self.risk_aversion = float(risk_aversion)
+        self.kappa = float(kappa)
+        self.min_half_spread = float(min_half_spread)
+        self.max_half_spread = float(max_half_spread)
+
+    # ========== 闭式解 ==========
+
+    def reservation_offset(self, inventory, sigma, time_remaining):
+        """保留价格相对中间价的偏移：r - s = -q·γ·σ²·(T-t)"""
+        q = np.asarray(inventory, dtype=np.float64)
+        sigma = np.asarray(sigma, dtype=np.float64)
+        tau = np.maximum(np.asarray(time_remaining, dtype=np.float64), 0.0)
+
+        return -q * self.risk_aversion * sigma ** 2 * tau
+
+    def optimal_spread(self, sigma, time_remaining, kappa=None):
+        """最优总价差：γ·σ²·(T-t) + (2/γ)·ln(1 + γ/κ)"""
+        gamma = self.risk_aversion
+        kappa = np.asarray(self.kappa if kappa is None else kappa, dtype=np.float64)
+        sigma = np.asarray(sigma, dtype=np.float64)
+        tau = np.maximum(np.asarray(time_remaining, dtype=np.float64), 0.0)
+
+        return gamma * sigma ** 2 * tau + (2.0 / gamma) * np.log1p(gamma / kappa)
+
+    def quote_offsets(self, inventory, sigma, time_remaining, kappa=None):
+        """
+        计算买卖报价相对中间价的偏移
+
+        bid = s + bid_offset, ask = s + ask_offset
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (bid_offsets, ask_offsets)
+        """
+        reservation = self.reservation_offset(inventory, sigma, time_remaining)
+        half_spread = self.optimal_spread(sigma, time_remaining, kappa) / 2.0
+        half_spread = np.clip(half_spread, self.min_half_spread, self.max_half_spread)
+
+        bid, ask = np.broadcast_arrays(reservation - half_spread, reservation + half_spread)
+        return bid.copy(), ask.copy()
+
+    # ========== 预计算报价表 ==========
+
+    def build_table(
+        self,
+        sigma: float,
+        max_inventory: int,
+        horizon: float,
+        n_time_buckets: int = 61,
+        kappa: float = None,
+    ) -> QuoteTable:
+        """
+        一次调用预计算整个市场的报价表
+
+        Args:
+            sigma: 波动率（价格单位）
+            max_inventory: 库存范围 [-max_inventory, max_inventory]
+            horizon: 最大剩余时间（与 lookup 的单位一致）
+            n_time_buckets: 时间网格点数（含 0 和 horizon）
+            kappa: 到达强度系数（默认使用构造时的值）
+        """
+        kappa = self.kappa if kappa is None else float(kappa)
+        n_time_buckets = max(int(n_time_buckets), 2)
+
+        inventories = np.arange(-int(max_inventory), int(max_inventory) + 1)
+        times = np.linspace(0.0, float(horizon), n_time_buckets)
+
+        bid, ask = self.quote_offsets(
+            inventories[:, np.newaxis],
+            sigma,
+            times[np.newaxis, :],
+            kappa,
+        )
+
+        return QuoteTable(inventories, times, bid, ask, float(sigma), kappa)
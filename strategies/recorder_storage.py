@@ -0,0 +1,280 @@
+"""
+记录器文件存储 - 分段轮转、后台压缩、保留策略
+
+问题：
+- TradeDataRecorder 每个会话一组 CSV，长时间运行时单个文件无限增长
+- /app/data 所在的 Zeabur / Railway 卷几周后被写满
+
+解决方案：
+- 分段：活动段始终是 {kind}_{session}.csv（追加写入，与原来相同）；
+  达到时间（按整点对齐）/ 大小阈值时改名为 {kind}_{session}.partNNNN.csv，再新建活动段
+- 压缩：已关闭的分段在后台线程中压缩为 .csv.gz（或 .csv.zst，需安装 zstandard），
+  写临时文件后原子改名，读取方不会看到写了一半的压缩文件
+- 读取：session_segments / iter_csv / iter_dict_rows 按顺序串联一个会话的全部分段
+  （压缩或未压缩），只保留第一个表头
+- 保留策略：hot_days 内的会话保持原样；更早的会话合并为每类一个压缩文件；
+  超过 retention_days 或总大小超过 max_bytes 时从最旧的会话开始删除
+"""
+
+import csv
+import gzip
+import io
+import os
+import re
+import time
+from pathlib import Path
+
+
+CSV_KINDS = ('orderbook', 'orders', 'inventory', 'trades')
+JSON_KINDS = ('config', 'settlement')
+
+CODEC_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+SEGMENT_SUFFIXES = ('', '.gz', '.zst')
+
+_SEGMENT_RE = re.compile(r'^(?P<kind>[a-z]+)_(?P<session>.+?)(?:\.part(?P<part>\d+))?\.csv(?:\.gz|\.zst)?$')
+
+
+# ========== 编解码 ==========
+
+def resolve_codec(codec: str) -> str:
+    """zstandard 未安装时回退到 gzip"""
+    if codec == 'zstd':
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            print("[STORAGE] zstandard 未安装，改用 gzip 压缩")
+            return 'gzip'
+    if codec not in CODEC_SUFFIXES:
+        raise ValueError(f"未知压缩格式: {codec}")
+    return codec
+
+
+def open_text(path, mode: str = 'r'):
+    """按扩展名打开（.gz / .zst / 普通文本），mode 为 'r' 或 'w'"""
+    path = Path(path)
+    if path.suffix == '.gz':
+        return gzip.open(path, mode + 't', newline='', compresslevel=6)
+    if path.suffix == '.zst':
+        import zstandard
+
+        raw = open(path, mode + 'b')
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, newline='')
+    return open(path, mode, newline='')
+
+
+def compress_file(path, codec: str = 'gzip') -> Path:
+    """压缩一个已关闭的分段（临时文件 + 原子改名），返回压缩后的路径"""
+    path = Path(path)
+    suffix = CODEC_SUFFIXES[codec]
+    target = path.with_name(path.name + suffix)
+    tmp = path.with_name(path.name + '.tmp' + suffix)
+    with open(path, 'r', newline='') as src, open_text(tmp, 'w') as dst:
+        while True:
+            block = src.read(1 << 20)
+            if not block:
+                break
+            dst.write(block)
+    os.replace(tmp, target)
+    path.unlink()
+    return target
+
+
+# ========== 分段读取 ==========
+
+def segment_path(data_dir, kind: str, session_id: str, part: int = None) -> Path:
+    """活动段（part=None）或第 part 个已关闭分段的未压缩路径"""
+    name = f"{kind}_{session_id}.csv" if part is None else f"{kind}_{session_id}.part{part:04d}.csv"
+    return Path(data_dir) / name
+
+
+def _existing(path: Path):
+    for suffix in SEGMENT_SUFFIXES:
+        candidate = path.with_name(path.name + suffix)
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def session_segments(data_dir, kind: str, session_id: str) -> list:
+    """一个会话某类数据的全部分段（按写入顺序：已关闭分段，然后是活动段）"""
+    data_dir = Path(data_dir)
+    parts = {}
+    for path in data_dir.glob(f"{kind}_{session_id}.part*.csv*"):
+        match = _SEGMENT_RE.match(path.name)
+        if match is None or match['session'] != session_id or match['part'] is None:
+            continue
+        part = int(match['part'])
+        # 压缩进行中时未压缩文件与压缩文件可能短暂并存，优先未压缩
+        if part not in parts or path.suffix == '.csv':
+            parts[part] = path
+    segments = [parts[part] for part in sorted(parts)]
+
+    active = _existing(segment_path(data_dir, kind, session_id))
+    if active is not None:
+        segments.append(active)
+    return segments
+
+
+def session_has(data_dir, kind: str, session_id: str) -> bool:
+    return bool(session_segments(data_dir, kind, session_id))
+
+
+def iter_csv(data_dir, kind: str, session_id: str):
+    """逐行产出一个会话某类数据的全部分段：第一行为表头，后续分段的表头跳过"""
+    header_sent = False
+    for path in session_segments(data_dir, kind, session_id):
+        try:
+            f = open_text(path)
+        except FileNotFoundError:
+            # 读取期间该分段被压缩：改读压缩后的文件（被合并删除的则跳过）
+            path = _existing(path)
+            if path is None:
+                continue
+            f = open_text(path)
+        with f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                continue
+            if not header_sent:
+                header_sent = True
+                yield header
+            yield from reader
+
+
+def iter_dict_rows(data_dir, kind: str, session_id: str):
+    rows = iter_csv(data_dir, kind, session_id)
+    header = next(rows, None)
+    if header is None:
+        return
+    for row in rows:
+        yield dict(zip(header, row))
+
+
+def list_sessions(data_dir, kind: str) -> set:
+    """数据目录下有某类数据的全部会话 ID"""
+    sessions = set()
+    for path in Path(data_dir).glob(f"{kind}_*.csv*"):
+        match = _SEGMENT_RE.match(path.name)
+        if match is not None and match['kind'] == kind:
+            sessions.add(match['session'])
+    return sessions
+
+
+# ========== 保留策略 ==========
+
+def session_files(data_dir, session_id: str) -> list:
+    """一个会话的全部文件（各类 CSV 分段 + config / settlement + 原始行情采集）"""
+    data_dir = Path(data_dir)
+    files = []
+    for kind in CSV_KINDS:
+        files.extend(session_segments(data_dir, kind, session_id))
+    for kind in JSON_KINDS:
+        path = data_dir / f"{kind}_{session_id}.json"
+        if path.exists():
+            files.append(path)
+    capture = data_dir / f"capture_{session_id}.bin"  # 见 market_capture.py，已是紧凑二进制，不再合并压缩
+    if capture.exists():
+        files.append(capture)
+    return files
+
+
+def compact_session(data_dir, session_id: str, codec: str = 'gzip') -> int:
+    """
+    把一个会话每类数据的全部分段合并为一个压缩文件
+
+    Returns:
+        合并前的分段数（已是单个压缩文件的不计）
+    """
+    merged = 0
+    suffix = CODEC_SUFFIXES[codec]
+    for kind in CSV_KINDS:
+        segments = session_segments(data_dir, kind, session_id)
+        if not segments or (len(segments) == 1 and segments[0].suffix == suffix):
+            continue
+
+        target = segment_path(data_dir, kind, session_id).with_name(f"{kind}_{session_id}.csv{suffix}")
+        tmp = target.with_name(f"{kind}_{session_id}.compact.tmp{suffix}")
+        with open_text(tmp, 'w') as f:
+            writer = csv.writer(f)
+            for row in iter_csv(data_dir, kind, session_id):
+                writer.writerow(row)
+        os.replace(tmp, target)
+        for path in segments:
+            if path != target:
+                path.unlink(missing_ok=True)
+        merged += len(segments)
+    return merged
+
+
+def apply_retention(
+    data_dir,
+    hot_days: float,
+    retention_days: float = None,
+    max_bytes: int = None,
+    codec: str = 'gzip',
+    exclude=(),
+    catalog=None,
+    now: float = None,
+) -> dict:
+    """
+    保留策略（会话年龄 = 最后一次写入距今的时间）
+
+    - 年龄超过 hot_days：各类分段合并为一个压缩文件
+    - 年龄超过 retention_days：删除
+    - 剩余总大小超过 max_bytes：从最旧的会话开始删除
+    - exclude 中的会话（当前会话）不处理；catalog 给出时同步删除目录记录
+
+    Returns:
+        {'compacted': n, 'deleted': n, 'bytes': 剩余总大小}
+    """
+    data_dir = Path(data_dir)
+    now = time.time() if now is None else now
+    codec = resolve_codec(codec)
+
+    session_ids = set()
+    for kind in CSV_KINDS:
+        session_ids |= list_sessions(data_dir, kind)
+    session_ids |= {p.stem[len('config_'):] for p in data_dir.glob('config_*.json')}
+    session_ids -= set(exclude)
+
+    sessions = []
+    for session_id in session_ids:
+        files = session_files(data_dir, session_id)
+        if files:
+            sessions.append([max(p.stat().st_mtime for p in files), session_id])
+    sessions.sort()
+
+    result = {'compacted': 0, 'deleted': 0, 'bytes': 0}
+    kept = []
+    for mtime, session_id in sessions:
+        age_days = (now - mtime) / 86400
+        if retention_days is not None and age_days > retention_days:
+            _delete_session(data_dir, session_id, catalog)
+            result['deleted'] += 1
+            continue
+        if age_days > hot_days and compact_session(data_dir, session_id, codec):
+            result['compacted'] += 1
+        kept.append((session_id, sum(p.stat().st_size for p in session_files(data_dir, session_id))))
+
+    total = sum(size for _, size in kept)
+    if max_bytes is not None:
+        for session_id, size in kept:
+            if total <= max_bytes:
+                break
+            _delete_session(data_dir, session_id, catalog)
+            result['deleted'] += 1
+            total -= size
+    result['bytes'] = total
+    return result
+
+
+def _delete_session(data_dir, session_id: str, catalog=None):
+    for path in session_files(data_dir, session_id):
+        path.unlink(missing_ok=True)
+    if catalog is not None:
+        catalog.remove_session(session_id)
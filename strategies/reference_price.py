@@ -0,0 +1,336 @@
+"""
+外部 BTC 现货参考价 - 为 15 分钟 up/down 合约定价
+
+问题：
+- 合约的公允价值取决于 BTC 现货相对本轮开盘价的位置和剩余时间
+- 策略只看 Polymarket 订单簿，现货已经变动时报价仍停留在旧价位
+
+解决方案：
+- 可插拔的参考价源：
+  - BinanceSpotSource：生产环境，交易所 websocket（bookTicker 中间价）
+  - ReplayPriceSource：测试/回放，读取本地 CSV 文件（ts_ms,price）
+- BinaryFairValue：闭式解计算公允概率
+  P(up) = Φ( ln(S/K) / (σ·√T) )
+  其中 S=现货，K=本轮开盘价，σ=每秒对数收益波动率（EWMA），T=剩余秒数
+- 公允概率变化超过阈值时回调，策略可在毫秒级重新报价
+- 开盘价 K：优先由参考价源查询本轮开始时刻的价格（Binance 1 分钟 K 线开盘价），
+  或由策略从状态日志恢复；都不可用时才取本轮开始后的第一笔现货价格
+  （迟启动 / 重启时这会是当前价格，公允概率偏向 0.5）
+"""
+
+import asyncio
+import json
+import math
+import threading
+import time
+
+
+NANOS_PER_SECOND = 1_000_000_000
+
+
+# ========== 公允价值 ==========
+
+def normal_cdf(x: float) -> float:
+    """标准正态分布 CDF"""
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+class BinaryFairValue:
+    """
+    15 分钟 up/down 合约公允概率
+
+    - 开盘价 K 由外部 set_strike 设置；未设置时取本轮开始后的第一笔现货价格（strike_source = 'first_seen'）
+    - σ 使用对数收益平方 / 时间间隔的 EWMA 估计（每秒方差）
+    - 价格回调可能来自参考价源的线程，属性都是整体替换，读侧无需加锁
+    """
+
+    # BTC 年化波动率约 50% → 每秒波动率
+    DEFAULT_SIGMA_PER_SEC = 0.50 / math.sqrt(365 * 24 * 3600)
+
+    def __init__(
+        self,
+        round_start_ts: int,
+        round_end_ts: int,
+        outcome_up: bool = True,
+        sigma_half_life_secs: float = 120.0,
+        default_sigma_per_sec: float = DEFAULT_SIGMA_PER_SEC,
+        requote_threshold: float = 0.005,
+    ):
+        self.round_start_ns = int(round_start_ts) * NANOS_PER_SECOND
+        self.round_end_ns = int(round_end_ts) * NANOS_PER_SECOND
+        self.outcome_up = outcome_up
+        self.requote_threshold = float(requote_threshold)
+
+        self._sigma_half_life_ns = sigma_half_life_secs * NANOS_PER_SECOND
+        self._variance_per_sec = default_sigma_per_sec ** 2
+
+        self.strike = None
+        self.strike_source = None
+        self.spot = None
+        self.spot_ts_ns = None
+
+        self._last_notified = None
+        self._listener = None
+
+    def set_listener(self, listener):
+        """设置公允概率变化回调：listener(fair_probability)"""
+        self._listener = listener
+
+    @property
+    def sigma_per_sec(self) -> float:
+        return math.sqrt(self._variance_per_sec)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.strike is not None and self.spot is not None
+
+    # ========== 价格输入 ==========
+
+    def set_strike(self, price: float, source: str):
+        """设置本轮开盘价（K 线开盘价 / 状态日志恢复），覆盖第一笔现货价格的回退值"""
+        self.strike = float(price)
+        self.strike_source = source
+
+    def on_price(self, price: float, ts_ns: int):
+        """接收一笔现货价格（参考价源回调）"""
+        price = float(price)
+        if price <= 0:
+            return
+
+        if self.strike is None and ts_ns >= self.round_start_ns:
+            self.set_strike(price, 'first_seen')
+
+        if self.spot is not None and ts_ns > self.spot_ts_ns:
+            dt_ns = ts_ns - self.spot_ts_ns
+            log_return = math.log(price / self.spot)
+            alpha = 1.0 - math.exp(-dt_ns / self._sigma_half_life_ns * math.log(2))
+            sample = log_return ** 2 / (dt_ns / NANOS_PER_SECOND)
+            self._variance_per_sec += alpha * (sample - self._variance_per_sec)
+
+        self.spot = price
+        self.spot_ts_ns = ts_ns
+
+        self._maybe_notify(ts_ns)
+
+    def _maybe_notify(self, ts_ns: int):
+        if self._listener is None or not self.is_ready:
+            return
+
+        fair = self.fair_probability(ts_ns)
+        if self._last_notified is None or abs(fair - self._last_notified) >= self.requote_threshold:
+            self._last_notified = fair
+            self._listener(fair)
+
+    # ========== 闭式定价 ==========
+
+    def time_remaining_secs(self, now_ns: int = None) -> float:
+        now_ns = time.time_ns() if now_ns is None else now_ns
+        return max(self.round_end_ns - now_ns, 0) / NANOS_PER_SECOND
+
+    def fair_probability(self, now_ns: int = None):
+        """
+        当前 outcome 的公允概率（未就绪时返回 None）
+
+        Args:
+            now_ns: 计算时刻（默认使用最新现货时间戳）
+        """
+        if not self.is_ready:
+            return None
+
+        now_ns = self.spot_ts_ns if now_ns is None else now_ns
+        t_secs = self.time_remaining_secs(now_ns)
+        moneyness = math.log(self.spot / self.strike)
+
+        if t_secs <= 0:
+            p_up = 1.0 if moneyness > 0 else (0.0 if moneyness < 0 else 0.5)
+        else:
+            p_up = normal_cdf(moneyness / (self.sigma_per_sec * math.sqrt(t_secs)))
+
+        return p_up if self.outcome_up else 1.0 - p_up
+
+
+# ========== 参考价源 ==========
+
+class ReferencePriceSource:
+    """参考价源基类：start(on_price) 后持续回调 on_price(price, ts_ns)"""
+
+    def start(self, on_price):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    def round_open_price(self, round_start_ts: int):
+        """本轮开始时刻的价格（开盘价 K），无法获取时返回 None"""
+        return None
+
+
+class BinanceSpotSource(ReferencePriceSource):
+    """
+    Binance 现货 bookTicker（生产环境）
+
+    - 独立线程运行 asyncio 事件循环，不占用 NautilusTrader 的事件循环
+    - 断线指数退避重连（最长 30 秒）
+    - 需要 websockets 库（可选依赖）
+    """
+
+    URL = "wss://stream.binance.com:9443/ws/{symbol}@bookTicker"
+    KLINES_URL = "https://api.binance.com/api/v3/klines"
+
+    def __init__(self, symbol: str = "btcusdt"):
+        self.symbol = symbol.upper()
+        self.url = self.URL.format(symbol=symbol.lower())
+        self._on_price = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self, on_price):
+        self._on_price = on_price
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._consume()),
+            name="reference-price-binance",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def round_open_price(self, round_start_ts: int):
+        """本轮开始时刻所在 1 分钟 K 线的开盘价（REST，启动时调用一次）"""
+        # 延迟导入：patches 包导入时会安装补丁
+        from patches.http_transport import get
+
+        start_ms = int(round_start_ts) * 1000
+        try:
+            response = get(self.KLINES_URL, params={
+                'symbol': self.symbol, 'interval': '1m', 'startTime': start_ms, 'limit': 1,
+            })
+            response.raise_for_status()
+            klines = response.json()
+        except Exception as e:
+            print(f"[REFERENCE] 查询开盘价 K 线失败: {e}")
+            return None
+
+        # 本轮开始时刻之后才有的 K 线（数据缺口）不能当作开盘价
+        if not klines or int(klines[0][0]) > start_ms:
+            return None
+        return float(klines[0][1])
+
+    async def _consume(self):
+        try:
+            import websockets
+        except ImportError as e:
+            print(f"[REFERENCE] websockets 未安装，参考价源不可用: {e}")
+            return
+
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            try:
+                async with websockets.connect(self.url, ping_interval=20) as ws:
+                    print(f"[REFERENCE] 已连接 {self.url}")
+                    backoff = 1.0
+                    while not self._stop_event.is_set():
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        msg = json.loads(raw)
+                        mid = (float(msg['b']) + float(msg['a'])) / 2
+                        self._on_price(mid, time.time_ns())
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                print(f"[REFERENCE] 连接断开: {e}，{backoff:.0f} 秒后重连")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+
+class ReplayPriceSource(ReferencePriceSource):
+    """
+    本地文件回放（测试/研究）
+
+    文件格式：每行 "ts_ms,price"（可有表头）
+
+    Args:
+        path: CSV 文件路径
+        realtime: False 时在 start() 内同步推送全部价格；
+                  True 时在后台线程按原始时间间隔（除以 speed）推送
+        speed: 实时回放倍速
+    """
+
+    def __init__(self, path, realtime: bool = False, speed: float = 1.0):
+        self.path = path
+        self.realtime = realtime
+        self.speed = float(speed)
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def rows(self):
+        """逐行读取 (ts_ns, price)"""
+        with open(self.path, 'r') as f:
+            for line in f:
+                parts = line.strip().split(',')
+                if len(parts) < 2:
+                    continue
+                try:
+                    ts_ms = int(parts[0])
+                    price = float(parts[1])
+                except ValueError:
+                    continue  # 表头
+                yield ts_ms * 1_000_000, price
+
+    def round_open_price(self, round_start_ts: int):
+        """文件中本轮开始后的第一笔价格"""
+        start_ns = int(round_start_ts) * NANOS_PER_SECOND
+        for ts_ns, price in self.rows():
+            if ts_ns >= start_ns:
+                return price
+        return None
+
+    def start(self, on_price):
+        self._stop_event.clear()
+        if not self.realtime:
+            for ts_ns, price in self.rows():
+                on_price(price, ts_ns)
+            return
+
+        self._thread = threading.Thread(
+            target=self._replay, args=(on_price,), name="reference-price-replay", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _replay(self, on_price):
+        previous_ts = None
+        for ts_ns, price in self.rows():
+            if previous_ts is not None:
+                wait = (ts_ns - previous_ts) / NANOS_PER_SECOND / self.speed
+                if self._stop_event.wait(max(wait, 0.0)):
+                    return
+            on_price(price, ts_ns)
+            previous_ts = ts_ns
+
+
+def create_reference_source(spec: str) -> ReferencePriceSource:
+    """
+    根据配置字符串创建参考价源
+
+    - "binance" / "binance:ethusdt"
+    - "replay:/path/to/prices.csv"
+    """
+    kind, _, arg = spec.partition(':')
+
+    if kind == 'binance':
+        return BinanceSpotSource(symbol=arg or 'btcusdt')
+    if kind == 'replay':
+        return ReplayPriceSource(arg, realtime=True)
+
+    raise ValueError(f"未知的参考价源: {spec}")
@@ -0,0 +1,119 @@
+"""
+自适应重新报价调度 - 有实质变化立即报价，没有变化时逐步退避
+
+问题：
+- on_order_book 只按固定的 update_interval_ms 节流：快速行情中最多延迟一个间隔才响应，
+  盘口静止时又每个间隔都撤单重挂，浪费计算和订单数
+- 成交后库存变化，报价倾斜应立即更新，却要等到下一个间隔
+
+解决方案：
+- 触发条件（任一满足，且距上次评估不少于 min_interval）：
+  - 任一侧顶档相对上次评估时变动 ≥ move_threshold（中间价的变动不会超过顶档变动），
+    或一侧盘口出现 / 消失
+  - 成交 / 参考价变动等外部强制事件（force）
+  - 距上次评估超过当前心跳间隔
+- 心跳退避：连续因“到时间”而评估（没有实质变化）时，间隔按 backoff 倍增到 max_interval；
+  一旦出现实质变化，间隔恢复为 base_interval
+- 调度器只做判断，不持有订单簿；积压的增量由事件派发合并为一次评估（见 event_actor.py）
+"""
+
+import math
+
+
+class RequoteScheduler:
+    """
+    重新报价调度器
+
+    用法：
+        reason = scheduler.check(now_ns, best_bid, best_ask)
+        if reason is not None:
+            scheduler.mark_evaluated(now_ns, best_bid, best_ask, reason)
+            ...  # 计算并提交报价
+    """
+
+    DEFAULT_MOVE_THRESHOLD = 0.01       # 1 个价格单位
+    DEFAULT_MIN_INTERVAL_MS = 100
+    DEFAULT_BASE_INTERVAL_MS = 1000
+    DEFAULT_MAX_INTERVAL_MS = 5000
+    DEFAULT_BACKOFF = 2.0
+
+    def __init__(
+        self,
+        move_threshold: float = DEFAULT_MOVE_THRESHOLD,
+        min_interval_ms: float = DEFAULT_MIN_INTERVAL_MS,
+        base_interval_ms: float = DEFAULT_BASE_INTERVAL_MS,
+        max_interval_ms: float = DEFAULT_MAX_INTERVAL_MS,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        self.move_threshold = float(move_threshold)
+        self.min_interval_ns = int(float(min_interval_ms) * 1_000_000)
+        self.base_interval_ns = int(float(base_interval_ms) * 1_000_000)
+        self.max_interval_ns = max(int(float(max_interval_ms) * 1_000_000), self.base_interval_ns)
+        self.backoff = max(float(backoff), 1.0)
+
+        self.interval_ns = self.base_interval_ns
+        self._last_eval_ns = None
+        self._last_bid = None
+        self._last_ask = None
+        self._force = None
+
+        # 统计：各触发原因的评估次数
+        self.counts = {}
+
+    # ========== 外部事件 ==========
+
+    def force(self, reason: str = 'forced'):
+        """下一次检查时无视心跳间隔（仍受 min_interval 限制）"""
+        self._force = reason
+
+    def on_fill(self):
+        self.force('fill')
+
+    # ========== 判断 ==========
+
+    def _moved(self, last, current) -> bool:
+        if last is None or current is None:
+            return last is not current
+        return abs(current - last) >= self.move_threshold - 1e-12
+
+    def check(self, now_ns: int, best_bid=None, best_ask=None):
+        """
+        判断是否需要评估报价（不修改状态）
+
+        Returns:
+            str | None: 触发原因（'initial' / 'fill' / 'move' / 'interval' / force 原因），不需要返回 None
+        """
+        if self._last_eval_ns is None:
+            return 'initial'
+
+        elapsed = now_ns - self._last_eval_ns
+        if elapsed < self.min_interval_ns:
+            return None
+
+        if self._force is not None:
+            return self._force
+
+        if self._moved(self._last_bid, best_bid) or self._moved(self._last_ask, best_ask):
+            return 'move'
+
+        if elapsed >= self.interval_ns:
+            return 'interval'
+        return None
+
+    def mark_evaluated(self, now_ns: int, best_bid=None, best_ask=None, reason: str = 'interval'):
+        """记录一次评估：更新比较基准，调整心跳间隔"""
+        self._last_eval_ns = now_ns
+        self._last_bid = None if best_bid is None or math.isnan(best_bid) else float(best_bid)
+        self._last_ask = None if best_ask is None or math.isnan(best_ask) else float(best_ask)
+        self._force = None
+
+        if reason == 'interval':
+            self.interval_ns = min(int(self.interval_ns * self.backoff), self.max_interval_ns)
+        else:
+            self.interval_ns = self.base_interval_ns
+
+        self.counts[reason] = self.counts.get(reason, 0) + 1
+
+    @property
+    def interval_ms(self) -> float:
+        return self.interval_ns / 1_000_000
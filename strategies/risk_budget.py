@@ -0,0 +1,250 @@
+"""
+跨轮次风险预算 - SQLite 持久化，多个策略实例共享
+
+问题：
+- _daily_start_balance / _daily_start_pnl 在 on_start 时按策略记录，
+  每轮（15 分钟）进程重启后丢失
+- StrategyRiskConfig.max_daily_pnl_loss 从未被执行
+- 下单前风险检查每个 tick 都扫描 Portfolio
+
+解决方案：
+- RiskBudget：每个 (日期, 实例, 轮次) 一行：盈亏、总敞口、订单数
+  - 每行只有一个写入者（实例自己的当前轮次），多进程写入无冲突
+  - 当日汇总 = 本实例合计（内存，增量维护）+ 其他实例合计（按 refresh_secs 从 SQLite 刷新一次 SUM）
+  - 进程重启后从 SQLite 加载本实例当日已有的行（之前轮次继续累计）
+  - 写入按 flush_secs 节流（成交等关键事件立即写入）
+- 下单前检查只读取内存中的汇总值，O(1)
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS risk_budget (
+    day TEXT NOT NULL,
+    instance TEXT NOT NULL,
+    round TEXT NOT NULL,
+    pnl REAL NOT NULL DEFAULT 0,
+    gross_exposure REAL NOT NULL DEFAULT 0,
+    orders INTEGER NOT NULL DEFAULT 0,
+    updated_ts REAL NOT NULL,
+    PRIMARY KEY (day, instance, round)
+)
+"""
+
+
+class _RoundUsage:
+    """本实例某一轮次的用量（内存缓存）"""
+
+    __slots__ = ('pnl', 'gross_exposure', 'orders', 'dirty')
+
+    def __init__(self, pnl=0.0, gross_exposure=0.0, orders=0):
+        self.pnl = float(pnl)
+        self.gross_exposure = float(gross_exposure)
+        self.orders = int(orders)
+        self.dirty = False
+
+
+class RiskBudget:
+    """
+    当日风险预算（跨轮次、跨实例）
+
+    用法：
+        budget = RiskBudget(path, instance="MM-001", limits=StrategyRiskConfig(...))
+        budget.update_round(round_key, pnl=..., gross_exposure=...)
+        budget.record_orders(round_key, 2)
+        reason = budget.check(additional_exposure=...)   # None 表示通过
+    """
+
+    DEFAULT_REFRESH_SECS = 5.0
+    DEFAULT_FLUSH_SECS = 1.0
+
+    def __init__(
+        self,
+        path,
+        instance: str,
+        limits=None,
+        refresh_secs: float = DEFAULT_REFRESH_SECS,
+        flush_secs: float = DEFAULT_FLUSH_SECS,
+        clock=time.time,
+    ):
+        self.path = Path(path)
+        self.instance = str(instance)
+        self.limits = limits
+        self.refresh_secs = float(refresh_secs)
+        self.flush_secs = float(flush_secs)
+        self._clock = clock
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+        self._day = None
+        self._rounds = {}
+        self._others = (0.0, 0.0, 0)
+        self._last_refresh = None
+        self._last_flush = 0.0
+        self._load_day()
+
+    # ========== 日期 ==========
+
+    def _current_day(self) -> str:
+        return datetime.fromtimestamp(self._clock(), tz=timezone.utc).strftime('%Y-%m-%d')
+
+    def _load_day(self):
+        """切换到当前 UTC 日期：加载本实例当日已有的行（进程重启后继续累计）"""
+        self._day = self._current_day()
+        rows = self._conn.execute(
+            "SELECT round, pnl, gross_exposure, orders FROM risk_budget WHERE day = ? AND instance = ?",
+            (self._day, self.instance),
+        ).fetchall()
+        self._rounds = {row[0]: _RoundUsage(*row[1:]) for row in rows}
+        self._own_pnl = sum(usage.pnl for usage in self._rounds.values())
+        self._own_exposure = sum(usage.gross_exposure for usage in self._rounds.values())
+        self._own_orders = sum(usage.orders for usage in self._rounds.values())
+        self._last_refresh = None
+
+    def _maybe_rollover(self):
+        if self._current_day() != self._day:
+            self.flush(force=True)
+            self._load_day()
+
+    # ========== 写入 ==========
+
+    def _round(self, round_key: str) -> _RoundUsage:
+        usage = self._rounds.get(round_key)
+        if usage is None:
+            usage = self._rounds[round_key] = _RoundUsage()
+        return usage
+
+    def update_round(self, round_key: str, pnl: float = None, gross_exposure: float = None, force: bool = False):
+        """更新某一轮次的盈亏 / 敞口（绝对值，可重复调用）"""
+        self._maybe_rollover()
+        usage = self._round(round_key)
+        if pnl is not None:
+            self._own_pnl += float(pnl) - usage.pnl
+            usage.pnl = float(pnl)
+        if gross_exposure is not None:
+            self._own_exposure += float(gross_exposure) - usage.gross_exposure
+            usage.gross_exposure = float(gross_exposure)
+        usage.dirty = True
+        self.flush(force=force)
+
+    def record_orders(self, round_key: str, count: int = 1):
+        """累计下单数"""
+        self._maybe_rollover()
+        usage = self._round(round_key)
+        usage.orders += int(count)
+        self._own_orders += int(count)
+        usage.dirty = True
+        self.flush()
+
+    def flush(self, force: bool = False):
+        """把本实例有变化的行写入 SQLite（按 flush_secs 节流）"""
+        now = self._clock()
+        if not force and now - self._last_flush < self.flush_secs:
+            return
+        dirty = [(key, usage) for key, usage in self._rounds.items() if usage.dirty]
+        if not dirty:
+            return
+
+        self._conn.executemany(
+            "INSERT INTO risk_budget (day, instance, round, pnl, gross_exposure, orders, updated_ts) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (day, instance, round) DO UPDATE SET "
+            "pnl = excluded.pnl, gross_exposure = excluded.gross_exposure, "
+            "orders = excluded.orders, updated_ts = excluded.updated_ts",
+            [
+                (self._day, self.instance, key, usage.pnl, usage.gross_exposure, usage.orders, now)
+                for key, usage in dirty
+            ],
+        )
+        self._conn.commit()
+        for _, usage in dirty:
+            usage.dirty = False
+        self._last_flush = now
+
+    # ========== 汇总 ==========
+
+    def refresh(self, force: bool = False):
+        """从 SQLite 刷新其他实例的当日汇总（按 refresh_secs 节流）"""
+        now = self._clock()
+        if not force and self._last_refresh is not None and now - self._last_refresh < self.refresh_secs:
+            return
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(pnl), 0), COALESCE(SUM(gross_exposure), 0), COALESCE(SUM(orders), 0) "
+            "FROM risk_budget WHERE day = ? AND instance != ?",
+            (self._day, self.instance),
+        ).fetchone()
+        self._others = (float(row[0]), float(row[1]), int(row[2]))
+        self._last_refresh = now
+
+    def _sync(self):
+        self._maybe_rollover()
+        self.refresh()
+
+    @property
+    def daily_pnl(self) -> float:
+        self._sync()
+        return self._others[0] + self._own_pnl
+
+    @property
+    def gross_exposure(self) -> float:
+        self._sync()
+        return self._others[1] + self._own_exposure
+
+    @property
+    def order_count(self) -> int:
+        self._sync()
+        return self._others[2] + self._own_orders
+
+    # ========== 下单前检查 ==========
+
+    def check(self, additional_exposure: float = 0.0, additional_orders: int = 0):
+        """
+        检查当日预算（limits 为 StrategyRiskConfig，未设置的限制跳过）
+
+        Returns:
+            str | None: 不通过的原因，通过返回 None
+        """
+        limits = self.limits
+        if limits is None:
+            return None
+
+        max_loss = getattr(limits, 'max_daily_pnl_loss', None)
+        if max_loss is not None:
+            pnl = self.daily_pnl
+            if pnl < float(max_loss):
+                return f"当日盈亏 {pnl:.2f} < 日最大亏损 {float(max_loss):.2f}"
+
+        max_exposure = getattr(limits, 'max_gross_exposure', None)
+        if max_exposure is not None:
+            exposure = self.gross_exposure + float(additional_exposure)
+            if exposure > float(max_exposure):
+                return f"总敞口 {exposure:.2f} > 上限 {float(max_exposure):.2f}"
+
+        max_orders = getattr(limits, 'max_daily_orders', None)
+        if max_orders is not None:
+            orders = self.order_count + int(additional_orders)
+            if orders > int(max_orders):
+                return f"当日订单数 {orders} > 上限 {int(max_orders)}"
+
+        return None
+
+    def close(self):
+        self.flush(force=True)
+        self._conn.close()
+
+
+def default_budget_path(data_dir: str = None) -> Path:
+    """默认 SQLite 路径（RISK_BUDGET_PATH 可覆盖）"""
+    override = os.getenv('RISK_BUDGET_PATH')
+    if override:
+        return Path(override)
+    return Path(data_dir or "/app/data") / "risk_budget.sqlite"
@@ -0,0 +1,428 @@
+"""
+会话数据目录 - 记录器输出的 SQLite 索引
+
+问题：
+- TradeDataRecorder 每个会话（一轮）在 /app/data 下写 orderbook_/orders_/inventory_/trades_*.csv
+  和 config_/settlement_*.json，没有索引
+- 按市场、时间范围、参数组合查找会话需要打开全部 config_*.json，
+  每天 96 轮，数据目录越积越大
+
+解决方案：
+- SessionCatalog：数据目录下的 catalog.sqlite3（WAL 模式，多个进程可同时读写）
+  - sessions：会话 ID、instrument、市场 slug、本轮开始时间、数据时间范围、参数哈希、结算结果
+  - files：每个会话每类 CSV 的路径、行数、时间范围
+- 写入时登记：记录器 save_config 时登记会话，写入时只在内存中累计行数 / 时间范围，
+  关闭时（及结算时）一次写入目录
+- 查询：find() 走索引定位会话，iter_files() / iter_rows() 只打开匹配的文件，
+  时间范围不重叠的文件不打开，按需逐行读取（分段 / 压缩文件见 recorder_storage.py）
+- 旧数据 / 崩溃未关闭的会话：index_directory() 扫描数据目录补录
+
+命令行：
+    python -m strategies.session_catalog /app/data list --market btc-updown-15m --since 2026-01-01
+    python -m strategies.session_catalog /app/data reindex
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from hashlib import sha1
+from pathlib import Path
+
+from .recorder_storage import CSV_KINDS, iter_csv, iter_dict_rows, segment_path, session_segments
+
+# 参数哈希不包含每轮不同的字段，同一组参数跨轮次哈希相同
+CONFIG_HASH_EXCLUDED = ('instrument_id', 'round_start_ts', 'market_slug')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id     TEXT PRIMARY KEY,
+    instrument_id  TEXT,
+    market_slug    TEXT,
+    round_start_ts INTEGER,
+    start_ts       REAL,
+    end_ts         REAL,
+    config_hash    TEXT,
+    config_json    TEXT,
+    outcome        REAL,
+    closed         INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_instrument ON sessions (instrument_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_market ON sessions (market_slug);
+CREATE INDEX IF NOT EXISTS idx_sessions_round ON sessions (round_start_ts);
+CREATE INDEX IF NOT EXISTS idx_sessions_time ON sessions (start_ts, end_ts);
+CREATE INDEX IF NOT EXISTS idx_sessions_config ON sessions (config_hash);
+
+CREATE TABLE IF NOT EXISTS files (
+    session_id TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    path       TEXT NOT NULL,
+    rows       INTEGER NOT NULL,
+    min_ts     REAL,
+    max_ts     REAL,
+    PRIMARY KEY (session_id, kind)
+);
+"""
+
+
+def config_hash(config: dict) -> str:
+    """策略参数哈希（排序后的 JSON，不含 instrument / 本轮开始时间 / slug）"""
+    params = {k: v for k, v in config.items() if k not in CONFIG_HASH_EXCLUDED}
+    text = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+    return sha1(text.encode()).hexdigest()[:16]
+
+
+def scan_csv(data_dir, kind: str, session_id: str) -> tuple:
+    """统计会话某类数据（全部分段）的行数与 timestamp 列范围（补录用）：返回 (rows, min_ts, max_ts)"""
+    rows, min_ts, max_ts = 0, None, None
+    reader = iter_csv(data_dir, kind, session_id)
+    header = next(reader, None)
+    if header is None:
+        return 0, None, None
+    ts_index = header.index('timestamp') if 'timestamp' in header else None
+    for row in reader:
+        rows += 1
+        if ts_index is None or ts_index >= len(row):
+            continue
+        try:
+            ts = float(row[ts_index])
+        except ValueError:
+            continue
+        min_ts = ts if min_ts is None else min(min_ts, ts)
+        max_ts = ts if max_ts is None else max(max_ts, ts)
+    return rows, min_ts, max_ts
+
+
+class SessionCatalog:
+    """
+    会话数据目录
+
+    用法：
+        catalog = SessionCatalog("/app/data")
+        sessions = catalog.find(market_slug="btc-updown-15m", since=day_start)
+        for session, paths in catalog.iter_files('trades', since=day_start):
+            ...
+    """
+
+    DEFAULT_FILENAME = "catalog.sqlite3"
+
+    def __init__(self, data_dir, filename: str = DEFAULT_FILENAME, timeout: float = 5.0):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.data_dir / filename
+
+        # 记录器可能在定时器线程和事件线程中调用，连接共享、写入加锁
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=timeout, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ========== 登记 ==========
+
+    def register_session(self, session_id: str, config: dict, start_ts: float = None):
+        """登记会话（save_config 时调用；重复登记只更新参数）"""
+        config = dict(config)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO sessions (session_id, instrument_id, market_slug, round_start_ts,
+                                      start_ts, config_hash, config_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    instrument_id = excluded.instrument_id,
+                    market_slug = excluded.market_slug,
+                    round_start_ts = excluded.round_start_ts,
+                    config_hash = excluded.config_hash,
+                    config_json = excluded.config_json
+                """,
+                (
+                    session_id,
+                    config.get('instrument_id'),
+                    config.get('market_slug') or None,
+                    int(config.get('round_start_ts') or 0) or None,
+                    start_ts,
+                    config_hash(config),
+                    json.dumps(config, sort_keys=True, default=str),
+                ),
+            )
+
+    def update_files(self, session_id: str, files: dict, outcome: float = None, closed: bool = False):
+        """
+        写入会话各文件的统计，并据此更新会话的数据时间范围
+
+        Args:
+            files: {kind: (path, rows, min_ts, max_ts)}
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (session_id, kind, path, rows, min_ts, max_ts) VALUES (?, ?, ?, ?, ?, ?)",
+                [(session_id, kind, str(path), rows, lo, hi) for kind, (path, rows, lo, hi) in files.items()],
+            )
+            self._conn.execute(
+                """
+                UPDATE sessions SET
+                    start_ts = COALESCE((SELECT MIN(min_ts) FROM files WHERE session_id = :sid), start_ts),
+                    end_ts = COALESCE((SELECT MAX(max_ts) FROM files WHERE session_id = :sid), end_ts),
+                    outcome = COALESCE(:outcome, outcome),
+                    closed = MAX(closed, :closed)
+                WHERE session_id = :sid
+                """,
+                {'sid': session_id, 'outcome': outcome, 'closed': int(closed)},
+            )
+
+    # ========== 查询 ==========
+
+    def find(
+        self,
+        market_slug: str = None,
+        instrument_id: str = None,
+        since: float = None,
+        until: float = None,
+        config_hash: str = None,
+        min_round_start_ts: float = None,
+        closed: bool = None,
+        limit: int = None,
+    ) -> list:
+        """
+        按条件查找会话（按数据开始时间排序）
+
+        Args:
+            market_slug: slug 前缀（如 "btc-updown-15m" 匹配所有 BTC 15 分钟轮次）
+            since / until: 与会话数据时间范围 [start_ts, end_ts] 重叠（Unix 秒）
+            min_round_start_ts: 本轮开始时间下限
+        """
+        where, args = self._where(
+            market_slug=market_slug,
+            instrument_id=instrument_id,
+            since=since,
+            until=until,
+            config_hash=config_hash,
+            min_round_start_ts=min_round_start_ts,
+            closed=closed,
+        )
+        sql = f"SELECT * FROM sessions {where} ORDER BY start_ts, session_id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, args)]
+
+    def remove_session(self, session_id: str):
+        """删除会话记录（保留策略删除数据文件后调用）"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def session_ids(self, **filters) -> list:
+        return [s['session_id'] for s in self.find(**filters)]
+
+    def files(self, session_id: str) -> dict:
+        """{kind: {'path', 'rows', 'min_ts', 'max_ts'}}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM files WHERE session_id = ?", (session_id,)).fetchall()
+        return {row['kind']: dict(row) for row in rows}
+
+    def iter_files(self, kind: str, since: float = None, until: float = None, **filters):
+        """
+        逐个产出匹配会话的 (session, paths)，paths 为按写入顺序的全部分段
+
+        文件自身的时间范围与 [since, until] 不重叠、空文件、已删除的文件跳过
+        """
+        where, args = self._where("s.", since=since, until=until, **filters)
+        sql = (
+            "SELECT s.*, f.path AS file_path, f.min_ts AS file_min_ts, f.max_ts AS file_max_ts "
+            f"FROM sessions s JOIN files f ON f.session_id = s.session_id AND f.kind = :kind "
+            f"{where} {'AND' if where else 'WHERE'} f.rows > 0 ORDER BY s.start_ts, s.session_id"
+        )
+        args['kind'] = kind
+        with self._lock:
+            rows = [dict(row) for row in self._conn.execute(sql, args)]
+
+        for row in rows:
+            if since is not None and row['file_max_ts'] is not None and row['file_max_ts'] < since:
+                continue
+            if until is not None and row['file_min_ts'] is not None and row['file_min_ts'] > until:
+                continue
+            path = Path(row.pop('file_path'))
+            paths = session_segments(path.parent, kind, row['session_id'])
+            if paths:
+                yield row, paths
+
+    def iter_rows(self, kind: str, since: float = None, until: float = None, **filters):
+        """逐行产出匹配文件中 timestamp 位于 [since, until] 的记录（附 session_id）"""
+        for session, paths in self.iter_files(kind, since=since, until=until, **filters):
+            for row in iter_dict_rows(paths[0].parent, kind, session['session_id']):
+                try:
+                    ts = float(row.get('timestamp') or 'nan')
+                except ValueError:
+                    continue
+                if since is not None and not ts >= since:
+                    continue
+                if until is not None and not ts <= until:
+                    continue
+                row['session_id'] = session['session_id']
+                yield row
+
+    @staticmethod
+    def _where(
+        prefix: str = "", market_slug=None, instrument_id=None, since=None, until=None,
+        config_hash=None, min_round_start_ts=None, closed=None,
+    ):
+        """构造 WHERE 子句（prefix 为 sessions 表别名，如 "s."）"""
+        clauses, args = [], {}
+        if market_slug is not None:
+            clauses.append(f"{prefix}market_slug LIKE :market_slug ESCAPE '\\'")
+            args['market_slug'] = market_slug.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        if instrument_id is not None:
+            clauses.append(f"{prefix}instrument_id = :instrument_id")
+            args['instrument_id'] = instrument_id
+        if since is not None:
+            clauses.append(f"COALESCE({prefix}end_ts, {prefix}start_ts) >= :since")
+            args['since'] = since
+        if until is not None:
+            clauses.append(f"{prefix}start_ts <= :until")
+            args['until'] = until
+        if config_hash is not None:
+            clauses.append(f"{prefix}config_hash = :config_hash")
+            args['config_hash'] = config_hash
+        if min_round_start_ts is not None:
+            clauses.append(f"{prefix}round_start_ts >= :min_round_start_ts")
+            args['min_round_start_ts'] = min_round_start_ts
+        if closed is not None:
+            clauses.append(f"{prefix}closed = :closed")
+            args['closed'] = int(closed)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    # ========== 补录 ==========
+
+    def index_directory(self, rescan: bool = False) -> int:
+        """
+        扫描数据目录补录目录中没有的会话（旧数据、目录启用之前的会话）
+
+        Args:
+            rescan: True 时重新统计所有未关闭的会话（崩溃后未写入统计）
+
+        Returns:
+            补录 / 重新统计的会话数
+        """
+        with self._lock:
+            known = {
+                row['session_id']: bool(row['closed'])
+                for row in self._conn.execute("SELECT session_id, closed FROM sessions")
+            }
+
+        indexed = 0
+        for config_path in sorted(self.data_dir.glob('config_*.json')):
+            session_id = config_path.stem[len('config_'):]
+            if session_id in known and (known[session_id] or not rescan):
+                continue
+            try:
+                with open(config_path, 'r') as f:
+                    config = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            if session_id not in known:
+                self.register_session(session_id, config)
+
+            files = {}
+            for kind in CSV_KINDS:
+                if session_segments(self.data_dir, kind, session_id):
+                    files[kind] = (
+                        segment_path(self.data_dir, kind, session_id),
+                        *scan_csv(self.data_dir, kind, session_id),
+                    )
+
+            outcome = None
+            settlement_path = self.data_dir / f"settlement_{session_id}.json"
+            if settlement_path.exists():
+                try:
+                    with open(settlement_path, 'r') as f:
+                        outcome = json.load(f).get('outcome')
+                except (OSError, ValueError):
+                    pass
+
+            self.update_files(session_id, files, outcome=outcome, closed=session_id not in known)
+            indexed += 1
+        return indexed
+
+
+# ========== 命令行 ==========
+
+def parse_time(text: str) -> float:
+    """Unix 秒或 ISO 日期 / 时间（UTC）"""
+    try:
+        return float(text)
+    except ValueError:
+        value = datetime.fromisoformat(text)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+
+
+def _format_ts(ts) -> str:
+    if ts is None:
+        return '-'
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="记录器会话数据目录")
+    parser.add_argument("data_dir", nargs="?", default="/app/data", help="TradeDataRecorder 输出目录")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = sub.add_parser("list", help="查找会话")
+    list_parser.add_argument("--market", help="市场 slug 前缀")
+    list_parser.add_argument("--instrument", help="instrument ID")
+    list_parser.add_argument("--since", type=parse_time, help="开始时间（Unix 秒或 ISO，UTC）")
+    list_parser.add_argument("--until", type=parse_time, help="结束时间（Unix 秒或 ISO，UTC）")
+    list_parser.add_argument("--config-hash", help="参数哈希")
+    list_parser.add_argument("--json", action="store_true", help="输出 JSON")
+
+    reindex_parser = sub.add_parser("reindex", help="扫描数据目录补录会话")
+    reindex_parser.add_argument("--rescan", action="store_true", help="重新统计未关闭的会话")
+
+    args = parser.parse_args(argv)
+    catalog = SessionCatalog(args.data_dir)
+
+    if args.command == "reindex":
+        started = time.perf_counter()
+        indexed = catalog.index_directory(rescan=args.rescan)
+        print(f"[CATALOG] 补录 {indexed} 个会话，用时 {(time.perf_counter() - started) * 1000:.0f}ms")
+        return
+
+    started = time.perf_counter()
+    sessions = catalog.find(
+        market_slug=args.market,
+        instrument_id=args.instrument,
+        since=args.since,
+        until=args.until,
+        config_hash=args.config_hash,
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        print(json.dumps(sessions, indent=2, default=str))
+        return
+
+    for s in sessions:
+        rows = {kind: f['rows'] for kind, f in catalog.files(s['session_id']).items()}
+        print(
+            f"{s['session_id']}  {_format_ts(s['start_ts'])} ~ {_format_ts(s['end_ts'])}  "
+            f"{s['market_slug'] or s['instrument_id'] or '-'}  params={s['config_hash']}  "
+            f"orderbook={rows.get('orderbook', 0)} trades={rows.get('trades', 0)}"
+            + ("" if s['outcome'] is None else f"  outcome={s['outcome']:g}")
+        )
+    print(f"[CATALOG] {len(sessions)} 个会话，查询用时 {elapsed_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+会话汇总报表 - 流式统计任意数量的记录会话
+
+问题：
+- TradeDataRecorder.get_summary 只有行数；tests/test_paper_trading.py 中的胜率 / 成交率 /
+  最大回撤只适用于一次内存中的运行
+- 记录会话逐日累积，一次全部读入内存不可行
+
+解决方案：
+- 每个会话（一轮）独立计算，orderbook 按块读取（每块 chunk_rows 行，numpy 向量化；
+  分段 / 压缩文件按顺序串联，见 recorder_storage.py），
+  成交按时间插入中间价路径，单个会话的内存与文件大小无关
+- 会话统计可合并：计数 / 求和直接相加，权益路径（最终值、峰值、谷值、最大回撤）按时间顺序拼接
+- 多个会话分散到进程池，主进程只合并小的统计对象
+- 按 市场（slug 去掉轮次时间戳）× UTC 日 分组，另给出每个市场的合计
+
+指标：
+- 成交率：有成交的订单数 / 提交订单数
+- 已实现价差：成交时相对市场中间价的优势（买：mid - 价格；卖：价格 - mid），按数量加权
+- 库存周转：成交量 / 各会话最大持仓之和
+- 最大回撤：盯市权益（现金流 + 持仓 × 中间价，结算后按 0 / 1）的最大回撤
+- 持仓时间占比：持仓不为 0 的时间 / 会话时长
+
+命令行：
+    python -m strategies.session_report /app/data --market btc-updown-15m --since 2026-01-01 --workers 4
+"""
+
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from .recorder_storage import iter_csv, iter_dict_rows
+from .session_catalog import SessionCatalog, parse_time
+
+
+NANOS_PER_SECOND = 1_000_000_000
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+BOOK_COLUMNS = ('timestamp', 'ts_ns', 'mid_price', 'best_bid', 'best_ask')
+
+
+# ========== 权益路径 ==========
+
+class EquityPath:
+    """
+    权益路径摘要（相对会话开始时的 0）：最终值、峰值、谷值、最大回撤
+
+    两段路径按时间顺序拼接（then）仍可得到精确的最大回撤，因此可以逐会话并行计算后合并
+    """
+
+    def __init__(self):
+        self.final = 0.0
+        self.peak = 0.0
+        self.trough = 0.0
+        self.max_drawdown = 0.0
+
+    def update(self, equity: float):
+        self.update_many(np.array([equity], dtype=np.float64))
+
+    def update_many(self, equity: np.ndarray):
+        if not len(equity):
+            return
+        running_peak = np.maximum.accumulate(np.concatenate(([self.peak], equity)))[1:]
+        self.max_drawdown = max(self.max_drawdown, float((running_peak - equity).max()))
+        self.peak = float(running_peak[-1])
+        self.trough = min(self.trough, float(equity.min()))
+        self.final = float(equity[-1])
+
+    def then(self, other: "EquityPath") -> "EquityPath":
+        """本路径之后接上 other（other 从本路径的最终值开始）"""
+        combined = EquityPath()
+        combined.final = self.final + other.final
+        combined.peak = max(self.peak, self.final + other.peak)
+        combined.trough = min(self.trough, self.final + other.trough)
+        combined.max_drawdown = max(self.max_drawdown, other.max_drawdown, self.peak - (self.final + other.trough))
+        return combined
+
+
+# ========== 统计 ==========
+
+class SessionStats:
+    """一个或多个会话的可合并统计"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.orders = 0
+        self.filled_orders = 0
+        self.fills = 0
+        self.volume = 0.0
+        self.notional = 0.0
+        self.edge_sum = 0.0          # Σ 数量 × 相对中间价的优势
+        self.edge_quantity = 0.0     # 有中间价可比的成交数量
+        self.inventory_capacity = 0.0  # Σ 各会话最大 |持仓|
+        self.secs_in_market = 0.0
+        self.secs_total = 0.0
+        self.settled = 0
+        self.path = EquityPath()
+
+    def merge(self, other: "SessionStats") -> "SessionStats":
+        """合并（other 在时间上位于本统计之后）"""
+        for name in (
+            'sessions', 'orders', 'filled_orders', 'fills', 'volume', 'notional', 'edge_sum',
+            'edge_quantity', 'inventory_capacity', 'secs_in_market', 'secs_total', 'settled',
+        ):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.path = self.path.then(other.path)
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            'sessions': self.sessions,
+            'orders': self.orders,
+            'fills': self.fills,
+            'fill_rate': self.filled_orders / self.orders if self.orders else None,
+            'volume': self.volume,
+            'notional': self.notional,
+            'realized_spread': self.edge_sum / self.edge_quantity if self.edge_quantity else None,
+            'inventory_turnover': self.volume / self.inventory_capacity if self.inventory_capacity else None,
+            'pnl': self.path.final,
+            'max_drawdown': self.path.max_drawdown,
+            'time_in_market': self.secs_in_market / self.secs_total if self.secs_total else None,
+            'settled': self.settled,
+        }
+
+
+# ========== 单个会话 ==========
+
+def _iter_chunks(rows, columns, chunk_rows: int):
+    """按块读取 CSV 行（第一行为表头）的指定列为 float 数组（缺失列或空值为 NaN）"""
+    header = next(rows, None)
+    if header is None:
+        return
+    index = [header.index(name) if name in header else None for name in columns]
+    while True:
+        block = list(islice(rows, chunk_rows))
+        if not block:
+            return
+        chunk = {}
+        for name, i in zip(columns, index):
+            if i is None:
+                chunk[name] = np.full(len(block), np.nan)
+                continue
+            chunk[name] = np.array(
+                [float(row[i]) if i < len(row) and row[i] not in ('', 'None') else np.nan for row in block],
+                dtype=np.float64,
+            )
+        yield chunk
+
+
+def _timestamps_ns(columns: dict) -> np.ndarray:
+    ts_ns = columns['ts_ns']
+    return np.where(np.isnan(ts_ns), columns['timestamp'] * NANOS_PER_SECOND, ts_ns).astype(np.int64)
+
+
+def _read_fills(data_dir: Path, session_id: str):
+    """成交（一轮最多几百笔，整体读入）：按时间排序的 (ts_ns, sign, price, quantity, order_id) 列表"""
+    fills = []
+    for row in iter_dict_rows(data_dir, 'trades', session_id):
+        try:
+            price = float(row['price'])
+            quantity = float(row['quantity'])
+        except (KeyError, ValueError):
+            continue
+        ts_ns = row.get('ts_ns')
+        ts_ns = int(ts_ns) if ts_ns else int(float(row['timestamp']) * NANOS_PER_SECOND)
+        sign = 1 if row.get('side', '').upper() == 'BUY' else -1
+        fills.append((ts_ns, sign, price, quantity, row.get('order_id')))
+    fills.sort(key=lambda fill: fill[0])
+    return fills
+
+
+def _count_submitted(data_dir: Path, session_id: str) -> int:
+    return sum(
+        1 for row in iter_dict_rows(data_dir, 'orders', session_id)
+        if row.get('status', 'SUBMITTED') == 'SUBMITTED'
+    )
+
+
+class _SessionScan:
+    """单个会话的扫描状态：持仓 / 现金流随成交变化，中间价路径分段计算权益"""
+
+    def __init__(self, stats: SessionStats):
+        self.stats = stats
+        self.position = 0.0
+        self.cash = 0.0
+        self.max_abs_position = 0.0
+        self.mid = np.nan
+        self.first_ts = None
+        self.last_ts = None
+
+    def _advance(self, ts_ns: int):
+        if self.first_ts is None:
+            self.first_ts = ts_ns
+        elif self.position != 0 and ts_ns > self.last_ts:
+            self.stats.secs_in_market += (ts_ns - self.last_ts) / NANOS_PER_SECOND
+        self.last_ts = ts_ns if self.last_ts is None else max(self.last_ts, ts_ns)
+
+    def book_segment(self, ts_ns: np.ndarray, mid: np.ndarray):
+        """两次成交之间的一段中间价路径（持仓不变）"""
+        if not len(ts_ns):
+            return
+        valid = ~np.isnan(mid)
+        if valid.any():
+            self.stats.path.update_many(self.cash + self.position * mid[valid])
+            self.mid = float(mid[valid][-1])
+        self._advance(int(ts_ns[0]))
+        self._advance(int(ts_ns[-1]))
+
+    def fill(self, ts_ns: int, sign: int, price: float, quantity: float):
+        self._advance(ts_ns)
+        stats = self.stats
+        stats.fills += 1
+        stats.volume += quantity
+        stats.notional += price * quantity
+        if not np.isnan(self.mid):
+            stats.edge_sum += quantity * sign * (self.mid - price)
+            stats.edge_quantity += quantity
+
+        self.position += sign * quantity
+        self.cash -= sign * price * quantity
+        self.max_abs_position = max(self.max_abs_position, abs(self.position))
+        mark = price if np.isnan(self.mid) else self.mid
+        stats.path.update(self.cash + self.position * mark)
+
+
+def session_stats(data_dir, session_id: str, outcome: float = None, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> SessionStats:
+    """
+    流式计算一个会话的统计
+
+    orderbook 按块读取；每块内按成交时间切分为若干段，每段持仓不变，权益路径向量化计算
+    """
+    data_dir = Path(data_dir)
+    stats = SessionStats()
+    stats.sessions = 1
+    stats.orders = _count_submitted(data_dir, session_id)
+
+    fills = _read_fills(data_dir, session_id)
+    stats.filled_orders = len({fill[4] for fill in fills})
+    scan = _SessionScan(stats)
+    next_fill = 0
+
+    for chunk in _iter_chunks(iter_csv(data_dir, 'orderbook', session_id), BOOK_COLUMNS, chunk_rows):
+        ts_ns = _timestamps_ns(chunk)
+        market_mid = (chunk['best_bid'] + chunk['best_ask']) / 2
+        mid = np.where(np.isnan(market_mid), chunk['mid_price'], market_mid)
+
+        start = 0
+        while next_fill < len(fills) and fills[next_fill][0] <= ts_ns[-1]:
+            fill_ts, sign, price, quantity, _ = fills[next_fill]
+            end = start + int(np.searchsorted(ts_ns[start:], fill_ts, side='right'))
+            scan.book_segment(ts_ns[start:end], mid[start:end])
+            scan.fill(fill_ts, sign, price, quantity)
+            start = end
+            next_fill += 1
+        scan.book_segment(ts_ns[start:], mid[start:])
+
+    for fill_ts, sign, price, quantity, _ in fills[next_fill:]:
+        scan.fill(fill_ts, sign, price, quantity)
+
+    if outcome is not None:
+        stats.settled = 1
+        stats.path.update(scan.cash + scan.position * float(outcome))
+
+    stats.inventory_capacity = scan.max_abs_position
+    if scan.first_ts is not None:
+        stats.secs_total = (scan.last_ts - scan.first_ts) / NANOS_PER_SECOND
+    return stats
+
+
+def _session_job(job):
+    data_dir, session_id, outcome, chunk_rows = job
+    return session_stats(data_dir, session_id, outcome, chunk_rows)
+
+
+# ========== 汇总 ==========
+
+def market_name(session: dict) -> str:
+    """市场名：slug 去掉末尾的轮次时间戳（btc-updown-15m-1767225600 → btc-updown-15m）"""
+    slug = session.get('market_slug')
+    if slug:
+        return re.sub(r'-\d+$', '', slug)
+    return session.get('instrument_id') or 'unknown'
+
+
+def session_day(session: dict) -> str:
+    ts = session.get('round_start_ts') or session.get('start_ts')
+    if ts is None:
+        return 'unknown'
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def build_report(data_dir, sessions: list, workers: int = None, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> dict:
+    """
+    计算并分组合并
+
+    Args:
+        sessions: SessionCatalog.find() 的结果（按开始时间排序）
+        workers: 进程数（1 = 在本进程中顺序计算）
+
+    Returns:
+        {'by_market_day': {(market, day): SessionStats}, 'by_market': {market: SessionStats},
+         'total': SessionStats}
+    """
+    jobs = [(str(data_dir), s['session_id'], s.get('outcome'), chunk_rows) for s in sessions]
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or len(jobs) <= 1:
+        results = map(_session_job, jobs)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_session_job, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+
+    by_market_day, by_market, total = {}, {}, SessionStats()
+    try:
+        for session, stats in zip(sessions, results):
+            market = market_name(session)
+            by_market_day.setdefault((market, session_day(session)), SessionStats()).merge(stats)
+            by_market.setdefault(market, SessionStats()).merge(stats)
+            total.merge(stats)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return {'by_market_day': by_market_day, 'by_market': by_market, 'total': total}
+
+
+def _fmt(value, spec: str, scale: float = 1.0) -> str:
+    return 'n/a' if value is None else format(value * scale, spec)
+
+
+def format_row(label: str, stats: SessionStats) -> str:
+    d = stats.to_dict()
+    return (
+        f"[REPORT] {label:<32} sessions={d['sessions']:<4} fills={d['fills']:<5} "
+        f"fill_rate={_fmt(d['fill_rate'], '.1%')} "
+        f"spread={_fmt(d['realized_spread'], '+.0f', 1e4)}bp "
+        f"turnover={_fmt(d['inventory_turnover'], '.2f')} "
+        f"pnl={d['pnl']:+.4f} max_dd={d['max_drawdown']:.4f} "
+        f"in_market={_fmt(d['time_in_market'], '.0%')}"
+    )
+
+
+def format_report(report: dict) -> str:
+    lines = [format_row(f"{market} {day}", stats) for (market, day), stats in sorted(report['by_market_day'].items())]
+    lines += [format_row(f"{market} (all days)", stats) for market, stats in sorted(report['by_market'].items())]
+    lines.append(format_row("TOTAL", report['total']))
+    return "\n".join(lines)
+
+
+# ========== 命令行 ==========
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="记录会话汇总报表（成交率 / 已实现价差 / 库存周转 / 回撤 / 持仓时间）")
+    parser.add_argument("data_dir", nargs="?", default="/app/data", help="TradeDataRecorder 输出目录")
+    parser.add_argument("--market", help="市场 slug 前缀")
+    parser.add_argument("--since", type=parse_time, help="开始时间（Unix 秒或 ISO，UTC）")
+    parser.add_argument("--until", type=parse_time, help="结束时间（Unix 秒或 ISO，UTC）")
+    parser.add_argument("--config-hash", help="参数哈希")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认 CPU 核数）")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="orderbook 每块行数")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args(argv)
+
+    catalog = SessionCatalog(args.data_dir)
+    catalog.index_directory()
+    sessions = catalog.find(
+        market_slug=args.market, since=args.since, until=args.until, config_hash=args.config_hash,
+    )
+    catalog.close()
+
+    report = build_report(args.data_dir, sessions, workers=args.workers, chunk_rows=args.chunk_rows)
+
+    if args.json:
+        print(json.dumps({
+            'by_market_day': {f"{m} {d}": s.to_dict() for (m, d), s in sorted(report['by_market_day'].items())},
+            'by_market': {m: s.to_dict() for m, s in sorted(report['by_market'].items())},
+            'total': report['total'].to_dict(),
+        }, indent=2))
+    else:
+        print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
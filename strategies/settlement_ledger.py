@@ -0,0 +1,328 @@
+"""
+结算感知的盈亏账本 - 二元市场到期后按 0 / 1 结算
+
+问题：
+- 策略从 portfolio.realized_pnls 读取盈亏，但到期时剩余库存按 0 或 1 结算，
+  这部分盈亏既不在 Portfolio 里，也没有被记录器捕获
+- 每轮（15 分钟）是独立进程，日亏损检查看不到之前几轮的盈亏
+- _check_daily_loss_limit 每个 tick 都重新查询 Portfolio
+
+解决方案：
+- SettlementLedger：按 condition（instrument）维护 现金流 + 持仓 + 标记价格，
+  每个事件 O(1) 更新当日累计盈亏（结算盈亏 + 未结算部分按标记价格计）
+- 结算：settle(key, outcome) 以 现金流 + 持仓 × outcome 记账
+- 结算结果来源：
+  - GammaResolutionSource：轮询 Gamma API（市场关闭且 outcomePrices 为 0/1）
+  - 记录器回放：replay_recorder_sessions 读取当日的 trades_*.csv / settlement_*.json，
+    新进程启动时重建之前几轮的盈亏
+- UTC 日切换时自动清零当日盈亏（未结算的持仓以切换时的价值为基线）
+"""
+
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .recorder_storage import iter_dict_rows
+
+
+GAMMA_MARKETS_URL = "https://gamma-api.polymarket.com/markets"
+
+
+def parse_instrument_id(instrument_id: str):
+    """'0x<condition>-<token>.POLYMARKET' → (condition_id, token_id)"""
+    symbol = str(instrument_id).split('.', 1)[0]
+    condition_id, _, token_id = symbol.partition('-')
+    return condition_id, token_id
+
+
+class _ConditionBook:
+    """单个 condition 的持仓（现金流 + 数量 + 标记价格）"""
+
+    __slots__ = ('quantity', 'cash', 'mark', 'baseline', 'expiry_ts')
+
+    def __init__(self, expiry_ts=None):
+        self.quantity = 0.0
+        self.cash = 0.0
+        self.mark = None
+        self.baseline = 0.0
+        self.expiry_ts = expiry_ts
+
+    @property
+    def value(self) -> float:
+        """当前价值：现金流 + 持仓 × 标记价格（首笔成交前持仓为 0，标记价格无影响）"""
+        mark = self.mark if self.mark is not None else 0.0
+        return self.cash + self.quantity * mark
+
+    @property
+    def pnl(self) -> float:
+        return self.value - self.baseline
+
+
+class SettlementLedger:
+    """
+    当日盈亏账本
+
+    daily_pnl = 当日已结算盈亏 + Σ 未结算 condition 的（现金流 + 持仓 × 标记价格 − 日初基线）
+    每个事件只修改一个 condition，增量维护总和，读取 O(1)
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._books = {}
+        self._open_pnl = 0.0
+        self.settled_pnl = 0.0
+        self.settlements = {}   # key → 结算盈亏（当日）
+        self._day = self._current_day()
+
+    # ========== 日切换 ==========
+
+    def _current_day(self):
+        return datetime.fromtimestamp(self._clock(), tz=timezone.utc).date()
+
+    def _maybe_rollover(self):
+        day = self._current_day()
+        if day == self._day:
+            return
+
+        self._day = day
+        self.settled_pnl = 0.0
+        self.settlements = {}
+        for book in self._books.values():
+            book.baseline = book.value
+        self._open_pnl = 0.0
+
+    # ========== 事件 ==========
+
+    def _book(self, key: str, expiry_ts=None) -> _ConditionBook:
+        book = self._books.get(key)
+        if book is None:
+            book = self._books[key] = _ConditionBook(expiry_ts)
+        elif expiry_ts is not None:
+            book.expiry_ts = expiry_ts
+        return book
+
+    def open(self, key: str, expiry_ts: int = None):
+        """登记一个 condition（可附带到期时间，用于判断何时可以查询结算结果）"""
+        self._maybe_rollover()
+        self._book(key, expiry_ts)
+
+    def on_fill(self, key: str, is_buy: bool, price: float, quantity: float, fee: float = 0.0):
+        """成交：买入支付现金、增加持仓；卖出相反；手续费计入现金流"""
+        self._maybe_rollover()
+        book = self._book(key)
+        self._open_pnl -= book.pnl
+
+        notional = float(price) * float(quantity)
+        if is_buy:
+            book.quantity += float(quantity)
+            book.cash -= notional
+        else:
+            book.quantity -= float(quantity)
+            book.cash += notional
+        book.cash -= float(fee)
+        if book.mark is None:
+            book.mark = float(price)
+
+        self._open_pnl += book.pnl
+
+    def mark(self, key: str, price: float):
+        """更新标记价格（未结算持仓按此计价）"""
+        book = self._books.get(key)
+        if book is None or price is None:
+            return
+        self._maybe_rollover()
+        self._open_pnl += book.quantity * (float(price) - (book.mark if book.mark is not None else 0.0))
+        book.mark = float(price)
+
+    def settle(self, key: str, outcome: float):
+        """
+        按结算结果记账（outcome：本 token 的最终价值 1 或 0）
+
+        Returns:
+            float | None: 该 condition 计入当日的结算盈亏（未知 key 返回 None）
+        """
+        book = self._books.pop(key, None)
+        if book is None:
+            return None
+        self._maybe_rollover()
+
+        self._open_pnl -= book.pnl
+        pnl = book.cash + book.quantity * float(outcome) - book.baseline
+        self.settled_pnl += pnl
+        self.settlements[key] = pnl
+        return pnl
+
+    # ========== 查询 ==========
+
+    @property
+    def daily_pnl(self) -> float:
+        self._maybe_rollover()
+        return self.settled_pnl + self._open_pnl
+
+    @property
+    def open_pnl(self) -> float:
+        return self._open_pnl
+
+    def unresolved(self, now_ts: float = None):
+        """已到期但尚未结算的 condition（无到期时间的也包括在内）"""
+        now_ts = self._clock() if now_ts is None else now_ts
+        return [
+            key for key, book in self._books.items()
+            if book.expiry_ts is None or book.expiry_ts <= now_ts
+        ]
+
+    def position(self, key: str) -> float:
+        book = self._books.get(key)
+        return book.quantity if book else 0.0
+
+    def pnl_of(self, key: str) -> float:
+        """某个 condition 计入当日的盈亏（未结算按标记价格，已结算为结算盈亏）"""
+        book = self._books.get(key)
+        if book is not None:
+            return book.pnl
+        return self.settlements.get(key, 0.0)
+
+    def exposure(self, key: str) -> float:
+        """某个 condition 的持仓敞口：|持仓| × 标记价格（已结算为 0）"""
+        book = self._books.get(key)
+        if book is None or book.mark is None:
+            return 0.0
+        return abs(book.quantity) * book.mark
+
+    # ========== 结算结果轮询 ==========
+
+    def poll(self, source, keys=None, on_error=None) -> dict:
+        """
+        查询结算结果并记账
+
+        Args:
+            source: 提供 fetch_outcome(instrument_id) -> float | None
+            keys: 要查询的 condition（默认为全部已到期未结算的）
+            on_error: 查询失败时调用 on_error(message)（策略中传 self.log.warning），
+                默认 print；失败的 condition 保持未结算，下次轮询重试
+
+        Returns:
+            {key: 结算盈亏}（只包含本次结算的）
+        """
+        on_error = print if on_error is None else on_error
+        booked = {}
+        for key in list(self.unresolved() if keys is None else keys):
+            try:
+                outcome = source.fetch_outcome(key)
+            except Exception as e:
+                on_error(f"[LEDGER] 查询结算结果失败 {key}: {e!r}")
+                continue
+            if outcome is not None:
+                booked[key] = self.settle(key, outcome)
+        return booked
+
+
+# ========== 结算结果来源 ==========
+
+class GammaResolutionSource:
+    """Gamma API：市场已关闭且 outcomePrices 为 0/1 时返回本 token 的结算价值"""
+
+    def __init__(self, url: str = GAMMA_MARKETS_URL, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch_outcome(self, instrument_id: str):
+        from patches import http_transport
+
+        condition_id, token_id = parse_instrument_id(instrument_id)
+        response = http_transport.get(self.url, params={'condition_ids': condition_id}, timeout=self.timeout)
+        response.raise_for_status()
+
+        markets = response.json()
+        if not markets:
+            return None
+        return self.outcome_from_market(markets[0], token_id)
+
+    @staticmethod
+    def outcome_from_market(market: dict, token_id: str):
+        """从 Gamma 市场数据解析结算结果（未结算返回 None）"""
+        if not market.get('closed'):
+            return None
+
+        token_ids = json.loads(market.get('clobTokenIds') or '[]')
+        prices = [float(p) for p in json.loads(market.get('outcomePrices') or '[]')]
+        if token_id not in token_ids or len(prices) != len(token_ids):
+            return None
+
+        price = prices[token_ids.index(token_id)]
+        return price if price in (0.0, 1.0) else None
+
+
+class StaticResolutionSource:
+    """固定结算结果（测试 / 手工补录）：{instrument_id: outcome}"""
+
+    def __init__(self, outcomes: dict):
+        self.outcomes = dict(outcomes)
+
+    def fetch_outcome(self, instrument_id: str):
+        return self.outcomes.get(instrument_id)
+
+
+# ========== 记录器回放 ==========
+
+def replay_recorder_sessions(ledger: SettlementLedger, data_dir, since_ts: float, exclude=(), catalog=None) -> int:
+    """
+    回放记录器输出：重建 since_ts 之后各会话（每个会话 = 一轮 = 一个 condition）的盈亏
+
+    - config_<session>.json 提供 instrument_id 和 round_start_ts
+    - trades_<session>.csv 逐笔成交
+    - settlement_<session>.json 存在时直接结算，否则留待 poll
+    - 传入 catalog（SessionCatalog）时按索引只读取本轮开始时间 >= since_ts 的会话，
+      不再打开数据目录下全部 config_*.json
+
+    Returns:
+        回放的会话数
+    """
+    data_dir = Path(data_dir)
+    replayed = 0
+
+    for session_id, config in _recorder_configs(data_dir, since_ts, catalog):
+        if session_id in exclude:
+            continue
+
+        key = config.get('instrument_id')
+        round_start_ts = config.get('round_start_ts') or 0
+        if not key or round_start_ts < since_ts:
+            continue
+
+        ledger.open(key, expiry_ts=round_start_ts + 15 * 60 if round_start_ts else None)
+
+        for row in iter_dict_rows(data_dir, 'trades', session_id):
+            ledger.on_fill(
+                key,
+                is_buy=row['side'].upper() == 'BUY',
+                price=float(row['price']),
+                quantity=float(row['quantity']),
+                fee=float(row.get('commission') or 0),
+            )
+
+        settlement_path = data_dir / f"settlement_{session_id}.json"
+        if settlement_path.exists():
+            with open(settlement_path, 'r') as f:
+                ledger.settle(key, json.load(f)['outcome'])
+
+        replayed += 1
+
+    return replayed
+
+
+def _recorder_configs(data_dir: Path, since_ts: float, catalog=None):
+    """产出 (session_id, config)：有会话目录时先补录新会话再按索引查询，否则扫描目录"""
+    if catalog is not None:
+        catalog.index_directory()
+        for session in catalog.find(min_round_start_ts=since_ts):
+            yield session['session_id'], json.loads(session['config_json'] or '{}')
+        return
+
+    for config_path in sorted(data_dir.glob('config_*.json')):
+        try:
+            with open(config_path, 'r') as f:
+                yield config_path.stem[len('config_'):], json.load(f)
+        except (OSError, ValueError):
+            continue
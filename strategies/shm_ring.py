@@ -0,0 +1,178 @@
+"""
+共享内存环形缓冲区 - 单生产者 / 单消费者，跨进程传递定长记录
+
+用途：
+- 行情进程 → 报价工作进程：归一化的顶档更新、成交回报
+- 报价工作进程 → 执行网关：报价 / 撤单请求
+
+设计：
+- multiprocessing.shared_memory 一块内存：64 字节头部 + capacity 条 NumPy 结构化记录
+- 头部 int64：[写序号, 读序号, 丢弃数, 容量]；写序号只由生产者修改，读序号只由消费者修改，
+  因此不需要锁
+- 生产者先写记录再推进写序号；消费者先读写序号再读记录（CPython 不会重排这两步，
+  x86 的存储顺序保证另一个进程看到序号时记录已写入）
+- 缓冲区满时丢弃新记录并计数（顶档更新可以丢：下一条更新会带来最新状态；
+  不能丢的记录由生产者检查 push 的返回值并重试，见 QuoteWorkerPool.publish_fill）
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+HEADER_BYTES = 64
+_WRITE, _READ, _DROPPED, _CAPACITY = range(4)
+
+
+# ========== 记录格式 ==========
+
+EVENT_BOOK = 1
+EVENT_FILL = 2
+
+# 行情进程 → 工作进程
+MARKET_EVENT_DTYPE = np.dtype([
+    ('kind', np.int8),
+    ('slot', np.int32),        # 市场编号（QuoteWorkerPool 中的下标）
+    ('ts_ns', np.int64),
+    ('best_bid', np.float64),  # 无买单为 NaN
+    ('best_ask', np.float64),  # 无卖单为 NaN
+    ('bid_size', np.float64),
+    ('ask_size', np.float64),
+    ('price', np.float64),     # 成交价（EVENT_FILL）
+    ('quantity', np.float64),  # 成交数量，买入为正、卖出为负（EVENT_FILL）
+])
+
+ACTION_QUOTE = 1
+ACTION_CANCEL = 2
+
+# 工作进程 → 执行网关
+ORDER_REQUEST_DTYPE = np.dtype([
+    ('action', np.int8),
+    ('slot', np.int32),
+    ('ts_ns', np.int64),
+    ('bid', np.float64),       # NaN：不挂买单（库存达到上限）
+    ('ask', np.float64),       # NaN：不挂卖单
+    ('quantity', np.float64),
+])
+
+
+class ShmRing:
+    """
+    单生产者 / 单消费者共享内存环形缓冲区
+
+    用法：
+        ring = ShmRing.create(MARKET_EVENT_DTYPE, capacity=65536)   # 父进程
+        ring = ShmRing.attach(ring.name, MARKET_EVENT_DTYPE)         # 子进程
+        ring.push((EVENT_BOOK, slot, ts_ns, bid, ask, bid_size, ask_size, 0.0, 0.0))
+        records = ring.pop_many()
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, dtype, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self.dtype = np.dtype(dtype)
+        self._header = np.ndarray((4,), dtype=np.int64, buffer=shm.buf, offset=0)
+        capacity = int(self._header[_CAPACITY])
+        self._records = np.ndarray((capacity,), dtype=self.dtype, buffer=shm.buf, offset=HEADER_BYTES)
+
+    @classmethod
+    def create(cls, dtype, capacity: int, name: str = None) -> 'ShmRing':
+        dtype = np.dtype(dtype)
+        capacity = int(capacity)
+        if capacity <= 0:
+            raise ValueError(f"capacity 必须为正数: {capacity}")
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_BYTES + capacity * dtype.itemsize)
+        header = np.ndarray((4,), dtype=np.int64, buffer=shm.buf, offset=0)
+        header[:] = (0, 0, 0, capacity)
+        del header
+        return cls(shm, dtype, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, dtype, untrack: bool = False) -> 'ShmRing':
+        """
+        附加到已有的缓冲区
+
+        Args:
+            untrack: 独立启动的进程（不是 multiprocessing 子进程）应设为 True，见 untrack_shared_memory()
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            untrack_shared_memory(shm)
+        return cls(shm, dtype, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        return len(self._records)
+
+    # ========== 生产者 ==========
+
+    def push(self, record) -> bool:
+        """写入一条记录（tuple，字段顺序同 dtype）；缓冲区满时丢弃并返回 False"""
+        header = self._header
+        write = int(header[_WRITE])
+        if write - int(header[_READ]) >= len(self._records):
+            header[_DROPPED] += 1
+            return False
+
+        self._records[write % len(self._records)] = record
+        header[_WRITE] = write + 1
+        return True
+
+    # ========== 消费者 ==========
+
+    def pop_many(self, max_items: int = None) -> np.ndarray:
+        """读出所有（最多 max_items 条）待处理记录（返回副本）"""
+        header = self._header
+        read = int(header[_READ])
+        available = int(header[_WRITE]) - read
+        if max_items is not None:
+            available = min(available, int(max_items))
+        if available <= 0:
+            return self._records[:0].copy()
+
+        indices = (read + np.arange(available)) % len(self._records)
+        records = self._records[indices]
+        header[_READ] = read + available
+        return records
+
+    def __len__(self):
+        return int(self._header[_WRITE]) - int(self._header[_READ])
+
+    @property
+    def dropped(self) -> int:
+        return int(self._header[_DROPPED])
+
+    # ========== 释放 ==========
+
+    def close(self):
+        """解除映射；创建者同时删除共享内存"""
+        if self._shm is None:
+            return
+        del self._header, self._records  # 释放对共享内存的引用，否则 close() 报 BufferError
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+
+def untrack_shared_memory(shm: shared_memory.SharedMemory):
+    """
+    附加方不登记到 resource_tracker
+
+    Python < 3.13 中独立进程附加后，其 resource_tracker 会在进程退出时删除共享内存，
+    创建方仍在使用的缓冲区被提前删除；删除应由创建方负责。
+    multiprocessing 子进程与父进程共用同一个 resource_tracker，不需要（也不应该）调用
+    """
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
@@ -0,0 +1,170 @@
+"""
+启动对账 - 首次报价前清理上个进程遗留的挂单，拉取近期成交
+
+问题：
+- BaseStrategy.on_start 只打印账户 / 仓位摘要，上个进程（崩溃 / 容器重启）遗留的 GTC 报价
+  仍在盘口上，新进程再挂一套就是双倍报价
+- NautilusTrader 启动对账默认拉取全部历史成交（不限时间、不限市场），启动慢
+
+解决方案（TradingNode 启动前，由运行器调用）：
+- 未结订单：一次账户级分页拉取（GET /data/orders，py_clob_client 按 next_cursor 翻页），按市场分组
+- 近期成交：每个市场一个请求（after = 当前 - 回看窗口），线程池并发
+- 本进程要交易的市场中的未结订单视为遗留订单，按批（DELETE /orders）撤销，各批并发
+- 撤单完成后 NautilusTrader 自身的启动对账（限定 instrument 和回看窗口，见运行器）
+  只需拉取仓位和窗口内成交，Cache 在策略启动、第一次报价之前就已是最新状态
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+QUERY = "query"
+CANCEL = "cancel"
+
+
+def market_key(condition_id: str, token_id: str) -> tuple:
+    return (str(condition_id), str(token_id))
+
+
+class ReconciliationReport:
+    """对账结果（每个市场的未结订单 / 近期成交，撤单结果，耗时）"""
+
+    def __init__(self):
+        self.open_orders = {}        # {(condition_id, token_id): [order, ...]}
+        self.recent_trades = {}      # {(condition_id, token_id): [trade, ...]}
+        self.other_open_orders = 0   # 不属于本进程市场的未结订单（不处理）
+        self.canceled = []
+        self.not_canceled = {}       # {order_id: 原因}
+        self.errors = []
+        self.elapsed_ms = 0.0
+
+    @property
+    def orphan_count(self) -> int:
+        return sum(len(orders) for orders in self.open_orders.values())
+
+    def summary(self) -> str:
+        trades = sum(len(t) for t in self.recent_trades.values())
+        text = (
+            f"遗留订单 {self.orphan_count}（已撤销 {len(self.canceled)}，失败 {len(self.not_canceled)}），"
+            f"其他市场未结订单 {self.other_open_orders}，近期成交 {trades} 笔，用时 {self.elapsed_ms:.0f}ms"
+        )
+        if self.errors:
+            text += f"，错误 {len(self.errors)} 个"
+        return text
+
+
+class StartupReconciler:
+    """
+    启动对账
+
+    用法：
+        reconciler = StartupReconciler(clob_client)
+        report = reconciler.run([(condition_id, token_id), ...])
+        print(report.summary())
+    """
+
+    DEFAULT_MAX_WORKERS = 8
+    DEFAULT_TRADE_LOOKBACK_SECS = 3600
+    DEFAULT_CANCEL_BATCH_SIZE = 15   # 与批量下单相同的单批上限（保守取值）
+
+    def __init__(
+        self,
+        client,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        trade_lookback_secs: float = DEFAULT_TRADE_LOOKBACK_SECS,
+        cancel_batch_size: int = DEFAULT_CANCEL_BATCH_SIZE,
+        throttle=None,
+        clock=time.time,
+    ):
+        """
+        Args:
+            client: 已配置 L2 凭证的 py_clob_client.ClobClient
+            throttle: 可选的限流回调 throttle(QUERY | CANCEL)，每个请求前调用
+        """
+        self.client = client
+        self.max_workers = int(max_workers)
+        self.trade_lookback_secs = trade_lookback_secs
+        self.cancel_batch_size = int(cancel_batch_size)
+        self._throttle = throttle
+        self._clock = clock
+
+    def run(self, markets, cancel_orphans: bool = True) -> ReconciliationReport:
+        """拉取未结订单和近期成交（并发），撤销本进程市场中的遗留订单"""
+        started = time.perf_counter()
+        report = ReconciliationReport()
+        keys = [market_key(*m) for m in markets]
+        since_ts = int(self._clock() - self.trade_lookback_secs)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(keys) + 1))) as pool:
+            orders_future = pool.submit(self._fetch_open_orders)
+            trade_futures = {key: pool.submit(self._fetch_trades, key, since_ts) for key in keys}
+
+            for key, future in trade_futures.items():
+                try:
+                    report.recent_trades[key] = future.result()
+                except Exception as e:
+                    report.errors.append(f"成交查询失败 {key[0][:10]}...: {e}")
+                    report.recent_trades[key] = []
+
+            try:
+                open_orders = orders_future.result()
+            except Exception as e:
+                report.errors.append(f"未结订单查询失败: {e}")
+                open_orders = []
+
+            wanted = set(keys)
+            for order in open_orders:
+                key = market_key(order.get('market'), order.get('asset_id'))
+                if key in wanted:
+                    report.open_orders.setdefault(key, []).append(order)
+                else:
+                    report.other_open_orders += 1
+
+            if cancel_orphans:
+                order_ids = [o['id'] for orders in report.open_orders.values() for o in orders]
+                self._cancel(pool, order_ids, report)
+
+        report.elapsed_ms = (time.perf_counter() - started) * 1000
+        return report
+
+    # ========== 查询 ==========
+
+    def _fetch_open_orders(self) -> list:
+        """账户全部未结订单（客户端内部按 next_cursor 翻页）"""
+        self._acquire(QUERY)
+        return self.client.get_orders() or []
+
+    def _fetch_trades(self, key, since_ts: int) -> list:
+        from py_clob_client.clob_types import TradeParams
+
+        self._acquire(QUERY)
+        condition_id, token_id = key
+        return self.client.get_trades(TradeParams(market=condition_id, asset_id=token_id, after=since_ts)) or []
+
+    # ========== 撤单 ==========
+
+    def _cancel(self, pool, order_ids, report: ReconciliationReport):
+        """按 cancel_batch_size 分批撤销，各批并发"""
+        batches = [
+            order_ids[i:i + self.cancel_batch_size]
+            for i in range(0, len(order_ids), self.cancel_batch_size)
+        ]
+        futures = [(batch, pool.submit(self._cancel_batch, batch)) for batch in batches]
+
+        for batch, future in futures:
+            try:
+                response = future.result() or {}
+            except Exception as e:
+                report.errors.append(f"批量撤单失败（{len(batch)} 个）: {e}")
+                report.not_canceled.update({order_id: str(e) for order_id in batch})
+                continue
+            report.canceled.extend(response.get('canceled') or [])
+            report.not_canceled.update(response.get('not_canceled') or {})
+
+    def _cancel_batch(self, order_ids):
+        self._acquire(CANCEL)
+        return self.client.cancel_orders(order_ids)
+
+    def _acquire(self, kind: str):
+        if self._throttle is not None:
+            self._throttle(kind)
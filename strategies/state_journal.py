@@ -0,0 +1,293 @@
+"""
+策略状态预写日志 - 崩溃 / 容器重启后快速恢复本轮状态
+
+问题：
+- 容器重启时 start.sh 直接重新运行 run_15m_market.py，本轮的价格历史（波动率）、
+  成交强度样本、市场开始时间全部丢失
+- 上一个进程挂出的 GTC 报价仍在盘口上，没有策略认领
+
+解决方案：
+- StateJournal：每轮一个只追加的 JSON Lines 文件，记录状态变化
+  - round：本轮开始（instrument、round_start_ts、市场开始时间）
+  - strike：参考价的本轮开盘价（重启后沿用，不取重启时的现货价）
+  - quote：提交报价（先写日志、立即 fsync，再发出订单）
+  - accepted / closed：订单被交易所接受（venue_order_id）/ 终结
+  - tick / trade：价格历史、市场成交（用于波动率、κ 估计）
+  - stop：正常停止
+- 写入批量 fsync：关键记录（round、quote）立即落盘，其余按条数 / 间隔合并落盘
+- 恢复：replay() 折叠日志得到 JournalState，compact() 把状态写成一条 snapshot 记录
+  （临时文件 + 原子替换），日志长度有界，重启回放在毫秒级完成
+"""
+
+import json
+import os
+import time
+from collections import deque
+from hashlib import sha1
+from pathlib import Path
+
+
+class JournalState:
+    """
+    日志折叠后的策略状态
+
+    - live_orders：{client_order_id: venue_order_id 或 None}，已提交且未终结的订单
+    - ticks / trades：最近的价格历史 / 市场成交（有上限）
+    - clean_shutdown：最后一条记录是 stop
+    """
+
+    DEFAULT_MAX_TICKS = 512
+    DEFAULT_MAX_TRADES = 512
+
+    def __init__(self, max_ticks: int = DEFAULT_MAX_TICKS, max_trades: int = DEFAULT_MAX_TRADES):
+        self.instrument_id = None
+        self.round_start_ts = None
+        self.market_start_time = None
+        self.live_orders = {}
+        self.last_quote = None
+        self.strike = None
+        self.strike_source = None
+        self.ticks = deque(maxlen=max_ticks)
+        self.trades = deque(maxlen=max_trades)
+        self.clean_shutdown = False
+        self.records = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return self.records == 0
+
+    def apply(self, record: dict):
+        """应用一条日志记录"""
+        kind = record.get('type')
+        self.records += 1
+        self.clean_shutdown = kind == 'stop'
+
+        if kind == 'round':
+            self.instrument_id = record.get('instrument_id', self.instrument_id)
+            self.round_start_ts = record.get('round_start_ts', self.round_start_ts)
+            if self.market_start_time is None:
+                self.market_start_time = record.get('market_start_time')
+        elif kind == 'snapshot':
+            self.instrument_id = record.get('instrument_id')
+            self.round_start_ts = record.get('round_start_ts')
+            self.market_start_time = record.get('market_start_time')
+            self.live_orders = dict(record.get('live_orders', {}))
+            self.last_quote = record.get('last_quote')
+            self.strike = record.get('strike')
+            self.strike_source = record.get('strike_source')
+            self.ticks.clear()
+            self.ticks.extend(record.get('ticks', ()))
+            self.trades.clear()
+            self.trades.extend(record.get('trades', ()))
+        elif kind == 'quote':
+            for client_order_id in record.get('orders', ()):
+                self.live_orders[client_order_id] = None
+            self.last_quote = (record.get('bid'), record.get('ask'))
+        elif kind == 'strike':
+            self.strike = record.get('strike')
+            self.strike_source = record.get('source')
+        elif kind == 'accepted':
+            self.live_orders[record['order']] = record.get('venue_order_id')
+        elif kind == 'closed':
+            self.live_orders.pop(record['order'], None)
+        elif kind == 'tick':
+            self.ticks.append(record['tick'])
+        elif kind == 'trade':
+            self.trades.append(record['trade'])
+
+    def venue_order_ids(self) -> set:
+        return {venue_id for venue_id in self.live_orders.values() if venue_id}
+
+    def to_snapshot(self) -> dict:
+        return {
+            'type': 'snapshot',
+            'instrument_id': self.instrument_id,
+            'round_start_ts': self.round_start_ts,
+            'market_start_time': self.market_start_time,
+            'live_orders': self.live_orders,
+            'last_quote': self.last_quote,
+            'strike': self.strike,
+            'strike_source': self.strike_source,
+            'ticks': list(self.ticks),
+            'trades': list(self.trades),
+        }
+
+
+class StateJournal:
+    """
+    只追加、批量 fsync 的状态日志
+
+    用法：
+        journal, state = StateJournal.recover(path)   # 回放 + 压缩，然后以追加方式打开
+        journal.append('quote', critical=True, bid=0.48, ask=0.52, orders=[...])
+        journal.append('tick', tick={...})           # 合并落盘
+        journal.maybe_flush()                        # 定时器中调用
+        journal.close()                              # 追加 stop 并落盘
+    """
+
+    DEFAULT_FLUSH_INTERVAL_MS = 200
+    DEFAULT_MAX_BATCH = 256
+
+    def __init__(
+        self,
+        path,
+        flush_interval_ms: float = DEFAULT_FLUSH_INTERVAL_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        fsync: bool = True,
+        clock=time.monotonic,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_batch = int(max_batch)
+        self.fsync = fsync
+        self._clock = clock
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._pending = []
+        self._oldest_pending = None
+
+        # 统计
+        self.records_written = 0
+        self.flushes = 0
+
+    # ========== 写入 ==========
+
+    def append(self, kind: str, critical: bool = False, **fields):
+        """
+        追加一条记录
+
+        Args:
+            critical: True 时立即落盘（报价等必须先于外部副作用持久化的记录）
+        """
+        if self._file is None:
+            return
+        fields['type'] = kind
+        fields['ts'] = time.time()
+        self._pending.append(json.dumps(fields, separators=(',', ':')))
+        if self._oldest_pending is None:
+            self._oldest_pending = self._clock()
+
+        if critical or len(self._pending) >= self.max_batch:
+            self.flush()
+        else:
+            self.maybe_flush()
+
+    def maybe_flush(self):
+        """最早的待写记录超过 flush_interval 时落盘"""
+        if self._pending and self._clock() - self._oldest_pending >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """写入所有待写记录并 fsync（一次系统调用批量落盘）"""
+        if not self._pending or self._file is None:
+            return
+        self._file.write('\n'.join(self._pending) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+        self.records_written += len(self._pending)
+        self.flushes += 1
+        self._pending = []
+        self._oldest_pending = None
+
+    def close(self, clean: bool = True):
+        """落盘并关闭；clean=True 时追加 stop 记录（下次启动视为正常停止）"""
+        if self._file is None:
+            return
+        if clean:
+            self.append('stop')
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    # ========== 恢复 ==========
+
+    @staticmethod
+    def replay(path, state: JournalState = None) -> JournalState:
+        """
+        回放日志
+
+        崩溃时最后一行可能只写了一半，无法解析的行跳过
+        """
+        state = state or JournalState()
+        path = Path(path)
+        if not path.exists():
+            return state
+
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                state.apply(record)
+        return state
+
+    @staticmethod
+    def compact(path, state: JournalState):
+        """把状态重写为一条 snapshot 记录（临时文件 fsync 后原子替换，中途崩溃不会丢失旧日志）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(state.to_snapshot(), separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        try:
+            dir_fd = os.open(path.parent, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    @classmethod
+    def recover(cls, path, **kwargs):
+        """
+        回放 + 压缩，然后打开日志继续追加
+
+        Returns:
+            (journal, state)：state.is_empty 表示本轮首次启动
+        """
+        state = cls.replay(path)
+        if not state.is_empty:
+            cls.compact(path, state)
+        return cls(path, **kwargs), state
+
+
+# ========== 文件管理 ==========
+
+def journal_path(base_dir, instrument_id: str) -> Path:
+    """每个 instrument（即每轮）一个日志文件"""
+    digest = sha1(str(instrument_id).encode()).hexdigest()[:16]
+    return Path(base_dir) / f"journal_{digest}.jsonl"
+
+
+def prune_journals(base_dir, max_age_secs: float = 86400, keep=()) -> int:
+    """删除超过 max_age_secs 未修改的日志（已结束的轮次），返回删除数量"""
+    base_dir = Path(base_dir)
+    if not base_dir.exists():
+        return 0
+
+    keep = {Path(p).name for p in keep}
+    cutoff = time.time() - max_age_secs
+    removed = 0
+    for path in base_dir.glob("journal_*.jsonl"):
+        if path.name in keep:
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
@@ -0,0 +1,138 @@
+"""
+紧凑的盘口时间序列缓冲 - 预分配 NumPy 数组
+
+问题：
+- 策略用 Python list 保存 Decimal 价格历史，每个元素约 100+ 字节
+- 更多信号（多周期波动率、实现价差、成交标记）会成倍增加内存和 CPU
+
+解决方案：
+- TickStore：按列（时间戳、中间价、买一/卖一、深度、自己的报价）预分配 float64/int64 数组
+- 环形写入 + 双倍存储：每个值同时写入 i 和 i + capacity，
+  因此任意长度 ≤ capacity 的最近窗口都是连续切片（零拷贝视图）
+- 向量化窗口查询：mean / std / returns / ewma / since
+- 多个信号共享同一个缓冲
+"""
+
+import math
+
+import numpy as np
+
+
+class TickStore:
+    """
+    定长盘口时间序列
+
+    列：
+    - ts（int64，纳秒）
+    - mid / best_bid / best_ask / bid_depth / ask_depth / our_bid / our_ask（float64，缺失为 NaN）
+    """
+
+    DEFAULT_CAPACITY = 4096
+
+    FLOAT_COLUMNS = ('mid', 'best_bid', 'best_ask', 'bid_depth', 'ask_depth', 'our_bid', 'our_ask')
+    COLUMNS = ('ts',) + FLOAT_COLUMNS
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 2:
+            raise ValueError(f"capacity must be >= 2, got {capacity}")
+
+        self.capacity = int(capacity)
+        self._columns = {'ts': np.zeros(2 * self.capacity, dtype=np.int64)}
+        for name in self.FLOAT_COLUMNS:
+            self._columns[name] = np.full(2 * self.capacity, np.nan, dtype=np.float64)
+
+        self._next = 0      # 下一个写入位置（0..capacity-1）
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._columns.values())
+
+    # ========== 写入 ==========
+
+    def append(self, ts_ns: int, mid: float, best_bid: float = math.nan, best_ask: float = math.nan,
+               bid_depth: float = math.nan, ask_depth: float = math.nan,
+               our_bid: float = math.nan, our_ask: float = math.nan):
+        """追加一行（O(1)，覆盖最旧的一行）"""
+        i = self._next
+        j = i + self.capacity
+        values = (ts_ns, mid, best_bid, best_ask, bid_depth, ask_depth, our_bid, our_ask)
+        for name, value in zip(self.COLUMNS, values):
+            column = self._columns[name]
+            column[i] = value
+            column[j] = value
+
+        self._next = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def update_last(self, **values):
+        """更新最新一行的部分列（如报价计算完成后写入 our_bid / our_ask）"""
+        if self._count == 0:
+            return
+        i = (self._next - 1) % self.capacity
+        for name, value in values.items():
+            column = self._columns[name]
+            column[i] = value
+            column[i + self.capacity] = value
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+    # ========== 读取（零拷贝视图） ==========
+
+    def column(self, name: str, n: int = None) -> np.ndarray:
+        """
+        最近 n 个值（时间顺序，最旧在前），返回只读视图（不拷贝）
+        """
+        n = self._count if n is None else max(0, min(int(n), self._count))
+        end = self._next + self.capacity
+        view = self._columns[name][end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def last(self, name: str = 'mid'):
+        """最新值（无数据返回 None）"""
+        if self._count == 0:
+            return None
+        value = self._columns[name][(self._next - 1) % self.capacity]
+        return int(value) if name == 'ts' else float(value)
+
+    def since(self, ts_ns: int) -> int:
+        """时间戳 ≥ ts_ns 的样本数（用于按时间长度取窗口）"""
+        ts = self.column('ts')
+        return len(ts) - int(np.searchsorted(ts, ts_ns, side='left'))
+
+    # ========== 向量化窗口查询 ==========
+
+    def mean(self, name: str = 'mid', n: int = None) -> float:
+        values = self.column(name, n)
+        return float(np.nanmean(values)) if len(values) else math.nan
+
+    def std(self, name: str = 'mid', n: int = None) -> float:
+        """总体标准差（ddof=0）"""
+        values = self.column(name, n)
+        return float(np.nanstd(values)) if len(values) else math.nan
+
+    def returns(self, name: str = 'mid', n: int = None, log: bool = True) -> np.ndarray:
+        """最近 n 个值之间的 n-1 个收益率"""
+        values = self.column(name, n)
+        if len(values) < 2:
+            return np.empty(0, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if log:
+                return np.diff(np.log(values))
+            return values[1:] / values[:-1] - 1.0
+
+    def ewma(self, name: str = 'mid', n: int = None, half_life: float = 20.0) -> float:
+        """指数加权均值（按样本数衰减，最新样本权重最大）"""
+        values = self.column(name, n)
+        if not len(values):
+            return math.nan
+        ages = np.arange(len(values) - 1, -1, -1, dtype=np.float64)
+        weights = np.exp2(-ages / half_life)
+        mask = ~np.isnan(values)
+        return float(np.dot(values[mask], weights[mask]) / weights[mask].sum())
@@ -13,7 +13,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # 应用补丁
-import patches  # noqa: F401
+import patches
+patches.apply_patches()
 
 from eth_account import Account
 from py_clob_client.client import ClobClient
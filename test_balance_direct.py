@@ -10,7 +10,7 @@ from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
 
-import requests
+from patches import http_transport
 from datetime import datetime
 import hmac
 import hashlib
@@ -67,7 +67,7 @@ params = {
 
 url = f"{base_url}{endpoint}?{urlencode(params)}"
 try:
-    response = requests.get(url, headers=headers, timeout=10)
+    response = http_transport.get(url, headers=headers, timeout=10)
     result = response.json()
     balance = result.get('balance', 'N/A')
     print(f"  返回余额: {balance}")
@@ -84,7 +84,7 @@ params_with_address = {
 
 url2 = f"{base_url}{endpoint}?{urlencode(params_with_address)}"
 try:
-    response2 = requests.get(url2, headers=headers, timeout=10)
+    response2 = http_transport.get(url2, headers=headers, timeout=10)
     result2 = response2.json()
     balance2 = result2.get('balance', 'N/A')
     print(f"  返回余额: {balance2}")
@@ -110,7 +110,7 @@ headers3 = {
 
 url3 = f"{base_url}{endpoint}?{urlencode(params)}"
 try:
-    response3 = requests.get(url3, headers=headers3, timeout=10)
+    response3 = http_transport.get(url3, headers=headers3, timeout=10)
     print(f"  状态码: {response3.status_code}")
     if response3.status_code == 200:
         result3 = response3.json()
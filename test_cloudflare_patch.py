@@ -18,6 +18,7 @@ print("=" * 80)
 print("\n[STEP 1] 导入补丁模块...")
 try:
     import patches
+    patches.apply_patches()
     print("[OK] 补丁模块已导入")
 except Exception as e:
     print(f"[ERROR] 补丁模块导入失败: {e}")
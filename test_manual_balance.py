@@ -11,7 +11,9 @@ from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
 
-import requests
+import patches
+from patches import http_transport
+patches.apply_patches()
 from datetime import datetime
 import hmac
 import hashlib
@@ -71,7 +73,7 @@ params = {
 }
 
 url1 = f"{base_url}{endpoint}?{urlencode(params)}"
-response1 = requests.get(url1, headers=headers1)
+response1 = http_transport.get(url1, headers=headers1)
 result1 = response1.json()
 balance1 = result1.get('balance', 'N/A')
 print(f"  返回余额: {balance1}")
@@ -85,7 +87,7 @@ params_with_address = {
 }
 
 url2 = f"{base_url}{endpoint}?{urlencode(params_with_address)}"
-response2 = requests.get(url2, headers=headers1)
+response2 = http_transport.get(url2, headers=headers1)
 result2 = response2.json()
 balance2 = result2.get('balance', 'N/A')
 print(f"  返回余额: {balance2}")
@@ -108,7 +110,7 @@ headers3 = {
 }
 
 url3 = f"{base_url}{endpoint}?{urlencode(params)}"
-response3 = requests.get(url3, headers=headers3)
+response3 = http_transport.get(url3, headers=headers3)
 print(f"  状态码: {response3.status_code}")
 if response3.status_code == 200:
     result3 = response3.json()
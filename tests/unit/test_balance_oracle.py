@@ -0,0 +1,164 @@
+"""
+链上余额预言机单元测试
+
+测试范围：
+- TTL 缓存（有效期内不重复查询）
+- 成交调整与刷新后清零
+- 挂单锁定与可用余额
+- 查询失败时沿用缓存
+- balanceOf 调用数据编码
+
+运行方法：
+    pytest tests/unit/test_balance_oracle.py -v
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from patches.balance_oracle import (
+    BalanceOracle,
+    JsonRpcBalanceSource,
+    StaticBalanceSource,
+)
+
+
+FUNDER = "0x1234567890abcdef1234567890abcdef12345678"
+
+
+class FakeClock:
+    """可手动推进的单调时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakySource:
+    """第一次成功，之后失败的余额源"""
+
+    def __init__(self, balance):
+        self.balance = Decimal(balance)
+        self.calls = 0
+
+    def fetch(self, address):
+        self.calls += 1
+        if self.calls > 1:
+            raise ConnectionError("rpc down")
+        return self.balance
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def oracle(clock):
+    """余额 100 USDC.e，TTL 60 秒"""
+    oracle = BalanceOracle(StaticBalanceSource("100"), FUNDER, ttl_secs=60, clock=clock)
+    oracle.refresh()
+    return oracle
+
+
+# ========== 缓存测试 ==========
+
+def test_initial_refresh(oracle):
+    """测试首次刷新查询链上余额"""
+    assert oracle.total == Decimal("100")
+    assert oracle.fetch_count == 1
+
+
+def test_ttl_cache(oracle, clock):
+    """测试 TTL 内不重复查询，过期后重新查询"""
+    clock.now = 30
+    oracle.refresh()
+    assert oracle.fetch_count == 1
+
+    clock.now = 61
+    oracle.refresh()
+    assert oracle.fetch_count == 2
+
+
+# ========== 成交调整测试 ==========
+
+def test_buy_fill_reduces_balance(oracle):
+    """测试买入成交扣减余额（含手续费）"""
+    oracle.on_fill(is_buy=True, price=Decimal("0.40"), quantity=Decimal("10"), fee=Decimal("0.02"))
+
+    assert oracle.total == Decimal("95.98")
+
+
+def test_sell_fill_increases_balance(oracle):
+    """测试卖出成交增加余额"""
+    oracle.on_fill(is_buy=False, price=Decimal("0.60"), quantity=Decimal("10"))
+
+    assert oracle.total == Decimal("106.00")
+
+
+def test_refresh_resets_adjustment(oracle, clock):
+    """测试刷新后以链上余额为准"""
+    oracle.on_fill(is_buy=True, price=Decimal("0.50"), quantity=Decimal("10"))
+    clock.now = 61
+    oracle.refresh()
+
+    assert oracle.total == Decimal("100")
+
+
+# ========== 锁定测试 ==========
+
+def test_snapshot_with_locks(oracle):
+    """测试挂单锁定"""
+    total, locked, free = oracle.snapshot(locked=Decimal("30"))
+
+    assert (total, locked, free) == (Decimal("100"), Decimal("30"), Decimal("70"))
+
+
+def test_locked_capped_at_total(oracle):
+    """测试锁定金额不超过总余额"""
+    total, locked, free = oracle.snapshot(locked=Decimal("150"))
+
+    assert locked == total
+    assert free == 0
+
+
+# ========== 失败处理测试 ==========
+
+def test_fetch_failure_keeps_cache(clock):
+    """测试查询失败沿用上次余额"""
+    oracle = BalanceOracle(FlakySource("50"), FUNDER, ttl_secs=10, clock=clock)
+    oracle.refresh()
+
+    clock.now = 20
+    assert oracle.refresh() == Decimal("50")
+
+
+def test_first_fetch_failure_raises(clock):
+    """测试从未成功时查询失败抛出异常"""
+    source = FlakySource("50")
+    source.calls = 1
+    oracle = BalanceOracle(source, FUNDER, clock=clock)
+
+    with pytest.raises(ConnectionError):
+        oracle.refresh()
+
+
+# ========== JSON-RPC 编码测试 ==========
+
+def test_encode_balance_of():
+    """测试 balanceOf 调用数据"""
+    data = JsonRpcBalanceSource.encode_balance_of(FUNDER)
+
+    assert data.startswith("0x70a08231")
+    assert len(data) == 10 + 64
+    assert data.endswith(FUNDER[2:].lower())
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,260 @@
+"""
+批量下单补丁单元测试（执行客户端用假对象，订单为真实 NautilusTrader 订单）
+
+测试范围：
+- 批量 POST /orders：全部确认，登记 venue_order_id 并通知等待中的确认
+- 单个订单 success: false、返回列表不足时逐个拒绝
+- 没有 post_orders 时逐个提交
+- 非限价单走单笔提交
+- 签名失败的订单 OrderDenied，其余订单照常提交
+- 策略 replace_quotes：批量撤单后一次提交订单列表
+
+运行方法：
+    pytest tests/unit/test_batch_orders_patch.py -v
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from nautilus_trader.adapters.polymarket.execution import PolymarketExecutionClient
+from nautilus_trader.common.component import TestClock
+from nautilus_trader.common.factories import OrderFactory
+from nautilus_trader.model.enums import OrderSide, TimeInForce
+from nautilus_trader.model.identifiers import InstrumentId, StrategyId, TraderId, VenueOrderId
+from nautilus_trader.model.objects import Price, Quantity
+
+from patches.batch_orders_patch import BATCH_LIMIT, patch_nautilus_batch_orders
+from strategies.base_strategy import BaseStrategy
+
+
+patch_nautilus_batch_orders()
+
+INSTRUMENT_ID = InstrumentId.from_str("0xaaa-111.POLYMARKET")
+TRADER_ID = TraderId("TRADER-001")
+STRATEGY_ID = StrategyId("PredictionMarketMMStrategy-001")
+
+
+class FakeHttpClient:
+    """签名返回 (side, price)；post_orders 返回预设结果（默认全部成功）"""
+
+    def __init__(self, batch=True, fail_prices=(), results=None):
+        self.fail_prices = set(fail_prices)
+        self.results = results
+        self.batches = []
+        if batch:
+            self.post_orders = self._post_orders
+
+    def create_order(self, order_args, options=None):
+        if order_args.price in self.fail_prices:
+            raise ValueError("bad signature")
+        return (order_args.side, order_args.price)
+
+    def _post_orders(self, args):
+        self.batches.append([a.order for a in args])
+        if self.results is not None:
+            return self.results
+        return [{'success': True, 'orderID': f"0xv{len(self.batches)}-{i}"} for i in range(len(args))]
+
+
+class FakeRetryManager:
+    message = "retry exhausted"
+
+    async def run(self, name, client_order_ids, func, *args):
+        return await func(*args)
+
+
+class FakeRetryPool:
+    async def acquire(self):
+        return FakeRetryManager()
+
+    async def release(self, manager):
+        pass
+
+
+class FakeExecClient:
+    """只带 _submit_order_list 用到的属性，记录生成的订单事件"""
+
+    def __init__(self, http_client):
+        self._http_client = http_client
+        self._clock = TestClock()
+        self._log = Mock()
+        self._cache = Mock()
+        self._retry_manager_pool = FakeRetryPool()
+        self._ack_events_order = {}
+        self._ack_events_trade = {}
+        self.events = []
+        self.single_submits = []
+        self.single_posts = []
+
+    def _get_neg_risk_for_instrument(self, instrument):
+        return False
+
+    async def _maintain_active_market(self, instrument_id):
+        pass
+
+    async def _submit_order(self, command):
+        self.single_submits.append(command.order)
+
+    async def _post_signed_order(self, order, signed_order):
+        self.single_posts.append((order, signed_order))
+
+    def _record(kind):
+        def generate(self, strategy_id, instrument_id, client_order_id, ts_event, reason=None):
+            self.events.append((kind, client_order_id, reason))
+        return generate
+
+    generate_order_submitted = _record('submitted')
+    generate_order_denied = _record('denied')
+    generate_order_rejected = _record('rejected')
+
+    def kinds(self, kind):
+        return [client_order_id for k, client_order_id, _ in self.events if k == kind]
+
+
+@pytest.fixture
+def factory():
+    return OrderFactory(TRADER_ID, STRATEGY_ID, TestClock())
+
+
+def limit(factory, price, side=OrderSide.BUY):
+    return factory.limit(INSTRUMENT_ID, side, Quantity.from_int(5), Price.from_str(price), time_in_force=TimeInForce.GTC)
+
+
+def submit(client, orders):
+    command = SimpleNamespace(
+        order_list=SimpleNamespace(orders=orders),
+        instrument_id=INSTRUMENT_ID,
+        trader_id=TRADER_ID,
+        strategy_id=STRATEGY_ID,
+        position_id=None,
+    )
+    asyncio.run(PolymarketExecutionClient._submit_order_list(client, command))
+
+
+# ========== 批量提交测试 ==========
+
+def test_batch_acked(factory):
+    """测试一次 POST 提交全部订单，确认后登记 venue_order_id 并通知等待中的确认"""
+    client = FakeExecClient(FakeHttpClient())
+    waiter = asyncio.Event()
+    client._ack_events_order[VenueOrderId("0xv1-1")] = waiter
+    orders = [limit(factory, "0.48"), limit(factory, "0.52", OrderSide.SELL)]
+
+    submit(client, orders)
+
+    assert client._http_client.batches == [[("BUY", 0.48), ("SELL", 0.52)]]
+    assert client.kinds('submitted') == [o.client_order_id for o in orders]
+    assert client.kinds('rejected') == client.kinds('denied') == []
+    client._cache.add_venue_order_id.assert_any_call(orders[0].client_order_id, VenueOrderId("0xv1-0"))
+    assert waiter.is_set()
+
+
+def test_batch_split_by_limit(factory):
+    """测试超过单批上限时分批提交"""
+    client = FakeExecClient(FakeHttpClient())
+    submit(client, [limit(factory, f"0.{10 + i}") for i in range(BATCH_LIMIT + 2)])
+
+    assert [len(batch) for batch in client._http_client.batches] == [BATCH_LIMIT, 2]
+
+
+def test_per_order_reject(factory):
+    """测试 success: false 的订单以返回的 errorMsg 拒绝，其余订单确认"""
+    results = [{'success': True, 'orderID': "0xv-0"}, {'success': False, 'errorMsg': "not enough balance"}]
+    client = FakeExecClient(FakeHttpClient(results=results))
+    orders = [limit(factory, "0.48"), limit(factory, "0.52", OrderSide.SELL)]
+
+    submit(client, orders)
+
+    assert client.events[-1] == ('rejected', orders[1].client_order_id, "not enough balance")
+    client._cache.add_venue_order_id.assert_called_once_with(orders[0].client_order_id, VenueOrderId("0xv-0"))
+
+
+def test_short_response_rejects_missing(factory):
+    """测试返回列表比请求短时，缺少结果的订单以重试信息拒绝"""
+    client = FakeExecClient(FakeHttpClient(results=[{'success': True, 'orderID': "0xv-0"}]))
+    orders = [limit(factory, "0.48"), limit(factory, "0.52", OrderSide.SELL)]
+
+    submit(client, orders)
+
+    assert client.kinds('rejected') == [orders[1].client_order_id]
+    assert client.events[-1][2] == FakeRetryManager.message
+
+
+def test_fallback_without_post_orders(factory):
+    """测试 py_clob_client 没有批量端点时逐个提交已签名订单"""
+    client = FakeExecClient(FakeHttpClient(batch=False))
+    orders = [limit(factory, "0.48"), limit(factory, "0.52", OrderSide.SELL)]
+
+    submit(client, orders)
+
+    assert client.single_posts == [(orders[0], ("BUY", 0.48)), (orders[1], ("SELL", 0.52))]
+    assert client.kinds('submitted') == [o.client_order_id for o in orders]
+
+
+def test_non_limit_routed_to_single_submit(factory):
+    """测试市价单走单笔提交逻辑，限价单仍批量提交"""
+    client = FakeExecClient(FakeHttpClient())
+    market = factory.market(INSTRUMENT_ID, OrderSide.SELL, Quantity.from_int(5))
+    order = limit(factory, "0.48")
+
+    submit(client, [market, order])
+
+    assert client.single_submits == [market]
+    assert client._http_client.batches == [[("BUY", 0.48)]]
+
+
+def test_signing_failure_denied(factory):
+    """测试签名失败的订单 OrderDenied，不提交；其余订单照常提交并确认"""
+    client = FakeExecClient(FakeHttpClient(fail_prices={0.52}))
+    orders = [limit(factory, "0.48"), limit(factory, "0.52", OrderSide.SELL)]
+
+    submit(client, orders)
+
+    assert client.kinds('denied') == [orders[1].client_order_id]
+    assert "SIGNING_FAILED" in client.events[0][2]
+    assert client.kinds('submitted') == [orders[0].client_order_id]
+    assert client._http_client.batches == [[("BUY", 0.48)]]
+
+
+def test_all_signing_failed(factory):
+    """测试全部签名失败时每个订单都有 OrderDenied，不发送请求"""
+    client = FakeExecClient(FakeHttpClient(fail_prices={0.48, 0.52}))
+    orders = [limit(factory, "0.48"), limit(factory, "0.52", OrderSide.SELL)]
+
+    submit(client, orders)
+
+    assert client.kinds('denied') == [o.client_order_id for o in orders]
+    assert client._http_client.batches == []
+
+
+# ========== 策略测试 ==========
+
+def test_replace_quotes(factory):
+    """测试撤销本策略挂单后，新报价作为一个订单列表提交"""
+    open_orders = [limit(factory, "0.40")]
+    strategy = SimpleNamespace(
+        instrument_id=INSTRUMENT_ID,
+        id=STRATEGY_ID,
+        cache=SimpleNamespace(orders_open=Mock(return_value=open_orders)),
+        clock=TestClock(),
+        cancel_orders=Mock(),
+        submit_order_list=Mock(),
+        log=Mock(),
+    )
+    quotes = [limit(factory, "0.48"), limit(factory, "0.52", OrderSide.SELL)]
+
+    BaseStrategy.replace_quotes(strategy, quotes)
+
+    strategy.cache.orders_open.assert_called_once_with(instrument_id=INSTRUMENT_ID, strategy_id=STRATEGY_ID)
+    strategy.cancel_orders.assert_called_once_with(open_orders)
+    [order_list] = strategy.submit_order_list.call_args.args
+    assert order_list.orders == quotes
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,213 @@
+"""
+订单簿快照总线单元测试
+
+测试范围：
+- 品种登记与查找
+- 发布 / 读取最新快照（缺失档位填充）
+- seqlock：写入中、已覆盖的快照不会被读出
+- 按序号批量读取、落后一圈时的丢失计数
+- 另一个进程附加读取、发布方关闭标记
+- 同名总线：残留的重建，仍在发布的不接管
+
+运行方法：
+    pytest tests/unit/test_book_bus.py -v
+"""
+
+import math
+import multiprocessing
+import uuid
+
+import numpy as np
+import pytest
+
+from strategies.book_bus import _CLOSED, _PID, BookSnapshotBus
+
+
+INSTRUMENT = "0xabc-123.POLYMARKET"
+
+
+def bus_name():
+    return f"test_book_{uuid.uuid4().hex[:12]}"
+
+
+def levels(bid=0.48, ask=0.52):
+    """两档买盘 + 一档卖盘"""
+    return [bid, bid - 0.01], [100.0, 50.0], [ask], [30.0]
+
+
+def read_latest_in_child(name, instrument_id, queue):
+    """子进程：附加总线并读出最新快照的买一价"""
+    bus = BookSnapshotBus.attach(name, untrack=False)
+    snapshot = bus.latest(bus.index_of(instrument_id))
+    queue.put(float(snapshot['bid_px'][0]))
+    bus.close()
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def bus():
+    bus = BookSnapshotBus.create(bus_name(), depth=3, ring_len=4, max_instruments=2)
+    yield bus
+    bus.close()
+
+
+# ========== 登记测试 ==========
+
+def test_register(bus):
+    """测试登记返回编号，重复登记返回原编号，超过上限报错"""
+    assert bus.register(INSTRUMENT) == 0
+    assert bus.register("0xdef-456.POLYMARKET") == 1
+    assert bus.register(INSTRUMENT) == 0
+    assert bus.instruments() == [INSTRUMENT, "0xdef-456.POLYMARKET"]
+    assert bus.index_of("missing") is None
+
+    with pytest.raises(ValueError):
+        bus.register("0x999-789.POLYMARKET")
+
+
+# ========== 读写测试 ==========
+
+def test_publish_latest(bus):
+    """测试最新快照与缺失档位填充（价格 NaN、数量 0）"""
+    slot = bus.register(INSTRUMENT)
+    assert bus.latest(slot) is None
+
+    bus.publish(slot, 1, *levels(0.48))
+    bus.publish(slot, 2, *levels(0.49))
+    snapshot = bus.latest(slot)
+
+    assert snapshot['ts_ns'] == 2
+    assert snapshot['bid_px'][:2] == pytest.approx([0.49, 0.48])
+    assert math.isnan(snapshot['bid_px'][2])
+    assert list(snapshot['ask_sz']) == [30.0, 0.0, 0.0]
+    assert bus.published(slot) == 2
+
+
+def test_in_progress_write_not_read(bus):
+    """测试 seq 为奇数（写入中）时读不到该快照"""
+    slot = bus.register(INSTRUMENT)
+    bus.publish(slot, 1, *levels())
+    bus.view(slot)['seq'][0] = 1  # 模拟发布方写到一半
+
+    assert bus.read(slot, 0, max_retries=3) is None
+
+    bus.view(slot)['seq'][0] = 2
+    assert bus.read(slot, 0)['ts_ns'] == 1
+
+
+def test_overwritten_snapshot_not_read(bus):
+    """测试被覆盖的旧序号读不到（环长度 4）"""
+    slot = bus.register(INSTRUMENT)
+    for ts in range(5):
+        bus.publish(slot, ts, *levels())
+
+    assert bus.read(slot, 0) is None
+    assert bus.read(slot, 4)['ts_ns'] == 4
+    assert bus.read(slot, 5) is None
+
+
+def test_read_since(bus):
+    """测试按序号增量读取"""
+    slot = bus.register(INSTRUMENT)
+    for ts in range(3):
+        bus.publish(slot, ts, *levels())
+
+    records, cursor, lost = bus.read_since(slot, 0)
+    assert list(records['ts_ns']) == [0, 1, 2]
+    assert (cursor, lost) == (3, 0)
+
+    records, cursor, lost = bus.read_since(slot, cursor)
+    assert len(records) == 0
+    assert (cursor, lost) == (3, 0)
+
+
+def test_read_since_lapped(bus):
+    """测试读取方落后超过一圈：只返回环内快照并计入丢失"""
+    slot = bus.register(INSTRUMENT)
+    for ts in range(10):
+        bus.publish(slot, ts, *levels())
+
+    records, cursor, lost = bus.read_since(slot, 0)
+    assert list(records['ts_ns']) == [6, 7, 8, 9]
+    assert (cursor, lost) == (10, 6)
+
+
+# ========== 共享测试 ==========
+
+def test_attach_from_other_process(bus):
+    """测试另一个进程附加后读到最新快照"""
+    slot = bus.register(INSTRUMENT)
+    bus.publish(slot, 1, *levels(0.48))
+    bus.publish(slot, 2, *levels(0.51))
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=read_latest_in_child, args=(bus.name, INSTRUMENT, queue))
+    process.start()
+    try:
+        assert queue.get(timeout=30) == pytest.approx(0.51)
+    finally:
+        process.join(timeout=10)
+
+
+def test_publisher_closed_flag():
+    """测试发布方关闭后，读取方已有的映射看到关闭标记"""
+    publisher = BookSnapshotBus.create(bus_name(), depth=3, ring_len=4)
+    reader = BookSnapshotBus.attach(publisher.name, untrack=False)
+    assert not reader.publisher_closed
+
+    publisher.close()
+    assert reader.publisher_closed
+    reader.close()
+
+
+def dead_pid() -> int:
+    """一个已退出进程的 pid"""
+    process = multiprocessing.get_context('spawn').Process(target=math.sqrt, args=(1.0,))
+    process.start()
+    process.join(timeout=10)
+    return process.pid
+
+
+@pytest.mark.parametrize("leftover", ["crashed", "closed"])
+def test_create_replaces_stale_segment(leftover):
+    """测试同名残留共享内存（发布进程已退出 / 已标记关闭）被重建（序号从 0 开始）"""
+    name = bus_name()
+    stale = BookSnapshotBus.create(name, depth=3, ring_len=4)
+    stale.publish(stale.register(INSTRUMENT), 1, *levels())
+    if leftover == "crashed":
+        stale._header[_PID] = dead_pid()
+    else:
+        stale._header[_CLOSED] = 1
+
+    bus = BookSnapshotBus.create(name, depth=3, ring_len=4)
+    try:
+        assert bus.instruments() == []
+        assert np.all(bus.view(0)['seq'] == 0)
+    finally:
+        bus.close()
+        stale._owner = False  # 已被新总线删除，只解除映射
+        stale.close()
+
+
+def test_create_does_not_take_over_live_bus():
+    """测试同名总线仍有发布方在用时不删除、不接管"""
+    live = BookSnapshotBus.create(bus_name(), depth=3, ring_len=4)
+    slot = live.register(INSTRUMENT)
+    live.publish(slot, 1, *levels())
+    try:
+        with pytest.raises(FileExistsError):
+            BookSnapshotBus.create(live.name, depth=3, ring_len=4)
+
+        reader = BookSnapshotBus.attach(live.name, untrack=False)
+        assert reader.published(reader.index_of(INSTRUMENT)) == 1
+        reader.close()
+    finally:
+        live.close()
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
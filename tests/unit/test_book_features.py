@@ -0,0 +1,177 @@
+"""
+订单簿特征流水线单元测试
+
+测试范围：
+- 增量应用（ADD/UPDATE/DELETE/CLEAR）
+- 最优价跟踪
+- 前 N 档深度、不平衡、微观价格、深度加权中间价
+- 前 N 档价格 / 数量
+
+运行方法：
+    pytest tests/unit/test_book_features.py -v
+"""
+
+import pytest
+
+from nautilus_trader.model.data import BookOrder, OrderBookDelta, OrderBookDeltas
+from nautilus_trader.model.enums import BookAction, OrderSide
+from nautilus_trader.model.identifiers import InstrumentId
+from nautilus_trader.model.objects import Price, Quantity
+
+from strategies.book_features import OrderBookFeatures
+
+
+INSTRUMENT_ID = InstrumentId.from_str("0xabc-123.POLYMARKET")
+
+
+def make_delta(side, price, size, action=BookAction.UPDATE):
+    """构造单条增量"""
+    return OrderBookDelta(
+        INSTRUMENT_ID,
+        action,
+        BookOrder(side, Price.from_str(price), Quantity.from_str(size), 0),
+        0,
+        0,
+        0,
+        0,
+    )
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def features():
+    """创建带初始盘口的特征对象"""
+    feats = OrderBookFeatures(tick_size=0.01, depth=3)
+    feats.apply_deltas([
+        make_delta(OrderSide.BUY, "0.48", "100", BookAction.ADD),
+        make_delta(OrderSide.BUY, "0.47", "50", BookAction.ADD),
+        make_delta(OrderSide.BUY, "0.45", "30", BookAction.ADD),
+        make_delta(OrderSide.BUY, "0.40", "999", BookAction.ADD),
+        make_delta(OrderSide.SELL, "0.52", "300", BookAction.ADD),
+        make_delta(OrderSide.SELL, "0.55", "20", BookAction.ADD),
+    ])
+    return feats
+
+
+# ========== 基础特征测试 ==========
+
+def test_empty_book_not_valid():
+    """测试空盘口无效"""
+    feats = OrderBookFeatures()
+    feats.refresh()
+
+    assert not feats.is_valid
+    assert feats.mid is None
+
+
+def test_best_prices(features):
+    """测试最优价与顶档数量"""
+    assert features.best_bid == pytest.approx(0.48)
+    assert features.best_ask == pytest.approx(0.52)
+    assert features.best_bid_size == 100
+    assert features.best_ask_size == 300
+    assert features.mid == pytest.approx(0.50)
+    assert features.spread == pytest.approx(0.04)
+
+
+def test_top_n_depth(features):
+    """测试只统计前 N 个非空档位"""
+    assert features.bid_depth == 180   # 100 + 50 + 30（不含 0.40）
+    assert features.ask_depth == 320
+
+
+def test_imbalance(features):
+    """测试盘口不平衡"""
+    assert features.imbalance == pytest.approx((180 - 320) / 500)
+
+
+def test_microprice_leans_to_thin_side(features):
+    """测试微观价格偏向薄的一侧（卖盘厚 → 偏向买价）"""
+    expected = (0.48 * 300 + 0.52 * 100) / 400
+
+    assert features.microprice == pytest.approx(expected)
+    assert features.microprice < features.mid
+
+
+def test_depth_weighted_mid(features):
+    """测试深度加权中间价"""
+    expected = (0.48 * 320 + 0.52 * 180) / 500
+
+    assert features.depth_weighted_mid == pytest.approx(expected)
+
+
+# ========== 增量更新测试 ==========
+
+def test_delete_best_bid_moves_to_next_level(features):
+    """测试删除最优买价后回退到下一档"""
+    features.apply_deltas([make_delta(OrderSide.BUY, "0.48", "0", BookAction.DELETE)])
+
+    assert features.best_bid == pytest.approx(0.47)
+    assert features.bid_depth == 50 + 30 + 999
+
+
+def test_zero_size_level_removes_level(features):
+    """测试 size=0 的价位等同删除"""
+    features.set_level(is_bid=False, price=0.52, size=0.0)
+    features.refresh()
+
+    assert features.best_ask == pytest.approx(0.55)
+
+
+def test_improving_price(features):
+    """测试更优报价成为新的最优价"""
+    features.apply_deltas([make_delta(OrderSide.SELL, "0.50", "10", BookAction.ADD)])
+
+    assert features.best_ask == pytest.approx(0.50)
+    assert features.ask_depth == 10 + 300 + 20
+
+
+def test_clear(features):
+    """测试 CLEAR 清空盘口"""
+    features.apply_deltas(OrderBookDeltas(INSTRUMENT_ID, [
+        OrderBookDelta.clear(INSTRUMENT_ID, 0, 0, 0),
+    ]))
+
+    assert not features.is_valid
+    assert features.bid_depth == 0
+
+
+def test_one_sided_book(features):
+    """测试单边盘口：有深度但无中间价"""
+    features.apply_deltas([
+        make_delta(OrderSide.SELL, "0.52", "0", BookAction.DELETE),
+        make_delta(OrderSide.SELL, "0.55", "0", BookAction.DELETE),
+    ])
+
+    assert not features.is_valid
+    assert features.best_bid == pytest.approx(0.48)
+    assert features.best_ask is None
+
+
+def test_reset_tick_size():
+    """测试切换 tick 大小"""
+    feats = OrderBookFeatures(tick_size=0.01)
+    feats.reset(tick_size=0.001)
+    feats.apply_deltas([
+        make_delta(OrderSide.BUY, "0.495", "10", BookAction.ADD),
+        make_delta(OrderSide.SELL, "0.505", "10", BookAction.ADD),
+    ])
+
+    assert feats.mid == pytest.approx(0.50)
+
+
+def test_top_levels(features):
+    """测试前 N 档：买盘价格降序、卖盘价格升序，不足 N 档时返回实际档数"""
+    bid_px, bid_sz, ask_px, ask_sz = features.top_levels(3)
+
+    assert bid_px == pytest.approx([0.48, 0.47, 0.45])
+    assert list(bid_sz) == [100, 50, 30]
+    assert ask_px == pytest.approx([0.52, 0.55])
+    assert list(ask_sz) == [300, 20]
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,272 @@
+"""
+单写者事件派发单元测试
+
+测试范围：
+- 按投递顺序处理
+- 积压时合并订单簿 / 定时器事件
+- 多线程投递时串行执行
+- 嵌套调用内联执行
+- 异常隔离与关闭
+- 方法路由（含子类 super() 链）
+
+运行方法：
+    pytest tests/unit/test_event_actor.py -v
+"""
+
+import threading
+
+import pytest
+
+from strategies.event_actor import EventActor, route_handlers
+
+
+class BlockingHandler:
+    """第一次调用时阻塞，模拟一次耗时的报价计算"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, value):
+        self.calls.append(value)
+        if len(self.calls) == 1:
+            self.started.set()
+            self.release.wait(timeout=5)
+
+
+def submit_while_busy(actor, handler):
+    """在后台线程中占住处理权，返回该线程"""
+    worker = threading.Thread(target=actor.submit, args=(handler, "first"))
+    worker.start()
+    assert handler.started.wait(timeout=5)
+    return worker
+
+
+# ========== 顺序与合并测试 ==========
+
+def test_processes_in_order():
+    """测试按投递顺序处理"""
+    actor = EventActor()
+    seen = []
+
+    for i in range(5):
+        actor.submit(seen.append, i)
+
+    assert seen == [0, 1, 2, 3, 4]
+    assert actor.depth == 0
+
+
+def test_coalesces_while_busy():
+    """测试处理期间积压的订单簿事件只处理最新的一次，成交逐个处理"""
+    actor = EventActor()
+    handler = BlockingHandler()
+    worker = submit_while_busy(actor, handler)
+
+    actor.submit(handler, "book-1", key="order_book")
+    actor.submit(handler, "fill-1")
+    actor.submit(handler, "book-2", key="order_book")
+    actor.submit(handler, "book-3", key="order_book")
+    actor.submit(handler, "fill-2")
+
+    handler.release.set()
+    worker.join(timeout=5)
+
+    assert handler.calls == ["first", "fill-1", "book-3", "fill-2"]
+    assert actor.coalesced == 2
+
+
+def test_submit_returns_while_busy():
+    """测试其他线程正在处理时，投递立即返回（由处理线程执行）"""
+    actor = EventActor()
+    handler = BlockingHandler()
+    worker = submit_while_busy(actor, handler)
+
+    actor.submit(handler, "queued")
+    assert handler.calls == ["first"]
+    assert actor.depth == 1
+
+    handler.release.set()
+    worker.join(timeout=5)
+    assert handler.calls == ["first", "queued"]
+
+
+# ========== 串行测试 ==========
+
+def test_single_writer_across_threads():
+    """测试多线程投递时处理函数从不并发执行"""
+    actor = EventActor()
+    state = {'active': 0, 'overlaps': 0, 'count': 0}
+
+    def handler(_):
+        state['active'] += 1
+        if state['active'] > 1:
+            state['overlaps'] += 1
+        state['count'] += 1
+        state['active'] -= 1
+
+    def producer():
+        for i in range(2000):
+            actor.submit(handler, i)
+
+    threads = [threading.Thread(target=producer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert state['overlaps'] == 0
+    assert state['count'] == 8000
+    assert actor.depth == 0
+
+
+def test_nested_submit_runs_inline():
+    """测试处理函数内部的嵌套调用直接执行"""
+    actor = EventActor()
+    seen = []
+
+    def outer(value):
+        seen.append(("outer", value))
+        actor.submit(seen.append, ("inner", value))
+        seen.append(("after", value))
+
+    actor.submit(outer, 1)
+
+    assert seen == [("outer", 1), ("inner", 1), ("after", 1)]
+
+
+def test_defer_runs_after_current():
+    """测试处理函数内部请求的评估排在当前事件之后，多次请求合并为一次"""
+    actor = EventActor()
+    seen = []
+
+    def on_delta(value):
+        seen.append(("delta", value))
+        actor.defer(seen.append, ("evaluate", value), key="order_book")
+        actor.defer(seen.append, ("evaluate", value + 1), key="order_book")
+        seen.append(("after", value))
+
+    actor.submit(on_delta, 1)
+
+    assert seen == [("delta", 1), ("after", 1), ("evaluate", 2)]
+
+
+# ========== 异常与关闭测试 ==========
+
+def test_error_isolated():
+    """测试处理失败不影响后续事件"""
+    errors = []
+    actor = EventActor(on_error=errors.append)
+    seen = []
+
+    def boom(_):
+        raise ValueError("bad book")
+
+    actor.submit(boom, 1)
+    actor.submit(seen.append, 2)
+
+    assert seen == [2]
+    assert actor.errors == 1
+    assert "bad book" in errors[0]
+    assert "Traceback" in errors[0]
+
+
+def test_errors_rate_limited_by_time():
+    """测试持续失败时不会永久静默：按时间限频上报，并汇总期间次数"""
+    errors = []
+    now = [0.0]
+    actor = EventActor(on_error=errors.append, error_log_interval_secs=10, clock=lambda: now[0])
+
+    def on_order_filled(_):
+        raise KeyError("commission")
+
+    def on_order_book(_):
+        raise ValueError("bad book")
+
+    for _ in range(50):
+        actor.submit(on_order_filled, 1)
+    actor.submit(on_order_book, 1)
+    assert len(errors) == 2                  # 每个处理函数第一次都上报
+    assert "on_order_book" in errors[1]
+
+    now[0] = 11.0
+    actor.submit(on_order_filled, 1)
+    assert len(errors) == 3
+    assert "49 次未上报" in errors[2]
+    assert actor.errors == 52
+
+
+def test_close_drops_pending():
+    """测试关闭后丢弃积压事件并拒绝新事件"""
+    actor = EventActor()
+    handler = BlockingHandler()
+    worker = submit_while_busy(actor, handler)
+    actor.submit(handler, "book", key="order_book")
+
+    results = []
+    closer = threading.Thread(target=lambda: results.append(actor.close(timeout=5)))
+    closer.start()
+    handler.release.set()
+    closer.join(timeout=5)
+    worker.join(timeout=5)
+
+    assert results == [1]
+    assert handler.calls == ["first"]
+    assert actor.submit(handler, "late") is False
+
+
+# ========== 方法路由测试 ==========
+
+HANDLERS = {'on_book': 'book', 'on_fill': None}
+
+
+class Base:
+    def __init__(self):
+        self.actor = EventActor()
+        self.seen = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        route_handlers(cls, HANDLERS)
+
+    def on_fill(self, fill):
+        self.seen.append(("base", fill))
+
+
+route_handlers(Base, HANDLERS)
+
+
+class Child(Base):
+    def on_fill(self, fill):
+        super().on_fill(fill)
+        self.seen.append(("child", fill))
+
+    def on_book(self, book):
+        self.seen.append(("book", book))
+
+
+def test_routed_super_chain():
+    """测试子类覆盖 + super() 调用只经过一次派发"""
+    child = Child()
+
+    child.on_fill("f1")
+    child.on_book("b1")
+
+    assert child.seen == [("base", "f1"), ("child", "f1"), ("book", "b1")]
+    assert child.actor.processed == 2
+
+
+def test_routed_without_actor():
+    """测试没有 actor 时直接调用"""
+    child = Child()
+    child.actor = None
+
+    child.on_fill("f1")
+
+    assert child.seen == [("base", "f1"), ("child", "f1")]
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
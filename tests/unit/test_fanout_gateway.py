@@ -0,0 +1,149 @@
+"""
+行情分发 / 执行网关单元测试（不依赖 TradingNode 的方法）
+
+测试范围：
+- 成交计入当日盈亏账本，顶档中间价更新标记价格
+- 当日亏损低于上限时撤销全部挂单并停止执行报价请求
+- 未设置上限时不检查
+- 报价请求中为 NaN 的一侧（库存达到上限）不挂单
+
+运行方法：
+    pytest tests/unit/test_fanout_gateway.py -v
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import math
+
+import pytest
+
+from nautilus_trader.model.enums import LiquiditySide, OrderSide, OrderType
+from nautilus_trader.model.events import OrderFilled
+from nautilus_trader.model.identifiers import (
+    AccountId,
+    ClientOrderId,
+    InstrumentId,
+    StrategyId,
+    TradeId,
+    TraderId,
+    VenueOrderId,
+)
+from nautilus_trader.model.objects import Currency, Money, Price, Quantity
+from nautilus_trader.core.uuid import UUID4
+
+from strategies import fanout_gateway
+from strategies.fanout_gateway import FanoutGatewayStrategy
+from strategies.shm_ring import ACTION_QUOTE
+from strategies.settlement_ledger import SettlementLedger
+
+
+INSTRUMENT_ID = InstrumentId.from_str("0xaaa-1.POLYMARKET")
+USDC = Currency.from_str("USDC")
+
+
+def make_fill(side=OrderSide.BUY, price="0.60", qty="10"):
+    return OrderFilled(
+        TraderId("TRADER-001"), StrategyId("FanoutGatewayStrategy-001"),
+        INSTRUMENT_ID, ClientOrderId("O-1"), VenueOrderId("0xvenue"), AccountId("POLYMARKET-001"),
+        TradeId("T-1"), None, side, OrderType.LIMIT, Quantity.from_str(qty), Price.from_str(price), USDC,
+        Money.from_str("0.01 USDC"), LiquiditySide.MAKER, UUID4(), 0, 0,
+    )
+
+
+def make_gateway(max_daily_loss=Decimal("-3.00")):
+    """只带成交 / 亏损检查 / 请求读取用到的属性"""
+    ledger = SettlementLedger()
+    ledger.open(str(INSTRUMENT_ID))
+    gateway = SimpleNamespace(
+        instrument_ids=[INSTRUMENT_ID],
+        _slots={INSTRUMENT_ID: 0},
+        ledger=ledger,
+        max_daily_loss=max_daily_loss,
+        halted=False,
+        pool=Mock(),
+        clock=SimpleNamespace(timestamp_ns=lambda: 0),
+        cancel_all_orders=Mock(),
+        execute_request=Mock(),
+        log=Mock(),
+        requests_coalesced=0,
+    )
+    gateway.pool.drain_orders.return_value = [{'slot': 0, 'action': 1}]
+    gateway._check_daily_loss = lambda: FanoutGatewayStrategy._check_daily_loss(gateway)
+    return gateway
+
+
+def fill(gateway, **kwargs):
+    FanoutGatewayStrategy.on_order_filled(gateway, make_fill(**kwargs))
+
+
+def drain(gateway):
+    FanoutGatewayStrategy._on_drain_timer(gateway, None)
+
+
+# ========== 测试 ==========
+
+def test_fill_booked_in_ledger():
+    """测试成交计入账本并转发给工作进程（卖出为负）"""
+    gateway = make_gateway()
+    fill(gateway, side=OrderSide.SELL, qty="5")
+
+    assert gateway.ledger.position(str(INSTRUMENT_ID)) == -5
+    assert gateway.ledger.daily_pnl == pytest.approx(-0.01)
+    assert gateway.pool.publish_fill.call_args.args[-1] == -5
+
+
+def test_daily_loss_halts_quoting():
+    """测试当日亏损低于上限时撤单、停止执行报价请求，之后保持停止"""
+    gateway = make_gateway()
+    fill(gateway, price="0.60", qty="10")
+    drain(gateway)
+    assert gateway.execute_request.call_count == 1
+
+    gateway.ledger.mark(str(INSTRUMENT_ID), 0.25)  # 10 × (0.25 − 0.60) − 0.01 = −3.51
+    drain(gateway)
+    gateway.ledger.mark(str(INSTRUMENT_ID), 0.60)
+    drain(gateway)
+
+    assert gateway.halted
+    assert gateway.execute_request.call_count == 1
+    gateway.cancel_all_orders.assert_called_once_with(INSTRUMENT_ID)
+    gateway.log.error.assert_called_once()
+
+
+def test_no_limit_no_halt():
+    """测试未设置日亏损上限时不停止"""
+    gateway = make_gateway(max_daily_loss=None)
+    fill(gateway, price="0.60", qty="10")
+    gateway.ledger.mark(str(INSTRUMENT_ID), 0.01)
+    drain(gateway)
+
+    assert not gateway.halted
+    assert gateway.execute_request.call_count == 1
+
+
+def test_nan_side_not_submitted(monkeypatch):
+    """测试库存达到上限的一侧（NaN）不挂单，另一侧照常提交"""
+    monkeypatch.setattr(fanout_gateway, "OrderList", lambda order_list_id, orders: orders)
+    instrument = SimpleNamespace(make_qty=lambda q: q, make_price=lambda p: p)
+    gateway = SimpleNamespace(
+        id="FanoutGatewayStrategy-001",
+        _slots={INSTRUMENT_ID: 0},
+        cache=SimpleNamespace(orders_open=lambda **kwargs: [], instrument=lambda i: instrument),
+        clock=SimpleNamespace(timestamp_ns=lambda: 0),
+        order_factory=SimpleNamespace(limit=lambda **kwargs: (kwargs['order_side'], kwargs['price'])),
+        submit_order_list=Mock(),
+        requests_executed=0,
+    )
+    request = {'action': ACTION_QUOTE, 'bid': math.nan, 'ask': 0.55, 'quantity': 5.0}
+
+    FanoutGatewayStrategy.execute_request(gateway, INSTRUMENT_ID, request)
+
+    gateway.submit_order_list.assert_called_once_with([(OrderSide.SELL, 0.55)])
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,166 @@
+"""
+共享 HTTP 传输层单元测试
+
+测试范围：
+- 每个主机复用同一个客户端
+- 代理 / 连接数配置从环境变量读取
+- 压缩响应解码（只声明能解码的 Accept-Encoding）
+- py_clob_client 接入（替换模块级客户端、叠加伪装头）
+- 导入传输层（及其使用的限流器）不安装补丁、不输出补丁信息
+
+运行方法：
+    pytest tests/unit/test_http_transport.py -v
+"""
+
+import gzip
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+from patches import http_transport
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+PAYLOAD = {'slug': "btc-updown-15m-1767225600", 'active': True}
+
+
+def cloudflare_handler(force_br: bool = False):
+    """模拟 Cloudflare：客户端声明 br 时优先返回 br，否则 gzip"""
+    def handler(request):
+        body = json.dumps(PAYLOAD).encode()
+        if force_br or 'br' in request.headers.get('Accept-Encoding', ''):
+            import brotli
+            return httpx.Response(200, headers={'Content-Encoding': 'br'}, content=brotli.compress(body))
+        return httpx.Response(200, headers={'Content-Encoding': 'gzip'}, content=gzip.compress(body))
+    return handler
+
+
+def mock_client(handler) -> httpx.Client:
+    return httpx.Client(**dict(http_transport.client_kwargs(), transport=httpx.MockTransport(handler)))
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    """清除代理环境变量，测试结束后关闭共享客户端"""
+    for name in ('HTTP_PROXY', 'http_proxy', 'HTTPS_PROXY', 'https_proxy'):
+        monkeypatch.delenv(name, raising=False)
+    yield
+    http_transport.close_all()
+
+
+# ========== 共享客户端测试 ==========
+
+def test_client_reused_per_host():
+    """测试同一主机复用客户端"""
+    a = http_transport.get_client("https://gamma-api.polymarket.com/markets/slug/x")
+    b = http_transport.get_client("https://gamma-api.polymarket.com/events")
+
+    assert a is b
+
+
+def test_separate_client_per_host():
+    """测试不同主机使用独立连接池"""
+    gamma = http_transport.get_client("https://gamma-api.polymarket.com/")
+    clob = http_transport.get_client("https://clob.polymarket.com/")
+
+    assert gamma is not clob
+
+
+def test_browser_headers():
+    """测试共享客户端带浏览器伪装头"""
+    client = http_transport.get_client("https://gamma-api.polymarket.com/")
+
+    assert client.headers["User-Agent"].startswith("Mozilla/5.0")
+
+
+# ========== 配置测试 ==========
+
+def test_proxy_from_env(monkeypatch):
+    """测试 HTTPS_PROXY 优先"""
+    monkeypatch.setenv('HTTP_PROXY', 'http://proxy-a:8080')
+    monkeypatch.setenv('HTTPS_PROXY', 'http://proxy-b:8080')
+
+    assert http_transport.get_proxy() == 'http://proxy-b:8080'
+    assert http_transport.client_kwargs()['proxy'] == 'http://proxy-b:8080'
+
+
+def test_no_proxy():
+    """测试未配置代理"""
+    assert 'proxy' not in http_transport.client_kwargs()
+
+
+def test_limits_from_env(monkeypatch):
+    """测试每主机连接数限制"""
+    monkeypatch.setenv('HTTP_MAX_CONNECTIONS_PER_HOST', '4')
+
+    limits = http_transport.get_limits()
+
+    assert limits.max_connections == 4
+    assert limits.max_keepalive_connections == 4
+
+
+# ========== 压缩响应测试 ==========
+
+def test_accept_encoding_matches_decoders():
+    """测试只在能解码 br 时声明 br"""
+    advertised = 'br' in http_transport.BROWSER_HEADERS["Accept-Encoding"]
+    assert advertised == http_transport.brotli_available()
+
+
+def test_compressed_response_decoded():
+    """测试服务端按声明的 Accept-Encoding 选择压缩格式时 .json() 正常"""
+    with mock_client(cloudflare_handler()) as client:
+        assert client.get("https://gamma-api.polymarket.com/markets").json() == PAYLOAD
+
+
+def test_br_response_decoded():
+    """测试 Content-Encoding: br 响应经共享客户端解码"""
+    pytest.importorskip('brotli')
+    with mock_client(cloudflare_handler(force_br=True)) as client:
+        response = client.get("https://gamma-api.polymarket.com/markets")
+        assert response.headers['Content-Encoding'] == 'br'
+        assert response.json() == PAYLOAD
+
+
+# ========== py_clob_client 接入测试 ==========
+
+def test_install_clob_transport():
+    """测试替换 py_clob_client 的模块级客户端并覆盖 User-Agent"""
+    from py_clob_client.http_helpers import helpers
+
+    http_transport.install_clob_transport()
+    client = helpers._http_client
+    http_transport.install_clob_transport()  # 幂等
+
+    assert helpers._http_client is client
+    headers = helpers.overloadHeaders("POST", None)
+    assert headers["User-Agent"] == http_transport.BROWSER_HEADERS["User-Agent"]
+    assert headers["Content-Type"] == "application/json"
+
+
+# ========== 导入测试 ==========
+
+def test_import_installs_no_patches():
+    """测试工具脚本导入传输层时不安装补丁（只加载传输层和行情限流器）"""
+    code = (
+        "import sys\n"
+        "from patches import http_transport\n"
+        "from patches.rate_limiter import get_governor\n"
+        "print(sorted(m for m in sys.modules if m.startswith('patches.')))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "['patches.http_transport', 'patches.rate_limiter']"
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
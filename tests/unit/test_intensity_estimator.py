@@ -0,0 +1,134 @@
+"""
+订单到达强度估计器单元测试
+
+测试范围：
+- 分桶计数与 κ 拟合
+- 指数衰减（旧成交权重降低）
+- 样本不足时回退默认值
+
+运行方法：
+    pytest tests/unit/test_intensity_estimator.py -v
+"""
+
+import math
+
+import pytest
+
+from strategies.intensity_estimator import ArrivalIntensityEstimator
+
+
+SECOND_NS = 1_000_000_000
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def estimator():
+    """创建测试估计器"""
+    return ArrivalIntensityEstimator(
+        tick_size=0.01,
+        n_buckets=10,
+        half_life_secs=300.0,
+        min_trades=10,
+        default_kappa=100.0,
+    )
+
+
+def feed_exponential(estimator, kappa, start_ns=0, base_count=400):
+    """按 A·exp(-κδ) 形状注入成交"""
+    ts = start_ns
+    for bucket in range(6):
+        delta = bucket * 0.01
+        count = int(round(base_count * math.exp(-kappa * delta)))
+        for _ in range(count):
+            estimator.on_trade(price=0.50 + delta, mid=0.50, ts_ns=ts)
+    return ts
+
+
+# ========== 拟合测试 ==========
+
+def test_default_kappa_before_enough_trades(estimator):
+    """测试样本不足时返回默认 κ"""
+    estimator.on_trade(price=0.51, mid=0.50, ts_ns=0)
+
+    assert not estimator.is_ready
+    assert estimator.kappa == 100.0
+
+
+def test_single_bucket_not_ready(estimator):
+    """测试只有一个非空桶时无法拟合"""
+    for _ in range(50):
+        estimator.on_trade(price=0.51, mid=0.50, ts_ns=0)
+
+    assert not estimator.is_ready
+    assert estimator.kappa == 100.0
+
+
+def test_recovers_kappa(estimator):
+    """测试从指数分布的成交中恢复 κ"""
+    feed_exponential(estimator, kappa=60.0)
+
+    assert estimator.is_ready
+    assert estimator.kappa == pytest.approx(60.0, rel=0.10)
+
+
+def test_kappa_clamped(estimator):
+    """测试 κ 限制在 [min_kappa, max_kappa]"""
+    # 远处成交比近处多：斜率为正 → κ 截断到下限
+    for bucket in range(1, 5):
+        for _ in range(bucket * 10):
+            estimator.on_trade(price=0.50 + bucket * 0.01, mid=0.50, ts_ns=0)
+
+    assert estimator.kappa == estimator.min_kappa
+
+
+def test_far_trades_go_to_last_bucket(estimator):
+    """测试超出范围的距离归入最后一个桶"""
+    estimator.on_trade(price=0.90, mid=0.50, ts_ns=0)
+
+    assert estimator._counts[-1] > 0
+
+
+# ========== 衰减测试 ==========
+
+def test_old_trades_decay(estimator):
+    """测试旧成交被新成交覆盖（κ 跟随最新分布）"""
+    feed_exponential(estimator, kappa=30.0, start_ns=0)
+    feed_exponential(estimator, kappa=120.0, start_ns=3600 * SECOND_NS)
+
+    assert estimator.kappa == pytest.approx(120.0, rel=0.15)
+
+
+def test_rescale_keeps_fit(estimator):
+    """测试权重重标定后拟合不变"""
+    feed_exponential(estimator, kappa=60.0, start_ns=0)
+    before = estimator.kappa
+
+    estimator._rescale(0)
+
+    estimator._dirty = True
+    assert estimator.kappa == pytest.approx(before)
+
+
+def test_intensity_a_positive(estimator):
+    """测试 A 按观测时长归一化"""
+    for i in range(100):
+        bucket = i % 3
+        estimator.on_trade(price=0.50 + bucket * 0.01, mid=0.50, ts_ns=i * SECOND_NS)
+
+    assert estimator.intensity_a > 0
+
+
+def test_reset(estimator):
+    """测试重置"""
+    feed_exponential(estimator, kappa=60.0)
+    estimator.reset()
+
+    assert estimator.trade_count == 0
+    assert estimator.kappa == 100.0
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,184 @@
+"""
+原始行情采集单元测试
+
+测试范围：
+- 增量 / 报价 / 成交编码后按顺序读回，交易所时间与接收时间保留
+- 多品种编号、追加打开已有文件
+- 缓冲超过上限时丢弃而不阻塞
+- 末尾不完整的帧忽略，小块读取与整块读取一致
+- 保留策略按会话删除采集文件
+
+运行方法：
+    pytest tests/unit/test_market_capture.py -v
+"""
+
+import numpy as np
+import pytest
+
+from nautilus_trader.model.data import BookOrder, OrderBookDelta, OrderBookDeltas, QuoteTick, TradeTick
+from nautilus_trader.model.enums import AggressorSide, BookAction, OrderSide
+from nautilus_trader.model.identifiers import InstrumentId, TradeId
+from nautilus_trader.model.objects import Price, Quantity
+
+from strategies.market_capture import (
+    DELTAS,
+    QUOTE,
+    TRADE,
+    MarketDataCapture,
+    capture_path,
+    iter_frames,
+    main,
+)
+from strategies.recorder_storage import apply_retention
+
+
+INSTRUMENT_ID = InstrumentId.from_str("0xabc-123.POLYMARKET")
+OTHER_ID = InstrumentId.from_str("0xdef-456.POLYMARKET")
+T0 = 1_767_225_600_000_000_000
+
+
+def make_deltas(instrument_id=INSTRUMENT_ID, ts=T0):
+    return OrderBookDeltas(instrument_id, [
+        OrderBookDelta.clear(instrument_id, 0, ts, ts + 5_000_000),
+        OrderBookDelta(instrument_id, BookAction.ADD,
+                       BookOrder(OrderSide.BUY, Price.from_str("0.48"), Quantity.from_str("100"), 0),
+                       0, 0, ts, ts + 5_000_000),
+        OrderBookDelta(instrument_id, BookAction.ADD,
+                       BookOrder(OrderSide.SELL, Price.from_str("0.52"), Quantity.from_str("50"), 0),
+                       128, 0, ts + 1, ts + 5_000_000),
+    ])
+
+
+def make_quote(ts=T0):
+    return QuoteTick(INSTRUMENT_ID, Price.from_str("0.48"), Price.from_str("0.52"),
+                     Quantity.from_str("100"), Quantity.from_str("50"), ts, ts + 3_000_000)
+
+
+def make_trade(ts=T0):
+    return TradeTick(INSTRUMENT_ID, Price.from_str("0.52"), Quantity.from_str("7"),
+                     AggressorSide.BUYER, TradeId("0xtrade-1"), ts, ts + 2_000_000)
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def capture(tmp_path):
+    capture = MarketDataCapture(tmp_path / "capture_s1.bin", flush_interval_ms=10)
+    yield capture
+    capture.close()
+
+
+# ========== 读写测试 ==========
+
+def test_roundtrip(capture):
+    """测试三类帧按写入顺序读回，字段与时间戳一致"""
+    capture.on_deltas(make_deltas())
+    capture.on_quote(make_quote(T0 + 10))
+    capture.on_trade(make_trade(T0 + 20))
+    capture.close()
+
+    frames = list(iter_frames(capture.path))
+    assert [f[0] for f in frames] == [DELTAS, QUOTE, TRADE]
+    assert {f[1] for f in frames} == {str(INSTRUMENT_ID)}
+
+    kind, _, ts_event, ts_init, deltas = frames[0]
+    assert (ts_event, ts_init) == (T0 + 1, T0 + 5_000_000)
+    assert deltas['action'].tolist() == [int(BookAction.CLEAR), int(BookAction.ADD), int(BookAction.ADD)]
+    assert deltas['side'].tolist()[1:] == [int(OrderSide.BUY), int(OrderSide.SELL)]
+    assert deltas['price'][1:].tolist() == [0.48, 0.52]
+    assert deltas['size'][1:].tolist() == [100.0, 50.0]
+    assert deltas['flags'][2] == 128
+
+    assert frames[1][2:] == (T0 + 10, T0 + 3_000_010, (0.48, 100.0, 0.52, 50.0))
+    assert frames[2][2:] == (T0 + 20, T0 + 2_000_020, (int(AggressorSide.BUYER), 0.52, 7.0, "0xtrade-1"))
+    assert capture.stats()['frames'] == 3
+
+
+def test_kinds_filter_and_instruments(capture):
+    """测试多品种编号与按类型筛选"""
+    capture.on_deltas(make_deltas(INSTRUMENT_ID))
+    capture.on_deltas(make_deltas(OTHER_ID, T0 + 100))
+    capture.on_quote(make_quote())
+    capture.close()
+
+    frames = list(iter_frames(capture.path, kinds={DELTAS}))
+    assert [f[1] for f in frames] == [str(INSTRUMENT_ID), str(OTHER_ID)]
+
+
+def test_append_to_existing_file(tmp_path):
+    """测试重新打开同一文件追加（品种重新登记）"""
+    path = tmp_path / "capture_s1.bin"
+    for ts in (T0, T0 + 1):
+        capture = MarketDataCapture(path)
+        capture.on_quote(make_quote(ts))
+        capture.close()
+
+    assert [(f[1], f[2]) for f in iter_frames(path)] == [(str(INSTRUMENT_ID), T0), (str(INSTRUMENT_ID), T0 + 1)]
+
+
+def test_drops_when_buffer_full(tmp_path):
+    """测试缓冲已满时丢弃新帧并计数"""
+    capture = MarketDataCapture(tmp_path / "capture_s1.bin", flush_interval_ms=60_000, max_buffer_bytes=200)
+    for i in range(10):
+        capture.on_quote(make_quote(T0 + i))
+    assert capture.dropped > 0
+    capture.close()
+
+    assert len(list(iter_frames(capture.path))) == capture.stats()['frames'] == 10 - capture.dropped
+
+
+def test_chunked_read_and_truncated_tail(capture):
+    """测试小块读取跨帧边界与整块一致，末尾写了一半的帧忽略"""
+    for i in range(50):
+        capture.on_deltas(make_deltas(ts=T0 + i))
+        capture.on_trade(make_trade(T0 + i))
+    capture.close()
+
+    whole = list(iter_frames(capture.path))
+    chunked = list(iter_frames(capture.path, chunk_bytes=37))
+    assert len(whole) == len(chunked) == 100
+    assert np.array_equal(whole[-2][4], chunked[-2][4])
+    assert [f[:4] for f in whole] == [f[:4] for f in chunked]
+
+    with open(capture.path, 'r+b') as f:
+        f.truncate(capture.path.stat().st_size - 5)
+    assert len(list(iter_frames(capture.path))) == 99
+
+
+def test_rejects_foreign_file(tmp_path):
+    """测试非采集文件报错"""
+    path = tmp_path / "capture_s1.bin"
+    path.write_bytes(b"timestamp,mid\n")
+    with pytest.raises(ValueError):
+        list(iter_frames(path))
+
+
+# ========== 集成测试 ==========
+
+def test_retention_deletes_capture(tmp_path):
+    """测试保留策略按会话删除采集文件"""
+    (tmp_path / "config_s1.json").write_text('{}')
+    capture = MarketDataCapture(capture_path(tmp_path, "s1"))
+    capture.on_quote(make_quote())
+    capture.close()
+
+    result = apply_retention(tmp_path, hot_days=1, retention_days=1, now=T0 / 1e9 + 400 * 86400)
+    assert result['deleted'] == 1
+    assert not capture.path.exists()
+
+
+def test_cli_summary(capture, capsys):
+    """测试命令行统计"""
+    capture.on_deltas(make_deltas())
+    capture.on_trade(make_trade())
+    capture.close()
+
+    main(["summary", str(capture.path)])
+    out = capsys.readouterr().out
+    assert "deltas" in out and "trade" in out
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -480,24 +480,25 @@ def test_check_risk_one_failed(strategy, mock_order_book):
 
 def test_update_price_history(strategy):
     """测试价格历史更新"""
-    initial_len = len(strategy._price_history)
+    initial_len = len(strategy.tick_store)
 
     # 添加价格
     strategy._update_price_history(Decimal("0.60"))
 
-    assert len(strategy._price_history) == initial_len + 1
+    assert len(strategy.tick_store) == initial_len + 1
+    assert strategy.tick_store.last('mid') == 0.60
 
 
 def test_update_price_history_truncation(strategy):
-    """测试价格历史截断"""
-    strategy.volatility_window = 10
+    """测试价格历史截断（定长时间序列）"""
+    capacity = strategy.tick_store.capacity
 
-    # 添加超过限制的价格
-    for i in range(50):
-        strategy._update_price_history(Decimal(str(i * 0.01)))
+    # 添加超过容量的价格
+    for i in range(capacity + 50):
+        strategy._update_price_history(Decimal("0.50"))
 
     # 应该被截断
-    assert len(strategy._price_history) <= strategy.volatility_window * 2
+    assert len(strategy.tick_store) == capacity
 
 
 # ========== 运行测试 ==========
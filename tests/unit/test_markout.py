@@ -0,0 +1,171 @@
+"""
+成交 markout 分析单元测试
+
+测试范围：
+- 向量化 markout（方向、horizon 超出路径）
+- 结算 markout
+- 在线增量与离线向量化结果一致
+- 分组统计
+- 从记录器输出加载会话
+
+运行方法：
+    pytest tests/unit/test_markout.py -v
+"""
+
+import math
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from strategies.data_recorder import TradeDataRecorder
+from strategies.markout import (
+    NANOS_PER_SECOND,
+    MarkoutTracker,
+    format_report,
+    load_sessions,
+    markouts,
+    settlement_markouts,
+    summarize,
+)
+
+
+S = NANOS_PER_SECOND
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def mid_path():
+    """0~120 秒，每秒一个中间价：0.50 起每秒上涨 0.001"""
+    ts = np.arange(0, 121) * S
+    mid = 0.50 + np.arange(0, 121) * 0.001
+    return ts, mid
+
+
+# ========== 向量化测试 ==========
+
+def test_buy_markout_positive_when_mid_rises(mid_path):
+    """测试买单后中间价上涨为正 markout"""
+    ts, mid = mid_path
+    result = markouts([10 * S], [0.51], [1], ts, mid, horizons_secs=(1, 5))
+
+    np.testing.assert_allclose(result, [[0.511 - 0.51, 0.515 - 0.51]])
+
+
+def test_sell_markout_negative_when_mid_rises(mid_path):
+    """测试卖单后中间价上涨为负 markout（被挑走）"""
+    ts, mid = mid_path
+    result = markouts([10 * S], [0.51], [-1], ts, mid, horizons_secs=(30,))
+
+    assert result[0, 0] == pytest.approx(-(0.54 - 0.51))
+
+
+def test_horizon_between_updates_uses_previous_mid(mid_path):
+    """测试目标时刻落在两次更新之间时使用之前的中间价"""
+    ts, mid = mid_path
+    result = markouts([int(10.5 * S)], [0.50], [1], ts, mid, horizons_secs=(1,))
+
+    assert result[0, 0] == pytest.approx(0.511 - 0.50)
+
+
+def test_horizon_beyond_path_is_nan(mid_path):
+    """测试 horizon 超出中间价路径末端时为 NaN"""
+    ts, mid = mid_path
+    result = markouts([100 * S], [0.5], [1], ts, mid, horizons_secs=(5, 60))
+
+    assert not math.isnan(result[0, 0])
+    assert math.isnan(result[0, 1])
+
+
+def test_settlement_markouts():
+    """测试相对结算结果的 markout"""
+    result = settlement_markouts([0.40, 0.60], [1, -1], outcome=1.0)
+
+    np.testing.assert_allclose(result, [0.60, -0.40])
+    assert np.isnan(settlement_markouts([0.4], [1], None)).all()
+
+
+# ========== 在线增量测试 ==========
+
+def test_tracker_matches_vectorized(mid_path):
+    """测试在线结果与离线向量化一致"""
+    ts, mid = mid_path
+    fills = [(int(3.2 * S), True, 0.49), (int(7.0 * S), False, 0.52), (int(70.5 * S), True, 0.53)]
+
+    tracker = MarkoutTracker()
+    fill_iter = iter(fills)
+    next_fill = next(fill_iter)
+    for t, m in zip(ts, mid):
+        while next_fill is not None and next_fill[0] < t:
+            tracker.on_fill(next_fill[0], next_fill[1], next_fill[2], 10)
+            next_fill = next(fill_iter, None)
+        tracker.on_mid(int(t), float(m))
+
+    expected = markouts(
+        [f[0] for f in fills], [f[2] for f in fills], [1 if f[1] else -1 for f in fills], ts, mid,
+    )
+    np.testing.assert_allclose(tracker.columns()['markout'], expected, equal_nan=True)
+    assert tracker.pending_count == 1  # 最后一笔的 +60s 超出路径
+
+
+def test_tracker_settlement():
+    """测试在线结算"""
+    tracker = MarkoutTracker()
+    tracker.on_fill(0, True, 0.30, 5)
+    tracker.on_settlement(0.0)
+
+    assert tracker.columns()['settlement'][0] == pytest.approx(-0.30)
+
+
+# ========== 分组统计测试 ==========
+
+def test_summarize_groups():
+    """测试按方向 / 价差 / 剩余时间分组"""
+    fills = {
+        'side_sign': np.array([1, 1, -1, -1]),
+        'quantity': np.array([10.0, 10.0, 10.0, 30.0]),
+        'spread': np.array([0.01, 0.01, 0.03, 0.10]),
+        'tte_secs': np.array([60.0, 500.0, 500.0, 800.0]),
+        'markout': np.array([[0.01], [-0.01], [-0.02], [0.02]]),
+        'settlement': np.array([0.5, np.nan, np.nan, np.nan]),
+    }
+    report = summarize(fills, horizons_secs=(1,))
+
+    assert report['all']['+1s']['count'] == 4
+    assert report['all']['+1s']['qty_weighted_mean'] == pytest.approx(0.4 / 60)
+    assert report['by_side']['SELL']['+1s']['adverse_rate'] == pytest.approx(0.5)
+    assert set(report['by_spread']) == {'tight', 'normal', 'wide'}
+    assert report['by_tte']['0-3m']['+1s']['count'] == 1
+    assert report['all']['settlement']['count'] == 1
+    assert "[MARKOUT]" in format_report(report)
+
+
+# ========== 会话加载测试 ==========
+
+def test_load_session_from_recorder(tmp_path):
+    """测试从记录器输出计算 markout"""
+    recorder = TradeDataRecorder(output_dir=str(tmp_path))
+    for i in range(10):
+        recorder.record_orderbook(
+            mid_price=Decimal("0.5"), bid_price=Decimal("0.49"), ask_price=Decimal("0.51"),
+            spread=Decimal("0.04"), time_remaining_min=10 - i / 60, volatility=Decimal("0.05"),
+            skew=Decimal("0"), best_bid=0.48 + i * 0.01, best_ask=0.50 + i * 0.01, ts_ns=i * S,
+        )
+    recorder.record_trade("O-1", "BUY", Decimal("0.49"), 10, Decimal("0"), Decimal("0"), ts_ns=2 * S)
+    recorder.record_settlement(1.0, "orderbook")
+
+    fills = load_sessions(tmp_path)
+
+    assert fills['sessions'] == 1
+    assert fills['markout'][0, 0] == pytest.approx(0.52 - 0.49)   # +1s: mid(3s) = 0.52
+    assert fills['markout'][0, 1] == pytest.approx(0.56 - 0.49)   # +5s: mid(7s) = 0.56
+    assert np.isnan(fills['markout'][0, 2])
+    assert fills['spread'][0] == pytest.approx(0.02)
+    assert fills['settlement'][0] == pytest.approx(0.51)
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
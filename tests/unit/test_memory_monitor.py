@@ -0,0 +1,129 @@
+"""
+内存监控单元测试
+
+测试范围：
+- 进程 RSS 采样
+- 组件探针
+- 报告节流
+- 策略注册的探针：缓存规模、定长时间序列字节数不随写入增长
+
+运行方法：
+    pytest tests/unit/test_memory_monitor.py -v
+"""
+
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from strategies.base_strategy import BaseStrategy
+from strategies.book_features import OrderBookFeatures
+from strategies.markout import MarkoutTracker
+from strategies.memory_monitor import MemoryMonitor, process_rss_bytes
+from strategies.tick_store import TickStore
+
+
+class FakeClock:
+    """可手动推进的单调时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ListLog:
+    """收集日志行"""
+
+    def __init__(self):
+        self.lines = []
+
+    def info(self, msg):
+        self.lines.append(msg)
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def monitor(clock):
+    return MemoryMonitor(interval_secs=60, clock=clock)
+
+
+# ========== 测试 ==========
+
+def test_process_rss_positive():
+    """测试能读取进程 RSS"""
+    assert process_rss_bytes() > 0
+
+
+def test_component_probes(monitor):
+    """测试组件探针"""
+    history = deque([1, 2, 3], maxlen=5)
+    monitor.register("price_history", lambda: len(history))
+
+    stats = monitor.snapshot()
+
+    assert stats["price_history"] == 3
+    assert stats["rss_mb"] > 0
+
+
+def test_failing_probe_reported(monitor):
+    """测试探针异常不影响报告"""
+    monitor.register("broken", lambda: 1 / 0)
+
+    assert "error" in monitor.snapshot()["broken"]
+
+
+def test_report_throttled(monitor, clock):
+    """测试按间隔节流"""
+    log = ListLog()
+
+    assert monitor.maybe_report(log) is not None
+    clock.now = 30
+    assert monitor.maybe_report(log) is None
+    clock.now = 61
+    assert monitor.maybe_report(log) is not None
+
+    assert len(log.lines) == 2
+    assert log.lines[0].startswith("[MEMORY]")
+
+
+def test_strategy_probes_report_bounded_buffers(monitor, clock):
+    """测试策略注册的探针进入报告，时间序列写满后字节数不再增长"""
+    strategy = SimpleNamespace(
+        memory_monitor=monitor,
+        cache=SimpleNamespace(
+            orders_total_count=lambda: 12,
+            orders_closed_count=lambda: 10,
+            positions_total_count=lambda: 1,
+        ),
+        book_features=OrderBookFeatures(),
+        tick_store=TickStore(capacity=64),
+        markouts=MarkoutTracker(),
+        actor=None,
+    )
+    BaseStrategy.register_memory_probes(strategy)
+    log = ListLog()
+
+    first = monitor.maybe_report(log)
+    for i in range(10_000):
+        strategy.tick_store.append(i, 0.5)
+    clock.now = 61
+    second = monitor.maybe_report(log)
+
+    assert (first['cache_orders'], first['cache_orders_closed'], first['cache_positions']) == (12, 10, 1)
+    assert second['tick_store_bytes'] == first['tick_store_bytes'] > 0
+    assert second['book_features_bytes'] == first['book_features_bytes'] > 0
+    assert "tick_store_bytes=" in log.lines[1] and "actor_max_depth" not in log.lines[1]
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,168 @@
+"""
+预签名订单缓存单元测试
+
+测试范围：
+- 命中 / 未命中
+- 相邻价位预签名
+- 每个签名订单只使用一次
+- 失效（成交）、nonce 不同不命中、LRU 淘汰
+- GTD 到期时间检查
+
+运行方法：
+    pytest tests/unit/test_order_signing_cache.py -v
+"""
+
+import itertools
+import time
+
+import pytest
+
+from py_clob_client.clob_types import OrderArgs
+
+from patches.order_signing_cache import PresignedOrderCache
+
+
+TOKEN_ID = "123456"
+
+
+class SigningClient:
+    """记录签名调用的客户端（每次签名返回唯一编号，模拟唯一 salt）"""
+
+    def __init__(self):
+        self.calls = []
+        self._salt = itertools.count()
+
+    def create_order(self, order_args, options=None):
+        self.calls.append((order_args.side, order_args.price))
+        return (order_args.side, order_args.price, next(self._salt))
+
+
+def make_args(price, side="BUY", size=10.0, nonce=0, expiration=0):
+    return OrderArgs(
+        token_id=TOKEN_ID, price=price, size=size, side=side, nonce=nonce, expiration=expiration,
+    )
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def client():
+    return SigningClient()
+
+
+@pytest.fixture
+def cache(client):
+    """创建缓存（每侧预签名 1 档）"""
+    cache = PresignedOrderCache(client, neighbor_levels=1, max_workers=1)
+    yield cache
+    cache.shutdown()
+
+
+def drain(cache):
+    """等待后台签名完成"""
+    cache._executor.submit(lambda: None).result(timeout=5)
+
+
+# ========== 命中测试 ==========
+
+def test_first_request_is_miss(cache, client):
+    """测试首次请求同步签名"""
+    signed = cache.create_order(make_args(0.50))
+
+    assert signed[:2] == ("BUY", 0.50)
+    assert cache.misses == 1
+    assert cache.hits == 0
+
+
+def test_neighbors_presigned(cache):
+    """测试请求后预签名同一价位及相邻档位"""
+    cache.create_order(make_args(0.50))
+    drain(cache)
+
+    prices = sorted(key[2] for key in cache._entries)
+    assert prices == [0.49, 0.50, 0.51]
+
+
+def test_requote_hits_cache(cache, client):
+    """测试移动一档后的重新报价命中缓存"""
+    cache.create_order(make_args(0.50))
+    drain(cache)
+    n_calls = len(client.calls)
+
+    signed = cache.create_order(make_args(0.51))
+
+    assert signed[:2] == ("BUY", 0.51)
+    assert cache.hits == 1
+    assert len(client.calls) >= n_calls  # 命中本身不签名，只触发后台补充
+
+
+def test_signed_order_used_once(cache):
+    """测试同一预签名订单不会返回两次"""
+    cache.create_order(make_args(0.50))
+    drain(cache)
+
+    first = cache.create_order(make_args(0.50))
+    second = cache.create_order(make_args(0.50))
+
+    assert first != second
+
+
+def test_side_and_size_in_key(cache):
+    """测试方向/数量不同不会误命中"""
+    cache.create_order(make_args(0.50, side="BUY"))
+    drain(cache)
+
+    cache.create_order(make_args(0.50, side="SELL"))
+    cache.create_order(make_args(0.50, size=20.0))
+
+    assert cache.hits == 0
+
+
+# ========== 失效测试 ==========
+
+def test_invalidate(cache):
+    """测试成交后清空"""
+    cache.create_order(make_args(0.50))
+    drain(cache)
+
+    cache.invalidate()
+
+    assert len(cache) == 0
+
+
+def test_nonce_in_key(cache, client):
+    """测试 nonce 不同不会命中旧订单，旧 nonce 的预签名订单保留（nonce 不触发清空）"""
+    cache.create_order(make_args(0.50, nonce=0))
+    drain(cache)
+
+    signed = cache.create_order(make_args(0.50, nonce=1))
+    drain(cache)
+
+    assert cache.hits == 0
+    assert signed[:2] == ("BUY", 0.50)
+    assert {key[5] for key in cache._entries} == {0, 1}
+
+
+def test_lru_eviction(client):
+    """测试超出容量淘汰最久未使用的价位"""
+    cache = PresignedOrderCache(client, max_entries=3, neighbor_levels=0, max_workers=1)
+    for price in (0.40, 0.41, 0.42, 0.43):
+        cache.create_order(make_args(price))
+        drain(cache)
+
+    assert sorted(key[2] for key in cache._entries) == [0.41, 0.42, 0.43]
+    cache.shutdown()
+
+
+def test_short_expiry_not_presigned(cache):
+    """测试即将到期的 GTD 订单不预签名"""
+    cache.create_order(make_args(0.50, expiration=int(time.time()) + 5))
+    drain(cache)
+
+    assert len(cache) == 0
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
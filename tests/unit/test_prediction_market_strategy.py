@@ -0,0 +1,212 @@
+"""
+预测市场做市策略单元测试（不依赖 TradingNode 的方法）
+
+测试范围：
+- 本轮结算结果判定：只看本轮结束后的盘口，参考价不作为结算结果
+- 参考价结算估计（只用于 markout）：现货过期或收盘接近开盘价时不估计
+- 参考价开盘价：状态日志恢复 > 本轮开始时刻价格 > 第一笔现货价格（迟启动时警告）
+- 运行时重新加载风险预设：库存上限 / 日亏损 / 总敞口与风险预算限制随之更新
+
+运行方法：
+    pytest tests/unit/test_prediction_market_strategy.py -v
+"""
+
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from config.risk_config import RiskPresetController
+from strategies.prediction_market_mm_strategy import PredictionMarketMMStrategy
+from strategies.reference_price import BinaryFairValue
+
+
+def make_strategy(time_remaining, best_bid=None, best_ask=None, pricer=None):
+    """只带 _settlement_outcome 用到的属性"""
+    return SimpleNamespace(
+        reference_pricer=pricer,
+        book_features=SimpleNamespace(best_bid=best_bid, best_ask=best_ask),
+        _get_time_remaining=lambda: time_remaining,
+    )
+
+
+def settlement_outcome(strategy):
+    return PredictionMarketMMStrategy._settlement_outcome(strategy)
+
+
+# ========== 结算结果测试 ==========
+
+def test_orderbook_outcome_after_round_end():
+    """测试本轮结束后按盘口判定"""
+    assert settlement_outcome(make_strategy(0, best_bid=0.99)) == (1.0, "orderbook")
+    assert settlement_outcome(make_strategy(0, best_bid=0.01, best_ask=0.02)) == (0.0, "orderbook")
+
+
+def test_no_orderbook_outcome_mid_round():
+    """测试本轮未结束时（中途停止 / 重启）盘口极端也不判定"""
+    assert settlement_outcome(make_strategy(120, best_bid=0.99)) is None
+    assert settlement_outcome(make_strategy(1, best_ask=0.01)) is None
+
+
+ROUND_END_NS = 1_767_225_600 * 1_000_000_000
+
+
+def make_pricer(spot, strike=50000.0, spot_offset_secs=0.0):
+    """本轮已结束的参考价（最后一笔现货在到期时刻 + spot_offset_secs）"""
+    return SimpleNamespace(
+        is_ready=True, strike=strike, spot=spot,
+        round_end_ns=ROUND_END_NS, spot_ts_ns=ROUND_END_NS + int(spot_offset_secs * 1e9),
+        time_remaining_secs=lambda: 0,
+    )
+
+
+def reference_estimate(pricer):
+    strategy = SimpleNamespace(
+        reference_pricer=pricer,
+        REFERENCE_ESTIMATE_MAX_STALENESS_SECS=PredictionMarketMMStrategy.REFERENCE_ESTIMATE_MAX_STALENESS_SECS,
+        REFERENCE_ESTIMATE_MIN_MOVE=PredictionMarketMMStrategy.REFERENCE_ESTIMATE_MIN_MOVE,
+    )
+    return PredictionMarketMMStrategy._reference_outcome_estimate(strategy)
+
+
+def test_reference_not_used_as_settlement():
+    """测试参考价不作为结算结果（只看盘口；盘口不极端时留给 Gamma 轮询）"""
+    pricer = make_pricer(spot=49000.0)
+    assert settlement_outcome(make_strategy(0, best_bid=0.99, pricer=pricer)) == (1.0, "orderbook")
+    assert settlement_outcome(make_strategy(0, best_bid=0.60, best_ask=0.62, pricer=pricer)) is None
+
+
+def test_reference_estimate():
+    """测试现货新鲜且明显偏离开盘价时给出估计"""
+    assert reference_estimate(make_pricer(spot=50100.0)) == 1.0
+    assert reference_estimate(make_pricer(spot=49900.0, spot_offset_secs=-3)) == 0.0
+
+
+def test_reference_estimate_requires_fresh_spot():
+    """测试最后一笔现货过期（行情断线）时不估计"""
+    assert reference_estimate(make_pricer(spot=50100.0, spot_offset_secs=-120)) is None
+
+
+def test_reference_estimate_requires_clear_move():
+    """测试收盘接近开盘价时不估计"""
+    assert reference_estimate(make_pricer(spot=50010.0)) is None
+
+
+def test_undetermined_book():
+    """测试盘口不极端时不判定"""
+    assert settlement_outcome(make_strategy(0, best_bid=0.60, best_ask=0.62)) is None
+
+
+# ========== 开盘价测试 ==========
+
+class FakeSource:
+    def __init__(self, open_price):
+        self.open_price = open_price
+        self.queried = []
+
+    def round_open_price(self, round_start_ts):
+        self.queried.append(round_start_ts)
+        return self.open_price
+
+
+def make_reference_strategy(round_start_ts, restored=None):
+    strategy = SimpleNamespace(
+        round_start_ts=round_start_ts,
+        reference_pricer=BinaryFairValue(round_start_ts, round_start_ts + 900),
+        journal=Mock(),
+        log=Mock(),
+        _restored_strike=restored,
+        _strike_journaled=False,
+    )
+    strategy._journal_strike = lambda: PredictionMarketMMStrategy._journal_strike(strategy)
+    return strategy
+
+
+def resolve_strike(strategy, source):
+    PredictionMarketMMStrategy._resolve_strike(strategy, source)
+
+
+def test_strike_restored_from_journal():
+    """测试同一轮内重启沿用状态日志中的开盘价，不查询、不重复写日志"""
+    strategy = make_reference_strategy(int(time.time()) - 300, restored=(50000.0, 'round_open'))
+    source = FakeSource(51000.0)
+    resolve_strike(strategy, source)
+
+    assert strategy.reference_pricer.strike == 50000.0
+    assert source.queried == []
+    strategy.journal.append.assert_not_called()
+
+
+def test_strike_from_round_open_when_late():
+    """测试迟启动时查询本轮开始时刻的价格并写入日志"""
+    start = int(time.time()) - 300
+    strategy = make_reference_strategy(start)
+    source = FakeSource(50012.0)
+    resolve_strike(strategy, source)
+
+    assert (strategy.reference_pricer.strike, strategy.reference_pricer.strike_source) == (50012.0, 'round_open')
+    assert source.queried == [start]
+    strategy.journal.append.assert_called_once_with('strike', critical=True, strike=50012.0, source='round_open')
+
+
+def test_strike_fallback_logged():
+    """测试迟启动且无法获取开盘价时回退为第一笔现货价格并警告"""
+    strategy = make_reference_strategy(int(time.time()) - 300)
+    resolve_strike(strategy, FakeSource(None))
+
+    assert strategy.reference_pricer.strike is None
+    strategy.log.warning.assert_called_once()
+
+
+def test_strike_not_queried_before_round():
+    """测试本轮尚未开始时不查询（第一笔现货价格即开盘价）"""
+    strategy = make_reference_strategy(int(time.time()) + 60)
+    source = FakeSource(50000.0)
+    resolve_strike(strategy, source)
+
+    assert source.queried == []
+    strategy.log.warning.assert_not_called()
+
+
+# ========== 风险预设测试 ==========
+
+class FakeRiskEngine:
+    def set_max_notional_per_order(self, instrument_id, new_value):
+        pass
+
+
+def test_preset_reload_updates_strategy_limits(tmp_path):
+    """测试 SIGHUP 重新加载预设后策略限制与风险预算限制都已更新"""
+    strategy = SimpleNamespace(
+        max_inventory=20,
+        max_daily_loss=Decimal("-3.00"),
+        max_gross_exposure=Decimal("50.00"),
+        max_daily_orders=None,
+        _quote_table=object(),
+        risk_budget=SimpleNamespace(limits=None),
+        log=Mock(),
+    )
+    strategy._budget_limits = lambda: PredictionMarketMMStrategy._budget_limits(strategy)
+    controller = RiskPresetController(
+        FakeRiskEngine(), "small", ["0xaaa-111.POLYMARKET"],
+        on_strategy_limits=lambda limits: PredictionMarketMMStrategy.apply_risk_limits(strategy, limits),
+    )
+    preset_file = tmp_path / "risk_preset"
+    preset_file.write_text("moderate\n")
+
+    assert controller.reload_from_file(str(preset_file)) is True
+
+    assert (strategy.max_inventory, strategy.max_daily_loss, strategy.max_gross_exposure) == (
+        50, Decimal("-50.00"), Decimal("150.00"),
+    )
+    assert strategy._quote_table is None
+    assert strategy.risk_budget.limits.max_daily_pnl_loss == Decimal("-50.00")
+    assert strategy.risk_budget.limits.max_gross_exposure == Decimal("150.00")
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,200 @@
+"""
+多进程报价单元测试
+
+测试范围：
+- MarketQuoter：围绕中间价报价、库存倾斜、报价未变不重复请求
+- MarketQuoter：到期保护 / 极端价格 / 单边盘口时撤单
+- MarketQuoter：库存硬上限（达到上限的一侧不挂单）
+- QuoteWorkerPool：顶档更新经共享内存到工作进程，报价请求返回
+- QuoteWorkerPool：成交缓冲区满时排队重试，按顺序送达、不丢弃
+
+运行方法：
+    pytest tests/unit/test_quote_workers.py -v
+"""
+
+import math
+import time
+
+import pytest
+
+from strategies.quote_workers import MarketQuoter, QuoteWorkerPool
+from strategies.shm_ring import ACTION_CANCEL, ACTION_QUOTE, MARKET_EVENT_DTYPE, ShmRing
+
+
+MS = 1_000_000
+ROUND_START = 1_767_225_600
+
+
+@pytest.fixture
+def quoter():
+    return MarketQuoter(round_start_ts=ROUND_START, order_size=5, requote_min_interval_ms=0)
+
+
+def evaluate(quoter, step, elapsed_secs=60):
+    """第 step 次评估（每次间隔 1 秒），距本轮开始 elapsed_secs 秒"""
+    return quoter.evaluate(step * 1000 * MS, ROUND_START + elapsed_secs + step)
+
+
+# ========== 报价测试 ==========
+
+def test_quotes_around_mid(quoter):
+    """测试买卖价位于中间价两侧"""
+    quoter.on_book(0, 0.48, 0.52, 10, 10)
+
+    action, bid, ask = evaluate(quoter, 0)
+
+    assert action == ACTION_QUOTE
+    assert bid < 0.50 < ask
+    assert round(ask - bid, 2) >= 0.01
+
+
+def test_unchanged_quote_not_repeated(quoter):
+    """测试报价未变化时不重复发送"""
+    quoter.on_book(0, 0.48, 0.52, 10, 10)
+    assert evaluate(quoter, 0) is not None
+
+    assert evaluate(quoter, 2) is None
+
+
+def test_inventory_skews_down():
+    """测试多头库存使报价下移"""
+    flat = MarketQuoter(round_start_ts=ROUND_START, risk_aversion=50.0)
+    long = MarketQuoter(round_start_ts=ROUND_START, risk_aversion=50.0)
+    for q in (flat, long):
+        q.on_book(0, 0.48, 0.52, 10, 10)
+    long.on_fill(1)
+
+    _, flat_bid, flat_ask = evaluate(flat, 0)
+    _, long_bid, long_ask = evaluate(long, 0)
+
+    assert long_bid + long_ask < flat_bid + flat_ask
+
+
+def test_fill_forces_requote(quoter):
+    """测试成交后立即重新报价（即使价格未变）"""
+    quoter.on_book(0, 0.48, 0.52, 10, 10)
+    evaluate(quoter, 0)
+
+    quoter.on_fill(-5)
+
+    assert evaluate(quoter, 0.2) is not None
+
+
+# ========== 撤单测试 ==========
+
+def test_end_buffer_cancels(quoter):
+    """测试最后几分钟撤单（只发送一次）"""
+    quoter.on_book(0, 0.48, 0.52, 10, 10)
+    evaluate(quoter, 0)
+
+    request = evaluate(quoter, 10, elapsed_secs=12 * 60)
+    assert request[0] == ACTION_CANCEL
+    assert evaluate(quoter, 20, elapsed_secs=12 * 60) is None
+
+
+def test_one_sided_book_cancels(quoter):
+    """测试盘口单边时撤单"""
+    quoter.on_book(0, 0.48, 0.52, 10, 10)
+    evaluate(quoter, 0)
+
+    quoter.on_book(0, math.nan, 0.52, 0, 10)
+
+    assert evaluate(quoter, 1)[0] == ACTION_CANCEL
+
+
+def test_no_cancel_before_quoting(quoter):
+    """测试从未报价时不发送撤单"""
+    quoter.on_book(0, 0.96, 0.98, 10, 10)
+
+    assert evaluate(quoter, 0) is None
+
+
+def test_inventory_cap_drops_bid():
+    """测试多头库存达到上限时不再挂买单，卖单照常"""
+    quoter = MarketQuoter(round_start_ts=ROUND_START, max_inventory=10, requote_min_interval_ms=0)
+    quoter.on_fill(10)
+    quoter.on_book(0, 0.48, 0.52, 10, 10)
+
+    action, bid, ask = evaluate(quoter, 0)
+
+    assert action == ACTION_QUOTE
+    assert math.isnan(bid) and 0 < ask < 1
+
+
+def test_inventory_cap_drops_ask():
+    """测试空头库存达到上限时不再挂卖单"""
+    quoter = MarketQuoter(round_start_ts=ROUND_START, max_inventory=10, requote_min_interval_ms=0)
+    quoter.on_fill(-12)
+    quoter.on_book(0, 0.48, 0.52, 10, 10)
+
+    action, bid, ask = evaluate(quoter, 0)
+
+    assert action == ACTION_QUOTE
+    assert 0 < bid < 1 and math.isnan(ask)
+
+
+def test_inventory_below_cap_quotes_both_sides():
+    """测试库存低于上限时双边报价"""
+    quoter = MarketQuoter(round_start_ts=ROUND_START, max_inventory=10, requote_min_interval_ms=0)
+    quoter.on_fill(9)
+    quoter.on_book(0, 0.48, 0.52, 10, 10)
+
+    _, bid, ask = evaluate(quoter, 0)
+
+    assert not math.isnan(bid) and not math.isnan(ask)
+
+
+# ========== 工作进程测试 ==========
+
+def test_worker_pool_round_trip():
+    """测试顶档更新经共享内存进入工作进程，报价请求返回"""
+    now = int(time.time())
+    pool = QuoteWorkerPool(
+        [{'round_start_ts': now - 60, 'order_size': 5}, {'round_start_ts': now - 60}],
+        n_workers=2,
+        ring_capacity=1024,
+    )
+    pool.start()
+    try:
+        pool.publish_book(0, time.time_ns(), 0.48, 0.52, 10, 10)
+        pool.publish_book(1, time.time_ns(), 0.30, 0.34, 10, 10)
+
+        requests = []
+        deadline = time.time() + 20
+        while len(requests) < 2 and time.time() < deadline:
+            requests += pool.drain_orders()
+            time.sleep(0.01)
+
+        by_slot = {int(r['slot']): r for r in requests}
+        assert set(by_slot) == {0, 1}
+        assert by_slot[0]['quantity'] == 5
+        assert by_slot[1]['bid'] < 0.32 < by_slot[1]['ask']
+        assert pool.stats()['alive'] == 2
+    finally:
+        pool.stop()
+
+    assert pool.alive == 0
+
+
+def test_fill_not_dropped_when_ring_full():
+    """测试成交缓冲区满时排队，读取请求时按顺序重试写入"""
+    pool = QuoteWorkerPool([{'round_start_ts': ROUND_START}], n_workers=1, fill_ring_capacity=2)
+    pool._open_rings()  # 不启动工作进程，测试中直接读缓冲区
+    fills = ShmRing.attach(pool._fill_rings[0].name, MARKET_EVENT_DTYPE)
+    try:
+        assert [pool.publish_fill(0, i, 0.5, i + 1) for i in range(4)] == [True, True, False, False]
+        assert pool.stats()['fill_pending'] == 2
+
+        assert fills.pop_many()['quantity'].tolist() == [1, 2]
+        pool.drain_orders()
+        assert pool.pending_fills == 0
+        assert fills.pop_many()['quantity'].tolist() == [3, 4]
+    finally:
+        fills.close()
+        pool.stop()
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,136 @@
+"""
+A-S 报价引擎单元测试
+
+测试范围：
+- 保留价格与最优价差闭式解
+- 向量化评估（库存 × 时间）
+- 预计算报价表查表
+
+运行方法：
+    pytest tests/unit/test_quoting_engine.py -v
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from strategies.quoting_engine import AvellanedaStoikovQuoter
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def quoter():
+    """创建测试报价器"""
+    return AvellanedaStoikovQuoter(risk_aversion=0.5, kappa=100.0)
+
+
+# ========== 闭式解测试 ==========
+
+def test_reservation_offset_neutral_inventory(quoter):
+    """测试零库存时保留价格等于中间价"""
+    assert quoter.reservation_offset(0, 0.02, 1.0) == 0.0
+
+
+def test_reservation_offset_sign(quoter):
+    """测试多头库存压低保留价格，空头抬高"""
+    assert quoter.reservation_offset(10, 0.02, 1.0) < 0
+    assert quoter.reservation_offset(-10, 0.02, 1.0) > 0
+
+
+def test_optimal_spread_formula(quoter):
+    """测试最优价差与论文公式一致"""
+    sigma, tau = 0.02, 0.5
+    expected = 0.5 * sigma ** 2 * tau + (2 / 0.5) * math.log(1 + 0.5 / 100.0)
+
+    assert quoter.optimal_spread(sigma, tau) == pytest.approx(expected)
+
+
+def test_optimal_spread_at_expiry_only_intensity_term(quoter):
+    """测试到期时价差只剩到达强度项"""
+    spread = quoter.optimal_spread(0.05, 0.0)
+
+    assert spread == pytest.approx(4 * math.log1p(0.005))
+
+
+def test_higher_kappa_tightens_spread(quoter):
+    """测试成交概率衰减越快（κ 越大），价差越小"""
+    assert quoter.optimal_spread(0.02, 1.0, kappa=200.0) < quoter.optimal_spread(0.02, 1.0, kappa=50.0)
+
+
+# ========== 向量化测试 ==========
+
+def test_quote_offsets_vectorized_shape(quoter):
+    """测试一次调用评估整组库存 × 时间状态"""
+    inventories = np.arange(-5, 6)[:, np.newaxis]
+    times = np.linspace(0, 1, 7)[np.newaxis, :]
+
+    bid, ask = quoter.quote_offsets(inventories, 0.02, times)
+
+    assert bid.shape == (11, 7)
+    assert ask.shape == (11, 7)
+    assert np.all(ask > bid)
+
+
+def test_quote_offsets_clipped_half_spread():
+    """测试半价差限制"""
+    quoter = AvellanedaStoikovQuoter(risk_aversion=0.5, kappa=100.0, min_half_spread=0.02)
+
+    bid, ask = quoter.quote_offsets(0, 0.0, 0.0)
+
+    assert float(ask - bid) == pytest.approx(0.04)
+
+
+def test_invalid_parameters():
+    """测试非法参数"""
+    with pytest.raises(ValueError):
+        AvellanedaStoikovQuoter(risk_aversion=0, kappa=100.0)
+    with pytest.raises(ValueError):
+        AvellanedaStoikovQuoter(risk_aversion=0.5, kappa=-1.0)
+
+
+# ========== 报价表测试 ==========
+
+def test_table_lookup_matches_closed_form(quoter):
+    """测试查表结果与闭式解一致（网格点上）"""
+    table = quoter.build_table(sigma=0.02, max_inventory=10, horizon=2.0, n_time_buckets=21)
+
+    bid, ask = table.lookup(4, 1.0)
+    expected_bid, expected_ask = quoter.quote_offsets(4, 0.02, 1.0)
+
+    assert bid == pytest.approx(float(expected_bid))
+    assert ask == pytest.approx(float(expected_ask))
+
+
+def test_table_lookup_clamps_inventory(quoter):
+    """测试超出范围的库存截断到边界"""
+    table = quoter.build_table(sigma=0.02, max_inventory=5, horizon=1.0)
+
+    assert table.lookup(50, 0.5) == table.lookup(5, 0.5)
+    assert table.lookup(-50, 0.5) == table.lookup(-5, 0.5)
+
+
+def test_table_lookup_rounds_time_up(quoter):
+    """测试时间向上取整到桶（保守使用更宽价差）"""
+    table = quoter.build_table(sigma=0.05, max_inventory=5, horizon=1.0, n_time_buckets=11)
+
+    bid_mid, ask_mid = table.lookup(0, 0.45)
+    bid_up, ask_up = table.lookup(0, 0.5)
+
+    assert (bid_mid, ask_mid) == (bid_up, ask_up)
+
+
+def test_table_is_stale(quoter):
+    """测试参数漂移判断"""
+    table = quoter.build_table(sigma=0.02, max_inventory=5, horizon=1.0)
+
+    assert not table.is_stale(0.021, 100.0, tolerance=0.10)
+    assert table.is_stale(0.03, 100.0, tolerance=0.10)
+    assert table.is_stale(0.02, 150.0, tolerance=0.10)
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
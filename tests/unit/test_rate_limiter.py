@@ -0,0 +1,186 @@
+"""
+客户端限流器单元测试
+
+测试范围：
+- 令牌桶补充 / 透支
+- 优先级放行（撤单优先）
+- 过时请求合并与排队超时
+- 403/429 惩罚退避
+- 环境变量配置
+
+运行方法：
+    pytest tests/unit/test_rate_limiter.py -v
+"""
+
+import asyncio
+
+import pytest
+
+from patches.rate_limiter import (
+    CANCEL,
+    GLOBAL,
+    MARKET_DATA,
+    ORDER_POST,
+    RateLimitGovernor,
+    TokenBucket,
+    load_limits_from_env,
+    order_submit_rate_limit,
+)
+
+
+class FakeClock:
+    """可手动推进的单调时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def governor():
+    """小容量限流器：下单/撤单各 1 个令牌，全局 2 个"""
+    return RateLimitGovernor(limits={
+        ORDER_POST: (50.0, 1.0),
+        CANCEL: (50.0, 1.0),
+        MARKET_DATA: (50.0, 1.0),
+        GLOBAL: (50.0, 2.0),
+    })
+
+
+# ========== 令牌桶测试 ==========
+
+def test_bucket_burst_then_refill(clock):
+    """测试突发容量用尽后按速率补充"""
+    bucket = TokenBucket(rate=2.0, capacity=2.0, clock=clock)
+
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.wait_time() == pytest.approx(0.5)
+
+    clock.now = 0.5
+    assert bucket.try_acquire()
+
+
+def test_bucket_drain(clock):
+    """测试透支后暂停"""
+    bucket = TokenBucket(rate=1.0, capacity=5.0, clock=clock)
+    bucket.drain(3.0)
+
+    assert not bucket.has_token()
+    assert bucket.wait_time() == pytest.approx(4.0)
+
+
+def test_invalid_bucket():
+    """测试非法参数"""
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)
+
+
+# ========== 调度测试 ==========
+
+def test_immediate_grant(governor):
+    """测试有额度时立即放行"""
+    assert asyncio.run(governor.acquire(ORDER_POST))
+    assert governor.granted == 1
+
+
+def test_cancel_prioritized_over_orders():
+    """测试排队时撤单先于下单放行"""
+    governor = RateLimitGovernor(limits={
+        ORDER_POST: (50.0, 5.0),
+        CANCEL: (50.0, 5.0),
+        GLOBAL: (20.0, 1.0),
+    })
+
+    async def scenario():
+        order = []
+
+        async def request(endpoint, name):
+            await governor.acquire(endpoint)
+            order.append(name)
+
+        await governor.acquire(ORDER_POST)  # 耗尽全局令牌
+        await asyncio.gather(
+            request(ORDER_POST, "order"),
+            request(CANCEL, "cancel"),
+        )
+        return order
+
+    assert asyncio.run(scenario()) == ["cancel", "order"]
+
+
+def test_stale_request_coalesced(governor):
+    """测试同一 key 的新请求替换排队中的旧请求"""
+    async def scenario():
+        await governor.acquire(ORDER_POST)  # 耗尽下单令牌
+        return await asyncio.gather(
+            governor.acquire(ORDER_POST, coalesce_key="quotes"),
+            governor.acquire(ORDER_POST, coalesce_key="quotes"),
+        )
+
+    assert asyncio.run(scenario()) == [False, True]
+    assert governor.stale == 1
+
+
+def test_max_wait_expires():
+    """测试排队超时视为过时"""
+    governor = RateLimitGovernor(limits={
+        ORDER_POST: (5.0, 1.0),
+        GLOBAL: (50.0, 5.0),
+    })
+
+    async def scenario():
+        await governor.acquire(ORDER_POST)
+        return await governor.acquire(ORDER_POST, max_wait=0.05)
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_penalize_backoff_doubles(clock):
+    """测试连续 403/429 时暂停时间翻倍"""
+    governor = RateLimitGovernor(clock=clock)
+
+    governor.penalize(429)
+    first = governor.buckets[GLOBAL].wait_time()
+    clock.now = 1.0
+    governor.penalize(429)
+    second = governor.buckets[GLOBAL].wait_time()
+
+    assert first > 0
+    assert second > first
+
+
+def test_market_data_sync(governor):
+    """测试线程阻塞获取"""
+    assert governor.acquire_sync(MARKET_DATA)
+    assert not governor.acquire_sync(MARKET_DATA, timeout=0.0)
+
+
+# ========== 配置测试 ==========
+
+def test_limits_from_env(monkeypatch):
+    """测试环境变量覆盖"""
+    monkeypatch.setenv("RATE_LIMIT_ORDER_POST", "4/8")
+    monkeypatch.setenv("RATE_LIMIT_CANCEL", "6")
+
+    limits = load_limits_from_env()
+
+    assert limits[ORDER_POST] == (4.0, 8.0)
+    assert limits[CANCEL] == (6.0, 6.0)
+    assert order_submit_rate_limit() == "8/00:00:02"
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,217 @@
+"""
+记录器文件存储单元测试
+
+测试范围：
+- 按大小 / 按整点轮转，已关闭分段后台压缩
+- 分段串联读取（表头只保留一个，压缩与未压缩混合）
+- 合并压缩、按天数 / 总大小删除，同步删除会话目录记录
+- 分析工具（markout / 会话报表）读取压缩后的会话
+
+运行方法：
+    pytest tests/unit/test_recorder_storage.py -v
+"""
+
+import gzip
+import os
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from strategies.data_recorder import TradeDataRecorder
+from strategies.markout import load_session
+from strategies.recorder_storage import (
+    apply_retention,
+    compact_session,
+    compress_file,
+    iter_csv,
+    iter_dict_rows,
+    session_segments,
+)
+from strategies.session_catalog import SessionCatalog, scan_csv
+from strategies.session_report import session_stats
+
+
+DAY = 86400
+NOW = 1_767_225_600  # 2026-01-01 00:00:00 UTC
+
+
+def write_csv(path, header, rows):
+    lines = [','.join(header)] + [','.join(str(v) for v in row) for row in rows]
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def write_session(data_dir, session_id, age_days, rows=3):
+    """写出一个会话（orderbook + trades + config），文件修改时间为 age_days 天前"""
+    write_csv(data_dir / f"orderbook_{session_id}.csv", ['timestamp', 'mid_price'],
+              [(NOW + i, 0.5) for i in range(rows)])
+    write_csv(data_dir / f"trades_{session_id}.csv", ['timestamp', 'side'], [(NOW, "BUY")])
+    (data_dir / f"config_{session_id}.json").write_text('{}')
+    mtime = NOW - age_days * DAY
+    for path in data_dir.glob(f"*_{session_id}.*"):
+        os.utime(path, (mtime, mtime))
+
+
+def record_books(recorder, n):
+    for i in range(n):
+        recorder.record_orderbook(Decimal("0.5"), Decimal("0.49"), Decimal("0.51"), Decimal("0.02"),
+                                  10.0, Decimal("0.1"), Decimal("0"), best_bid=0.49, best_ask=0.51,
+                                  ts_ns=(NOW + i) * 1_000_000_000)
+
+
+# ========== 轮转测试 ==========
+
+def test_rotate_by_size(tmp_path):
+    """测试活动段超过大小上限时轮转，关闭时压缩完成，串联读取得到全部行"""
+    recorder = TradeDataRecorder(output_dir=str(tmp_path), use_catalog=False, rotate_bytes=600)
+    record_books(recorder, 10)
+    recorder.close()
+
+    segments = session_segments(tmp_path, 'orderbook', recorder.session_id)
+    assert len(segments) > 2
+    assert all(p.name.endswith('.csv.gz') for p in segments[:-1])
+    assert segments[-1].name == f"orderbook_{recorder.session_id}.csv"
+
+    rows = list(iter_csv(tmp_path, 'orderbook', recorder.session_id))
+    assert rows[0][0] == 'timestamp'
+    assert len(rows) == 11  # 表头 + 10 行，后续分段的表头已跳过
+    assert recorder.get_summary().count("10 条") == 1
+
+
+def test_rotate_on_hour_boundary(tmp_path):
+    """测试跨整点时轮转，没有数据的类型不产生分段"""
+    clock = [NOW + 3599.0]
+    with patch('strategies.data_recorder.time.time', lambda: clock[0]):
+        recorder = TradeDataRecorder(output_dir=str(tmp_path), use_catalog=False, rotate_secs=3600)
+        recorder.record_order("O-1", "BUY", Decimal("0.49"), 5)
+        clock[0] = NOW + 3601.0
+        recorder.record_order("O-2", "BUY", Decimal("0.49"), 5)
+        recorder.record_order("O-3", "BUY", Decimal("0.49"), 5)
+        recorder.close()
+
+    orders = session_segments(tmp_path, 'orders', recorder.session_id)
+    assert [p.name for p in orders] == [
+        f"orders_{recorder.session_id}.part0001.csv.gz", f"orders_{recorder.session_id}.csv",
+    ]
+    assert [r['order_id'] for r in iter_dict_rows(tmp_path, 'orders', recorder.session_id)] == ["O-1", "O-2", "O-3"]
+    assert len(session_segments(tmp_path, 'trades', recorder.session_id)) == 1
+
+
+def test_catalog_counts_all_segments(tmp_path):
+    """测试会话目录的行数为全部分段合计（与补录时的扫描结果一致）"""
+    recorder = TradeDataRecorder(output_dir=str(tmp_path), rotate_bytes=600)
+    recorder.save_config({'instrument_id': "0xaaa-1.POLYMARKET"})
+    record_books(recorder, 10)
+    recorder.close()
+
+    catalog = SessionCatalog(tmp_path)
+    try:
+        assert catalog.files(recorder.session_id)['orderbook']['rows'] == 10
+        assert scan_csv(tmp_path, 'orderbook', recorder.session_id)[0] == 10
+    finally:
+        catalog.close()
+
+
+# ========== 读取测试 ==========
+
+def test_iter_csv_mixed_segments(tmp_path):
+    """测试压缩分段与未压缩分段按编号顺序串联"""
+    write_csv(tmp_path / "trades_s1.part0001.csv", ['timestamp', 'side'], [(1, "BUY")])
+    write_csv(tmp_path / "trades_s1.part0002.csv", ['timestamp', 'side'], [(2, "SELL")])
+    write_csv(tmp_path / "trades_s1.csv", ['timestamp', 'side'], [(3, "BUY")])
+    compress_file(tmp_path / "trades_s1.part0001.csv")
+
+    assert list(iter_csv(tmp_path, 'trades', "s1")) == [
+        ['timestamp', 'side'], ['1', 'BUY'], ['2', 'SELL'], ['3', 'BUY'],
+    ]
+
+
+def test_compact_session(tmp_path):
+    """测试合并为每类一个压缩文件，内容不变"""
+    write_csv(tmp_path / "trades_s1.part0001.csv", ['timestamp', 'side'], [(1, "BUY")])
+    write_csv(tmp_path / "trades_s1.csv", ['timestamp', 'side'], [(2, "SELL")])
+    before = list(iter_csv(tmp_path, 'trades', "s1"))
+
+    assert compact_session(tmp_path, "s1") == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["trades_s1.csv.gz"]
+    assert list(iter_csv(tmp_path, 'trades', "s1")) == before
+    assert compact_session(tmp_path, "s1") == 0  # 已合并的不再处理
+
+
+# ========== 保留策略测试 ==========
+
+def test_retention_compacts_and_deletes(tmp_path):
+    """测试热数据保持原样、较旧的合并压缩、过期的删除，当前会话不处理"""
+    write_session(tmp_path, "hot", age_days=1)
+    write_session(tmp_path, "warm", age_days=5)
+    write_session(tmp_path, "old", age_days=40)
+    write_session(tmp_path, "current", age_days=40)
+
+    result = apply_retention(tmp_path, hot_days=3, retention_days=30, exclude={"current"}, now=NOW)
+
+    assert (result['compacted'], result['deleted']) == (1, 1)
+    assert (tmp_path / "orderbook_hot.csv").exists()
+    assert (tmp_path / "orderbook_warm.csv.gz").exists() and not (tmp_path / "orderbook_warm.csv").exists()
+    assert len(list(iter_dict_rows(tmp_path, 'orderbook', "warm"))) == 3
+    assert not list(tmp_path.glob("*_old.*"))
+    assert (tmp_path / "orderbook_current.csv").exists()
+
+
+def test_retention_max_bytes_deletes_oldest(tmp_path):
+    """测试超过总大小上限时从最旧的会话开始删除，并删除目录记录"""
+    for i, session_id in enumerate(["a", "b", "c"]):
+        write_session(tmp_path, session_id, age_days=3 - i, rows=200)
+    catalog = SessionCatalog(tmp_path)
+    try:
+        catalog.index_directory()
+        size = sum(p.stat().st_size for p in tmp_path.glob("*_c.*"))
+
+        result = apply_retention(tmp_path, hot_days=30, max_bytes=int(size * 2.5), catalog=catalog, now=NOW)
+
+        assert result['deleted'] == 1
+        assert result['bytes'] <= size * 2.5
+        assert sorted(catalog.session_ids()) == ["b", "c"]
+        assert not list(tmp_path.glob("*_a.*"))
+    finally:
+        catalog.close()
+
+
+def test_recorder_retention_async(tmp_path):
+    """测试记录器在后台线程执行保留策略"""
+    write_session(tmp_path, "old", age_days=400)
+    recorder = TradeDataRecorder(output_dir=str(tmp_path), use_catalog=False)
+
+    result = recorder.apply_retention_async(hot_days=3, retention_days=30).result(timeout=10)
+    recorder.close()
+
+    assert result['deleted'] == 1
+    assert (tmp_path / f"orderbook_{recorder.session_id}.csv").exists()
+
+
+# ========== 分析工具测试 ==========
+
+def test_readers_on_compressed_session(tmp_path):
+    """测试 markout 与会话报表读取合并压缩后的会话，结果与压缩前一致"""
+    recorder = TradeDataRecorder(output_dir=str(tmp_path), use_catalog=False, rotate_bytes=600)
+    record_books(recorder, 10)
+    recorder.record_trade("O-1", "BUY", Decimal("0.49"), 5, Decimal("0"), Decimal("0"),
+                          ts_ns=(NOW + 2) * 1_000_000_000)
+    recorder.close()
+    sid = recorder.session_id
+
+    before_markout = load_session(tmp_path, sid)
+    before_stats = session_stats(tmp_path, sid).to_dict()
+    compact_session(tmp_path, sid)
+    with gzip.open(tmp_path / f"orderbook_{sid}.csv.gz", 'rt') as f:
+        assert sum(1 for _ in f) == 11
+
+    after_markout = load_session(tmp_path, sid)
+    assert len(after_markout['price']) == len(before_markout['price']) == 1
+    assert after_markout['markout'] == pytest.approx(before_markout['markout'], nan_ok=True)
+    assert session_stats(tmp_path, sid).to_dict() == before_stats
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
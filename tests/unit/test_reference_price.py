@@ -0,0 +1,252 @@
+"""
+外部现货参考价单元测试
+
+测试范围：
+- 公允概率闭式解（Φ(ln(S/K) / σ√T)）
+- 开盘价捕获与 EWMA 波动率
+- 重新报价回调阈值
+- 本地文件回放源
+- 开盘价：外部设置优先于第一笔现货价格，K 线查询
+
+运行方法：
+    pytest tests/unit/test_reference_price.py -v
+"""
+
+import math
+
+import pytest
+
+from patches import http_transport
+from strategies.reference_price import (
+    BinanceSpotSource,
+    BinaryFairValue,
+    ReplayPriceSource,
+    create_reference_source,
+    normal_cdf,
+)
+
+
+SECOND_NS = 1_000_000_000
+ROUND_START = 1_700_000_000
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def pricer():
+    """创建 15 分钟一轮的定价器"""
+    return BinaryFairValue(
+        round_start_ts=ROUND_START,
+        round_end_ts=ROUND_START + 900,
+        default_sigma_per_sec=1e-4,
+    )
+
+
+def at(secs):
+    """本轮开始后 secs 秒的时间戳（纳秒）"""
+    return (ROUND_START + secs) * SECOND_NS
+
+
+# ========== 公允概率测试 ==========
+
+def test_not_ready_without_prices(pricer):
+    """测试无价格时未就绪"""
+    assert not pricer.is_ready
+    assert pricer.fair_probability() is None
+
+
+def test_price_before_round_not_strike(pricer):
+    """测试本轮开始前的价格不作为开盘价"""
+    pricer.on_price(50000.0, at(-10))
+
+    assert pricer.strike is None
+
+
+def test_at_the_money_is_half(pricer):
+    """测试现货等于开盘价时概率为 0.5"""
+    pricer.on_price(50000.0, at(0))
+
+    assert pricer.fair_probability(at(0)) == pytest.approx(0.5)
+
+
+def test_closed_form(pricer):
+    """测试闭式解"""
+    pricer.on_price(50000.0, at(0))
+    pricer._variance_per_sec = 1e-8  # 固定 σ，排除 EWMA 影响
+    pricer.spot = 50050.0
+
+    expected = normal_cdf(math.log(50050 / 50000) / (1e-4 * math.sqrt(600)))
+
+    assert pricer.fair_probability(at(300)) == pytest.approx(expected)
+
+
+def test_spot_up_raises_probability(pricer):
+    """测试现货上涨，up 概率上升"""
+    pricer.on_price(50000.0, at(0))
+    pricer.on_price(50100.0, at(60))
+
+    assert pricer.fair_probability(at(60)) > 0.5
+
+
+def test_down_outcome_is_complement():
+    """测试 down 合约概率为 1 - P(up)"""
+    up = BinaryFairValue(ROUND_START, ROUND_START + 900, outcome_up=True)
+    down = BinaryFairValue(ROUND_START, ROUND_START + 900, outcome_up=False)
+    for p in (up, down):
+        p.on_price(50000.0, at(0))
+        p.on_price(49950.0, at(30))
+
+    assert up.fair_probability(at(30)) + down.fair_probability(at(30)) == pytest.approx(1.0)
+
+
+def test_expiry_is_digital(pricer):
+    """测试到期时概率为 0/1"""
+    pricer.on_price(50000.0, at(0))
+    pricer.on_price(50001.0, at(899))
+
+    assert pricer.fair_probability(at(900)) == 1.0
+
+
+def test_less_time_more_certain(pricer):
+    """测试剩余时间越少，价内合约概率越接近 1"""
+    pricer.on_price(50000.0, at(0))
+    pricer.on_price(50050.0, at(10))
+
+    assert pricer.fair_probability(at(800)) > pricer.fair_probability(at(100))
+
+
+# ========== 波动率测试 ==========
+
+def test_sigma_ewma_increases_with_moves(pricer):
+    """测试大幅波动推高 σ 估计"""
+    before = pricer.sigma_per_sec
+    price = 50000.0
+    for i in range(60):
+        price *= 1.002 if i % 2 else 0.998
+        pricer.on_price(price, at(i))
+
+    assert pricer.sigma_per_sec > before
+
+
+# ========== 回调测试 ==========
+
+def test_listener_threshold(pricer):
+    """测试公允概率变化超过阈值才回调"""
+    calls = []
+    pricer.set_listener(calls.append)
+
+    pricer.on_price(50000.0, at(0))
+    pricer.on_price(50000.01, at(1))   # 变化极小
+    pricer.on_price(50200.0, at(2))    # 大幅变化
+
+    assert len(calls) == 2
+    assert calls[0] == pytest.approx(0.5)
+    assert calls[1] > 0.5
+
+
+# ========== 回放源测试 ==========
+
+def test_replay_source(tmp_path, pricer):
+    """测试本地文件回放（同步模式）"""
+    path = tmp_path / "prices.csv"
+    path.write_text(
+        "ts_ms,price\n"
+        f"{(ROUND_START - 1) * 1000},49990\n"
+        f"{ROUND_START * 1000},50000\n"
+        f"{(ROUND_START + 5) * 1000},50025.5\n"
+    )
+
+    ReplayPriceSource(path).start(pricer.on_price)
+
+    assert pricer.strike == 50000.0
+    assert pricer.spot == 50025.5
+    assert pricer.spot_ts_ns == at(5)
+
+
+def test_replay_round_open_price(tmp_path):
+    """测试回放源的本轮开盘价（本轮开始后的第一笔）"""
+    path = tmp_path / "prices.csv"
+    path.write_text(f"{(ROUND_START - 1) * 1000},49990\n{(ROUND_START + 2) * 1000},50010\n")
+
+    assert ReplayPriceSource(path).round_open_price(ROUND_START) == 50010.0
+    assert ReplayPriceSource(path).round_open_price(ROUND_START + 10) is None
+
+
+def test_create_reference_source(tmp_path):
+    """测试配置字符串解析"""
+    source = create_reference_source(f"replay:{tmp_path / 'x.csv'}")
+
+    assert isinstance(source, ReplayPriceSource)
+    assert create_reference_source("binance:ethusdt").url.endswith("ethusdt@bookTicker")
+
+    with pytest.raises(ValueError):
+        create_reference_source("unknown")
+
+
+# ========== 开盘价测试 ==========
+
+def test_set_strike_overrides_first_seen(pricer):
+    """测试迟启动时外部设置的开盘价不被第一笔现货价格覆盖"""
+    pricer.set_strike(50000.0, 'round_open')
+    pricer.on_price(50500.0, at(300))
+
+    assert pricer.strike == 50000.0
+    assert pricer.strike_source == 'round_open'
+    assert pricer.fair_probability() > 0.5
+
+
+def test_first_seen_fallback(pricer):
+    """测试未设置开盘价时回退为本轮开始后的第一笔现货价格"""
+    pricer.on_price(50500.0, at(300))
+
+    assert pricer.strike == 50500.0
+    assert pricer.strike_source == 'first_seen'
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def test_binance_round_open_price(monkeypatch):
+    """测试本轮开始时刻的 1 分钟 K 线开盘价"""
+    requests = []
+
+    def fake_get(url, params=None):
+        requests.append(params)
+        return FakeResponse([[params['startTime'], "50012.34", "50100", "49900", "50050", "12.5"]])
+
+    monkeypatch.setattr(http_transport, 'get', fake_get)
+
+    assert BinanceSpotSource("btcusdt").round_open_price(ROUND_START) == 50012.34
+    assert requests == [{'symbol': "BTCUSDT", 'interval': '1m', 'startTime': ROUND_START * 1000, 'limit': 1}]
+
+
+def test_binance_round_open_price_unavailable(monkeypatch):
+    """测试 K 线缺失 / 晚于本轮开始 / 请求失败时返回 None"""
+    source = BinanceSpotSource()
+
+    monkeypatch.setattr(http_transport, 'get', lambda url, params=None: FakeResponse([]))
+    assert source.round_open_price(ROUND_START) is None
+
+    later = [[(ROUND_START + 60) * 1000, "50000"]]
+    monkeypatch.setattr(http_transport, 'get', lambda url, params=None: FakeResponse(later))
+    assert source.round_open_price(ROUND_START) is None
+
+    def failing_get(url, params=None):
+        raise OSError("timeout")
+
+    monkeypatch.setattr(http_transport, 'get', failing_get)
+    assert source.round_open_price(ROUND_START) is None
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,99 @@
+"""
+自适应重新报价调度单元测试
+
+测试范围：
+- 顶档变动超过阈值立即触发
+- 成交 / 外部事件强制触发
+- 最小间隔限制
+- 盘口静止时心跳退避，出现变化后恢复
+
+运行方法：
+    pytest tests/unit/test_requote_scheduler.py -v
+"""
+
+import pytest
+
+from strategies.requote_scheduler import RequoteScheduler
+
+
+MS = 1_000_000
+T0 = 1_000_000 * MS
+
+
+@pytest.fixture
+def scheduler():
+    s = RequoteScheduler(
+        move_threshold=0.01,
+        min_interval_ms=100,
+        base_interval_ms=1000,
+        max_interval_ms=4000,
+    )
+    s.mark_evaluated(T0, 0.48, 0.52, s.check(T0, 0.48, 0.52))
+    return s
+
+
+# ========== 触发测试 ==========
+
+def test_initial_evaluation():
+    """测试首次总是评估"""
+    assert RequoteScheduler().check(T0, 0.48, 0.52) == 'initial'
+
+
+def test_touch_move_triggers(scheduler):
+    """测试顶档变动达到阈值立即触发"""
+    assert scheduler.check(T0 + 200 * MS, 0.485, 0.52) is None
+    assert scheduler.check(T0 + 200 * MS, 0.49, 0.52) == 'move'
+    assert scheduler.check(T0 + 200 * MS, 0.48, 0.51) == 'move'
+
+
+def test_side_disappears_triggers(scheduler):
+    """测试一侧盘口消失触发"""
+    assert scheduler.check(T0 + 200 * MS, None, 0.52) == 'move'
+
+
+def test_min_interval(scheduler):
+    """测试最小间隔内不触发"""
+    assert scheduler.check(T0 + 50 * MS, 0.40, 0.60) is None
+    assert scheduler.check(T0 + 100 * MS, 0.40, 0.60) == 'move'
+
+
+def test_fill_forces(scheduler):
+    """测试成交后立即触发，评估后清除"""
+    scheduler.on_fill()
+    assert scheduler.check(T0 + 200 * MS, 0.48, 0.52) == 'fill'
+
+    scheduler.mark_evaluated(T0 + 200 * MS, 0.48, 0.52, 'fill')
+    assert scheduler.check(T0 + 400 * MS, 0.48, 0.52) is None
+
+
+# ========== 退避测试 ==========
+
+def test_backoff_when_quiet(scheduler):
+    """测试盘口静止时心跳间隔倍增到上限"""
+    now = T0
+    intervals = []
+    for _ in range(4):
+        assert scheduler.check(now + scheduler.interval_ns - MS, 0.48, 0.52) is None
+        now += scheduler.interval_ns
+        reason = scheduler.check(now, 0.48, 0.52)
+        assert reason == 'interval'
+        scheduler.mark_evaluated(now, 0.48, 0.52, reason)
+        intervals.append(scheduler.interval_ms)
+
+    assert intervals == [2000, 4000, 4000, 4000]
+
+
+def test_backoff_resets_on_move(scheduler):
+    """测试出现实质变化后心跳间隔恢复"""
+    scheduler.mark_evaluated(T0 + 1000 * MS, 0.48, 0.52, 'interval')
+    assert scheduler.interval_ms == 2000
+
+    scheduler.mark_evaluated(T0 + 1200 * MS, 0.47, 0.52, 'move')
+    assert scheduler.interval_ms == 1000
+    assert scheduler.counts == {'initial': 1, 'interval': 1, 'move': 1}
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,173 @@
+"""
+跨轮次风险预算单元测试
+
+测试范围：
+- 日亏损 / 总敞口 / 订单数检查
+- 进程重启后继续累计（持久化）
+- 多实例共享汇总
+- 写入节流与 UTC 日切换
+
+运行方法：
+    pytest tests/unit/test_risk_budget.py -v
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from config.risk_config import StrategyRiskConfig
+from strategies.risk_budget import RiskBudget
+
+
+DAY_START = 1_767_225_600  # 2026-01-01 00:00:00 UTC
+
+
+class FakeClock:
+    """可手动设置的 Unix 时钟"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def clock():
+    return FakeClock(DAY_START + 3600)
+
+
+@pytest.fixture
+def limits():
+    return StrategyRiskConfig(
+        max_daily_pnl_loss=Decimal("-10"),
+        max_gross_exposure=Decimal("50"),
+        max_daily_orders=100,
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "risk_budget.sqlite"
+
+
+@pytest.fixture
+def budget(db_path, limits, clock):
+    budget = RiskBudget(db_path, instance="MM-001", limits=limits, clock=clock)
+    yield budget
+    budget.close()
+
+
+# ========== 检查测试 ==========
+
+def test_within_budget(budget):
+    """测试预算充足"""
+    budget.update_round("round-1", pnl=-2.0, gross_exposure=10.0)
+
+    assert budget.check(additional_exposure=5.0, additional_orders=2) is None
+
+
+def test_daily_loss_across_rounds(budget):
+    """测试多轮亏损累计触发日最大亏损"""
+    budget.update_round("round-1", pnl=-6.0)
+    assert budget.check() is None
+
+    budget.update_round("round-2", pnl=-5.0)
+    assert "日最大亏损" in budget.check()
+
+
+def test_update_round_is_absolute(budget):
+    """测试同一轮次重复更新不重复累计"""
+    for pnl in (-1.0, -2.0, -3.0):
+        budget.update_round("round-1", pnl=pnl)
+
+    assert budget.daily_pnl == pytest.approx(-3.0)
+
+
+def test_exposure_limit(budget):
+    """测试总敞口上限（含本次新增）"""
+    budget.update_round("round-1", gross_exposure=45.0)
+
+    assert budget.check(additional_exposure=4.0) is None
+    assert "总敞口" in budget.check(additional_exposure=6.0)
+
+
+def test_order_count_limit(budget):
+    """测试当日订单数上限"""
+    budget.record_orders("round-1", 99)
+
+    assert "订单数" in budget.check(additional_orders=2)
+
+
+def test_no_limits(db_path, clock):
+    """测试未设置限制时总是通过"""
+    budget = RiskBudget(db_path, instance="MM-001", clock=clock)
+    budget.update_round("round-1", pnl=-1000.0)
+
+    assert budget.check() is None
+    budget.close()
+
+
+# ========== 持久化测试 ==========
+
+def test_restart_continues_day(db_path, limits, clock):
+    """测试进程重启（下一轮）后继续累计当日用量"""
+    first = RiskBudget(db_path, instance="MM-001", limits=limits, clock=clock)
+    first.update_round("round-1", pnl=-6.0, gross_exposure=0.0)
+    first.record_orders("round-1", 40)
+    first.close()
+
+    second = RiskBudget(db_path, instance="MM-001", limits=limits, clock=clock)
+    second.update_round("round-2", pnl=-5.0)
+
+    assert second.daily_pnl == pytest.approx(-11.0)
+    assert second.order_count == 40
+    assert second.check() is not None
+    second.close()
+
+
+def test_instances_share_budget(db_path, limits, clock):
+    """测试多个实例共享当日预算"""
+    a = RiskBudget(db_path, instance="MM-001", limits=limits, clock=clock)
+    b = RiskBudget(db_path, instance="MM-002", limits=limits, clock=clock)
+
+    a.update_round("round-1", pnl=-4.0, force=True)
+    b.update_round("round-1", pnl=-7.0, force=True)
+    a.refresh(force=True)
+
+    assert a.daily_pnl == pytest.approx(-11.0)
+    a.close()
+    b.close()
+
+
+def test_flush_throttled(db_path, limits, clock):
+    """测试写入按间隔节流，其他实例在刷新后才能看到"""
+    a = RiskBudget(db_path, instance="MM-001", limits=limits, clock=clock, flush_secs=1.0)
+    b = RiskBudget(db_path, instance="MM-002", limits=limits, clock=clock, refresh_secs=0.0)
+
+    a.update_round("round-1", pnl=-1.0, force=True)
+    a.update_round("round-1", pnl=-3.0)
+    assert b.daily_pnl == pytest.approx(-1.0)
+
+    clock.now += 1.5
+    a.flush()
+    assert b.daily_pnl == pytest.approx(-3.0)
+    a.close()
+    b.close()
+
+
+def test_day_rollover(budget, clock):
+    """测试 UTC 日切换后预算清零"""
+    budget.update_round("round-1", pnl=-9.0)
+
+    clock.now = DAY_START + 86400 + 10
+    assert budget.daily_pnl == pytest.approx(0.0)
+    assert budget.order_count == 0
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,158 @@
+"""
+风险预设单元测试
+
+测试范围：
+- 按 instrument 设置单订单名义价值上限
+- 调试日志默认关闭
+- 导入风险配置不加载 patches 包（不安装补丁）
+- 按名称选择预设
+- 运行时切换预设 / 新增 instrument，策略限制经回调推送
+
+运行方法：
+    pytest tests/unit/test_risk_config.py -v
+"""
+
+import subprocess
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from nautilus_trader.model.identifiers import InstrumentId
+
+from config.risk_config import (
+    DEFAULT_PRESET,
+    RiskPresetController,
+    get_polymarket_risk_config,
+    get_risk_preset,
+)
+
+
+ROUND_1 = "0xaaa-111.POLYMARKET"
+ROUND_2 = "0xbbb-222.POLYMARKET"
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+class FakeRiskEngine:
+    """记录 set_max_notional_per_order 调用"""
+
+    def __init__(self):
+        self.notionals = {}
+
+    def set_max_notional_per_order(self, instrument_id, new_value):
+        self.notionals[instrument_id] = Decimal(str(new_value))
+
+
+# ========== 配置测试 ==========
+
+def test_notional_per_instrument():
+    """测试每个 instrument 都有单订单上限"""
+    config = get_polymarket_risk_config([ROUND_1, InstrumentId.from_str(ROUND_2)], Decimal("10"))
+
+    assert config.max_notional_per_order == {ROUND_1: "10", ROUND_2: "10"}
+
+
+def test_single_instrument_accepted():
+    """测试兼容单个 instrument"""
+    config = get_polymarket_risk_config(ROUND_1)
+
+    assert list(config.max_notional_per_order) == [ROUND_1]
+
+
+def test_import_without_patches():
+    """测试导入风险配置不会加载 patches 包（导入 patches 会安装所有补丁）"""
+    code = "import sys, config.risk_config; print(any(m.split('.')[0] == 'patches' for m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "False"
+
+
+def test_debug_off_by_default(monkeypatch):
+    """测试调试日志默认关闭，可由环境变量开启"""
+    monkeypatch.delenv("RISK_ENGINE_DEBUG", raising=False)
+    assert get_polymarket_risk_config(ROUND_1).debug is False
+
+    monkeypatch.setenv("RISK_ENGINE_DEBUG", "1")
+    assert get_polymarket_risk_config(ROUND_1).debug is True
+
+
+def test_preset_by_name():
+    """测试按名称选择预设"""
+    preset = get_risk_preset(" Moderate ", [ROUND_1])
+
+    assert preset['max_notional_per_order'] == Decimal("25.00")
+    assert preset['risk_engine'].max_notional_per_order[ROUND_1] == "25.00"
+    assert preset['strategy'].max_daily_pnl_loss == Decimal("-50.00")
+
+
+def test_default_preset_small_capital():
+    """测试默认预设为小资金配置（日亏损 3 USDC、库存 20 个）"""
+    preset = get_risk_preset(DEFAULT_PRESET, [ROUND_1])
+
+    assert DEFAULT_PRESET == "small"
+    assert preset['max_notional_per_order'] == Decimal("10.00")
+    assert preset['strategy'].max_daily_pnl_loss == Decimal("-3.00")
+    assert preset['strategy'].max_position_size == Decimal("20")
+
+
+def test_unknown_preset():
+    """测试未知预设"""
+    with pytest.raises(ValueError):
+        get_risk_preset("yolo", [ROUND_1])
+
+
+# ========== 运行时调整测试 ==========
+
+def test_controller_applies_preset():
+    """测试控制器为 instrument 设置上限"""
+    engine = FakeRiskEngine()
+    RiskPresetController(engine, "conservative", [ROUND_1])
+
+    assert engine.notionals == {InstrumentId.from_str(ROUND_1): Decimal("10.00")}
+
+
+def test_controller_add_and_switch():
+    """测试新增 instrument 与切换预设"""
+    engine = FakeRiskEngine()
+    controller = RiskPresetController(engine, "conservative", [ROUND_1])
+
+    controller.add_instruments([ROUND_2, ROUND_1])
+    controller.set_preset("aggressive")
+
+    assert len(controller.instrument_ids) == 2
+    assert set(engine.notionals.values()) == {Decimal("100.00")}
+
+
+def test_reload_from_file(tmp_path):
+    """测试从文件重新加载预设"""
+    engine = FakeRiskEngine()
+    controller = RiskPresetController(engine, "conservative", [ROUND_1])
+    preset_file = tmp_path / "risk_preset"
+
+    preset_file.write_text("moderate\n")
+    assert controller.reload_from_file(str(preset_file)) is True
+    assert controller.reload_from_file(str(preset_file)) is False
+
+    preset_file.write_text("unknown")
+    assert controller.reload_from_file(str(preset_file)) is False
+    assert controller.preset_name == "moderate"
+    assert controller.reload_from_file(str(tmp_path / "missing")) is False
+
+
+def test_switch_pushes_strategy_limits():
+    """测试切换预设时策略限制经回调交给策略"""
+    pushed = []
+    controller = RiskPresetController(FakeRiskEngine(), "small", [ROUND_1], on_strategy_limits=pushed.append)
+    assert pushed == []  # 启动时策略已按预设创建，不重复推送
+
+    controller.set_preset("moderate")
+
+    assert [limits.max_daily_pnl_loss for limits in pushed] == [Decimal("-50.00")]
+    assert pushed[0].max_position_size == Decimal("50")
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,243 @@
+"""
+会话数据目录单元测试
+
+测试范围：
+- 记录器写入时登记会话、关闭时写入行数 / 时间范围
+- 实盘 OrderFilled 事件写入成交记录
+- 按市场 slug 前缀、时间范围、参数哈希查询
+- 只打开时间范围重叠的文件，按行筛选
+- 补录旧数据 / 目录启用之前的会话
+- 结算账本经目录回放
+
+运行方法：
+    pytest tests/unit/test_session_catalog.py -v
+"""
+
+import csv
+import json
+from decimal import Decimal
+
+import pytest
+
+from nautilus_trader.model.currencies import USDC
+from nautilus_trader.model.enums import LiquiditySide, OrderSide, OrderType
+from nautilus_trader.model.events import OrderFilled
+from nautilus_trader.model.identifiers import (
+    AccountId, ClientOrderId, InstrumentId, StrategyId, TradeId, TraderId, VenueOrderId,
+)
+from nautilus_trader.model.objects import Money, Price, Quantity
+from nautilus_trader.core.uuid import UUID4
+
+from strategies.data_recorder import TradeDataRecorder
+from strategies.session_catalog import SessionCatalog, config_hash
+from strategies.settlement_ledger import SettlementLedger, replay_recorder_sessions
+
+
+DAY_START = 1_767_225_600  # 2026-01-01 00:00:00 UTC
+
+CONFIG = {'base_spread': "0.02", 'order_size': 5}
+
+
+def write_csv(path, header, rows):
+    lines = [','.join(header)] + [','.join(str(v) for v in row) for row in rows]
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def write_session(data_dir, session_id, slug, round_start_ts, timestamps, trades=(), **params):
+    """直接写出记录器格式的会话文件（模拟目录启用之前的数据）"""
+    config = dict(CONFIG, **params, instrument_id=f"0x{session_id}-1.POLYMARKET",
+                  round_start_ts=round_start_ts, market_slug=slug)
+    (data_dir / f"config_{session_id}.json").write_text(json.dumps(config))
+    write_csv(
+        data_dir / f"orderbook_{session_id}.csv",
+        ['timestamp', 'mid_price'],
+        [(ts, 0.5) for ts in timestamps],
+    )
+    write_csv(
+        data_dir / f"trades_{session_id}.csv",
+        ['timestamp', 'order_id', 'side', 'price', 'quantity', 'commission'],
+        trades,
+    )
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = SessionCatalog(tmp_path)
+    yield catalog
+    catalog.close()
+
+
+@pytest.fixture
+def indexed(tmp_path, catalog):
+    """三个已补录的会话：两轮 BTC（参数不同）、一轮 ETH"""
+    write_session(tmp_path, "s1", "btc-updown-15m-1767225600", DAY_START, [DAY_START + 10, DAY_START + 800])
+    write_session(tmp_path, "s2", "btc-updown-15m-1767226500", DAY_START + 900,
+                  [DAY_START + 910, DAY_START + 1700], base_spread="0.03")
+    write_session(tmp_path, "s3", "eth-updown-15m-1767226500", DAY_START + 900, [DAY_START + 905])
+    assert catalog.index_directory() == 3
+    return catalog
+
+
+# ========== 写入时登记测试 ==========
+
+def test_recorder_registers_session(tmp_path):
+    """测试记录器 save_config 登记会话，close 写入行数并标记关闭"""
+    recorder = TradeDataRecorder(output_dir=str(tmp_path))
+    recorder.save_config(dict(CONFIG, instrument_id="0xaaa-1.POLYMARKET", round_start_ts=DAY_START,
+                              market_slug="btc-updown-15m-1767225600"))
+    for _ in range(3):
+        recorder.record_orderbook(Decimal("0.5"), Decimal("0.49"), Decimal("0.51"), Decimal("0.02"),
+                                  10.0, Decimal("0.1"), Decimal("0"))
+    recorder.record_trade("O-1", "BUY", Decimal("0.49"), 5, Decimal("0"), Decimal("0"))
+    recorder.close()
+
+    catalog = SessionCatalog(tmp_path)
+    try:
+        [session] = catalog.find(market_slug="btc-updown-15m")
+        assert session['session_id'] == recorder.session_id
+        assert session['closed'] == 1
+        assert session['round_start_ts'] == DAY_START
+        assert session['start_ts'] is not None and session['end_ts'] >= session['start_ts']
+
+        files = catalog.files(recorder.session_id)
+        assert files['orderbook']['rows'] == 3
+        assert files['trades']['rows'] == 1
+        assert files['orders']['rows'] == 0
+    finally:
+        catalog.close()
+
+
+def make_fill(side=OrderSide.BUY, price="0.40", qty="10", commission="0.00000000", ts_ns=DAY_START * 10**9):
+    """构造一个实盘 OrderFilled 事件（commission 为 Money）"""
+    return OrderFilled(
+        TraderId("TRADER-001"), StrategyId("PredictionMarketMMStrategy-001"),
+        InstrumentId.from_str("0xaaa-1.POLYMARKET"), ClientOrderId("O-20260101-000001"),
+        VenueOrderId("0xvenue"), AccountId("POLYMARKET-001"), TradeId("T-1"), None,
+        side, OrderType.LIMIT, Quantity.from_str(qty), Price.from_str(price), USDC,
+        Money.from_str(f"{commission} USDC"), LiquiditySide.MAKER, UUID4(), ts_ns, ts_ns,
+    )
+
+
+def test_record_fill_event(tmp_path):
+    """测试 OrderFilled 写入成交记录，并可被结算账本回放"""
+    recorder = TradeDataRecorder(output_dir=str(tmp_path))
+    recorder.save_config(dict(CONFIG, instrument_id="0xaaa-1.POLYMARKET", round_start_ts=DAY_START))
+    recorder.record_fill(make_fill(commission="0.01000000"))
+    recorder.record_settlement(1.0, "orderbook")
+    recorder.close()
+
+    with open(tmp_path / f"trades_{recorder.session_id}.csv", newline='') as f:
+        [row] = list(csv.DictReader(f))
+    assert row['order_id'] == "O-20260101-000001"
+    assert row['side'] == "BUY"
+    assert Decimal(row['price']) == Decimal("0.40") and Decimal(row['quantity']) == 10
+    assert Decimal(row['commission']) == Decimal("0.01") and Decimal(row['pnl']) == Decimal("-0.01")
+    assert int(row['ts_ns']) == DAY_START * 10**9
+
+    ledger = SettlementLedger(clock=lambda: DAY_START + 3600)
+    assert replay_recorder_sessions(ledger, tmp_path, since_ts=DAY_START) == 1
+    assert ledger.settled_pnl == pytest.approx(6.0 - 0.01)
+
+
+def test_settlement_recorded(tmp_path):
+    """测试结算结果写入目录"""
+    recorder = TradeDataRecorder(output_dir=str(tmp_path))
+    recorder.save_config(dict(CONFIG, instrument_id="0xaaa-1.POLYMARKET"))
+    recorder.record_settlement(1.0, "orderbook")
+    recorder.close()
+
+    catalog = SessionCatalog(tmp_path)
+    try:
+        assert catalog.find()[0]['outcome'] == 1.0
+    finally:
+        catalog.close()
+
+
+def test_config_hash_ignores_round_fields():
+    """测试参数哈希与 instrument / 本轮开始时间 / slug 无关"""
+    a = dict(CONFIG, instrument_id="0xa-1.POLYMARKET", round_start_ts=1, market_slug="a")
+    b = dict(CONFIG, instrument_id="0xb-2.POLYMARKET", round_start_ts=2, market_slug="b")
+    assert config_hash(a) == config_hash(b)
+    assert config_hash(a) != config_hash(dict(a, base_spread="0.03"))
+
+
+# ========== 查询测试 ==========
+
+def test_find_by_market_prefix(indexed):
+    """测试 slug 前缀匹配"""
+    assert indexed.session_ids(market_slug="btc-updown-15m") == ["s1", "s2"]
+    assert indexed.session_ids(market_slug="eth") == ["s3"]
+    assert indexed.session_ids(market_slug="btc_") == []  # 下划线不作为通配符
+
+
+def test_find_by_time_range(indexed):
+    """测试与会话数据时间范围重叠"""
+    assert indexed.session_ids(since=DAY_START + 850) == ["s3", "s2"]
+    assert indexed.session_ids(until=DAY_START + 100) == ["s1"]
+    assert indexed.session_ids(since=DAY_START + 801, until=DAY_START + 904) == []
+
+
+def test_find_by_config_hash(indexed):
+    """测试按参数组合查询"""
+    session = indexed.find(market_slug="btc", limit=1)[0]
+    assert indexed.session_ids(config_hash=session['config_hash']) == ["s1", "s3"]
+
+
+def test_iter_rows_window(indexed):
+    """测试只读取时间窗口内的行"""
+    rows = list(indexed.iter_rows('orderbook', since=DAY_START + 700, until=DAY_START + 906))
+    assert [(r['session_id'], int(r['timestamp'])) for r in rows] == [("s1", DAY_START + 800), ("s3", DAY_START + 905)]
+
+
+def test_iter_files_skips_empty_and_missing(tmp_path, indexed):
+    """测试空文件、已删除的文件不产出"""
+    assert list(indexed.iter_files('trades')) == []
+
+    (tmp_path / "orderbook_s2.csv").unlink()
+    assert [s['session_id'] for s, _ in indexed.iter_files('orderbook')] == ["s1", "s3"]
+
+
+# ========== 补录测试 ==========
+
+def test_index_directory_incremental(tmp_path, indexed):
+    """测试补录只处理新会话"""
+    assert indexed.index_directory() == 0
+
+    write_session(tmp_path, "s4", "btc-updown-15m-1767227400", DAY_START + 1800, [DAY_START + 1810])
+    assert indexed.index_directory() == 1
+    assert indexed.files("s4")['orderbook']['rows'] == 1
+
+
+def test_rescan_open_session(tmp_path, catalog):
+    """测试崩溃未关闭的会话在 rescan 时重新统计"""
+    catalog.register_session("s1", dict(CONFIG, instrument_id="0xs1-1.POLYMARKET"))
+    write_session(tmp_path, "s1", "btc-updown-15m-1767225600", DAY_START, [DAY_START + 10, DAY_START + 20])
+
+    assert catalog.index_directory() == 0
+    assert catalog.index_directory(rescan=True) == 1
+    assert catalog.files("s1")['orderbook']['rows'] == 2
+    assert catalog.find()[0]['closed'] == 0
+
+
+# ========== 回放测试 ==========
+
+def test_ledger_replay_via_catalog(tmp_path, catalog):
+    """测试结算账本经目录只回放本轮开始时间之后的会话"""
+    write_session(tmp_path, "old", "btc-updown-15m-1767224700", DAY_START - 900, [DAY_START - 890])
+    write_session(tmp_path, "s1", "btc-updown-15m-1767225600", DAY_START, [DAY_START + 10],
+                  trades=[(DAY_START + 10, "O-1", "BUY", 0.40, 10, 0)])
+    (tmp_path / "settlement_s1.json").write_text(json.dumps({'outcome': 1.0}))
+
+    ledger = SettlementLedger(clock=lambda: DAY_START + 3600)
+    replayed = replay_recorder_sessions(ledger, tmp_path, since_ts=DAY_START, catalog=catalog)
+
+    assert replayed == 1
+    assert ledger.settled_pnl == pytest.approx(6.0)
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
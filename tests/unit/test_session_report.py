@@ -0,0 +1,168 @@
+"""
+会话汇总报表单元测试
+
+测试范围：
+- 单个会话：成交率、已实现价差、库存周转、回撤、持仓时间
+- 分块读取与整体读取结果一致
+- 权益路径拼接的最大回撤
+- 按 市场 × 日 分组，进程池与顺序计算结果一致
+
+运行方法：
+    pytest tests/unit/test_session_report.py -v
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from strategies.session_catalog import SessionCatalog
+from strategies.session_report import EquityPath, build_report, main, session_stats
+
+
+DAY_START = 1_767_225_600  # 2026-01-01 00:00:00 UTC
+NS = 1_000_000_000
+
+
+def write_csv(path, header, rows):
+    lines = [','.join(header)] + [','.join(str(v) for v in row) for row in rows]
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def write_session(data_dir, session_id, slug, round_start_ts, outcome=None):
+    """
+    一轮：中间价 0.50 0.50 0.55 0.45 0.50（每秒一条），
+    t=1 买入 10 @0.48，t=3 卖出 10 @0.52；提交 4 个订单
+    """
+    t0 = round_start_ts * NS
+    (data_dir / f"config_{session_id}.json").write_text(json.dumps({
+        'instrument_id': f"0x{session_id}-1.POLYMARKET", 'round_start_ts': round_start_ts, 'market_slug': slug,
+    }))
+    write_csv(
+        data_dir / f"orderbook_{session_id}.csv",
+        ['timestamp', 'mid_price', 'ts_ns', 'best_bid', 'best_ask'],
+        [(round_start_ts + i, mid, t0 + i * NS, mid - 0.01, mid + 0.01) for i, mid in enumerate([0.50, 0.50, 0.55, 0.45, 0.50])],
+    )
+    write_csv(
+        data_dir / f"trades_{session_id}.csv",
+        ['timestamp', 'order_id', 'side', 'price', 'quantity', 'commission', 'pnl', 'ts_ns'],
+        [
+            (round_start_ts + 1, "O-1", "BUY", 0.48, 10, 0, 0, t0 + 1 * NS),
+            (round_start_ts + 3, "O-2", "SELL", 0.52, 10, 0, 0, t0 + 3 * NS),
+        ],
+    )
+    write_csv(
+        data_dir / f"orders_{session_id}.csv",
+        ['timestamp', 'order_id', 'side', 'price', 'quantity', 'order_type', 'status'],
+        [(round_start_ts, f"O-{i}", "BUY", 0.5, 10, "LIMIT", "SUBMITTED") for i in range(1, 5)],
+    )
+    if outcome is not None:
+        (data_dir / f"settlement_{session_id}.json").write_text(json.dumps({'outcome': outcome}))
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def data_dir(tmp_path):
+    write_session(tmp_path, "s1", "btc-updown-15m-1767225600", DAY_START)
+    write_session(tmp_path, "s2", "btc-updown-15m-1767226500", DAY_START + 900)
+    write_session(tmp_path, "s3", "btc-updown-15m-1767312000", DAY_START + 86400)
+    write_session(tmp_path, "s4", "eth-updown-15m-1767225600", DAY_START)
+    return tmp_path
+
+
+@pytest.fixture
+def sessions(data_dir):
+    catalog = SessionCatalog(data_dir)
+    catalog.index_directory()
+    yield catalog.find()
+    catalog.close()
+
+
+# ========== 单个会话测试 ==========
+
+def test_session_metrics(data_dir):
+    """测试单个会话的各项指标"""
+    stats = session_stats(data_dir, "s1").to_dict()
+
+    assert stats['fills'] == 2
+    assert stats['fill_rate'] == pytest.approx(0.5)
+    assert stats['realized_spread'] == pytest.approx(0.045)  # (10×0.02 + 10×0.07) / 20
+    assert stats['inventory_turnover'] == pytest.approx(2.0)
+    assert stats['pnl'] == pytest.approx(0.4)
+    assert stats['max_drawdown'] == pytest.approx(1.0)      # 峰值 0.7（t=2）→ -0.3（t=3）
+    assert stats['time_in_market'] == pytest.approx(0.5)    # t=1..3 持仓，共 4 秒
+
+
+def test_chunked_matches_whole(data_dir):
+    """测试分块读取（每块 2 行）与整体读取结果一致"""
+    assert session_stats(data_dir, "s1", chunk_rows=2).to_dict() == session_stats(data_dir, "s1").to_dict()
+
+
+def test_settlement_marks_final_position(tmp_path):
+    """测试结算后剩余持仓按 outcome 计价"""
+    write_session(tmp_path, "s1", "btc-updown-15m-1767225600", DAY_START)
+    write_csv(
+        tmp_path / "trades_s1.csv",
+        ['timestamp', 'order_id', 'side', 'price', 'quantity', 'ts_ns'],
+        [(DAY_START + 1, "O-1", "BUY", 0.48, 10, (DAY_START + 1) * NS)],
+    )
+
+    stats = session_stats(tmp_path, "s1", outcome=1.0).to_dict()
+    assert stats['pnl'] == pytest.approx(5.2)
+    assert stats['settled'] == 1
+
+
+# ========== 合并测试 ==========
+
+def test_equity_path_concatenation():
+    """测试两段路径拼接的最大回撤与整体计算一致"""
+    rng = np.random.default_rng(0)
+    first, second = rng.normal(size=50).cumsum(), rng.normal(size=50).cumsum()
+
+    a, b, whole = EquityPath(), EquityPath(), EquityPath()
+    a.update_many(first)
+    b.update_many(second)
+    whole.update_many(np.concatenate([first, first[-1] + second]))
+    combined = a.then(b)
+
+    assert combined.max_drawdown == pytest.approx(whole.max_drawdown)
+    assert combined.final == pytest.approx(whole.final)
+    assert combined.peak == pytest.approx(whole.peak)
+
+
+def test_group_by_market_and_day(data_dir, sessions):
+    """测试按 市场 × UTC 日 分组"""
+    report = build_report(data_dir, sessions, workers=1)
+
+    assert sorted(report['by_market_day']) == [
+        ("btc-updown-15m", "2026-01-01"), ("btc-updown-15m", "2026-01-02"), ("eth-updown-15m", "2026-01-01"),
+    ]
+    assert report['by_market_day'][("btc-updown-15m", "2026-01-01")].sessions == 2
+    assert report['by_market']["btc-updown-15m"].fills == 6
+    assert report['total'].to_dict()['pnl'] == pytest.approx(1.6)
+
+
+def test_process_pool_matches_sequential(data_dir, sessions):
+    """测试进程池与顺序计算结果一致"""
+    sequential = build_report(data_dir, sessions, workers=1)
+    parallel = build_report(data_dir, sessions, workers=2)
+
+    assert parallel['total'].to_dict() == sequential['total'].to_dict()
+    assert {k: v.to_dict() for k, v in parallel['by_market'].items()} == \
+        {k: v.to_dict() for k, v in sequential['by_market'].items()}
+
+
+def test_cli_json(data_dir, capsys):
+    """测试命令行按市场筛选并输出 JSON"""
+    main([str(data_dir), "--market", "eth", "--workers", "1", "--json"])
+    report = json.loads(capsys.readouterr().out)
+
+    assert list(report['by_market']) == ["eth-updown-15m"]
+    assert report['total']['sessions'] == 1
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
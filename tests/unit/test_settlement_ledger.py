@@ -0,0 +1,208 @@
+"""
+结算账本单元测试
+
+测试范围：
+- 成交现金流与标记价格计价
+- 到期按 0 / 1 结算
+- 跨轮次当日盈亏与 UTC 日切换
+- 结算结果查询（Gamma 数据解析、静态来源、查询失败交给 on_error）
+- 记录器输出回放
+
+运行方法：
+    pytest tests/unit/test_settlement_ledger.py -v
+"""
+
+import json
+from decimal import Decimal
+
+import pytest
+
+from strategies.data_recorder import TradeDataRecorder
+from strategies.settlement_ledger import (
+    GammaResolutionSource,
+    SettlementLedger,
+    StaticResolutionSource,
+    parse_instrument_id,
+    replay_recorder_sessions,
+)
+
+
+ROUND_1 = "0xaaa-111.POLYMARKET"
+ROUND_2 = "0xbbb-222.POLYMARKET"
+DAY_START = 1_767_225_600  # 2026-01-01 00:00:00 UTC
+
+
+class FakeClock:
+    """可手动设置的 Unix 时钟"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def clock():
+    return FakeClock(DAY_START + 3600)
+
+
+@pytest.fixture
+def ledger(clock):
+    return SettlementLedger(clock=clock)
+
+
+# ========== 计价测试 ==========
+
+def test_round_trip_realized(ledger):
+    """测试买卖平仓后的盈亏"""
+    ledger.on_fill(ROUND_1, True, 0.40, 10)
+    ledger.on_fill(ROUND_1, False, 0.45, 10, fee=0.01)
+
+    assert ledger.daily_pnl == pytest.approx(0.49)
+    assert ledger.position(ROUND_1) == 0
+
+
+def test_mark_to_market(ledger):
+    """测试未结算持仓按标记价格计价"""
+    ledger.on_fill(ROUND_1, True, 0.40, 10)
+    ledger.mark(ROUND_1, 0.30)
+
+    assert ledger.daily_pnl == pytest.approx(-1.0)
+    assert ledger.open_pnl == pytest.approx(-1.0)
+
+
+def test_settlement_at_one(ledger):
+    """测试到期剩余库存按 1 结算"""
+    ledger.on_fill(ROUND_1, True, 0.40, 10)
+    pnl = ledger.settle(ROUND_1, 1.0)
+
+    assert pnl == pytest.approx(6.0)
+    assert ledger.settled_pnl == pytest.approx(6.0)
+    assert ledger.open_pnl == pytest.approx(0.0)
+
+
+def test_settlement_at_zero_short(ledger):
+    """测试卖出的库存到期归零"""
+    ledger.on_fill(ROUND_1, False, 0.60, 5)
+
+    assert ledger.settle(ROUND_1, 0.0) == pytest.approx(3.0)
+
+
+def test_settle_unknown_key(ledger):
+    """测试未知 condition 结算返回 None"""
+    assert ledger.settle("unknown", 1.0) is None
+
+
+# ========== 跨轮次测试 ==========
+
+def test_daily_pnl_across_rounds(ledger):
+    """测试当日盈亏累计多轮"""
+    ledger.on_fill(ROUND_1, True, 0.50, 10)
+    ledger.settle(ROUND_1, 0.0)
+    ledger.on_fill(ROUND_2, True, 0.50, 10)
+    ledger.mark(ROUND_2, 0.60)
+
+    assert ledger.daily_pnl == pytest.approx(-5.0 + 1.0)
+
+
+def test_day_rollover(ledger, clock):
+    """测试 UTC 日切换：已结算清零，未结算持仓以切换时的价值为基线"""
+    ledger.on_fill(ROUND_1, True, 0.50, 10)
+    ledger.settle(ROUND_1, 0.0)
+    ledger.on_fill(ROUND_2, True, 0.50, 10)
+    ledger.mark(ROUND_2, 0.60)
+
+    clock.now = DAY_START + 86400 + 60
+    assert ledger.daily_pnl == pytest.approx(0.0)
+
+    ledger.settle(ROUND_2, 1.0)
+    assert ledger.daily_pnl == pytest.approx(4.0)
+
+
+def test_unresolved_respects_expiry(ledger, clock):
+    """测试到期前不查询结算结果"""
+    ledger.open(ROUND_1, expiry_ts=clock.now + 600)
+    assert ledger.unresolved() == []
+
+    clock.now += 601
+    assert ledger.unresolved() == [ROUND_1]
+
+
+def test_poll_books_resolved(ledger, clock):
+    """测试轮询结算结果"""
+    ledger.open(ROUND_1, expiry_ts=clock.now - 1)
+    ledger.on_fill(ROUND_1, True, 0.20, 10)
+    ledger.open(ROUND_2, expiry_ts=clock.now - 1)
+
+    booked = ledger.poll(StaticResolutionSource({ROUND_1: 1.0}))
+
+    assert booked == {ROUND_1: pytest.approx(8.0)}
+    assert ledger.unresolved() == [ROUND_2]
+
+
+def test_poll_reports_errors(ledger, clock):
+    """测试查询失败交给 on_error，该 condition 保持未结算"""
+    class FailingSource:
+        def fetch_outcome(self, instrument_id):
+            raise ConnectionError("gamma timeout")
+
+    ledger.open(ROUND_1, expiry_ts=clock.now - 1)
+    errors = []
+
+    assert ledger.poll(FailingSource(), on_error=errors.append) == {}
+    assert len(errors) == 1
+    assert errors[0].startswith("[LEDGER]") and ROUND_1 in errors[0] and "gamma timeout" in errors[0]
+    assert ledger.unresolved() == [ROUND_1]
+
+
+# ========== 结算结果来源测试 ==========
+
+def test_parse_instrument_id():
+    """测试解析 condition / token"""
+    assert parse_instrument_id(ROUND_1) == ("0xaaa", "111")
+
+
+def test_gamma_outcome_parsing():
+    """测试 Gamma 市场数据解析"""
+    market = {'closed': True, 'clobTokenIds': '["111", "222"]', 'outcomePrices': '["0", "1"]'}
+
+    assert GammaResolutionSource.outcome_from_market(market, "111") == 0.0
+    assert GammaResolutionSource.outcome_from_market(market, "222") == 1.0
+    assert GammaResolutionSource.outcome_from_market({**market, 'closed': False}, "111") is None
+    assert GammaResolutionSource.outcome_from_market(
+        {**market, 'outcomePrices': '["0.5", "0.5"]'}, "111"
+    ) is None
+
+
+# ========== 回放测试 ==========
+
+def test_replay_recorder_sessions(tmp_path, clock):
+    """测试从记录器输出重建之前几轮的盈亏"""
+    settled = TradeDataRecorder(output_dir=str(tmp_path))
+    settled.session_id = "s1"
+    settled.trades_file = tmp_path / "trades_s1.csv"
+    settled.settlement_file = tmp_path / "settlement_s1.json"
+    settled.config_file = tmp_path / "config_s1.json"
+    settled._init_csv_files()
+    settled.save_config({'instrument_id': ROUND_1, 'round_start_ts': DAY_START + 60})
+    settled.record_trade("O-1", "BUY", Decimal("0.40"), 10, Decimal("0"), Decimal("0"))
+    settled.record_settlement(1.0, "orderbook")
+
+    (tmp_path / "config_s2.json").write_text(json.dumps({'instrument_id': ROUND_2, 'round_start_ts': DAY_START + 960}))
+    (tmp_path / "config_old.json").write_text(json.dumps({'instrument_id': "0xold-1.POLYMARKET", 'round_start_ts': DAY_START - 900}))
+
+    ledger = SettlementLedger(clock=clock)
+    replayed = replay_recorder_sessions(ledger, tmp_path, since_ts=DAY_START)
+
+    assert replayed == 2
+    assert ledger.settled_pnl == pytest.approx(6.0)
+    assert ledger.unresolved() == [ROUND_2]
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
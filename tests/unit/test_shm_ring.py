@@ -0,0 +1,118 @@
+"""
+共享内存环形缓冲区单元测试
+
+测试范围：
+- 写入 / 读出与顺序
+- 环绕（wrap-around）
+- 缓冲区满时丢弃计数
+- 另一个映射（附加方）可见
+
+运行方法：
+    pytest tests/unit/test_shm_ring.py -v
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from strategies.shm_ring import (
+    EVENT_BOOK,
+    MARKET_EVENT_DTYPE,
+    ORDER_REQUEST_DTYPE,
+    ShmRing,
+)
+
+
+def book(slot, ts_ns, bid=0.48, ask=0.52):
+    return (EVENT_BOOK, slot, ts_ns, bid, ask, 10.0, 10.0, 0.0, 0.0)
+
+
+@pytest.fixture
+def ring():
+    ring = ShmRing.create(MARKET_EVENT_DTYPE, capacity=4)
+    yield ring
+    ring.close()
+
+
+# ========== 读写测试 ==========
+
+def test_push_pop_order(ring):
+    """测试按写入顺序读出"""
+    for i in range(3):
+        assert ring.push(book(i, 100 + i))
+
+    records = ring.pop_many()
+
+    assert list(records['slot']) == [0, 1, 2]
+    assert list(records['ts_ns']) == [100, 101, 102]
+    assert len(ring) == 0
+
+
+def test_pop_empty(ring):
+    """测试空缓冲区返回空数组"""
+    records = ring.pop_many()
+
+    assert len(records) == 0
+    assert records.dtype == MARKET_EVENT_DTYPE
+
+
+def test_wrap_around(ring):
+    """测试多次写满读空后的环绕"""
+    seen = []
+    for i in range(10):
+        ring.push(book(i, i))
+        if i % 3 == 2:
+            seen.extend(ring.pop_many()['slot'])
+    seen.extend(ring.pop_many()['slot'])
+
+    assert seen == list(range(10))
+
+
+def test_full_drops(ring):
+    """测试缓冲区满时丢弃新记录并计数"""
+    results = [ring.push(book(i, i)) for i in range(6)]
+
+    assert results == [True] * 4 + [False] * 2
+    assert ring.dropped == 2
+    assert list(ring.pop_many(max_items=2)['slot']) == [0, 1]
+    assert ring.push(book(9, 9))
+    assert list(ring.pop_many()['slot']) == [2, 3, 9]
+
+
+def test_nan_touch(ring):
+    """测试缺失的顶档以 NaN 传递"""
+    ring.push(book(0, 1, bid=math.nan))
+
+    assert math.isnan(ring.pop_many()['best_bid'][0])
+
+
+# ========== 共享测试 ==========
+
+def test_attach_sees_writes():
+    """测试附加方读到创建方写入的记录，读序号对双方可见"""
+    writer = ShmRing.create(ORDER_REQUEST_DTYPE, capacity=8)
+    reader = ShmRing.attach(writer.name, ORDER_REQUEST_DTYPE)
+
+    writer.push((1, 3, 123, 0.49, 0.51, 5.0))
+    records = reader.pop_many()
+
+    assert reader.capacity == 8
+    assert records['slot'][0] == 3
+    assert np.isclose(records['ask'][0], 0.51)
+    assert len(writer) == 0
+
+    reader.close()
+    writer.close()
+
+
+def test_invalid_capacity():
+    """测试容量必须为正数"""
+    with pytest.raises(ValueError):
+        ShmRing.create(MARKET_EVENT_DTYPE, capacity=0)
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
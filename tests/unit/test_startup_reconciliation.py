@@ -0,0 +1,187 @@
+"""
+启动对账单元测试
+
+测试范围：
+- 未结订单按市场分组，其他市场的订单只计数不处理
+- 近期成交按市场查询（回看窗口）
+- 遗留订单按批撤销，汇总撤销 / 未撤销结果
+- 单个市场 / 单批失败不影响其他市场
+- 限流回调
+
+运行方法：
+    pytest tests/unit/test_startup_reconciliation.py -v
+"""
+
+import threading
+
+import pytest
+
+from strategies.startup_reconciliation import CANCEL, QUERY, StartupReconciler
+
+
+MARKET_A = ("0xaaa", "111")
+MARKET_B = ("0xbbb", "222")
+OTHER = ("0xccc", "333")
+
+
+def order(order_id, market):
+    return {'id': order_id, 'market': market[0], 'asset_id': market[1]}
+
+
+class FakeClobClient:
+    """记录调用的 ClobClient 替身（get_orders / get_trades / cancel_orders）"""
+
+    def __init__(self, orders=(), trades=None, failing_markets=(), reject=()):
+        self.orders = list(orders)
+        self.trades = trades or {}
+        self.failing_markets = set(failing_markets)
+        self.reject = set(reject)
+        self.trade_params = []
+        self.cancel_batches = []
+        self._lock = threading.Lock()
+
+    def get_orders(self):
+        return list(self.orders)
+
+    def get_trades(self, params):
+        with self._lock:
+            self.trade_params.append(params)
+        if params.market in self.failing_markets:
+            raise RuntimeError("HTTP 500")
+        return list(self.trades.get(params.market, []))
+
+    def cancel_orders(self, order_ids):
+        with self._lock:
+            self.cancel_batches.append(list(order_ids))
+        return {
+            'canceled': [i for i in order_ids if i not in self.reject],
+            'not_canceled': {i: "order not found" for i in order_ids if i in self.reject},
+        }
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def orders():
+    return (
+        [order(f"A{i}", MARKET_A) for i in range(4)]
+        + [order("B0", MARKET_B)]
+        + [order("X0", OTHER)]
+    )
+
+
+def make_reconciler(client, **kwargs):
+    kwargs.setdefault('clock', lambda: 10_000.0)
+    return StartupReconciler(client, **kwargs)
+
+
+# ========== 分组测试 ==========
+
+def test_groups_open_orders_by_market(orders):
+    """测试未结订单按市场分组，其他市场只计数"""
+    client = FakeClobClient(orders)
+    report = make_reconciler(client).run([MARKET_A, MARKET_B], cancel_orphans=False)
+
+    assert [o['id'] for o in report.open_orders[MARKET_A]] == ["A0", "A1", "A2", "A3"]
+    assert [o['id'] for o in report.open_orders[MARKET_B]] == ["B0"]
+    assert report.other_open_orders == 1
+    assert report.orphan_count == 5
+    assert client.cancel_batches == []
+
+
+def test_recent_trades_lookback():
+    """测试每个市场一个成交查询，after = 当前 - 回看窗口"""
+    client = FakeClobClient(trades={MARKET_A[0]: [{'id': 't1'}]})
+    report = make_reconciler(client, trade_lookback_secs=600).run([MARKET_A, MARKET_B])
+
+    assert {(p.market, p.asset_id) for p in client.trade_params} == {MARKET_A, MARKET_B}
+    assert {p.after for p in client.trade_params} == {9_400}
+    assert report.recent_trades[MARKET_A] == [{'id': 't1'}]
+    assert report.recent_trades[MARKET_B] == []
+
+
+# ========== 撤单测试 ==========
+
+def test_cancel_in_batches(orders):
+    """测试遗留订单按批撤销，不撤销其他市场的订单"""
+    client = FakeClobClient(orders)
+    report = make_reconciler(client, cancel_batch_size=2).run([MARKET_A, MARKET_B])
+
+    assert sorted(len(batch) for batch in client.cancel_batches) == [1, 2, 2]
+    assert sorted(report.canceled) == ["A0", "A1", "A2", "A3", "B0"]
+    assert "X0" not in sum(client.cancel_batches, [])
+
+
+def test_not_canceled_collected(orders):
+    """测试交易所拒绝撤销的订单（如已成交）汇总到 not_canceled"""
+    client = FakeClobClient(orders, reject={"A1"})
+    report = make_reconciler(client).run([MARKET_A])
+
+    assert sorted(report.canceled) == ["A0", "A2", "A3"]
+    assert report.not_canceled == {"A1": "order not found"}
+
+
+def test_failed_batch_recorded(orders):
+    """测试整批撤单请求失败时记录错误，订单计入 not_canceled"""
+    client = FakeClobClient(orders)
+
+    def fail(order_ids):
+        raise RuntimeError("HTTP 503")
+
+    client.cancel_orders = fail
+    report = make_reconciler(client).run([MARKET_B])
+
+    assert report.not_canceled == {"B0": "HTTP 503"}
+    assert len(report.errors) == 1
+
+
+# ========== 错误隔离测试 ==========
+
+def test_market_failure_isolated(orders):
+    """测试单个市场成交查询失败不影响其他市场和撤单"""
+    client = FakeClobClient(orders, trades={MARKET_B[0]: [{'id': 't2'}]}, failing_markets={MARKET_A[0]})
+    report = make_reconciler(client).run([MARKET_A, MARKET_B])
+
+    assert report.recent_trades[MARKET_A] == []
+    assert report.recent_trades[MARKET_B] == [{'id': 't2'}]
+    assert len(report.errors) == 1
+    assert len(report.canceled) == 5
+
+
+def test_open_orders_failure_skips_cancel():
+    """测试未结订单查询失败时不撤单"""
+    client = FakeClobClient()
+
+    def fail():
+        raise RuntimeError("timeout")
+
+    client.get_orders = fail
+    report = make_reconciler(client).run([MARKET_A])
+
+    assert report.orphan_count == 0
+    assert client.cancel_batches == []
+    assert "未结订单查询失败" in report.errors[0]
+
+
+# ========== 限流测试 ==========
+
+def test_throttle_called_per_request(orders):
+    """测试每个请求前调用限流回调"""
+    calls = []
+    lock = threading.Lock()
+
+    def throttle(kind):
+        with lock:
+            calls.append(kind)
+
+    client = FakeClobClient(orders)
+    make_reconciler(client, cancel_batch_size=3, throttle=throttle).run([MARKET_A, MARKET_B])
+
+    assert calls.count(QUERY) == 3   # 未结订单 1 次 + 每个市场成交 1 次
+    assert calls.count(CANCEL) == 2  # 5 个订单，每批 3 个
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
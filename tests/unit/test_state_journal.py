@@ -0,0 +1,191 @@
+"""
+策略状态日志单元测试
+
+测试范围：
+- 关键记录立即落盘，其余按条数 / 间隔合并落盘
+- 回放：未结订单、价格历史、本轮开盘价、正常停止标记
+- 崩溃时写了一半的最后一行
+- 压缩为 snapshot 后回放结果不变
+- 过期日志清理
+
+运行方法：
+    pytest tests/unit/test_state_journal.py -v
+"""
+
+import os
+import time
+
+import pytest
+
+from strategies.state_journal import JournalState, StateJournal, journal_path, prune_journals
+
+
+class FakeClock:
+    """可控的单调时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def lines(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return journal_path(tmp_path, "0xabc-123.POLYMARKET")
+
+
+@pytest.fixture
+def journal(path, clock):
+    journal = StateJournal(path, flush_interval_ms=200, max_batch=3, fsync=False, clock=clock)
+    yield journal
+    journal.close(clean=False)
+
+
+# ========== 写入测试 ==========
+
+def test_critical_record_flushed_immediately(journal, path):
+    """测试关键记录立即落盘"""
+    journal.append('quote', critical=True, bid=0.48, ask=0.52, orders=['O-1', 'O-2'])
+
+    assert len(lines(path)) == 1
+    assert journal.flushes == 1
+
+
+def test_batched_by_interval(journal, path, clock):
+    """测试非关键记录在间隔内合并，超过间隔后落盘"""
+    journal.append('tick', tick={'ts': 1, 'mid': 0.5})
+    clock.now = 0.1
+    journal.maybe_flush()
+    assert lines(path) == []
+
+    clock.now = 0.2
+    journal.maybe_flush()
+    assert len(lines(path)) == 1
+
+
+def test_batched_by_size(journal, path):
+    """测试待写记录达到 max_batch 时落盘"""
+    for i in range(3):
+        journal.append('tick', tick={'ts': i, 'mid': 0.5})
+
+    assert len(lines(path)) == 3
+    assert journal.flushes == 1
+
+
+# ========== 回放测试 ==========
+
+def test_replay_live_orders(journal, path):
+    """测试提交 → 接受 → 终结后的未结订单"""
+    journal.append('round', instrument_id="X", round_start_ts=100, market_start_time=123.0)
+    journal.append('quote', critical=True, bid=0.48, ask=0.52, orders=['O-1', 'O-2'])
+    journal.append('accepted', order='O-1', venue_order_id='0xv1')
+    journal.append('accepted', order='O-2', venue_order_id='0xv2')
+    journal.append('closed', order='O-2')
+    journal.flush()
+
+    state = StateJournal.replay(path)
+
+    assert state.market_start_time == 123.0
+    assert state.live_orders == {'O-1': '0xv1'}
+    assert state.venue_order_ids() == {'0xv1'}
+    assert state.last_quote == (0.48, 0.52)
+    assert not state.clean_shutdown
+
+
+def test_replay_clean_shutdown(journal, path):
+    """测试正常停止标记；之后再次启动写入新记录则不再是正常停止"""
+    journal.close()
+    assert StateJournal.replay(path).clean_shutdown
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type":"round","market_start_time":1.0}\n')
+    assert not StateJournal.replay(path).clean_shutdown
+
+
+def test_replay_skips_torn_tail(journal, path):
+    """测试崩溃时写了一半的最后一行被跳过"""
+    journal.append('tick', critical=True, tick={'ts': 1, 'mid': 0.5})
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type":"tick","tick":{"ts":2,')
+
+    state = StateJournal.replay(path)
+    assert list(state.ticks) == [{'ts': 1, 'mid': 0.5}]
+
+
+def test_ticks_bounded(path):
+    """测试价格历史有上限（只保留最近的）"""
+    state = JournalState(max_ticks=2)
+    for i in range(5):
+        state.apply({'type': 'tick', 'tick': {'ts': i}})
+
+    assert [t['ts'] for t in state.ticks] == [3, 4]
+
+
+def test_replay_missing_file(tmp_path):
+    """测试本轮首次启动（无日志）"""
+    assert StateJournal.replay(tmp_path / "missing.jsonl").is_empty
+
+
+# ========== 恢复测试 ==========
+
+def test_recover_compacts(journal, path):
+    """测试恢复时压缩为一条 snapshot，回放结果不变，之后继续追加"""
+    journal.append('round', instrument_id="X", round_start_ts=100, market_start_time=123.0)
+    journal.append('quote', critical=True, bid=0.48, ask=0.52, orders=['O-1'])
+    journal.append('accepted', order='O-1', venue_order_id='0xv1')
+    for i in range(3):
+        journal.append('tick', tick={'ts': i, 'mid': 0.5})
+    journal.append('trade', trade={'price': 0.5, 'mid': 0.5, 'ts_ns': 7})
+    journal.append('strike', critical=True, strike=50012.34, source='round_open')
+    journal.close(clean=False)
+
+    recovered, state = StateJournal.recover(path, fsync=False)
+    try:
+        assert len(lines(path)) == 1
+        assert (state.strike, state.strike_source) == (50012.34, 'round_open')
+        assert state.live_orders == {'O-1': '0xv1'}
+        assert len(state.ticks) == 3
+        assert list(state.trades) == [{'price': 0.5, 'mid': 0.5, 'ts_ns': 7}]
+
+        recovered.append('closed', critical=True, order='O-1')
+        again = StateJournal.replay(path)
+        assert again.live_orders == {}
+        assert again.market_start_time == 123.0
+        assert again.strike == 50012.34
+        assert len(again.ticks) == 3
+    finally:
+        recovered.close()
+
+
+# ========== 文件管理测试 ==========
+
+def test_prune_old_journals(tmp_path):
+    """测试清理过期日志，保留当前轮次"""
+    old = journal_path(tmp_path, "old")
+    current = journal_path(tmp_path, "current")
+    for p in (old, current):
+        p.write_text("")
+        os.utime(p, (time.time() - 2 * 86400,) * 2)
+
+    assert prune_journals(tmp_path, keep=[current]) == 1
+    assert not old.exists()
+    assert current.exists()
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
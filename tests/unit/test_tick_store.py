@@ -0,0 +1,172 @@
+"""
+盘口时间序列缓冲单元测试
+
+测试范围：
+- 环形写入与容量
+- 零拷贝窗口视图（跨越环形边界）
+- 向量化查询（mean / std / returns / ewma / since）
+- 最新一行更新
+- 策略写入价格历史与波动率计算（MarketMakingStrategy 的方法直接作用于 TickStore）
+
+运行方法：
+    pytest tests/unit/test_tick_store.py -v
+"""
+
+import math
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from strategies.base_strategy import BaseStrategy
+from strategies.book_features import OrderBookFeatures
+from strategies.market_making_strategy import MarketMakingStrategy
+from strategies.tick_store import TickStore
+
+
+# ========== Fixtures ==========
+
+@pytest.fixture
+def store():
+    """容量 8，写入 12 行（已环绕）"""
+    store = TickStore(capacity=8)
+    for i in range(12):
+        store.append(ts_ns=i * 1_000, mid=0.40 + i * 0.01, best_bid=0.39 + i * 0.01, best_ask=0.41 + i * 0.01)
+    return store
+
+
+# ========== 写入测试 ==========
+
+def test_capacity_bounded(store):
+    """测试超出容量只保留最近的行"""
+    assert len(store) == 8
+    assert store.column('ts')[0] == 4_000
+    assert store.last('ts') == 11_000
+
+
+def test_window_chronological_across_wrap(store):
+    """测试窗口跨越环形边界时仍按时间顺序"""
+    mids = store.column('mid', 5)
+
+    np.testing.assert_allclose(mids, [0.47, 0.48, 0.49, 0.50, 0.51])
+
+
+def test_window_is_zero_copy_view(store):
+    """测试窗口是底层数组的只读视图"""
+    view = store.column('mid', 6)
+
+    assert np.shares_memory(view, store._columns['mid'])
+    with pytest.raises(ValueError):
+        view[0] = 1.0
+
+
+def test_window_larger_than_count():
+    """测试窗口大于已有行数"""
+    store = TickStore(capacity=8)
+    store.append(1, 0.5)
+
+    assert len(store.column('mid', 100)) == 1
+
+
+def test_update_last(store):
+    """测试写入最新一行的报价"""
+    store.update_last(our_bid=0.48, our_ask=0.54)
+
+    assert store.last('our_bid') == 0.48
+    assert math.isnan(store.column('our_bid', 2)[0])
+
+
+def test_invalid_capacity():
+    """测试非法容量"""
+    with pytest.raises(ValueError):
+        TickStore(capacity=1)
+
+
+# ========== 查询测试 ==========
+
+def test_mean_std(store):
+    """测试均值与总体标准差"""
+    mids = np.array([0.48, 0.49, 0.50, 0.51])
+
+    assert store.mean('mid', 4) == pytest.approx(mids.mean())
+    assert store.std('mid', 4) == pytest.approx(mids.std())
+
+
+def test_returns(store):
+    """测试对数收益率"""
+    returns = store.returns('mid', 3)
+
+    np.testing.assert_allclose(returns, np.diff(np.log([0.49, 0.50, 0.51])))
+
+
+def test_ewma_weights_recent(store):
+    """测试 EWMA 偏向最新值"""
+    assert store.ewma('mid', 8, half_life=1.0) > store.mean('mid', 8)
+
+
+def test_since(store):
+    """测试按时间取样本数"""
+    assert store.since(9_000) == 3
+    assert store.since(0) == 8
+
+
+def test_empty_store():
+    """测试空缓冲"""
+    store = TickStore(capacity=4)
+
+    assert store.last() is None
+    assert math.isnan(store.mean())
+    assert len(store.returns()) == 0
+
+
+# ========== 策略集成测试 ==========
+
+def make_strategy(capacity=64, volatility_window=20):
+    """只带价格历史 / 波动率方法用到的属性（Strategy 不能脱离 TradingNode 实例化）"""
+    strategy = SimpleNamespace(
+        tick_store=TickStore(capacity=capacity),
+        book_features=OrderBookFeatures(),
+        clock=SimpleNamespace(timestamp_ns=lambda: 1_700_000_000_000_000_000),
+        volatility_window=volatility_window,
+    )
+    strategy.record_tick = lambda mid: BaseStrategy.record_tick(strategy, mid)
+    return strategy
+
+
+def update_price_history(strategy, price):
+    MarketMakingStrategy._update_price_history(strategy, Decimal(str(price)))
+
+
+def test_strategy_price_history():
+    """测试策略写入价格历史：中间价与时间戳进入 TickStore，超过容量后定长"""
+    strategy = make_strategy(capacity=16)
+    update_price_history(strategy, 0.60)
+
+    assert strategy.tick_store.last('mid') == 0.60
+    assert strategy.tick_store.last('ts') == 1_700_000_000_000_000_000
+
+    for _ in range(50):
+        update_price_history(strategy, 0.50)
+    assert len(strategy.tick_store) == 16
+
+
+def test_strategy_volatility_uses_window():
+    """测试波动率 = 最近 volatility_window 个中间价的 std / mean，更早的价格不参与"""
+    strategy = make_strategy(volatility_window=20)
+    for _ in range(9):
+        update_price_history(strategy, 0.90)
+    assert MarketMakingStrategy._calculate_volatility(strategy) == Decimal("0")  # 不足 10 个
+
+    mids = [0.50 + 0.01 * (i % 3) for i in range(20)]
+    for mid in mids:
+        update_price_history(strategy, mid)
+
+    volatility = MarketMakingStrategy._calculate_volatility(strategy)
+    assert float(volatility) == pytest.approx(np.std(mids) / np.mean(mids))
+
+
+# ========== 运行测试 ==========
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])